@@ -232,6 +232,58 @@ export class JobQueueService {
     }
   }
 
+  /**
+   * Create several jobs with a single bridge call (one bulk insert)
+   */
+  async createJobs(
+    jobs: Array<{
+      type: string;
+      payload: any;
+      assignedTo?: string;
+      sourceFile?: string;
+      sourceLine?: number;
+      tags?: string[];
+    }>
+  ): Promise<JobInfo[]> {
+    if (jobs.length === 0) {
+      return [];
+    }
+
+    const jobData = jobs.map(job => ({
+      type: job.type,
+      payload: job.payload,
+      agent: job.assignedTo,
+      sourceFile: job.sourceFile,
+      sourceLine: job.sourceLine,
+      tags: job.tags,
+    }));
+
+    try {
+      const result = await this.callBridge('create_jobs', JSON.stringify(jobData));
+      const created: JobInfo[] = result.jobs || [];
+      this.showThrottledNotice(`${created.length} jobs created`, 'jobs-created');
+      return created;
+    } catch (err) {
+      this.showThrottledNotice(`Failed to create jobs: ${err.message}`, 'job-create-error');
+      throw err;
+    }
+  }
+
+  /**
+   * Create research jobs for all questions in a note with one bridge call
+   */
+  async createResearchJobs(questions: string[], sourceFile?: string): Promise<JobInfo[]> {
+    return this.createJobs(
+      questions.map(question => ({
+        type: 'research',
+        payload: { question },
+        assignedTo: 'researcher',
+        sourceFile,
+        tags: ['research', 'daily-note'],
+      }))
+    );
+  }
+
   /**
    * Create a research job from a question
    */
@@ -186,6 +186,41 @@ describe('JobQueueService', () => {
     });
   });
 
+  describe('createResearchJobs', () => {
+    it('should create all research jobs with one bridge call', async () => {
+      setupSpawnMock({
+        jobs: [
+          { shortId: 'res00001', type: 'research', status: 'pending' },
+          { shortId: 'res00002', type: 'research', status: 'pending' },
+        ],
+      });
+
+      const result = await service.createResearchJobs(
+        ['What is AI?', 'What is ML?'],
+        'daily/2024-02-01.md'
+      );
+
+      expect(result).toHaveLength(2);
+      expect(result[1].shortId).toBe('res00002');
+      expect(spawn).toHaveBeenCalledTimes(1);
+
+      const calls = (spawn as jest.Mock).mock.calls;
+      expect(calls[0][1][1]).toBe('create_jobs');
+      const jsonArg = JSON.parse(calls[0][1][2]);
+      expect(jsonArg).toHaveLength(2);
+      expect(jsonArg[0].payload.question).toBe('What is AI?');
+      expect(jsonArg[1].agent).toBe('researcher');
+      expect(jsonArg[1].sourceFile).toBe('daily/2024-02-01.md');
+    });
+
+    it('should not call the bridge for an empty list', async () => {
+      const result = await service.createResearchJobs([]);
+
+      expect(result).toEqual([]);
+      expect(spawn).not.toHaveBeenCalled();
+    });
+  });
+
   describe('createMeetingExtractionJob', () => {
     it('should create meeting extraction job with correct payload', async () => {
       const meeting = {
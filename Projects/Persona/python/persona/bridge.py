@@ -16,7 +16,8 @@ try:
 except ImportError:
     pass  # Assume environment is pre-configured
 
-from persona.core.job_store import JobStore, JobStatus
+from persona.core.export import iter_export_records, write_jsonl
+from persona.core.job_store import JobStore, JobStatus, JobSummary, parse_timestamp
 
 
 # Singleton JobStore instance to avoid creating new connections per call
@@ -47,27 +48,29 @@ def reset_store() -> None:
     _store_instance = None
 
 
-def create_job(data: dict) -> dict:
+def _job_spec(data: dict) -> dict:
     """
-    Create a new job.
+    Convert TypeScript job data into JobStore.create_job arguments.
 
     Args:
         data: Job data from TypeScript
 
     Returns:
-        Created job info
+        Keyword arguments for create_job
     """
-    store = get_store()
+    return {
+        'job_type': data.get('type', 'unknown'),
+        'payload': data.get('payload', {}),
+        'assigned_to': data.get('agent'),
+        'source_file': data.get('sourceFile'),
+        'source_line': data.get('sourceLine'),
+        'tags': data.get('tags', []),
+        'priority': data.get('priority')
+    }
 
-    job = store.create_job(
-        job_type=data.get('type', 'unknown'),
-        payload=data.get('payload', {}),
-        assigned_to=data.get('agent'),
-        source_file=data.get('sourceFile'),
-        source_line=data.get('sourceLine'),
-        tags=data.get('tags', [])
-    )
 
+def _created_job_info(job) -> dict:
+    """Format a newly created job for TypeScript."""
     return {
         'id': job.id,
         'shortId': job.short_id,
@@ -77,6 +80,36 @@ def create_job(data: dict) -> dict:
     }
 
 
+def create_job(data: dict) -> dict:
+    """
+    Create a new job.
+
+    Args:
+        data: Job data from TypeScript
+
+    Returns:
+        Created job info
+    """
+    store = get_store()
+    job = store.create_job(**_job_spec(data))
+    return _created_job_info(job)
+
+
+def create_jobs(items: list) -> dict:
+    """
+    Create several jobs in a single bulk insert.
+
+    Args:
+        items: List of job data objects from TypeScript (same shape as create_job)
+
+    Returns:
+        Created job info, in the same order as items
+    """
+    store = get_store()
+    jobs = store.create_jobs([_job_spec(data) for data in items])
+    return {'jobs': [_created_job_info(job) for job in jobs]}
+
+
 def get_job_status(job_id: str) -> dict:
     """
     Get job status.
@@ -178,57 +211,61 @@ def get_completed_jobs(limit: int = 20) -> dict:
     store = get_store()
 
     # Get completed and failed jobs, ordered by completion time desc
-    result = store.client.table("jobs").select("*").in_(
-        "status", ["completed", "failed"]
-    ).order("completed_at", desc=True).limit(limit).execute()
+    jobs = store.get_finished_jobs(["completed", "failed"], limit=limit)
 
-    jobs = []
-    for row in result.data:
-        jobs.append({
-            'id': row['id'],
-            'shortId': row['short_id'],
-            'type': row['job_type'],
-            'status': row['status'],
-            'assignedTo': row.get('assigned_to'),
-            'pid': row.get('pid'),
-            'createdAt': row.get('created_at'),
-            'startedAt': row.get('started_at'),
-            'completedAt': row.get('completed_at'),
-            'error': row.get('error_message'),
-            'exitCode': row.get('exit_code')
-        })
+    return {'jobs': [_finished_job_info(job) for job in jobs]}
 
-    return {'jobs': jobs}
+
+def _finished_job_info(job: JobSummary) -> dict:
+    """Build the response dict for a completed or failed job."""
+    return {
+        'id': job.id,
+        'shortId': job.short_id,
+        'type': job.job_type,
+        'status': job.status.value,
+        'assignedTo': job.assigned_to,
+        'pid': job.pid,
+        'createdAt': job.created_at,
+        'startedAt': job.started_at,
+        'completedAt': job.completed_at,
+        'error': job.error_message,
+        'exitCode': job.exit_code
+    }
 
 
-def get_hung_jobs(threshold_minutes: int = 5) -> dict:
+def get_hung_jobs(threshold_minutes: int = None) -> dict:
     """
-    Get jobs that have been running longer than threshold.
+    Get running jobs that have not sent a heartbeat within the threshold.
+
+    Uses the same rule as the worker's reaper and `persona hung`, so a long
+    job that is still heartbeating is not reported.
 
     Args:
-        threshold_minutes: Minutes after which a job is considered hung
+        threshold_minutes: Minutes without a heartbeat after which a job is
+            considered hung (default: JOB_HUNG_TIMEOUT)
 
     Returns:
         List of hung jobs
     """
     store = get_store()
-    cutoff = datetime.now(timezone.utc) - timedelta(minutes=threshold_minutes)
-
-    result = store.client.table("jobs").select("*").eq(
-        "status", "running"
-    ).lt("started_at", cutoff.isoformat()).execute()
+    if threshold_minutes is None:
+        timeout = int(os.environ.get('JOB_HUNG_TIMEOUT', '300'))
+    else:
+        timeout = threshold_minutes * 60
 
     jobs = []
-    for row in result.data:
+    for job in store.get_hung_jobs(timeout):
         jobs.append({
-            'id': row['id'],
-            'shortId': row['short_id'],
-            'type': row['job_type'],
-            'status': row['status'],
-            'assignedTo': row.get('assigned_to'),
-            'pid': row.get('pid'),
-            'createdAt': row.get('created_at'),
-            'startedAt': row.get('started_at')
+            'id': job.id,
+            'shortId': job.short_id,
+            'type': job.job_type,
+            'status': job.status.value,
+            'assignedTo': job.assigned_to,
+            'pid': job.pid,
+            'workerId': job.worker_id,
+            'createdAt': job.created_at,
+            'startedAt': job.started_at,
+            'lastHeartbeat': job.last_heartbeat
         })
 
     return {'jobs': jobs}
@@ -246,27 +283,9 @@ def get_failed_jobs(limit: int = 20) -> dict:
     """
     store = get_store()
 
-    result = store.client.table("jobs").select("*").eq(
-        "status", "failed"
-    ).order("completed_at", desc=True).limit(limit).execute()
+    jobs = store.get_finished_jobs(["failed"], limit=limit)
 
-    jobs = []
-    for row in result.data:
-        jobs.append({
-            'id': row['id'],
-            'shortId': row['short_id'],
-            'type': row['job_type'],
-            'status': row['status'],
-            'assignedTo': row.get('assigned_to'),
-            'pid': row.get('pid'),
-            'createdAt': row.get('created_at'),
-            'startedAt': row.get('started_at'),
-            'completedAt': row.get('completed_at'),
-            'error': row.get('error_message'),
-            'exitCode': row.get('exit_code')
-        })
-
-    return {'jobs': jobs}
+    return {'jobs': [_finished_job_info(job) for job in jobs]}
 
 
 def get_job_logs(job_id: str, limit: int = 50) -> dict:
@@ -416,10 +435,7 @@ def get_job_summary() -> dict:
 
     summary = {}
     for status in JobStatus:
-        result = store.client.table("jobs").select("id", count="exact").eq(
-            "status", status.value
-        ).execute()
-        summary[status.value] = result.count
+        summary[status.value] = store.count_jobs(status.value)
 
     return summary
 
@@ -481,11 +497,7 @@ def update_job_status(job_id: str, data: dict) -> dict:
     elif new_status == 'failed':
         store.fail_job(job_id, error or 'Unknown error')
     elif new_status == 'cancelled':
-        # Directly update status to cancelled
-        store.client.table("jobs").update({
-            "status": "cancelled",
-            "completed_at": datetime.now(timezone.utc).isoformat()
-        }).eq("short_id", job_id).execute()
+        store.cancel_job(job_id)
 
     return {'success': True, 'status': new_status}
 
@@ -577,13 +589,7 @@ def publish_event(event_type: str, job_id: str, data: dict, source: str = "pytho
 
     try:
         # Call the database function to publish the event
-        result = store.client.rpc('publish_event', {
-            'p_type': event_type,
-            'p_job_id': job_id,
-            'p_source': source,
-            'p_trace_id': trace_id,
-            'p_data': data
-        }).execute()
+        result = store.publish_event(event_type, job_id, source, trace_id, data)
 
         # Also update the jobs table based on event type (triggers Realtime)
         if event_type == 'job.started':
@@ -594,10 +600,7 @@ def publish_event(event_type: str, job_id: str, data: dict, source: str = "pytho
         elif event_type == 'job.failed':
             store.fail_job(job_id, error=data.get('error', 'Unknown error'))
         elif event_type == 'job.cancelled':
-            store.client.table("jobs").update({
-                "status": "cancelled",
-                "completed_at": datetime.now(timezone.utc).isoformat()
-            }).eq("short_id", job_id).execute()
+            store.cancel_job(job_id)
 
         return {
             'success': True,
@@ -605,7 +608,7 @@ def publish_event(event_type: str, job_id: str, data: dict, source: str = "pytho
             'job_id': job_id,
             'source': source,
             'trace_id': trace_id,
-            'db_result': result.data
+            'db_result': result
         }
 
     except Exception as e:
@@ -634,15 +637,12 @@ def read_events(qty: int = 10, visibility_timeout: int = 30) -> dict:
     store = get_store()
 
     try:
-        result = store.client.rpc('read_events', {
-            'p_qty': qty,
-            'p_visibility_timeout': visibility_timeout
-        }).execute()
+        events = store.read_events(qty, visibility_timeout)
 
         return {
             'success': True,
-            'events': result.data,
-            'count': len(result.data)
+            'events': events,
+            'count': len(events)
         }
 
     except Exception as e:
@@ -668,13 +668,11 @@ def delete_event(msg_id: int) -> dict:
     store = get_store()
 
     try:
-        result = store.client.rpc('delete_event', {
-            'p_msg_id': msg_id
-        }).execute()
+        deleted = store.delete_event(msg_id)
 
         return {
             'success': True,
-            'deleted': result.data
+            'deleted': deleted
         }
 
     except Exception as e:
@@ -699,19 +697,12 @@ def get_events(job_id: str = None, event_type: str = None, limit: int = 50) -> d
     store = get_store()
 
     try:
-        query = store.client.table("events").select("*").order("timestamp", desc=True).limit(limit)
-
-        if job_id:
-            query = query.eq("job_id", job_id)
-        if event_type:
-            query = query.eq("type", event_type)
-
-        result = query.execute()
+        events = store.get_events(job_id=job_id, event_type=event_type, limit=limit)
 
         return {
             'success': True,
-            'events': result.data,
-            'count': len(result.data)
+            'events': events,
+            'count': len(events)
         }
 
     except Exception as e:
@@ -735,21 +726,14 @@ def get_agent_daily_performance(agent: str = None, days: int = 7) -> dict:
     """
     store = get_store()
 
-    # Query jobs with both started_at and completed_at
-    query = store.client.table("jobs").select(
-        "assigned_to, started_at, completed_at, status"
-    ).not_.is_("completed_at", "null").not_.is_("started_at", "null")
-
-    if agent:
-        query = query.eq("assigned_to", agent)
-
-    # Filter to last N days
+    # Stream jobs with both started_at and completed_at in the last N days
     cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
-    result = query.gte("completed_at", cutoff).execute()
+    rows = store.iter_finished_job_timings(cutoff, assigned_to=agent)
 
-    # Aggregate by day and agent
+    # Aggregate by day and agent, keeping running totals rather than
+    # every duration so memory stays constant however many jobs there are
     daily_stats = {}
-    for row in result.data:
+    for row in rows:
         date = row['completed_at'][:10]  # YYYY-MM-DD
         agent_name = row['assigned_to'] or 'unassigned'
         key = f"{date}:{agent_name}"
@@ -761,7 +745,10 @@ def get_agent_daily_performance(agent: str = None, days: int = 7) -> dict:
                 'total': 0,
                 'successful': 0,
                 'failed': 0,
-                'durations': []
+                'timed': 0,
+                'durationSum': 0.0,
+                'durationMin': None,
+                'durationMax': None
             }
 
         daily_stats[key]['total'] += 1
@@ -771,43 +758,86 @@ def get_agent_daily_performance(agent: str = None, days: int = 7) -> dict:
             daily_stats[key]['failed'] += 1
 
         # Calculate duration
-        try:
-            started = datetime.fromisoformat(row['started_at'].replace('Z', '+00:00'))
-            completed = datetime.fromisoformat(row['completed_at'].replace('Z', '+00:00'))
-            duration = (completed - started).total_seconds()
-            daily_stats[key]['durations'].append(duration)
-        except (ValueError, TypeError):
-            pass  # Skip if timestamps can't be parsed
+        started = parse_timestamp(row['started_at'])
+        completed = parse_timestamp(row['completed_at'])
+        if started is None or completed is None:
+            continue  # Skip if timestamps can't be parsed
+        duration = (completed - started).total_seconds()
+
+        stats = daily_stats[key]
+        stats['timed'] += 1
+        stats['durationSum'] += duration
+        if stats['durationMin'] is None or duration < stats['durationMin']:
+            stats['durationMin'] = duration
+        if stats['durationMax'] is None or duration > stats['durationMax']:
+            stats['durationMax'] = duration
 
     # Calculate averages
     metrics = []
     for key, stats in daily_stats.items():
-        durations = stats['durations']
+        timed = stats['timed']
         metrics.append({
             'date': stats['date'],
             'agent': stats['agent'],
             'jobsCompleted': stats['total'],
             'successful': stats['successful'],
             'failed': stats['failed'],
-            'avgDurationSeconds': sum(durations) / len(durations) if durations else 0,
-            'minDurationSeconds': min(durations) if durations else 0,
-            'maxDurationSeconds': max(durations) if durations else 0
+            'avgDurationSeconds': stats['durationSum'] / timed if timed else 0,
+            'minDurationSeconds': stats['durationMin'] if timed else 0,
+            'maxDurationSeconds': stats['durationMax'] if timed else 0
         })
 
     return {'metrics': sorted(metrics, key=lambda x: (x['date'], x['agent']), reverse=True)}
 
 
+def export_history(kind: str, output_path: str, filters: dict = None) -> dict:
+    """
+    Stream job, log or event history to a JSON Lines file.
+
+    Records are paged from the store and written as they arrive, so memory
+    use does not grow with the size of the history.
+
+    Args:
+        kind: 'jobs', 'logs' or 'events'
+        output_path: File to write
+        filters: Optional filters (status, agent, type, job_id, event_type, since)
+
+    Returns:
+        Output path and number of records written
+    """
+    store = get_store()
+    filters = filters or {}
+
+    records = iter_export_records(
+        store,
+        kind,
+        status=filters.get('status'),
+        agent=filters.get('agent'),
+        job_type=filters.get('type'),
+        job_id=filters.get('job_id'),
+        event_type=filters.get('event_type'),
+        since=filters.get('since')
+    )
+
+    with open(output_path, 'w') as f:
+        count = write_jsonl(records, f)
+
+    return {'success': True, 'path': output_path, 'count': count}
+
+
 def main():
     """
     Bridge script entry point.
 
     Usage:
         python bridge.py create_job '{"type": "research", "payload": {...}}'
+        python bridge.py create_jobs '[{"type": "research", "payload": {...}}, ...]'
         python bridge.py get_job_status <job_id>
         python bridge.py get_pending_jobs [agent]
         python bridge.py get_running_jobs [agent]
         python bridge.py get_job_logs <job_id> [limit]
         python bridge.py get_job_summary
+        python bridge.py export_history <jobs|logs|events> <output_path> [filters_json]
     """
     if len(sys.argv) < 2:
         print(json.dumps({'error': 'No command provided'}))
@@ -825,6 +855,19 @@ def main():
             result = create_job(data)
             print(json.dumps(result))
 
+        elif command == 'create_jobs':
+            if len(sys.argv) < 3:
+                print(json.dumps({'error': 'No job data provided'}))
+                sys.exit(1)
+
+            items = json.loads(sys.argv[2])
+            if not isinstance(items, list):
+                print(json.dumps({'error': 'Job data must be a JSON array'}))
+                sys.exit(1)
+
+            result = create_jobs(items)
+            print(json.dumps(result))
+
         elif command == 'get_job_status':
             if len(sys.argv) < 3:
                 print(json.dumps({'error': 'No job ID provided'}))
@@ -864,7 +907,7 @@ def main():
             print(json.dumps(result))
 
         elif command == 'get_hung_jobs':
-            threshold = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+            threshold = int(sys.argv[2]) if len(sys.argv) > 2 else None
             result = get_hung_jobs(threshold)
             print(json.dumps(result))
 
@@ -967,6 +1010,16 @@ def main():
             result = get_events(job_id, event_type, limit)
             print(json.dumps(result))
 
+        elif command == 'export_history':
+            if len(sys.argv) < 4:
+                print(json.dumps({'error': 'Usage: export_history <jobs|logs|events> <output_path> [filters_json]'}))
+                sys.exit(1)
+            kind = sys.argv[2]
+            output_path = sys.argv[3]
+            filters = json.loads(sys.argv[4]) if len(sys.argv) > 4 else {}
+            result = export_history(kind, output_path, filters)
+            print(json.dumps(result))
+
         else:
             print(json.dumps({'error': f'Unknown command: {command}'}))
             sys.exit(1)
@@ -5,9 +5,10 @@ import click
 import os
 from pathlib import Path
 from tabulate import tabulate
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
+from persona.core.export import EXPORT_KINDS, iter_export_records, write_jsonl
 from persona.core.job_store import JobStore, JobStatus
 from persona.core.process_manager import ProcessManager
 
@@ -45,10 +46,7 @@ def status(ctx):
 
     for status_enum in JobStatus:
         try:
-            result = store.client.table("jobs").select("id", count="exact").eq(
-                "status", status_enum.value
-            ).execute()
-            count = result.count
+            count = store.count_jobs(status_enum.value)
             click.echo(f"  {status_enum.value:12s}: {count:4d}")
         except Exception as e:
             click.echo(f"  Error counting {status_enum.value}: {e}", err=True)
@@ -64,6 +62,10 @@ def jobs(ctx, status, agent, type, limit):
     """List jobs with optional filters"""
     store = ctx.obj['store']
 
+    if store.client is None:
+        click.echo("The job dashboard requires the Supabase backend", err=True)
+        return
+
     query = store.client.table("job_dashboard").select("*").limit(limit)
 
     if status:
@@ -219,13 +221,14 @@ def info(ctx, job_id):
 
 
 @cli.command()
-@click.option('--timeout', '-t', type=int, default=300, help='Heartbeat timeout in seconds')
+@click.option('--timeout', '-t', type=int, default=None, help='Heartbeat timeout in seconds (default: JOB_HUNG_TIMEOUT or 300)')
 @click.option('--kill', '-k', is_flag=True, help='Kill hung jobs')
 @click.pass_context
 def hung(ctx, timeout, kill):
     """Find and optionally kill hung jobs"""
     store = ctx.obj['store']
     pm = ctx.obj['pm']
+    timeout = timeout or int(os.environ.get('JOB_HUNG_TIMEOUT', '300'))
 
     hung_jobs = store.get_hung_jobs(timeout)
 
@@ -238,7 +241,7 @@ def hung(ctx, timeout, kill):
 
         if kill:
             if click.confirm(f"Kill {job.short_id}?"):
-                if pm.kill_job(job.id):
+                if pm.kill_job(job.id, hung_reason=f"No heartbeat for {timeout}s"):
                     click.echo(f"Killed {job.short_id}")
                 else:
                     click.echo(f"Failed to kill {job.short_id}", err=True)
@@ -298,14 +301,12 @@ def cleanup(ctx, days, dry_run):
 
     if dry_run:
         # Count jobs that would be deleted
-        result = store.client.table("jobs").select("id", count="exact").in_(
-            "status", ["completed", "cancelled"]
-        ).lt("created_at", f"now() - interval '{days} days'").execute()
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        count = store.count_jobs(["completed", "cancelled"], created_before=cutoff)
 
-        click.echo(f"Would delete {result.count} old jobs")
+        click.echo(f"Would delete {count} old jobs")
     else:
-        result = store.client.rpc("cleanup_old_jobs", {"days_to_keep": days}).execute()
-        deleted = result.data if result.data else 0
+        deleted = store.cleanup_old_jobs(days)
         click.echo(f"Deleted {deleted} old jobs")
 
 
@@ -315,8 +316,9 @@ def cleanup(ctx, days, dry_run):
 @click.option('--question', '-q', help='Research question')
 @click.option('--prompt', '-p', help='Custom prompt')
 @click.option('--file', '-f', type=click.Path(exists=True), help='Source file')
+@click.option('--priority', type=int, help='Queue priority, higher first (default: from job type)')
 @click.pass_context
-def create(ctx, type, agent, question, prompt, file):
+def create(ctx, type, agent, question, prompt, file, priority):
     """Create a new job"""
     store = ctx.obj['store']
 
@@ -330,7 +332,8 @@ def create(ctx, type, agent, question, prompt, file):
         job_type=type,
         payload=payload,
         assigned_to=agent,
-        source_file=file
+        source_file=file,
+        priority=priority
     )
 
     click.echo(f"Created job: {job.short_id}")
@@ -340,12 +343,49 @@ def create(ctx, type, agent, question, prompt, file):
         click.echo(f"Assigned to: {agent}")
 
 
+@cli.command()
+@click.argument('kind', type=click.Choice(EXPORT_KINDS))
+@click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True), help='Write to file instead of stdout')
+@click.option('--status', '-s', help='Job status filter (jobs)')
+@click.option('--agent', '-a', help='Assigned agent filter (jobs)')
+@click.option('--type', '-t', 'job_type', help='Job type filter (jobs)')
+@click.option('--job', '-j', 'job_id', help='Job ID filter (logs, events)')
+@click.option('--event-type', '-e', help='Event type filter (events)')
+@click.option('--since', help='Only records at or after this ISO timestamp')
+@click.pass_context
+def export(ctx, kind, output, status, agent, job_type, job_id, event_type, since):
+    """Stream job, log or event history as JSON Lines"""
+    store = ctx.obj['store']
+
+    records = iter_export_records(
+        store,
+        kind,
+        status=status,
+        agent=agent,
+        job_type=job_type,
+        job_id=job_id,
+        event_type=event_type,
+        since=since
+    )
+
+    if output:
+        with open(output, 'w') as f:
+            count = write_jsonl(records, f)
+        click.echo(f"Exported {count} {kind} to {output}", err=True)
+    else:
+        write_jsonl(records, click.get_text_stream('stdout'))
+
+
 @cli.command()
 @click.pass_context
 def agents(ctx):
     """List available agents"""
     store = ctx.obj['store']
 
+    if store.client is None:
+        click.echo("The agent registry requires the Supabase backend", err=True)
+        return
+
     result = store.client.table("agents").select("*").eq("is_active", True).execute()
 
     if not result.data:
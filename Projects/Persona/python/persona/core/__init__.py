@@ -1,6 +1,8 @@
 """Core components for Persona job queue system."""
 
-from .job_store import Job, JobStatus, JobStore
+from .job_store import Job, JobStatus, JobStore, JobSummary
+from .async_job_store import AsyncJobStore
+from .heartbeat import HeartbeatService
 from .process_manager import ProcessManager
 from .note_state import NoteStateStore
 
@@ -8,6 +10,9 @@ __all__ = [
     "Job",
     "JobStatus",
     "JobStore",
+    "JobSummary",
+    "AsyncJobStore",
+    "HeartbeatService",
     "ProcessManager",
     "NoteStateStore",
 ]
@@ -0,0 +1,903 @@
+"""Asyncio job store with the same surface as JobStore."""
+
+import asyncio
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+from .backends import AsyncSupabaseBackend, Filter, SqliteBackend, ThreadedBackend
+from .job_types import JobTypeRegistry, default_registry
+from .scheduling import SchedulingPolicy, default_policy
+from .job_store import (
+    DEFAULT_PAGE_SIZE,
+    Job,
+    JobStatus,
+    JobSummary,
+    UpdateConflictError,
+    _IdCache,
+    _JobStoreBase,
+    _JOB_SUMMARY_SELECT,
+    _is_uuid,
+)
+
+
+class AsyncJobStore(_JobStoreBase):
+    """
+    Asyncio counterpart of JobStore.
+
+    Every JobStore method is available as a coroutine with the same
+    arguments and return types (iter_* methods are async generators).
+    Calls never block the event loop, so hundreds of store operations can
+    be in flight at once, e.g. with asyncio.gather.
+
+    Use `await AsyncJobStore.connect()` to build the backend selected by
+    PERSONA_BACKEND; the async Supabase client cannot be created outside a
+    running event loop.
+    """
+
+    def __init__(
+        self,
+        backend,
+        id_cache_size: int = 1024,
+        job_types: JobTypeRegistry = None,
+        scheduling: SchedulingPolicy = None
+    ):
+        """
+        Initialize AsyncJobStore.
+
+        Args:
+            backend: Async backend (AsyncSupabaseBackend or ThreadedBackend)
+            id_cache_size: Maximum number of short_id -> UUID mappings to cache
+            job_types: Registry used to validate new jobs (default: default_registry())
+            scheduling: Weights and aging used when claiming (default: default_policy())
+        """
+        self.backend = backend
+        # Raw async Supabase client for Supabase-only features (None for SQLite)
+        self.client = getattr(backend, "client", None)
+        self.hostname = os.uname().nodename
+        self.job_types = job_types or default_registry()
+        self.scheduling = scheduling or default_policy()
+        self._id_cache = _IdCache(id_cache_size)
+
+    @classmethod
+    async def connect(
+        cls,
+        supabase_url: str = None,
+        supabase_key: str = None,
+        id_cache_size: int = 1024,
+        max_concurrency: int = None
+    ) -> "AsyncJobStore":
+        """
+        Build a store on the backend selected by PERSONA_BACKEND.
+
+        Args:
+            supabase_url: Supabase project URL (defaults to SUPABASE_URL env var)
+            supabase_key: Supabase service role key (defaults to SUPABASE_KEY env var)
+            id_cache_size: Maximum number of short_id -> UUID mappings to cache
+            max_concurrency: Maximum backend requests in flight (defaults to
+                PERSONA_ASYNC_MAX_CONCURRENCY, or 100)
+
+        Returns:
+            Connected AsyncJobStore
+
+        Raises:
+            ValueError: If the backend is unknown or Supabase credentials are missing
+        """
+        if max_concurrency is None:
+            max_concurrency = int(os.environ.get("PERSONA_ASYNC_MAX_CONCURRENCY", "100"))
+
+        kind = os.environ.get("PERSONA_BACKEND", "supabase").lower()
+
+        if kind == "sqlite":
+            path = os.environ.get(
+                "PERSONA_SQLITE_PATH",
+                os.path.expanduser("~/.persona/persona.db")
+            )
+            return cls(ThreadedBackend(SqliteBackend(path)), id_cache_size)
+
+        if kind != "supabase":
+            raise ValueError(f"Unknown PERSONA_BACKEND: {kind}")
+
+        url = supabase_url or os.environ.get("SUPABASE_URL")
+        key = supabase_key or os.environ.get("SUPABASE_KEY")
+
+        if not url or not key:
+            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set")
+
+        # Imported here so persona.core works with supabase releases that
+        # predate the async client
+        from supabase import acreate_client
+
+        client = await acreate_client(url, key)
+        return cls(AsyncSupabaseBackend(client, max_concurrency), id_cache_size)
+
+    async def aclose(self) -> None:
+        """Release the backend's connections."""
+        await self.backend.aclose()
+
+    async def __aenter__(self) -> "AsyncJobStore":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def create_job(
+        self,
+        job_type: str,
+        payload: dict,
+        assigned_to: str = None,
+        parent_id: str = None,
+        delegated_by: str = None,
+        source_file: str = None,
+        source_line: int = None,
+        tags: list[str] = None,
+        priority: int = None
+    ) -> Job:
+        """
+        Create a new job in the queue.
+
+        Args:
+            job_type: Type of job (e.g., 'research', 'meeting_extract', 'delegate')
+            payload: Job-specific data (questions, context, etc.)
+            assigned_to: Agent ID to assign this job to
+            parent_id: Parent job ID if this is a delegated subtask
+            delegated_by: Agent that created this job
+            source_file: Source file that triggered this job
+            source_line: Line number in source file
+            tags: Tags for categorization
+            priority: Queue priority within the agent, higher first
+                (default: the job type's priority)
+
+        Returns:
+            Created Job object
+
+        Raises:
+            InvalidJobError: If the payload does not match the job type's schema
+        """
+        data = self._build_job_row(
+            job_type,
+            payload,
+            assigned_to=assigned_to,
+            parent_id=parent_id,
+            delegated_by=delegated_by,
+            source_file=source_file,
+            source_line=source_line,
+            tags=tags,
+            priority=priority
+        )
+
+        return self._row_to_job(await self.backend.insert_job(data))
+
+    async def create_jobs(self, specs: list[dict], chunk_size: int = 500) -> list[Job]:
+        """
+        Create many jobs, inserting chunks concurrently.
+
+        Args:
+            specs: Job specs (job_type, payload, assigned_to, parent_id, ...)
+            chunk_size: Maximum number of rows per insert request
+
+        Returns:
+            Created Job objects, in the same order as specs
+        """
+        rows = []
+        for spec in specs:
+            row = self._build_job_row(**spec)
+            row["id"] = str(uuid.uuid4())
+            rows.append(row)
+
+        chunks = [rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size)]
+        results = await asyncio.gather(*(self.backend.insert_jobs(chunk) for chunk in chunks))
+
+        created = {r["id"]: r for result in results for r in result}
+        return [self._row_to_job(created[row["id"]]) for row in rows]
+
+    async def get_job(self, job_id: str) -> Optional[Job]:
+        """
+        Get a job by ID or short_id.
+
+        Args:
+            job_id: Full UUID or 8-character short ID
+
+        Returns:
+            Job object if found, None otherwise
+        """
+        column = "id" if _is_uuid(job_id) else "short_id"
+        rows = await self.backend.select_jobs([(column, "eq", job_id)])
+
+        if rows:
+            return self._row_to_job(rows[0])
+        return None
+
+    async def resolve_id(self, job_id: str) -> Optional[str]:
+        """
+        Resolve a job ID or short_id to the job's UUID.
+
+        Args:
+            job_id: Full UUID or 8-character short ID
+
+        Returns:
+            Job UUID, or None if no job has this short_id
+        """
+        if _is_uuid(job_id):
+            return job_id
+
+        job_uuid = self._id_cache.get(job_id)
+        if job_uuid:
+            return job_uuid
+
+        rows = await self.backend.select_jobs([("short_id", "eq", job_id)], columns="id, short_id")
+        if not rows:
+            return None
+
+        job_uuid = rows[0]["id"]
+        self._id_cache.put(job_id, job_uuid)
+        return job_uuid
+
+    async def update_job(
+        self,
+        job_id: str,
+        max_retries: int = 3,
+        expected_version: int = None,
+        **updates
+    ) -> Job:
+        """
+        Update job fields with a single transition_job round trip.
+
+        Same semantics as JobStore.update_job; conflict backoff uses
+        asyncio.sleep so other tasks keep running.
+
+        Args:
+            job_id: Job ID (full UUID or short ID)
+            max_retries: Maximum number of attempts on version conflict
+            expected_version: Only apply if the job is still at this version
+            **updates: Fields to update
+
+        Returns:
+            Updated Job object
+
+        Raises:
+            ValueError: If job not found
+            UpdateConflictError: If update conflicts persist after retries
+        """
+        if 'status' in updates and isinstance(updates['status'], JobStatus):
+            updates['status'] = updates['status'].value
+
+        job_uuid = await self.resolve_id(job_id)
+        if not job_uuid:
+            raise ValueError(f"Job {job_id} not found")
+
+        for attempt in range(max_retries):
+            row = await self.backend.transition_job(job_uuid, expected_version, updates)
+
+            if row:
+                return self._row_to_job(row)
+
+            if expected_version is None:
+                raise ValueError(f"Job {job_id} not found")
+
+            current = await self.get_job(job_uuid)
+            if not current:
+                raise ValueError(f"Job {job_id} not found")
+
+            if attempt < max_retries - 1:
+                await asyncio.sleep(0.1 * (attempt + 1))
+                expected_version = current.version
+
+        raise UpdateConflictError(
+            f"Update conflict: Job {job_id} was modified by another process after {max_retries} retries"
+        )
+
+    async def start_job(self, job_id: str, pid: int) -> Job:
+        """
+        Mark a job as started with its PID.
+
+        Args:
+            job_id: Job ID
+            pid: Process ID of the running agent
+
+        Returns:
+            Updated Job object
+        """
+        return await self.update_job(job_id, **self._start_patch(pid))
+
+    async def heartbeat(self, job_id: str) -> None:
+        """
+        Update heartbeat timestamp to indicate job is still alive.
+
+        Args:
+            job_id: Job ID
+        """
+        job_uuid = await self.resolve_id(job_id)
+        if job_uuid:
+            await self.backend.update_jobs([("id", "eq", job_uuid)], self._heartbeat_values())
+
+    async def heartbeat_many(self, job_ids: list[str]) -> None:
+        """
+        Update the heartbeat timestamp for several jobs in one request.
+
+        Args:
+            job_ids: Full job UUIDs
+        """
+        if not job_ids:
+            return
+
+        await self.backend.update_jobs([("id", "in", list(job_ids))], self._heartbeat_values())
+
+    async def complete_job(self, job_id: str, result: dict = None, expected_version: int = None) -> Optional[Job]:
+        """
+        Mark a job as completed.
+
+        Args:
+            job_id: Job ID
+            result: Optional result data to store
+            expected_version: Version the caller last read; if given, only
+                complete the job while it is still running (see _finish_running)
+
+        Returns:
+            Updated Job object, or None if the job's outcome was already recorded
+        """
+        return await self._finish_running(job_id, expected_version, self._complete_patch(result))
+
+    async def fail_job(
+        self,
+        job_id: str,
+        error: str,
+        exit_code: int = 1,
+        result: dict = None,
+        expected_version: int = None
+    ) -> Optional[Job]:
+        """
+        Mark a job as failed.
+
+        Args:
+            job_id: Job ID
+            error: Error message
+            exit_code: Exit code (default 1)
+            result: Optional result data to store (existing result kept if None)
+            expected_version: Version the caller last read; if given, only
+                fail the job while it is still running (see _finish_running)
+
+        Returns:
+            Updated Job object, or None if the job's outcome was already recorded
+        """
+        return await self._finish_running(job_id, expected_version, self._fail_patch(error, exit_code, result))
+
+    async def cancel_job(self, job_id: str, expected_version: int = None) -> Optional[Job]:
+        """
+        Cancel a job.
+
+        Args:
+            job_id: Job ID
+            expected_version: Version the caller last read; if given, only
+                cancel the job while it is still running (see _finish_running)
+
+        Returns:
+            Updated Job object, or None if the job's outcome was already recorded
+        """
+        return await self._finish_running(job_id, expected_version, self._cancel_patch())
+
+    async def _finish_running(self, job_id: str, expected_version: Optional[int], patch: dict) -> Optional[Job]:
+        """
+        Apply a terminal patch, as a compare-and-set when a version is given.
+
+        A conflict means the job changed after the caller read it. If it is
+        no longer running, another process (kill_job, the reaper, a cancel)
+        already recorded its outcome and that outcome is kept. If it is
+        still running, the change was something else, such as a progress
+        update, and the patch is retried against the current version.
+
+        Args:
+            job_id: Job ID
+            expected_version: Version the caller last read, or None to apply
+                the patch unconditionally
+            patch: Terminal status patch
+
+        Returns:
+            Updated Job object, or None if the outcome was already recorded
+
+        Raises:
+            UpdateConflictError: If the running job keeps changing
+        """
+        if expected_version is None:
+            return await self.update_job(job_id, **patch)
+
+        for _ in range(3):
+            try:
+                return await self.update_job(job_id, max_retries=1, expected_version=expected_version, **patch)
+            except UpdateConflictError:
+                current = await self.get_job(job_id)
+                if not current or current.status != JobStatus.RUNNING:
+                    return None
+                expected_version = current.version
+
+        raise UpdateConflictError(f"Update conflict: running job {job_id} kept changing")
+
+    async def requeue_job(self, job_id: str) -> Optional[Job]:
+        """
+        Put a running job back in the queue so another worker can claim it.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            Updated Job object, or None if the job is no longer running
+        """
+        job = await self.get_job(job_id)
+        if not job or job.status != JobStatus.RUNNING:
+            return None
+        try:
+            return await self.update_job(
+                job.id, max_retries=1, expected_version=job.version, **self._requeue_patch()
+            )
+        except UpdateConflictError:
+            return None
+
+    async def mark_hung(self, job_id: str, reason: str) -> Optional[Job]:
+        """
+        Mark a running job as hung.
+
+        Args:
+            job_id: Job ID
+            reason: Stored as the job's error message
+
+        Returns:
+            Updated Job object, or None if the job is no longer running
+        """
+        job = await self.get_job(job_id)
+        if not job or job.status != JobStatus.RUNNING:
+            return None
+        try:
+            return await self.update_job(
+                job.id, max_retries=1, expected_version=job.version, **self._hung_patch(reason)
+            )
+        except UpdateConflictError:
+            return None
+
+    async def cancel_all_pending(self, reason: str = "Batch cancelled") -> int:
+        """
+        Cancel all pending jobs in a single operation.
+
+        Args:
+            reason: Reason for cancellation
+
+        Returns:
+            Number of jobs cancelled
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        rows = await self.backend.update_jobs([("status", "eq", JobStatus.PENDING.value)], {
+            "status": JobStatus.CANCELLED.value,
+            "completed_at": now,
+            "error_message": reason
+        })
+
+        return len(rows)
+
+    async def log(self, job_id: str, level: str, message: str, metadata: dict = None):
+        """
+        Add a log entry for a job.
+
+        Args:
+            job_id: Job ID
+            level: Log level (debug, info, warn, error)
+            message: Log message
+            metadata: Optional metadata dict
+        """
+        job_uuid = await self.resolve_id(job_id)
+        if job_uuid:
+            await self.backend.insert_logs(self._log_rows(job_uuid, [message], level, metadata))
+
+    async def log_batch(self, job_id: str, messages: list[str], level: str = "info") -> None:
+        """
+        Insert multiple log entries at once for streaming logs.
+
+        Args:
+            job_id: Job ID (full UUID or short ID)
+            messages: List of log messages
+            level: Log level for all messages
+        """
+        if not messages:
+            return
+
+        job_uuid = await self.resolve_id(job_id)
+        if job_uuid:
+            await self.backend.insert_logs(self._log_rows(job_uuid, messages, level))
+
+    async def get_logs(self, job_id: str, limit: int = 100) -> list[dict]:
+        """
+        Get logs for a job.
+
+        Args:
+            job_id: Job ID
+            limit: Maximum number of log entries to return
+
+        Returns:
+            List of log entries
+        """
+        job_uuid = await self.resolve_id(job_id)
+        if not job_uuid:
+            return []
+
+        return await self.backend.select_logs(job_uuid, limit)
+
+    async def record_metrics(self, rows: list[dict]) -> None:
+        """
+        Insert downsampled resource usage rows in one request.
+
+        Args:
+            rows: Metric rows (see JobStore.record_metrics)
+        """
+        if rows:
+            await self.backend.insert_job_metrics(rows)
+
+    async def get_metrics(self, job_id: str, limit: int = 100) -> list[dict]:
+        """
+        Get resource usage rows for a job.
+
+        Args:
+            job_id: Job ID
+            limit: Maximum number of rows to return
+
+        Returns:
+            Metric rows, newest first
+        """
+        job_uuid = await self.resolve_id(job_id)
+        if not job_uuid:
+            return []
+
+        return await self.backend.select_job_metrics(job_uuid, limit)
+
+    async def get_pending_jobs(self, assigned_to: str = None, limit: int = 10) -> list[JobSummary]:
+        """
+        Get pending jobs, optionally filtered by agent.
+
+        Args:
+            assigned_to: Agent ID to filter by
+            limit: Maximum number of jobs to return
+
+        Returns:
+            List of pending job summaries
+        """
+        rows = await self.backend.select_jobs(
+            self._pending_filters(assigned_to), columns=_JOB_SUMMARY_SELECT, order="created_at", limit=limit
+        )
+        return [self._row_to_summary(r) for r in rows]
+
+    async def claim_jobs(
+        self,
+        worker_id: str,
+        assigned_to: str = None,
+        limit: int = 1,
+        exclude_types: list[str] = None
+    ) -> list[Job]:
+        """
+        Atomically claim pending jobs for a worker.
+
+        Args:
+            worker_id: Identifier of the claiming worker
+            assigned_to: Only claim jobs for this agent (None = any agent)
+            limit: Maximum number of jobs to claim
+            exclude_types: Job types to leave pending (e.g. classes at their limit)
+
+        Returns:
+            List of claimed jobs, now in running status
+        """
+        if limit <= 0:
+            return []
+
+        rows = await self.backend.claim_jobs(
+            worker_id, self.hostname, assigned_to, limit, exclude_types, self.scheduling
+        )
+        return [self._row_to_job(r) for r in rows]
+
+    async def get_running_jobs(
+        self,
+        assigned_to: str = None,
+        started_before: str = None,
+        worker_id: str = None
+    ) -> list[JobSummary]:
+        """
+        Get all currently running jobs.
+
+        Args:
+            assigned_to: Optional agent ID to filter by
+            started_before: Optional ISO timestamp; only jobs started earlier
+            worker_id: Optional worker to filter by
+
+        Returns:
+            List of running job summaries
+        """
+        filters = self._running_filters(assigned_to, started_before, worker_id)
+        rows = await self.backend.select_jobs(filters, columns=_JOB_SUMMARY_SELECT)
+        return [self._row_to_summary(r) for r in rows]
+
+    async def get_finished_jobs(self, statuses: list[str], limit: int = 20) -> list[JobSummary]:
+        """
+        Get recently finished jobs, newest completion first.
+
+        Args:
+            statuses: Terminal statuses to include (e.g. ['completed', 'failed'])
+            limit: Maximum number of jobs to return
+
+        Returns:
+            List of job summaries
+        """
+        rows = await self.backend.select_jobs(
+            self._status_filters(statuses), columns=_JOB_SUMMARY_SELECT,
+            order="completed_at", desc=True, limit=limit
+        )
+        return [self._row_to_summary(r) for r in rows]
+
+    async def count_jobs(self, status=None, created_before: str = None) -> int:
+        """
+        Count jobs, optionally by status and age.
+
+        Args:
+            status: Status value, or list of status values
+            created_before: Optional ISO timestamp; only jobs created earlier
+
+        Returns:
+            Number of matching jobs
+        """
+        return await self.backend.count_jobs(self._count_filters(status, created_before))
+
+    async def cleanup_old_jobs(self, days_to_keep: int = 30) -> int:
+        """
+        Delete completed and cancelled jobs older than days_to_keep.
+
+        Args:
+            days_to_keep: Keep jobs created within this many days
+
+        Returns:
+            Number of jobs deleted
+        """
+        return await self.backend.cleanup_old_jobs(days_to_keep)
+
+    async def iter_finished_job_timings(
+        self,
+        since: str,
+        assigned_to: str = None,
+        page_size: int = DEFAULT_PAGE_SIZE
+    ) -> AsyncIterator[dict]:
+        """
+        Stream start/finish timestamps of jobs that finished since a point in time.
+
+        Args:
+            since: ISO timestamp; only jobs completed at or after it
+            assigned_to: Optional agent ID to filter by
+            page_size: Rows fetched per request
+
+        Yields:
+            Dicts with assigned_to, started_at, completed_at, status
+        """
+        async for row in self._iter_pages(
+            "jobs",
+            self._timing_filters(since, assigned_to),
+            ("created_at", "id"),
+            columns="id, created_at, assigned_to, started_at, completed_at, status",
+            page_size=page_size
+        ):
+            yield row
+
+    async def iter_jobs(
+        self,
+        filters: list[Filter] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        summary: bool = False
+    ) -> AsyncIterator:
+        """
+        Stream jobs oldest first using keyset pagination on (created_at, id).
+
+        Args:
+            filters: (column, op, value) filters, e.g. [("status", "eq", "failed")]
+            page_size: Rows fetched per request
+            summary: Yield JobSummary projections instead of full Job rows
+
+        Yields:
+            Job (or JobSummary) objects
+        """
+        columns = _JOB_SUMMARY_SELECT if summary else "*"
+        convert = self._row_to_summary if summary else self._row_to_job
+
+        async for row in self._iter_pages("jobs", filters, ("created_at", "id"), columns, page_size):
+            yield convert(row)
+
+    async def iter_logs(
+        self,
+        job_id: str = None,
+        since: str = None,
+        page_size: int = DEFAULT_PAGE_SIZE
+    ) -> AsyncIterator[dict]:
+        """
+        Stream log entries oldest first using keyset pagination on (timestamp, id).
+
+        Args:
+            job_id: Optional job ID or short ID to restrict to
+            since: Optional ISO timestamp; only entries at or after it
+            page_size: Rows fetched per request
+
+        Yields:
+            Log entry dicts
+        """
+        filters = []
+        if job_id:
+            job_uuid = await self.resolve_id(job_id)
+            if not job_uuid:
+                return
+            filters.append(("job_id", "eq", job_uuid))
+        if since:
+            filters.append(("timestamp", "gte", since))
+
+        async for row in self._iter_pages("job_logs", filters, ("timestamp", "id"), page_size=page_size):
+            yield row
+
+    async def iter_events(
+        self,
+        job_id: str = None,
+        event_type: str = None,
+        since: str = None,
+        page_size: int = DEFAULT_PAGE_SIZE
+    ) -> AsyncIterator[dict]:
+        """
+        Stream audit events oldest first using keyset pagination on (timestamp, id).
+
+        Args:
+            job_id: Optional job ID filter
+            event_type: Optional event type filter
+            since: Optional ISO timestamp; only events at or after it
+            page_size: Rows fetched per request
+
+        Yields:
+            Event dicts
+        """
+        filters = self._event_filters(job_id, event_type, since)
+        async for row in self._iter_pages("events", filters, ("timestamp", "id"), page_size=page_size):
+            yield row
+
+    async def _iter_pages(
+        self,
+        table: str,
+        filters: list[Filter],
+        order: tuple[str, ...],
+        columns: str = "*",
+        page_size: int = DEFAULT_PAGE_SIZE
+    ) -> AsyncIterator[dict]:
+        """Yield rows page by page, resuming each page after the previous page's last key."""
+        if page_size <= 0:
+            raise ValueError("page_size must be positive")
+
+        after = None
+        while True:
+            rows = await self.backend.select_page(
+                table, filters, order, after=after, columns=columns, limit=page_size
+            )
+            for row in rows:
+                yield row
+
+            if len(rows) < page_size:
+                return
+            after = tuple(rows[-1][column] for column in order)
+
+    async def get_hung_jobs(self, timeout_seconds: int = 300) -> list[Job]:
+        """
+        Get jobs that haven't sent a heartbeat recently.
+
+        Args:
+            timeout_seconds: Heartbeat timeout in seconds (default 300 = 5 minutes)
+
+        Returns:
+            List of hung jobs
+        """
+        rows = await self.backend.detect_hung_jobs(timeout_seconds)
+        return [self._row_to_job(r) for r in rows]
+
+    async def get_job_tree(self, job_id: str) -> list[Job]:
+        """
+        Get a job and all its children (delegation chain).
+
+        Args:
+            job_id: Root job ID
+
+        Returns:
+            List of jobs in the tree
+        """
+        job_uuid = await self.resolve_id(job_id)
+        if not job_uuid:
+            return []
+
+        rows = await self.backend.get_job_tree(job_uuid)
+        return [self._row_to_job(r) for r in rows]
+
+    async def get_jobs_by_type(self, job_type: str, limit: int = 50) -> list[Job]:
+        """
+        Get jobs by type.
+
+        Args:
+            job_type: Job type to filter by
+            limit: Maximum number of jobs to return
+
+        Returns:
+            List of jobs
+        """
+        rows = await self.backend.select_jobs(
+            [("job_type", "eq", job_type)], order="created_at", desc=True, limit=limit
+        )
+        return [self._row_to_job(r) for r in rows]
+
+    async def get_jobs_by_source(self, source_file: str, limit: int = 50) -> list[Job]:
+        """
+        Get jobs by source file.
+
+        Args:
+            source_file: Source file path
+            limit: Maximum number of jobs to return
+
+        Returns:
+            List of jobs
+        """
+        rows = await self.backend.select_jobs(
+            [("source_file", "eq", source_file)], order="created_at", desc=True, limit=limit
+        )
+        return [self._row_to_job(r) for r in rows]
+
+    async def publish_event(
+        self,
+        event_type: str,
+        job_id: str,
+        source: str = "python",
+        trace_id: str = "",
+        data: dict = None
+    ) -> dict:
+        """
+        Publish a job lifecycle event to the event queue and audit table.
+
+        Args:
+            event_type: Event type (e.g. 'job.started')
+            job_id: Job ID or short ID the event refers to
+            source: Event source ('typescript', 'python', 'bash', 'claude')
+            trace_id: Optional trace ID for correlating events
+            data: Event-specific data
+
+        Returns:
+            Backend result (msg_id and event)
+        """
+        return await self.backend.publish_event(event_type, job_id, source, trace_id, data or {})
+
+    async def read_events(self, qty: int = 10, visibility_timeout: int = 30) -> list[dict]:
+        """
+        Read events from the job event queue.
+
+        Args:
+            qty: Maximum number of events to read
+            visibility_timeout: Seconds to hide read events from other consumers
+
+        Returns:
+            List of queue messages
+        """
+        return await self.backend.read_events(qty, visibility_timeout)
+
+    async def delete_event(self, msg_id: int) -> bool:
+        """
+        Delete a processed event from the queue.
+
+        Args:
+            msg_id: Message ID from read_events
+
+        Returns:
+            True if the message was deleted
+        """
+        return await self.backend.delete_event(msg_id)
+
+    async def get_events(self, job_id: str = None, event_type: str = None, limit: int = 50) -> list[dict]:
+        """
+        Query the events audit table, newest first.
+
+        Args:
+            job_id: Optional job ID filter
+            event_type: Optional event type filter
+            limit: Maximum events to return
+
+        Returns:
+            List of events
+        """
+        return await self.backend.select_events(self._event_filters(job_id, event_type), limit)
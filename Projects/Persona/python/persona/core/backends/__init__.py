@@ -0,0 +1,16 @@
+"""Storage backends for JobStore and NoteStateStore."""
+
+from .async_supabase_backend import AsyncSupabaseBackend
+from .base import Filter, StorageBackend
+from .sqlite_backend import SqliteBackend
+from .supabase_backend import SupabaseBackend
+from .threaded_backend import ThreadedBackend
+
+__all__ = [
+    "AsyncSupabaseBackend",
+    "Filter",
+    "StorageBackend",
+    "SqliteBackend",
+    "SupabaseBackend",
+    "ThreadedBackend",
+]
@@ -0,0 +1,240 @@
+"""Asynchronous Supabase (PostgREST) storage backend."""
+
+import asyncio
+from typing import Optional
+
+from ..scheduling import SchedulingPolicy
+from .base import Filter
+from .supabase_backend import SupabaseBackend, _quote
+
+
+class AsyncSupabaseBackend:
+    """
+    Storage backend on the async Supabase client.
+
+    Exposes the StorageBackend methods as coroutines with the same
+    signatures and row shapes. All requests share the client's single
+    PostgREST HTTP session, so concurrent calls reuse pooled keep-alive
+    connections; a semaphore caps how many are in flight at once.
+    """
+
+    def __init__(self, client, max_concurrency: int = 100):
+        """
+        Initialize AsyncSupabaseBackend.
+
+        Args:
+            client: supabase.AsyncClient instance
+            max_concurrency: Maximum requests in flight at once
+        """
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connections."""
+        await self.client.postgrest.aclose()
+
+    async def _execute(self, query):
+        async with self._slots:
+            return await query.execute()
+
+    async def select_page(
+        self,
+        table: str,
+        filters: list[Filter] = None,
+        order: tuple[str, ...] = ("created_at", "id"),
+        after: tuple = None,
+        columns: str = "*",
+        limit: int = 500
+    ) -> list[dict]:
+        query = self._apply_filters(self.client.table(table).select(columns), filters)
+
+        if after is not None:
+            if len(order) == 1:
+                query = query.gt(order[0], after[0])
+            elif len(order) == 2:
+                (a, b), (x, y) = order, after
+                query = query.or_(
+                    f"{a}.gt.{_quote(x)},and({a}.eq.{_quote(x)},{b}.gt.{_quote(y)})"
+                )
+            else:
+                raise ValueError("Keyset pagination supports one or two order columns")
+
+        for column in order:
+            query = query.order(column)
+        return (await self._execute(query.limit(limit))).data
+
+    # -------------------------------------------------------------------
+    # Jobs
+    # -------------------------------------------------------------------
+
+    async def insert_job(self, row: dict) -> dict:
+        result = await self._execute(self.client.table("jobs").insert(row))
+        return result.data[0]
+
+    async def insert_jobs(self, rows: list[dict]) -> list[dict]:
+        result = await self._execute(self.client.table("jobs").insert(rows))
+        return result.data
+
+    async def select_jobs(
+        self,
+        filters: list[Filter] = None,
+        columns: str = "*",
+        order: str = None,
+        desc: bool = False,
+        limit: int = None
+    ) -> list[dict]:
+        query = self._apply_filters(self.client.table("jobs").select(columns), filters)
+        if order:
+            query = query.order(order, desc=desc) if desc else query.order(order)
+        if limit is not None:
+            query = query.limit(limit)
+        return (await self._execute(query)).data
+
+    async def count_jobs(self, filters: list[Filter] = None) -> int:
+        query = self.client.table("jobs").select("id", count="exact")
+        result = await self._execute(self._apply_filters(query, filters))
+        return result.count or 0
+
+    async def update_jobs(self, filters: list[Filter], values: dict) -> list[dict]:
+        query = self._apply_filters(self.client.table("jobs").update(values), filters)
+        return (await self._execute(query)).data or []
+
+    async def transition_job(
+        self,
+        job_id: str,
+        expected_version: Optional[int],
+        patch: dict
+    ) -> Optional[dict]:
+        result = await self._execute(self.client.rpc("transition_job", {
+            "p_id": job_id,
+            "p_expected_version": expected_version,
+            "p_patch": patch
+        }))
+        return result.data[0] if result.data else None
+
+    async def claim_jobs(
+        self,
+        worker_id: str,
+        hostname: str,
+        agent: Optional[str],
+        limit: int,
+        exclude_types: Optional[list[str]] = None,
+        policy: Optional[SchedulingPolicy] = None
+    ) -> list[dict]:
+        params = {
+            "p_worker_id": worker_id,
+            "p_hostname": hostname,
+            "p_agent": agent,
+            "p_limit": limit
+        }
+        if exclude_types:
+            params["p_exclude_types"] = list(exclude_types)
+        if policy is not None:
+            params.update(policy.rpc_params())
+        result = await self._execute(self.client.rpc("claim_jobs", params))
+        return result.data
+
+    async def detect_hung_jobs(self, timeout_seconds: int) -> list[dict]:
+        result = await self._execute(
+            self.client.rpc("detect_hung_jobs", {"timeout_seconds": timeout_seconds})
+        )
+        return result.data
+
+    async def get_job_tree(self, job_id: str) -> list[dict]:
+        result = await self._execute(self.client.rpc("get_job_tree", {"job_uuid": job_id}))
+        return result.data
+
+    async def cleanup_old_jobs(self, days_to_keep: int) -> int:
+        result = await self._execute(
+            self.client.rpc("cleanup_old_jobs", {"days_to_keep": days_to_keep})
+        )
+        return result.data if result.data else 0
+
+    # -------------------------------------------------------------------
+    # Logs
+    # -------------------------------------------------------------------
+
+    async def insert_logs(self, rows: list[dict]) -> None:
+        await self._execute(self.client.table("job_logs").insert(rows))
+
+    async def select_logs(self, job_id: str, limit: int) -> list[dict]:
+        query = self.client.table("job_logs").select("*").eq(
+            "job_id", job_id
+        ).order("timestamp", desc=True).limit(limit)
+        return (await self._execute(query)).data
+
+    # -------------------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------------------
+
+    async def insert_job_metrics(self, rows: list[dict]) -> None:
+        await self._execute(self.client.table("job_metrics").insert(rows))
+
+    async def select_job_metrics(self, job_id: str, limit: int) -> list[dict]:
+        query = self.client.table("job_metrics").select("*").eq(
+            "job_id", job_id
+        ).order("sampled_at", desc=True).limit(limit)
+        return (await self._execute(query)).data
+
+    # -------------------------------------------------------------------
+    # Events
+    # -------------------------------------------------------------------
+
+    async def publish_event(
+        self,
+        event_type: str,
+        job_id: str,
+        source: str,
+        trace_id: str,
+        data: dict
+    ) -> dict:
+        result = await self._execute(self.client.rpc('publish_event', {
+            'p_type': event_type,
+            'p_job_id': job_id,
+            'p_source': source,
+            'p_trace_id': trace_id,
+            'p_data': data
+        }))
+        return result.data
+
+    async def read_events(self, qty: int, visibility_timeout: int) -> list[dict]:
+        result = await self._execute(self.client.rpc('read_events', {
+            'p_qty': qty,
+            'p_visibility_timeout': visibility_timeout
+        }))
+        return result.data
+
+    async def delete_event(self, msg_id: int) -> bool:
+        result = await self._execute(self.client.rpc('delete_event', {
+            'p_msg_id': msg_id
+        }))
+        return result.data
+
+    async def select_events(self, filters: list[Filter] = None, limit: int = 50) -> list[dict]:
+        query = self.client.table("events").select("*").order("timestamp", desc=True).limit(limit)
+        return (await self._execute(self._apply_filters(query, filters))).data
+
+    # -------------------------------------------------------------------
+    # Daily note state
+    # -------------------------------------------------------------------
+
+    async def get_note_state(self, note_path: str) -> Optional[dict]:
+        result = await self._execute(
+            self.client.table("daily_note_state").select("*").eq("note_path", note_path)
+        )
+        return result.data[0] if result.data else None
+
+    async def upsert_note_state(self, row: dict) -> None:
+        await self._execute(self.client.table("daily_note_state").upsert(row))
+
+    async def delete_note_state(self, note_path: str) -> None:
+        await self._execute(
+            self.client.table("daily_note_state").delete().eq("note_path", note_path)
+        )
+
+    # Query builders are synchronous on the async client too
+    _apply_filters = staticmethod(SupabaseBackend._apply_filters)
@@ -0,0 +1,189 @@
+"""Storage backend interface for JobStore and NoteStateStore."""
+
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+from ..scheduling import SchedulingPolicy
+
+# A filter is a (column, operator, value) tuple. Supported operators:
+#   eq, neq, lt, lte, gt, gte, in, is_null, not_null
+# Value is ignored for is_null / not_null.
+Filter = tuple[str, str, Any]
+
+FILTER_OPS = frozenset({"eq", "neq", "lt", "lte", "gt", "gte", "in", "is_null", "not_null"})
+
+
+class StorageBackend(ABC):
+    """
+    Persistence operations used by JobStore and NoteStateStore.
+
+    Rows are plain dicts shaped like the Supabase `jobs`, `job_logs`,
+    `events` and `daily_note_state` tables. JSON columns (payload, result,
+    metadata, data, parsed_data) and tags are returned decoded, except that
+    job payload, result and tags may be left as JSON text for Job to decode
+    lazily.
+    """
+
+    def close(self) -> None:
+        """Release any connections held by the backend."""
+
+    @abstractmethod
+    def select_page(
+        self,
+        table: str,
+        filters: list[Filter] = None,
+        order: tuple[str, ...] = ("created_at", "id"),
+        after: tuple = None,
+        columns: str = "*",
+        limit: int = 500
+    ) -> list[dict]:
+        """
+        Select one keyset page of rows, ascending by the order columns.
+
+        Rows start strictly after the `after` key (a tuple of values for the
+        order columns, typically taken from the last row of the previous
+        page), so paging stays cheap and stable however deep it goes.
+        """
+
+    # -------------------------------------------------------------------
+    # Jobs
+    # -------------------------------------------------------------------
+
+    @abstractmethod
+    def insert_job(self, row: dict) -> dict:
+        """Insert one job row and return it as stored."""
+
+    @abstractmethod
+    def insert_jobs(self, rows: list[dict]) -> list[dict]:
+        """Insert several job rows in one operation and return them as stored."""
+
+    @abstractmethod
+    def select_jobs(
+        self,
+        filters: list[Filter] = None,
+        columns: str = "*",
+        order: str = None,
+        desc: bool = False,
+        limit: int = None
+    ) -> list[dict]:
+        """Select job rows matching all filters."""
+
+    @abstractmethod
+    def count_jobs(self, filters: list[Filter] = None) -> int:
+        """Count job rows matching all filters."""
+
+    @abstractmethod
+    def update_jobs(self, filters: list[Filter], values: dict) -> list[dict]:
+        """Apply values to every job matching filters and return the updated rows."""
+
+    @abstractmethod
+    def transition_job(
+        self,
+        job_id: str,
+        expected_version: Optional[int],
+        patch: dict
+    ) -> Optional[dict]:
+        """
+        Apply patch to one job, optionally only if it is at expected_version.
+
+        Returns the updated row, or None if the job is missing or the
+        version did not match.
+        """
+
+    @abstractmethod
+    def claim_jobs(
+        self,
+        worker_id: str,
+        hostname: str,
+        agent: Optional[str],
+        limit: int,
+        exclude_types: Optional[list[str]] = None,
+        policy: Optional[SchedulingPolicy] = None
+    ) -> list[dict]:
+        """
+        Atomically move up to limit pending jobs to running for a worker.
+
+        Jobs of exclude_types are skipped. The rest are picked by weighted
+        fair queueing across agents, then priority and age within an agent
+        (see SchedulingPolicy); without a policy every weight is 1 and
+        priorities do not age.
+        """
+
+    @abstractmethod
+    def detect_hung_jobs(self, timeout_seconds: int) -> list[dict]:
+        """Return running jobs with no heartbeat within timeout_seconds."""
+
+    @abstractmethod
+    def get_job_tree(self, job_id: str) -> list[dict]:
+        """Return a job and all of its descendants."""
+
+    @abstractmethod
+    def cleanup_old_jobs(self, days_to_keep: int) -> int:
+        """Delete completed/cancelled jobs older than days_to_keep; return the count."""
+
+    # -------------------------------------------------------------------
+    # Logs
+    # -------------------------------------------------------------------
+
+    @abstractmethod
+    def insert_logs(self, rows: list[dict]) -> None:
+        """Insert job log rows."""
+
+    @abstractmethod
+    def select_logs(self, job_id: str, limit: int) -> list[dict]:
+        """Return the newest log rows for a job, newest first."""
+
+    # -------------------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------------------
+
+    @abstractmethod
+    def insert_job_metrics(self, rows: list[dict]) -> None:
+        """Insert downsampled resource usage rows."""
+
+    @abstractmethod
+    def select_job_metrics(self, job_id: str, limit: int) -> list[dict]:
+        """Return the newest resource usage rows for a job, newest first."""
+
+    # -------------------------------------------------------------------
+    # Events
+    # -------------------------------------------------------------------
+
+    @abstractmethod
+    def publish_event(
+        self,
+        event_type: str,
+        job_id: str,
+        source: str,
+        trace_id: str,
+        data: dict
+    ) -> dict:
+        """Enqueue an event and record it in the events audit table."""
+
+    @abstractmethod
+    def read_events(self, qty: int, visibility_timeout: int) -> list[dict]:
+        """Read queued events, hiding them for visibility_timeout seconds."""
+
+    @abstractmethod
+    def delete_event(self, msg_id: int) -> bool:
+        """Delete a queued event."""
+
+    @abstractmethod
+    def select_events(self, filters: list[Filter] = None, limit: int = 50) -> list[dict]:
+        """Select audit events matching filters, newest first."""
+
+    # -------------------------------------------------------------------
+    # Daily note state
+    # -------------------------------------------------------------------
+
+    @abstractmethod
+    def get_note_state(self, note_path: str) -> Optional[dict]:
+        """Return the stored state for a note, or None."""
+
+    @abstractmethod
+    def upsert_note_state(self, row: dict) -> None:
+        """Insert or replace the state row for a note."""
+
+    @abstractmethod
+    def delete_note_state(self, note_path: str) -> None:
+        """Delete the state row for a note."""
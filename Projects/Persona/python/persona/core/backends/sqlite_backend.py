@@ -0,0 +1,777 @@
+"""Local SQLite storage backend."""
+
+import json
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+from ..scheduling import SchedulingPolicy
+from .base import FILTER_OPS, Filter, StorageBackend
+
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version.
+# Mirrors the Supabase tables closely enough that rows look the same to
+# JobStore: UUID text ids, ISO-8601 UTC timestamps, JSON-encoded columns.
+_MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        short_id TEXT UNIQUE NOT NULL,
+        job_type TEXT NOT NULL,
+        payload TEXT NOT NULL DEFAULT '{}',
+        status TEXT NOT NULL DEFAULT 'pending'
+            CHECK (status IN ('pending', 'running', 'completed', 'failed', 'cancelled', 'hung')),
+        pid INTEGER,
+        hostname TEXT,
+        worker_id TEXT,
+        created_at TEXT NOT NULL,
+        started_at TEXT,
+        completed_at TEXT,
+        updated_at TEXT,
+        version INTEGER NOT NULL DEFAULT 0,
+        last_heartbeat TEXT,
+        exit_code INTEGER,
+        error_message TEXT,
+        result TEXT,
+        parent_job_id TEXT REFERENCES jobs(id) ON DELETE SET NULL,
+        delegated_by TEXT,
+        assigned_to TEXT,
+        source_file TEXT,
+        source_line INTEGER,
+        tags TEXT NOT NULL DEFAULT '[]'
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
+    CREATE INDEX IF NOT EXISTS idx_jobs_assigned_to ON jobs(assigned_to);
+    CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at);
+    CREATE INDEX IF NOT EXISTS idx_jobs_parent ON jobs(parent_job_id);
+    CREATE INDEX IF NOT EXISTS idx_jobs_worker_id ON jobs(worker_id);
+    CREATE INDEX IF NOT EXISTS idx_jobs_pending_created
+        ON jobs(assigned_to, created_at) WHERE status = 'pending';
+
+    CREATE TABLE IF NOT EXISTS job_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id TEXT REFERENCES jobs(id) ON DELETE CASCADE,
+        timestamp TEXT NOT NULL,
+        level TEXT NOT NULL CHECK (level IN ('debug', 'info', 'warn', 'error')),
+        message TEXT NOT NULL,
+        metadata TEXT DEFAULT '{}'
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_logs_job ON job_logs(job_id, timestamp);
+
+    -- Log inserts count as heartbeats (see 20261017000003_log_insert_heartbeat.sql)
+    CREATE TRIGGER IF NOT EXISTS touch_job_heartbeat_from_logs
+    AFTER INSERT ON job_logs
+    BEGIN
+        UPDATE jobs SET last_heartbeat = NEW.timestamp
+        WHERE id = NEW.job_id AND status = 'running';
+    END;
+
+    CREATE TABLE IF NOT EXISTS events (
+        id TEXT PRIMARY KEY,
+        type TEXT NOT NULL,
+        job_id TEXT,
+        timestamp TEXT NOT NULL,
+        source TEXT NOT NULL,
+        trace_id TEXT,
+        data TEXT,
+        created_at TEXT NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_events_job_id ON events(job_id);
+    CREATE INDEX IF NOT EXISTS idx_events_type ON events(type);
+    CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp);
+
+    -- Stand-in for the pgmq job_events queue
+    CREATE TABLE IF NOT EXISTS event_queue (
+        msg_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        read_ct INTEGER NOT NULL DEFAULT 0,
+        enqueued_at TEXT NOT NULL,
+        vt TEXT NOT NULL,
+        message TEXT NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_event_queue_vt ON event_queue(vt);
+
+    CREATE TABLE IF NOT EXISTS daily_note_state (
+        note_path TEXT PRIMARY KEY,
+        content_hash TEXT NOT NULL,
+        last_scanned TEXT,
+        last_content TEXT,
+        parsed_data TEXT
+    );
+    """,
+    """
+    -- Downsampled resource usage (see 20261017000004_add_job_metrics.sql)
+    CREATE TABLE IF NOT EXISTS job_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id TEXT REFERENCES jobs(id) ON DELETE CASCADE,
+        sampled_at TEXT NOT NULL,
+        samples INTEGER NOT NULL DEFAULT 1,
+        cpu_percent REAL,
+        cpu_percent_max REAL,
+        rss_bytes INTEGER,
+        io_read_bytes INTEGER,
+        io_write_bytes INTEGER,
+        children INTEGER
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_job_metrics_job ON job_metrics(job_id, sampled_at);
+    """,
+    """
+    -- Queue priority (see 20261017000006_add_job_priority.sql)
+    ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0;
+    """,
+    """
+    -- Hung job sweeps (see 20261017000007_index_running_heartbeat.sql)
+    CREATE INDEX IF NOT EXISTS idx_jobs_running_heartbeat
+        ON jobs(last_heartbeat) WHERE status = 'running';
+    """,
+]
+
+# Columns per table, used to validate caller-supplied column names and to
+# know which values are stored JSON-encoded.
+_COLUMNS = {
+    "jobs": (
+        "id", "short_id", "job_type", "payload", "status", "pid", "hostname",
+        "worker_id", "created_at", "started_at", "completed_at", "updated_at",
+        "version", "last_heartbeat", "exit_code", "error_message", "result",
+        "parent_job_id", "delegated_by", "assigned_to", "source_file",
+        "source_line", "tags", "priority"
+    ),
+    "job_logs": ("id", "job_id", "timestamp", "level", "message", "metadata"),
+    "job_metrics": (
+        "id", "job_id", "sampled_at", "samples", "cpu_percent", "cpu_percent_max",
+        "rss_bytes", "io_read_bytes", "io_write_bytes", "children"
+    ),
+    "events": ("id", "type", "job_id", "timestamp", "source", "trace_id", "data", "created_at"),
+    "event_queue": ("msg_id", "read_ct", "enqueued_at", "vt", "message"),
+    "daily_note_state": ("note_path", "content_hash", "last_scanned", "last_content", "parsed_data"),
+}
+
+_JSON_COLUMNS = {
+    "jobs": {"payload", "result", "tags"},
+    "job_logs": {"metadata"},
+    "job_metrics": set(),
+    "events": {"data"},
+    "event_queue": {"message"},
+    "daily_note_state": {"parsed_data"},
+}
+
+# Returned as JSON text and decoded by Job on first access
+_LAZY_JSON_COLUMNS = {
+    "jobs": {"payload", "result", "tags"},
+}
+
+_SQL_OPS = {"eq": "=", "neq": "!=", "lt": "<", "lte": "<=", "gt": ">", "gte": ">="}
+
+# Columns transition_job may not touch
+_IMMUTABLE_JOB_COLUMNS = {"id", "short_id", "created_at", "version"}
+
+# Changes to these alone do not bump jobs.version (matches bump_job_version)
+_HEARTBEAT_COLUMNS = {"last_heartbeat", "updated_at"}
+
+
+def _now() -> str:
+    """Current UTC time as a sortable ISO-8601 string."""
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _ago(seconds: float) -> str:
+    """UTC time `seconds` ago, formatted like _now()."""
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds)).isoformat(timespec="microseconds")
+
+
+def _statements(script: str) -> Iterator[str]:
+    """Split a migration script into statements (executescript would commit first)."""
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            yield buffer
+            buffer = ""
+    if buffer.strip():
+        yield buffer
+
+
+class SqliteBackend(StorageBackend):
+    """
+    Storage backend backed by a local SQLite database in WAL mode.
+
+    Intended for single-host deployments, offline development and
+    benchmarks. Each thread gets its own connection; writes that must be
+    atomic (claim, transition, event reads) run in BEGIN IMMEDIATE
+    transactions so concurrent workers on the same file never see the same
+    job twice.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Initialize SqliteBackend.
+
+        Args:
+            path: Database file path, or ":memory:" for a private in-memory
+                database shared by this backend's threads
+        """
+        self.path = str(path)
+        self.client = None
+
+        if self.path == ":memory:":
+            # Named shared-cache database so every thread's connection sees
+            # the same data; it lives as long as _keeper stays open.
+            self._uri = f"file:persona-{uuid.uuid4().hex}?mode=memory&cache=shared"
+        else:
+            Path(self.path).expanduser().parent.mkdir(parents=True, exist_ok=True)
+            self._uri = Path(self.path).expanduser().resolve().as_uri()
+
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        self._keeper = self._conn()
+        self._migrate()
+
+    def close(self) -> None:
+        """Close every connection opened by this backend."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def select_page(
+        self,
+        table: str,
+        filters: list[Filter] = None,
+        order: tuple[str, ...] = ("created_at", "id"),
+        after: tuple = None,
+        columns: str = "*",
+        limit: int = 500
+    ) -> list[dict]:
+        if table not in _COLUMNS:
+            raise ValueError(f"Unknown table: {table}")
+        for column in order:
+            self._check_column(table, column)
+
+        cols = self._columns_sql(table, columns)
+        where, params = self._where(table, filters)
+        if after is not None:
+            keyset = f"({', '.join(order)}) > ({', '.join('?' * len(order))})"
+            where += f" AND {keyset}" if where else f" WHERE {keyset}"
+            params.extend(after)
+
+        sql = f"SELECT {cols} FROM {table}{where} ORDER BY {', '.join(order)} LIMIT ?"
+        return self._fetch(table, sql, [*params, limit])
+
+    # -------------------------------------------------------------------
+    # Jobs
+    # -------------------------------------------------------------------
+
+    def insert_job(self, row: dict) -> dict:
+        return self.insert_jobs([row])[0]
+
+    def insert_jobs(self, rows: list[dict]) -> list[dict]:
+        if not rows:
+            return []
+
+        now = _now()
+        prepared = [self._new_job_row(row, now) for row in rows]
+
+        with self._write() as conn:
+            for row in prepared:
+                self._insert(conn, "jobs", row)
+
+        return self._jobs_by_ids([row["id"] for row in prepared])
+
+    def select_jobs(
+        self,
+        filters: list[Filter] = None,
+        columns: str = "*",
+        order: str = None,
+        desc: bool = False,
+        limit: int = None
+    ) -> list[dict]:
+        cols = self._columns_sql("jobs", columns)
+        where, params = self._where("jobs", filters)
+        sql = f"SELECT {cols} FROM jobs{where}"
+        if order:
+            self._check_column("jobs", order)
+            sql += f" ORDER BY {order} {'DESC' if desc else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._fetch("jobs", sql, params)
+
+    def count_jobs(self, filters: list[Filter] = None) -> int:
+        where, params = self._where("jobs", filters)
+        return self._conn().execute(f"SELECT COUNT(*) FROM jobs{where}", params).fetchone()[0]
+
+    def update_jobs(self, filters: list[Filter], values: dict) -> list[dict]:
+        if not values:
+            return []
+
+        with self._write() as conn:
+            ids = self._matching_ids(conn, filters)
+            if ids:
+                self._update_ids(conn, ids, values)
+
+        return self._jobs_by_ids(ids)
+
+    def transition_job(
+        self,
+        job_id: str,
+        expected_version: Optional[int],
+        patch: dict
+    ) -> Optional[dict]:
+        for column in patch:
+            self._check_column("jobs", column)
+            if column in _IMMUTABLE_JOB_COLUMNS:
+                raise ValueError(f"Column {column} cannot be changed by a transition")
+
+        with self._write() as conn:
+            current = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if current is None:
+                return None
+            if expected_version is not None and current["version"] != expected_version:
+                return None
+
+            changed = {
+                k: v for k, v in patch.items()
+                if current[k] != self._encode("jobs", k, v)
+            }
+            if changed:
+                self._update_ids(conn, [job_id], changed)
+
+        return self._jobs_by_ids([job_id])[0]
+
+    def claim_jobs(
+        self,
+        worker_id: str,
+        hostname: str,
+        agent: Optional[str],
+        limit: int,
+        exclude_types: Optional[list[str]] = None,
+        policy: Optional[SchedulingPolicy] = None
+    ) -> list[dict]:
+        if limit <= 0:
+            return []
+
+        sql, params = self._claim_query(agent, limit, exclude_types, policy or SchedulingPolicy(aging_seconds=None))
+        with self._write() as conn:
+            ids = [r[0] for r in conn.execute(sql, params)]
+
+            if ids:
+                now = _now()
+                self._update_ids(conn, ids, {
+                    "status": "running",
+                    "worker_id": worker_id,
+                    "hostname": hostname,
+                    "started_at": now,
+                    "last_heartbeat": now
+                })
+
+        return self._jobs_by_ids(ids)
+
+    def detect_hung_jobs(self, timeout_seconds: int) -> list[dict]:
+        return self._fetch(
+            "jobs",
+            "SELECT * FROM jobs WHERE status = 'running' "
+            "AND (last_heartbeat IS NULL OR last_heartbeat < ?)",
+            [_ago(timeout_seconds)]
+        )
+
+    def get_job_tree(self, job_id: str) -> list[dict]:
+        return self._fetch(
+            "jobs",
+            """
+            WITH RECURSIVE job_tree(id) AS (
+                SELECT id FROM jobs WHERE id = ?
+                UNION ALL
+                SELECT j.id FROM jobs j JOIN job_tree jt ON j.parent_job_id = jt.id
+            )
+            SELECT jobs.* FROM jobs JOIN job_tree USING (id)
+            """,
+            [job_id]
+        )
+
+    def cleanup_old_jobs(self, days_to_keep: int) -> int:
+        with self._write() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'cancelled') AND created_at < ?",
+                (_ago(days_to_keep * 86400),)
+            )
+            return cursor.rowcount
+
+    # -------------------------------------------------------------------
+    # Logs
+    # -------------------------------------------------------------------
+
+    def insert_logs(self, rows: list[dict]) -> None:
+        if not rows:
+            return
+
+        now = _now()
+        with self._write() as conn:
+            for row in rows:
+                self._insert(conn, "job_logs", {"timestamp": now, "metadata": {}, **row})
+
+    def select_logs(self, job_id: str, limit: int) -> list[dict]:
+        return self._fetch(
+            "job_logs",
+            "SELECT * FROM job_logs WHERE job_id = ? ORDER BY timestamp DESC, id DESC LIMIT ?",
+            [job_id, limit]
+        )
+
+    # -------------------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------------------
+
+    def insert_job_metrics(self, rows: list[dict]) -> None:
+        if not rows:
+            return
+
+        now = _now()
+        with self._write() as conn:
+            for row in rows:
+                self._insert(conn, "job_metrics", {"sampled_at": now, **row})
+
+    def select_job_metrics(self, job_id: str, limit: int) -> list[dict]:
+        return self._fetch(
+            "job_metrics",
+            "SELECT * FROM job_metrics WHERE job_id = ? ORDER BY sampled_at DESC, id DESC LIMIT ?",
+            [job_id, limit]
+        )
+
+    # -------------------------------------------------------------------
+    # Events
+    # -------------------------------------------------------------------
+
+    def publish_event(
+        self,
+        event_type: str,
+        job_id: str,
+        source: str,
+        trace_id: str,
+        data: dict
+    ) -> dict:
+        now = _now()
+        event = {
+            "type": event_type,
+            "job_id": job_id,
+            "timestamp": now,
+            "source": source,
+            "trace_id": trace_id or "",
+            "data": data
+        }
+
+        with self._write() as conn:
+            msg_id = self._insert(conn, "event_queue", {
+                "enqueued_at": now,
+                "vt": now,
+                "message": event
+            })
+            self._insert(conn, "events", {
+                "id": str(uuid.uuid4()),
+                "type": event_type,
+                "job_id": job_id,
+                "timestamp": now,
+                "source": source,
+                "trace_id": trace_id,
+                "data": data,
+                "created_at": now
+            })
+
+        return {"success": True, "msg_id": msg_id, "event": event}
+
+    def read_events(self, qty: int, visibility_timeout: int) -> list[dict]:
+        now = _now()
+        hidden_until = (
+            datetime.now(timezone.utc) + timedelta(seconds=visibility_timeout)
+        ).isoformat(timespec="microseconds")
+
+        with self._write() as conn:
+            ids = [r[0] for r in conn.execute(
+                "SELECT msg_id FROM event_queue WHERE vt <= ? ORDER BY msg_id LIMIT ?",
+                (now, qty)
+            )]
+            if ids:
+                marks = ",".join("?" * len(ids))
+                conn.execute(
+                    f"UPDATE event_queue SET vt = ?, read_ct = read_ct + 1 WHERE msg_id IN ({marks})",
+                    [hidden_until, *ids]
+                )
+            rows = conn.execute(
+                f"SELECT * FROM event_queue WHERE msg_id IN ({','.join('?' * len(ids))}) ORDER BY msg_id",
+                ids
+            ).fetchall() if ids else []
+
+        return [self._decode("event_queue", r) for r in rows]
+
+    def delete_event(self, msg_id: int) -> bool:
+        with self._write() as conn:
+            cursor = conn.execute("DELETE FROM event_queue WHERE msg_id = ?", (msg_id,))
+            return cursor.rowcount > 0
+
+    def select_events(self, filters: list[Filter] = None, limit: int = 50) -> list[dict]:
+        where, params = self._where("events", filters)
+        return self._fetch(
+            "events",
+            f"SELECT * FROM events{where} ORDER BY timestamp DESC LIMIT ?",
+            [*params, limit]
+        )
+
+    # -------------------------------------------------------------------
+    # Daily note state
+    # -------------------------------------------------------------------
+
+    def get_note_state(self, note_path: str) -> Optional[dict]:
+        rows = self._fetch(
+            "daily_note_state",
+            "SELECT * FROM daily_note_state WHERE note_path = ?",
+            [note_path]
+        )
+        return rows[0] if rows else None
+
+    def upsert_note_state(self, row: dict) -> None:
+        with self._write() as conn:
+            self._insert(conn, "daily_note_state", row, replace=True)
+
+    def delete_note_state(self, note_path: str) -> None:
+        with self._write() as conn:
+            conn.execute("DELETE FROM daily_note_state WHERE note_path = ?", (note_path,))
+
+    # -------------------------------------------------------------------
+    # Internals
+    # -------------------------------------------------------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self._uri,
+                uri=True,
+                timeout=30,
+                isolation_level=None,  # explicit transactions only
+                check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA foreign_keys = ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """Run the block in a BEGIN IMMEDIATE transaction."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def _migrate(self) -> None:
+        if self._conn().execute("PRAGMA user_version").fetchone()[0] >= len(_MIGRATIONS):
+            return
+
+        # Several workers may open a new file at once; holding the write lock
+        # makes reading the version and applying the migrations one step
+        with self._write() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, script in enumerate(_MIGRATIONS[version:], start=version + 1):
+                for statement in _statements(script):
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {number}")
+
+    @staticmethod
+    def _claim_query(
+        agent: Optional[str],
+        limit: int,
+        exclude_types: Optional[list[str]],
+        policy: SchedulingPolicy
+    ) -> tuple[str, list]:
+        """Build the query for the ids to claim, in claim order (mirrors the claim_jobs function)."""
+        params: list = []
+
+        def weights_cte(name: str, key: str, weights: dict) -> str:
+            if not weights:
+                return f"{name}({key}, weight) AS (SELECT NULL, NULL WHERE 0)"
+            params.extend(v for item in weights.items() for v in item)
+            return f"{name}({key}, weight) AS (VALUES {', '.join('(?, ?)' for _ in weights)})"
+
+        ctes = [
+            weights_cte("agent_weights", "flow", policy.agent_weights),
+            weights_cte("type_weights", "job_type", policy.type_weights),
+        ]
+
+        if policy.aging_seconds:
+            aging = "CAST(MAX((julianday('now') - julianday(j.created_at)) * 86400, 0) / ? AS INTEGER)"
+            aging_params = [policy.aging_seconds]
+        else:
+            aging, aging_params = "0", []
+
+        where = "j.status = 'pending'"
+        where_params: list = []
+        if agent is not None:
+            where += " AND j.assigned_to = ?"
+            where_params.append(agent)
+        if exclude_types:
+            where += f" AND j.job_type NOT IN ({', '.join('?' * len(exclude_types))})"
+            where_params.extend(exclude_types)
+
+        sql = f"""
+            WITH {ctes[0]}, {ctes[1]},
+            running AS (
+                SELECT COALESCE(j.assigned_to, '') AS flow, SUM(1.0 / COALESCE(tw.weight, 1)) AS service
+                FROM jobs j LEFT JOIN type_weights tw ON tw.job_type = j.job_type
+                WHERE j.status = 'running'
+                GROUP BY 1
+            ),
+            pending AS (
+                SELECT j.id, COALESCE(j.assigned_to, '') AS flow, j.created_at,
+                       1.0 / COALESCE(tw.weight, 1) AS cost,
+                       j.priority + {aging} AS effective_priority
+                FROM jobs j LEFT JOIN type_weights tw ON tw.job_type = j.job_type
+                WHERE {where}
+            ),
+            ranked AS (
+                SELECT p.id, p.created_at, p.effective_priority,
+                       (COALESCE(r.service, 0) + SUM(p.cost) OVER (
+                           PARTITION BY p.flow
+                           ORDER BY p.effective_priority DESC, p.created_at, p.id
+                           ROWS UNBOUNDED PRECEDING
+                       )) / COALESCE(aw.weight, 1) AS finish
+                FROM pending p
+                LEFT JOIN running r ON r.flow = p.flow
+                LEFT JOIN agent_weights aw ON aw.flow = p.flow
+            )
+            SELECT id FROM ranked
+            ORDER BY finish, effective_priority DESC, created_at, id
+            LIMIT ?
+        """
+        return sql, [*params, *aging_params, *where_params, limit]
+
+    def _new_job_row(self, row: dict, now: str) -> dict:
+        job_id = row.get("id") or str(uuid.uuid4())
+        return {
+            "status": "pending",
+            "payload": {},
+            "tags": [],
+            **{k: v for k, v in row.items() if v is not None},
+            "id": job_id,
+            "short_id": row.get("short_id") or job_id[:8],
+            "created_at": row.get("created_at") or now,
+            "updated_at": now,
+            "version": 0,
+        }
+
+    def _insert(self, conn: sqlite3.Connection, table: str, row: dict, replace: bool = False) -> int:
+        columns = list(row)
+        for column in columns:
+            self._check_column(table, column)
+        verb = "INSERT OR REPLACE" if replace else "INSERT"
+        cursor = conn.execute(
+            f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [self._encode(table, c, row[c]) for c in columns]
+        )
+        return cursor.lastrowid
+
+    def _update_ids(self, conn: sqlite3.Connection, ids: list[str], values: dict) -> None:
+        """Update jobs by id, bumping version unless only heartbeat columns change."""
+        values = dict(values)
+        sets = []
+        params = []
+        for column, value in values.items():
+            self._check_column("jobs", column)
+            sets.append(f"{column} = ?")
+            params.append(self._encode("jobs", column, value))
+
+        if set(values) - _HEARTBEAT_COLUMNS:
+            sets.append("version = version + 1")
+            if "updated_at" not in values:
+                sets.append("updated_at = ?")
+                params.append(_now())
+
+        marks = ",".join("?" * len(ids))
+        conn.execute(f"UPDATE jobs SET {', '.join(sets)} WHERE id IN ({marks})", [*params, *ids])
+
+    def _matching_ids(self, conn: sqlite3.Connection, filters: list[Filter]) -> list[str]:
+        where, params = self._where("jobs", filters)
+        return [r[0] for r in conn.execute(f"SELECT id FROM jobs{where}", params)]
+
+    def _jobs_by_ids(self, ids: list[str]) -> list[dict]:
+        """Fetch jobs by id, returned in the order of ids."""
+        found = {}
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            for row in self._fetch("jobs", f"SELECT * FROM jobs WHERE id IN ({marks})", chunk):
+                found[row["id"]] = row
+        return [found[i] for i in ids if i in found]
+
+    def _fetch(self, table: str, sql: str, params: list) -> list[dict]:
+        return [self._decode(table, r) for r in self._conn().execute(sql, params)]
+
+    def _where(self, table: str, filters: list[Filter] = None) -> tuple[str, list]:
+        clauses = []
+        params: list = []
+        for column, op, value in filters or []:
+            self._check_column(table, column)
+            if op not in FILTER_OPS:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            if op == "in":
+                values = list(value)
+                if not values:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+            elif op == "is_null" or (op == "eq" and value is None):
+                clauses.append(f"{column} IS NULL")
+            elif op == "not_null":
+                clauses.append(f"{column} IS NOT NULL")
+            else:
+                clauses.append(f"{column} {_SQL_OPS[op]} ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def _columns_sql(self, table: str, columns: str) -> str:
+        if columns.strip() == "*":
+            return "*"
+        names = [c.strip() for c in columns.split(",")]
+        for name in names:
+            self._check_column(table, name)
+        return ", ".join(names)
+
+    @staticmethod
+    def _check_column(table: str, column: str) -> None:
+        if column not in _COLUMNS[table]:
+            raise ValueError(f"Unknown column for {table}: {column}")
+
+    @staticmethod
+    def _encode(table: str, column: str, value):
+        if column in _JSON_COLUMNS[table] and value is not None:
+            return json.dumps(value)
+        return value
+
+    @staticmethod
+    def _decode(table: str, row: sqlite3.Row) -> dict:
+        data = dict(row)
+        for column in _JSON_COLUMNS[table] - _LAZY_JSON_COLUMNS.get(table, set()):
+            if data.get(column) is not None:
+                data[column] = json.loads(data[column])
+        return data
@@ -0,0 +1,238 @@
+"""Supabase (PostgREST) storage backend."""
+
+from typing import Optional
+
+from ..scheduling import SchedulingPolicy
+from .base import FILTER_OPS, Filter, StorageBackend
+
+
+def _quote(value) -> str:
+    """Quote a value for use inside a PostgREST or=(...) filter."""
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class SupabaseBackend(StorageBackend):
+    """
+    Storage backend backed by a Supabase project.
+
+    Jobs, logs and note state use PostgREST table queries; atomic operations
+    (claim, transition, hung detection, job tree, event queue) call the
+    database functions defined in the supabase/migrations directory.
+    """
+
+    def __init__(self, client):
+        """
+        Initialize SupabaseBackend.
+
+        Args:
+            client: Supabase client instance
+        """
+        self.client = client
+
+    def select_page(
+        self,
+        table: str,
+        filters: list[Filter] = None,
+        order: tuple[str, ...] = ("created_at", "id"),
+        after: tuple = None,
+        columns: str = "*",
+        limit: int = 500
+    ) -> list[dict]:
+        query = self._apply_filters(self.client.table(table).select(columns), filters)
+
+        if after is not None:
+            if len(order) == 1:
+                query = query.gt(order[0], after[0])
+            elif len(order) == 2:
+                # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y)
+                (a, b), (x, y) = order, after
+                query = query.or_(
+                    f"{a}.gt.{_quote(x)},and({a}.eq.{_quote(x)},{b}.gt.{_quote(y)})"
+                )
+            else:
+                raise ValueError("Keyset pagination supports one or two order columns")
+
+        for column in order:
+            query = query.order(column)
+        return query.limit(limit).execute().data
+
+    # -------------------------------------------------------------------
+    # Jobs
+    # -------------------------------------------------------------------
+
+    def insert_job(self, row: dict) -> dict:
+        result = self.client.table("jobs").insert(row).execute()
+        return result.data[0]
+
+    def insert_jobs(self, rows: list[dict]) -> list[dict]:
+        result = self.client.table("jobs").insert(rows).execute()
+        return result.data
+
+    def select_jobs(
+        self,
+        filters: list[Filter] = None,
+        columns: str = "*",
+        order: str = None,
+        desc: bool = False,
+        limit: int = None
+    ) -> list[dict]:
+        query = self._apply_filters(self.client.table("jobs").select(columns), filters)
+        if order:
+            query = query.order(order, desc=desc) if desc else query.order(order)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.execute().data
+
+    def count_jobs(self, filters: list[Filter] = None) -> int:
+        query = self.client.table("jobs").select("id", count="exact")
+        result = self._apply_filters(query, filters).execute()
+        return result.count or 0
+
+    def update_jobs(self, filters: list[Filter], values: dict) -> list[dict]:
+        query = self._apply_filters(self.client.table("jobs").update(values), filters)
+        return query.execute().data or []
+
+    def transition_job(
+        self,
+        job_id: str,
+        expected_version: Optional[int],
+        patch: dict
+    ) -> Optional[dict]:
+        result = self.client.rpc("transition_job", {
+            "p_id": job_id,
+            "p_expected_version": expected_version,
+            "p_patch": patch
+        }).execute()
+        return result.data[0] if result.data else None
+
+    def claim_jobs(
+        self,
+        worker_id: str,
+        hostname: str,
+        agent: Optional[str],
+        limit: int,
+        exclude_types: Optional[list[str]] = None,
+        policy: Optional[SchedulingPolicy] = None
+    ) -> list[dict]:
+        params = {
+            "p_worker_id": worker_id,
+            "p_hostname": hostname,
+            "p_agent": agent,
+            "p_limit": limit
+        }
+        if exclude_types:
+            params["p_exclude_types"] = list(exclude_types)
+        if policy is not None:
+            params.update(policy.rpc_params())
+        result = self.client.rpc("claim_jobs", params).execute()
+        return result.data
+
+    def detect_hung_jobs(self, timeout_seconds: int) -> list[dict]:
+        result = self.client.rpc("detect_hung_jobs", {"timeout_seconds": timeout_seconds}).execute()
+        return result.data
+
+    def get_job_tree(self, job_id: str) -> list[dict]:
+        result = self.client.rpc("get_job_tree", {"job_uuid": job_id}).execute()
+        return result.data
+
+    def cleanup_old_jobs(self, days_to_keep: int) -> int:
+        result = self.client.rpc("cleanup_old_jobs", {"days_to_keep": days_to_keep}).execute()
+        return result.data if result.data else 0
+
+    # -------------------------------------------------------------------
+    # Logs
+    # -------------------------------------------------------------------
+
+    def insert_logs(self, rows: list[dict]) -> None:
+        self.client.table("job_logs").insert(rows).execute()
+
+    def select_logs(self, job_id: str, limit: int) -> list[dict]:
+        result = self.client.table("job_logs").select("*").eq(
+            "job_id", job_id
+        ).order("timestamp", desc=True).limit(limit).execute()
+        return result.data
+
+    # -------------------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------------------
+
+    def insert_job_metrics(self, rows: list[dict]) -> None:
+        self.client.table("job_metrics").insert(rows).execute()
+
+    def select_job_metrics(self, job_id: str, limit: int) -> list[dict]:
+        result = self.client.table("job_metrics").select("*").eq(
+            "job_id", job_id
+        ).order("sampled_at", desc=True).limit(limit).execute()
+        return result.data
+
+    # -------------------------------------------------------------------
+    # Events
+    # -------------------------------------------------------------------
+
+    def publish_event(
+        self,
+        event_type: str,
+        job_id: str,
+        source: str,
+        trace_id: str,
+        data: dict
+    ) -> dict:
+        result = self.client.rpc('publish_event', {
+            'p_type': event_type,
+            'p_job_id': job_id,
+            'p_source': source,
+            'p_trace_id': trace_id,
+            'p_data': data
+        }).execute()
+        return result.data
+
+    def read_events(self, qty: int, visibility_timeout: int) -> list[dict]:
+        result = self.client.rpc('read_events', {
+            'p_qty': qty,
+            'p_visibility_timeout': visibility_timeout
+        }).execute()
+        return result.data
+
+    def delete_event(self, msg_id: int) -> bool:
+        result = self.client.rpc('delete_event', {
+            'p_msg_id': msg_id
+        }).execute()
+        return result.data
+
+    def select_events(self, filters: list[Filter] = None, limit: int = 50) -> list[dict]:
+        query = self.client.table("events").select("*").order("timestamp", desc=True).limit(limit)
+        return self._apply_filters(query, filters).execute().data
+
+    # -------------------------------------------------------------------
+    # Daily note state
+    # -------------------------------------------------------------------
+
+    def get_note_state(self, note_path: str) -> Optional[dict]:
+        result = self.client.table("daily_note_state").select("*").eq(
+            "note_path", note_path
+        ).execute()
+        return result.data[0] if result.data else None
+
+    def upsert_note_state(self, row: dict) -> None:
+        self.client.table("daily_note_state").upsert(row).execute()
+
+    def delete_note_state(self, note_path: str) -> None:
+        self.client.table("daily_note_state").delete().eq(
+            "note_path", note_path
+        ).execute()
+
+    @staticmethod
+    def _apply_filters(query, filters: list[Filter] = None):
+        """Translate (column, op, value) filters into PostgREST query calls."""
+        for column, op, value in filters or []:
+            if op not in FILTER_OPS:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            if op == "in":
+                query = query.in_(column, list(value))
+            elif op == "is_null":
+                query = query.is_(column, "null")
+            elif op == "not_null":
+                query = query.not_.is_(column, "null")
+            else:
+                query = getattr(query, op)(column, value)
+        return query
@@ -0,0 +1,49 @@
+"""Run a synchronous storage backend from asyncio code."""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .base import StorageBackend
+
+
+class ThreadedBackend:
+    """
+    Async adapter for a synchronous StorageBackend.
+
+    Every backend method becomes a coroutine that runs the blocking call on
+    a small shared thread pool, so it never stalls the event loop. Used for
+    SQLite, which has no async driver; its per-thread connections make the
+    pool threads safe to use concurrently.
+    """
+
+    def __init__(self, backend: StorageBackend, max_workers: int = 8):
+        """
+        Initialize ThreadedBackend.
+
+        Args:
+            backend: Synchronous backend to wrap
+            max_workers: Threads available for backend calls
+        """
+        self.backend = backend
+        self.client = getattr(backend, "client", None)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="persona-db")
+
+    async def aclose(self) -> None:
+        """Wait for in-flight calls, then close the wrapped backend."""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self.backend.close()
+
+    def __getattr__(self, name: str):
+        method = getattr(self.backend, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(method, *args, **kwargs)
+            )
+
+        call.__name__ = name
+        return call
@@ -0,0 +1,183 @@
+"""Structured control messages from agents.
+
+An agent may report its progress and outcome as JSON objects on stdout,
+one per line, each prefixed with CONTROL_PREFIX:
+
+    PERSONA_MSG {"type": "progress", "message": "Searching", "percent": 40}
+    PERSONA_MSG {"type": "artifact", "path": "Resources/abc123-research.md"}
+    PERSONA_MSG {"type": "usage", "input_tokens": 1200, "output_tokens": 300}
+    PERSONA_MSG {"type": "delegate", "agent": "researcher", "task": "..."}
+    PERSONA_MSG {"type": "result", "data": {"summary": "..."}}
+    PERSONA_MSG {"type": "complete"}
+
+Only lines that start with the prefix are control messages, so output that
+merely mentions a marker cannot change the job's outcome.
+"""
+
+import json
+from typing import Optional
+
+CONTROL_PREFIX = "PERSONA_MSG "
+
+MESSAGE_TYPES = frozenset({"progress", "result", "delegate", "artifact", "usage", "complete", "error"})
+
+
+def parse_control_line(line: str) -> Optional[dict]:
+    """
+    Parse one output line as a control message.
+
+    Args:
+        line: Output line without its newline
+
+    Returns:
+        The message dict, or None if the line is ordinary output
+
+    Raises:
+        ValueError: If the line has the control prefix but is not a valid message
+    """
+    if not line.startswith(CONTROL_PREFIX):
+        return None
+
+    message = json.loads(line[len(CONTROL_PREFIX):])
+    if not isinstance(message, dict):
+        raise ValueError("Control message must be a JSON object")
+
+    msg_type = message.get("type")
+    if msg_type not in MESSAGE_TYPES:
+        raise ValueError(f"Unknown control message type: {msg_type!r}")
+
+    if msg_type == "delegate":
+        if not (_nonblank(message.get("agent")) and _nonblank(message.get("task"))):
+            raise ValueError("Delegate message needs agent and task strings")
+        if not isinstance(message.get("context", ""), (str, type(None))):
+            raise ValueError("Delegate context must be a string")
+    if msg_type == "artifact" and not message.get("path"):
+        raise ValueError("Artifact message needs a path")
+
+    return message
+
+
+def _nonblank(value) -> bool:
+    return isinstance(value, str) and bool(value.strip())
+
+
+class ControlState:
+    """
+    Accumulated effect of the control messages a job has sent.
+
+    `dirty` is set whenever progress, artifacts or usage change, so callers
+    can push one store update per interval instead of one per message.
+    """
+
+    __slots__ = (
+        "used", "outcome", "error", "progress", "output", "delegations",
+        "artifacts", "usage", "invalid", "dirty",
+    )
+
+    def __init__(self):
+        """Initialize an empty ControlState."""
+        self.used = False
+        self.outcome: Optional[str] = None
+        self.error: Optional[str] = None
+        self.progress: Optional[dict] = None
+        self.output: dict = {}
+        self.delegations: list[dict] = []
+        self.artifacts: list[str] = []
+        self.usage: dict = {}
+        self.invalid = 0
+        self.dirty = False
+
+    def feed(self, line: str) -> bool:
+        """
+        Apply a line if it is a control message.
+
+        Malformed control lines are counted in `invalid` and otherwise ignored.
+
+        Args:
+            line: Output line without its newline
+
+        Returns:
+            True if the line was a control line (valid or not)
+        """
+        try:
+            message = parse_control_line(line)
+        except ValueError:
+            self.invalid += 1
+            return True
+
+        if message is None:
+            return False
+
+        self.apply(message)
+        return True
+
+    def apply(self, message: dict) -> None:
+        """
+        Apply one parsed control message.
+
+        Args:
+            message: Message dict with a valid `type`
+        """
+        self.used = True
+        msg_type = message["type"]
+        fields = {k: v for k, v in message.items() if k != "type"}
+
+        if msg_type == "progress":
+            self.progress = fields
+            self.dirty = True
+
+        elif msg_type == "artifact":
+            if fields["path"] not in self.artifacts:
+                self.artifacts.append(fields["path"])
+                self.dirty = True
+
+        elif msg_type == "usage":
+            # Agents report usage incrementally; numeric counters add up
+            for key, value in fields.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self.usage[key] = self.usage.get(key, 0) + value
+                else:
+                    self.usage[key] = value
+            self.dirty = True
+
+        elif msg_type == "delegate":
+            self.delegations.append({
+                "agent": fields["agent"],
+                "task": fields["task"],
+                "context": fields.get("context"),
+            })
+
+        elif msg_type == "result":
+            data = fields.get("data", fields)
+            if isinstance(data, dict):
+                self.output.update(data)
+            else:
+                self.output["value"] = data
+
+        elif msg_type == "complete":
+            # An error already reported is not undone by a later complete
+            if self.outcome is None:
+                self.outcome = "complete"
+
+        elif msg_type == "error":
+            # The first error message is kept
+            if self.outcome != "error":
+                self.outcome = "error"
+                self.error = fields.get("message") or "Agent reported an error"
+
+    def snapshot(self) -> dict:
+        """
+        Get the job's reported state as stored in the job's result column.
+
+        Returns:
+            Dict with whichever of output, progress, artifacts and usage
+            have been reported
+        """
+        # Copies, since the snapshot is written from another thread
+        state = {
+            "output": dict(self.output),
+            "progress": dict(self.progress or {}),
+            "artifacts": list(self.artifacts),
+            "usage": dict(self.usage),
+        }
+        return {key: value for key, value in state.items() if value}
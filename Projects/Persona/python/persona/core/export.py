@@ -0,0 +1,85 @@
+"""Streaming export of job, log and event history."""
+
+import json
+from typing import IO, Iterator
+
+from .job_store import JobStore
+
+EXPORT_KINDS = ("jobs", "logs", "events")
+
+
+def iter_export_records(
+    store: JobStore,
+    kind: str,
+    status: str = None,
+    agent: str = None,
+    job_type: str = None,
+    job_id: str = None,
+    event_type: str = None,
+    since: str = None,
+    page_size: int = 500
+) -> Iterator[dict]:
+    """
+    Stream history records as JSON-serializable dicts, oldest first.
+
+    Args:
+        store: JobStore to read from
+        kind: 'jobs', 'logs' or 'events'
+        status: Job status filter (jobs)
+        agent: Assigned agent filter (jobs)
+        job_type: Job type filter (jobs)
+        job_id: Job ID filter (logs, events)
+        event_type: Event type filter (events)
+        since: ISO timestamp lower bound (created_at for jobs, timestamp otherwise)
+        page_size: Rows fetched per request
+
+    Yields:
+        Record dicts
+
+    Raises:
+        ValueError: If kind is not one of EXPORT_KINDS
+    """
+    if kind == "jobs":
+        filters = []
+        if status:
+            filters.append(("status", "eq", status))
+        if agent:
+            filters.append(("assigned_to", "eq", agent))
+        if job_type:
+            filters.append(("job_type", "eq", job_type))
+        if since:
+            filters.append(("created_at", "gte", since))
+
+        for job in store.iter_jobs(filters, page_size=page_size):
+            yield job.to_dict()
+
+    elif kind == "logs":
+        yield from store.iter_logs(job_id=job_id, since=since, page_size=page_size)
+
+    elif kind == "events":
+        yield from store.iter_events(
+            job_id=job_id, event_type=event_type, since=since, page_size=page_size
+        )
+
+    else:
+        raise ValueError(f"Unknown export kind: {kind} (expected one of {', '.join(EXPORT_KINDS)})")
+
+
+def write_jsonl(records: Iterator[dict], fp: IO[str]) -> int:
+    """
+    Write records to a text stream as JSON Lines.
+
+    Args:
+        records: Records to write
+        fp: Writable text stream
+
+    Returns:
+        Number of records written
+    """
+    count = 0
+    for record in records:
+        fp.write(json.dumps(record, default=str))
+        fp.write("\n")
+        count += 1
+    return count
+
@@ -0,0 +1,314 @@
+"""Host-level heartbeat service for running jobs."""
+
+import heapq
+import os
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import psutil
+
+from .job_store import JobStore
+
+
+@dataclass
+class _TrackedJob:
+    """A job the heartbeat service is keeping alive."""
+    process: Optional[subprocess.Popen] = None
+    pid: Optional[int] = None
+    on_exit: Optional[Callable[[], None]] = None
+    active: bool = True
+    watch_progress: bool = False
+
+
+class DeadlineIndex:
+    """
+    Min-heap of per-job deadlines on the monotonic clock.
+
+    touch() only records when a job was last seen, so it is cheap enough to
+    call for every output line. The heap holds at most one entry per job.
+    When that entry comes due, pop_expired() checks the latest touch and
+    either re-arms the entry at the real deadline or reports the job.
+    """
+
+    def __init__(self, timeout: float):
+        """
+        Initialize DeadlineIndex.
+
+        Args:
+            timeout: Seconds from a job's last touch until its deadline
+        """
+        self.timeout = timeout
+        self._heap: list[tuple[float, str]] = []
+        self._armed: dict[str, float] = {}
+        self._last: dict[str, float] = {}
+
+    def touch(self, job_id: str, now: float = None):
+        """
+        Move a job's deadline to timeout seconds from now.
+
+        Args:
+            job_id: Job UUID
+            now: Current monotonic time (default: time.monotonic())
+        """
+        now = now if now is not None else time.monotonic()
+        self._last[job_id] = now
+        if job_id not in self._armed:
+            self._arm(job_id, now + self.timeout)
+
+    def discard(self, job_id: str):
+        """
+        Stop tracking a job.
+
+        Args:
+            job_id: Job UUID
+        """
+        self._last.pop(job_id, None)
+        self._armed.pop(job_id, None)
+
+    def next_deadline(self) -> Optional[float]:
+        """
+        Return the earliest heap deadline, or None when nothing is tracked.
+
+        This can be earlier than any real deadline, when the job has been
+        touched since; checking then just re-arms it.
+        """
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_expired(self, now: float = None) -> list[str]:
+        """
+        Remove and return the jobs whose deadline has passed.
+
+        Args:
+            now: Current monotonic time (default: time.monotonic())
+
+        Returns:
+            Expired job IDs, earliest deadline first
+        """
+        now = now if now is not None else time.monotonic()
+        expired = []
+        while self._prune() and self._heap[0][0] <= now:
+            _, job_id = heapq.heappop(self._heap)
+            deadline = self._last[job_id] + self.timeout
+            if deadline > now:
+                self._arm(job_id, deadline)
+            else:
+                self.discard(job_id)
+                expired.append(job_id)
+        return expired
+
+    def _arm(self, job_id: str, deadline: float):
+        self._armed[job_id] = deadline
+        heapq.heappush(self._heap, (deadline, job_id))
+
+    def _prune(self) -> bool:
+        """Drop entries of discarded jobs from the top; return whether any remain."""
+        while self._heap:
+            deadline, job_id = self._heap[0]
+            if self._armed.get(job_id) == deadline:
+                return True
+            heapq.heappop(self._heap)
+        return False
+
+    def __len__(self) -> int:
+        return len(self._armed)
+
+
+class HeartbeatService:
+    """
+    Sends one bulk heartbeat per interval for every live job on this host.
+
+    Jobs are registered with their process (or PID). Each tick checks which
+    of them are still alive and writes a single heartbeat_many() update for
+    the ones that showed no other sign of life since the previous tick. A
+    successful log flush counts as activity, because log inserts refresh
+    last_heartbeat on the server.
+
+    Heartbeats only prove the process is alive. Jobs registered with
+    watch_progress also get a stall deadline, which record_progress() moves
+    on every line of output. expired() names the ones that have been silent
+    for stall_timeout. Deadlines never depend on database writes, so an
+    unreachable backend cannot make a healthy agent look stalled.
+    """
+
+    def __init__(self, job_store: JobStore, interval: float = None, stall_timeout: float = None):
+        """
+        Initialize HeartbeatService.
+
+        Args:
+            job_store: JobStore used to write heartbeats
+            interval: Seconds between ticks (default: JOB_HEARTBEAT_INTERVAL or 30)
+            stall_timeout: Seconds without output before a watched job counts
+                as stalled (default: JOB_STALL_TIMEOUT or 1800)
+        """
+        self.job_store = job_store
+        self.interval = interval or float(os.environ.get('JOB_HEARTBEAT_INTERVAL', '30'))
+        self.deadlines = DeadlineIndex(stall_timeout or float(os.environ.get('JOB_STALL_TIMEOUT', '1800')))
+
+        self._jobs: dict[str, _TrackedJob] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(
+        self,
+        job_id: str,
+        process: subprocess.Popen = None,
+        pid: int = None,
+        on_exit: Callable[[], None] = None,
+        watch_progress: bool = False
+    ):
+        """
+        Start keeping a job alive.
+
+        Args:
+            job_id: Job UUID
+            process: Popen handle for the job's process, if we own it
+            pid: PID to check with psutil when there is no Popen handle
+            on_exit: Called (from the service thread) once the process is gone
+            watch_progress: Track a stall deadline fed by record_progress();
+                only for jobs whose output is seen line by line
+        """
+        with self._lock:
+            # The job was just started, which already set last_heartbeat
+            self._jobs[job_id] = _TrackedJob(
+                process=process, pid=pid, on_exit=on_exit, watch_progress=watch_progress
+            )
+            if watch_progress:
+                self.deadlines.touch(job_id)
+
+    def unregister(self, job_id: str):
+        """
+        Stop tracking a job.
+
+        Args:
+            job_id: Job UUID
+        """
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self.deadlines.discard(job_id)
+
+    def record_activity(self, job_id: str):
+        """
+        Note that a job proved it is alive by other means (e.g. a log flush).
+
+        Args:
+            job_id: Job UUID
+        """
+        with self._lock:
+            tracked = self._jobs.get(job_id)
+            if tracked:
+                tracked.active = True
+
+    def record_progress(self, job_id: str):
+        """
+        Note that a watched job produced output, moving its stall deadline.
+
+        Args:
+            job_id: Job UUID
+        """
+        with self._lock:
+            tracked = self._jobs.get(job_id)
+            if tracked and tracked.watch_progress:
+                self.deadlines.touch(job_id)
+
+    def tracked_ids(self) -> list[str]:
+        """Return the IDs of all jobs currently tracked."""
+        with self._lock:
+            return list(self._jobs)
+
+    def expired(self) -> list[str]:
+        """
+        Take the watched jobs that have produced no output for stall_timeout.
+
+        Each job is returned once; it is watched again from its next line
+        of output.
+
+        Returns:
+            Job IDs, longest silent first
+        """
+        with self._lock:
+            return self.deadlines.pop_expired()
+
+    def next_deadline(self) -> Optional[float]:
+        """Return the monotonic time of the next stall check, if any."""
+        with self._lock:
+            return self.deadlines.next_deadline()
+
+    def tick(self) -> list[str]:
+        """
+        Run one heartbeat round.
+
+        Returns:
+            IDs of the jobs included in the bulk heartbeat
+        """
+        due = []
+        exited = []
+
+        with self._lock:
+            for job_id, tracked in list(self._jobs.items()):
+                if not self._is_alive(tracked):
+                    exited.append(self._jobs.pop(job_id))
+                    self.deadlines.discard(job_id)
+                elif tracked.active:
+                    tracked.active = False
+                else:
+                    due.append(job_id)
+
+        if due:
+            try:
+                self.job_store.heartbeat_many(due)
+            except Exception as e:
+                # Log but don't crash the heartbeat thread
+                print(f"Heartbeat failed for {len(due)} jobs: {e}")
+
+        for tracked in exited:
+            if tracked.on_exit:
+                try:
+                    tracked.on_exit()
+                except Exception as e:
+                    print(f"Exit handler failed: {e}")
+
+        return due
+
+    def start(self):
+        """Start the background heartbeat thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """
+        Stop the background heartbeat thread.
+
+        Args:
+            timeout: Seconds to wait for the thread to finish
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.tick()
+
+    @staticmethod
+    def _is_alive(tracked: _TrackedJob) -> bool:
+        """Check whether a tracked job's process is still running."""
+        if tracked.process is not None:
+            return tracked.process.poll() is None
+
+        if tracked.pid is None:
+            return False
+
+        try:
+            return psutil.Process(tracked.pid).status() != psutil.STATUS_ZOMBIE
+        except psutil.NoSuchProcess:
+            return False
@@ -0,0 +1,171 @@
+"""Push notification of new jobs through Supabase Realtime."""
+
+import asyncio
+import threading
+from typing import Callable, Optional
+
+from realtime import RealtimeSubscribeStates
+from supabase import acreate_client
+
+
+class JobListener:
+    """
+    Calls back when pending jobs are inserted, so a worker can claim at once.
+
+    Subscribes to INSERTs on the jobs table (which is in the
+    supabase_realtime publication) from its own thread and event loop.
+    on_job(row) is called for every new pending job. on_connected() is
+    called each time the subscription is (re)established, because inserts
+    made while it was down were not delivered. If the channel errors or
+    closes, the client is torn down and rebuilt with exponential backoff.
+
+    Callbacks run on the listener thread and must be quick.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        on_job: Callable[[dict], None],
+        on_connected: Callable[[], None] = None,
+        agent: str = None,
+        max_backoff: float = 60.0
+    ):
+        """
+        Initialize JobListener.
+
+        Args:
+            url: Supabase project URL
+            key: Supabase key
+            on_job: Called with the row of each new pending job
+            on_connected: Called whenever the subscription becomes active
+            agent: Only report jobs assigned to this agent
+            max_backoff: Longest wait between reconnect attempts, in seconds
+        """
+        self.url = url
+        self.key = key
+        self.on_job = on_job
+        self.on_connected = on_connected
+        self.agent = agent
+        self.max_backoff = max_backoff
+
+        self.connected = False
+        self.notifications = 0
+        self.reconnects = 0
+
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._lost: Optional[asyncio.Event] = None
+        # Wait before the next reconnect; reset once a subscription succeeds
+        self._backoff = 1.0
+
+    def start(self):
+        """Start the listener thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._main, args=(ready,), name="persona-job-listener", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop(self, timeout: float = None):
+        """
+        Unsubscribe and stop the listener thread.
+
+        Args:
+            timeout: Seconds to wait for the thread to finish
+        """
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        """
+        Get listener metrics.
+
+        Returns:
+            Dict with connected, notifications and reconnects
+        """
+        return {"connected": self.connected, "notifications": self.notifications, "reconnects": self.reconnects}
+
+    def _main(self, ready: threading.Event):
+        self._loop = asyncio.new_event_loop()
+        self._stop = asyncio.Event()
+        ready.set()
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+
+    async def _run(self):
+        while not self._stop.is_set():
+            self._lost = asyncio.Event()
+            client = None
+            try:
+                client = await acreate_client(self.url, self.key)
+                channel = client.channel("persona-worker-jobs")
+                channel.on_postgres_changes(
+                    "INSERT",
+                    schema="public",
+                    table="jobs",
+                    filter=f"assigned_to=eq.{self.agent}" if self.agent else None,
+                    callback=self._on_change,
+                )
+                await channel.subscribe(self._on_state)
+
+                stop = asyncio.ensure_future(self._stop.wait())
+                lost = asyncio.ensure_future(self._lost.wait())
+                await asyncio.wait({stop, lost}, return_when=asyncio.FIRST_COMPLETED)
+                stop.cancel()
+                lost.cancel()
+            except Exception as e:
+                print(f"Job listener error: {e}")
+            finally:
+                self.connected = False
+                if client is not None:
+                    try:
+                        await client.remove_all_channels()
+                    except Exception:
+                        pass
+
+            if self._stop.is_set():
+                break
+
+            self.reconnects += 1
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self._backoff)
+            except asyncio.TimeoutError:
+                pass
+            self._backoff = min(self._backoff * 2, self.max_backoff)
+
+    def _on_state(self, state: RealtimeSubscribeStates, error: Optional[Exception] = None):
+        if state == RealtimeSubscribeStates.SUBSCRIBED:
+            self.connected = True
+            # Recorded here: by the time the session is lost, connected is False again
+            self._backoff = 1.0
+            if self.on_connected:
+                self._call(self.on_connected)
+        else:
+            if self.connected or error:
+                print(f"Job listener disconnected ({state.value}){f': {error}' if error else ''}")
+            self.connected = False
+            if self._lost is not None:
+                self._lost.set()
+
+    def _on_change(self, payload: dict):
+        row = (payload.get("data") or {}).get("record") or {}
+        if row.get("status", "pending") != "pending":
+            return
+        self.notifications += 1
+        self._call(self.on_job, row)
+
+    @staticmethod
+    def _call(callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"Job listener callback failed: {e}")
@@ -1,12 +1,25 @@
-"""Job store for managing jobs in Supabase."""
+"""Job store for managing jobs in Supabase or a local SQLite database."""
 
+import json
 import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
-from dataclasses import dataclass, field
-from typing import Optional
+from dataclasses import dataclass
+from typing import Iterator, Optional
 from enum import Enum
 from supabase import create_client, Client
 
+from .backends import Filter, SqliteBackend, StorageBackend, SupabaseBackend
+from .job_types import JobTypeRegistry, default_registry
+from .scheduling import SchedulingPolicy, default_policy
+
+# Rows per request for the iter_* keyset-paginated generators
+DEFAULT_PAGE_SIZE = 500
+
 
 class JobStatus(Enum):
     """Job execution status."""
@@ -23,56 +36,575 @@ class UpdateConflictError(Exception):
     pass
 
 
-@dataclass
+# Job attributes in display order, with the default used when a row omits one
+_JOB_FIELDS = {
+    "id": None,
+    "short_id": None,
+    "job_type": None,
+    "payload": None,
+    "status": None,
+    "pid": None,
+    "hostname": None,
+    "worker_id": None,
+    "created_at": None,
+    "started_at": None,
+    "completed_at": None,
+    "updated_at": None,
+    "version": 0,
+    "last_heartbeat": None,
+    "exit_code": None,
+    "error_message": None,
+    "result": None,
+    "parent_job_id": None,
+    "delegated_by": None,
+    "assigned_to": None,
+    "source_file": None,
+    "source_line": None,
+    "tags": None,
+    "priority": 0,
+}
+
+# Columns a backend may hand back as undecoded JSON text
+_LAZY_JSON_FIELDS = ("payload", "result", "tags")
+
+_UNSET = object()
+
+# Fractional seconds of a timestamp, padded by parse_timestamp
+_FRACTION = re.compile(r"\.(\d+)")
+
+
 class Job:
-    """Job representation."""
+    """
+    Job representation.
+
+    Wraps the row returned by the backend instead of copying each column
+    into its own attribute. status, payload, result and tags are decoded
+    on first access and cached, so listing many jobs only pays for the
+    fields that are actually read.
+    """
+
+    __slots__ = ("_row", "_status", "_payload", "_result", "_tags")
+
+    def __init__(self, id: str, short_id: str, job_type: str, payload: dict, status: JobStatus, **fields):
+        unknown = set(fields) - set(_JOB_FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown Job fields: {', '.join(sorted(unknown))}")
+
+        row = dict(fields, id=id, short_id=short_id, job_type=job_type, payload=payload)
+        row["status"] = status.value if isinstance(status, JobStatus) else status
+        self._bind(row)
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Job":
+        """
+        Wrap a backend row without copying it.
+
+        The Job takes ownership of row; attribute assignment writes to it.
+
+        Args:
+            row: Row dict from a StorageBackend
+
+        Returns:
+            Job backed by row
+        """
+        job = cls.__new__(cls)
+        job._bind(row)
+        return job
+
+    def _bind(self, row: dict) -> None:
+        self._row = row
+        self._status = _UNSET
+        self._payload = _UNSET
+        self._result = _UNSET
+        self._tags = _UNSET
+
+    @property
+    def status(self) -> JobStatus:
+        if self._status is _UNSET:
+            self._status = JobStatus(self._row["status"])
+        return self._status
+
+    @status.setter
+    def status(self, value: JobStatus) -> None:
+        self._status = value
+
+    @property
+    def payload(self) -> dict:
+        if self._payload is _UNSET:
+            self._payload = _decode_json(self._row.get("payload"))
+        return self._payload
+
+    @payload.setter
+    def payload(self, value: dict) -> None:
+        self._payload = value
+
+    @property
+    def result(self) -> Optional[dict]:
+        if self._result is _UNSET:
+            self._result = _decode_json(self._row.get("result"))
+        return self._result
+
+    @result.setter
+    def result(self, value: Optional[dict]) -> None:
+        self._result = value
+
+    @property
+    def tags(self) -> list[str]:
+        if self._tags is _UNSET:
+            self._tags = _decode_json(self._row.get("tags")) or []
+        return self._tags
+
+    @tags.setter
+    def tags(self, value: list[str]) -> None:
+        self._tags = value
+
+    def to_dict(self) -> dict:
+        """
+        Return every field as a plain, JSON-serializable dict.
+
+        Returns:
+            Dict keyed by field name, with status as its string value
+        """
+        data = {name: getattr(self, name) for name in _JOB_FIELDS}
+        data["status"] = self.status.value
+        return data
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Job):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in _JOB_FIELDS)
+        return f"Job({fields})"
+
+
+def _plain_field(name: str, default):
+    """Build a read/write property backed by the wrapped row."""
+
+    def getter(self):
+        value = self._row.get(name)
+        return default if value is None else value
+
+    def setter(self, value):
+        self._row[name] = value
+
+    return property(getter, setter)
+
+
+for _name, _default in _JOB_FIELDS.items():
+    if _name not in ("status",) + _LAZY_JSON_FIELDS:
+        setattr(Job, _name, _plain_field(_name, _default))
+del _name, _default
+
+
+def _decode_json(value):
+    """Decode a JSON column that the backend may have left as text."""
+    if isinstance(value, (str, bytes)):
+        try:
+            return json.loads(value)
+        except ValueError:
+            # Already decoded: a bare JSON string value
+            return value
+    return value
+
+
+# Columns fetched for JobSummary listings. Leaves out payload and result,
+# which can be large (delegated jobs carry the parent's log as context).
+JOB_SUMMARY_COLUMNS = (
+    "id",
+    "short_id",
+    "job_type",
+    "status",
+    "pid",
+    "hostname",
+    "worker_id",
+    "assigned_to",
+    "parent_job_id",
+    "created_at",
+    "started_at",
+    "completed_at",
+    "last_heartbeat",
+    "exit_code",
+    "error_message",
+)
+_JOB_SUMMARY_SELECT = ", ".join(JOB_SUMMARY_COLUMNS)
+
+
+@dataclass(slots=True)
+class JobSummary:
+    """Lightweight job row for list views (no payload or result)."""
     id: str
     short_id: str
     job_type: str
-    payload: dict
     status: JobStatus
     pid: Optional[int] = None
     hostname: Optional[str] = None
+    worker_id: Optional[str] = None
+    assigned_to: Optional[str] = None
+    parent_job_id: Optional[str] = None
     created_at: Optional[str] = None
     started_at: Optional[str] = None
     completed_at: Optional[str] = None
-    updated_at: Optional[str] = None
     last_heartbeat: Optional[str] = None
     exit_code: Optional[int] = None
     error_message: Optional[str] = None
-    result: Optional[dict] = None
-    parent_job_id: Optional[str] = None
-    delegated_by: Optional[str] = None
-    assigned_to: Optional[str] = None
-    source_file: Optional[str] = None
-    source_line: Optional[int] = None
-    tags: list[str] = field(default_factory=list)
 
 
-class JobStore:
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a timestamp column as returned by either backend.
+
+    PostgREST trims trailing zeros from fractional seconds (e.g.
+    `...:03.12345+00:00`), which datetime.fromisoformat only accepts from
+    Python 3.11, so the fraction is padded to microseconds first.
+
+    Args:
+        value: ISO 8601 timestamp, or None
+
+    Returns:
+        Timezone-aware datetime (UTC if the value has no offset), or None
+        if the value is missing or unparseable
+    """
+    if not value:
+        return None
+    text = _FRACTION.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), value.replace("Z", "+00:00"), count=1)
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def _is_uuid(job_id: str) -> bool:
+    """Return True if job_id looks like a full UUID rather than a short_id."""
+    # UUID format: xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx
+    return len(job_id) == 36 and job_id.count('-') == 4
+
+
+class _IdCache:
+    """
+    Bounded LRU cache mapping job short_ids to UUIDs.
+
+    Short IDs and UUIDs never change once a job exists, so entries never
+    need invalidation; the bound only limits memory. Thread-safe, since
+    ProcessManager calls into JobStore from several threads.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, short_id: str) -> Optional[str]:
+        """Look up a UUID, counting the hit or miss."""
+        with self._lock:
+            job_uuid = self._entries.get(short_id)
+            if job_uuid is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(short_id)
+            self.hits += 1
+            return job_uuid
+
+    def put(self, short_id: str, job_uuid: str) -> None:
+        """Remember a short_id -> UUID mapping, evicting the oldest if full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[short_id] = job_uuid
+            self._entries.move_to_end(short_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize
+            }
+
+
+class _JobStoreBase:
+    """
+    Query building and row conversion shared by JobStore and AsyncJobStore.
+
+    Nothing here does I/O, so the sync and async stores build identical
+    filters, patches and rows and only differ in how they await the backend.
     """
-    Manages jobs in Supabase with full observability.
+
+    hostname: str
+    job_types: JobTypeRegistry
+    scheduling: SchedulingPolicy
+    _id_cache: _IdCache
+
+    def id_cache_stats(self) -> dict:
+        """
+        Get id resolution cache counters.
+
+        Returns:
+            Dict with hits, misses, size and maxsize
+        """
+        return self._id_cache.stats()
+
+    def _build_job_row(
+        self,
+        job_type: str,
+        payload: dict,
+        assigned_to: str = None,
+        parent_id: str = None,
+        delegated_by: str = None,
+        source_file: str = None,
+        source_line: int = None,
+        tags: list[str] = None,
+        priority: int = None
+    ) -> dict:
+        """
+        Build the insert row for a new pending job.
+
+        Raises:
+            InvalidJobError: If the payload does not match the job type's schema
+        """
+        self.job_types.validate(job_type, payload)
+        if priority is None:
+            priority = self.job_types.get(job_type).priority
+        return {
+            "job_type": job_type,
+            "payload": payload,
+            "status": JobStatus.PENDING.value,
+            "hostname": self.hostname,
+            "assigned_to": assigned_to,
+            "parent_job_id": parent_id,
+            "delegated_by": delegated_by,
+            "source_file": source_file,
+            "source_line": source_line,
+            "tags": tags or [],
+            "priority": priority
+        }
+
+    @staticmethod
+    def _start_patch(pid: int) -> dict:
+        now = datetime.now(timezone.utc).isoformat()
+        return {"status": JobStatus.RUNNING, "pid": pid, "started_at": now, "last_heartbeat": now}
+
+    @staticmethod
+    def _complete_patch(result: dict = None) -> dict:
+        return {
+            "status": JobStatus.COMPLETED,
+            "completed_at": datetime.now(timezone.utc).isoformat(),
+            "exit_code": 0,
+            "result": result
+        }
+
+    @staticmethod
+    def _fail_patch(error: str, exit_code: int = 1, result: dict = None) -> dict:
+        patch = {
+            "status": JobStatus.FAILED,
+            "completed_at": datetime.now(timezone.utc).isoformat(),
+            "exit_code": exit_code,
+            "error_message": error
+        }
+        # Unlike completion, failure keeps whatever result the job stored
+        if result is not None:
+            patch["result"] = result
+        return patch
+
+    @staticmethod
+    def _cancel_patch() -> dict:
+        return {
+            "status": JobStatus.CANCELLED,
+            "completed_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    @staticmethod
+    def _hung_patch(reason: str) -> dict:
+        return {
+            "status": JobStatus.HUNG,
+            "completed_at": datetime.now(timezone.utc).isoformat(),
+            "error_message": reason
+        }
+
+    @staticmethod
+    def _requeue_patch() -> dict:
+        return {
+            "status": JobStatus.PENDING,
+            "pid": None,
+            "worker_id": None,
+            "started_at": None,
+            "last_heartbeat": None
+        }
+
+    @staticmethod
+    def _heartbeat_values() -> dict:
+        return {"last_heartbeat": datetime.now(timezone.utc).isoformat()}
+
+    @staticmethod
+    def _log_rows(job_uuid: str, messages: list[str], level: str, metadata: dict = None) -> list[dict]:
+        return [
+            {
+                "job_id": job_uuid,
+                "level": level,
+                "message": msg,
+                "metadata": metadata or {}
+            }
+            for msg in messages
+        ]
+
+    @staticmethod
+    def _pending_filters(assigned_to: str = None) -> list[Filter]:
+        filters = [("status", "eq", "pending")]
+        if assigned_to:
+            filters.append(("assigned_to", "eq", assigned_to))
+        return filters
+
+    @staticmethod
+    def _running_filters(assigned_to: str = None, started_before: str = None, worker_id: str = None) -> list[Filter]:
+        filters = [("status", "eq", "running")]
+        if assigned_to:
+            filters.append(("assigned_to", "eq", assigned_to))
+        if worker_id:
+            filters.append(("worker_id", "eq", worker_id))
+        if started_before:
+            filters.append(("started_at", "lt", started_before))
+        return filters
+
+    @staticmethod
+    def _status_filters(statuses: list[str]) -> list[Filter]:
+        if len(statuses) == 1:
+            return [("status", "eq", statuses[0])]
+        return [("status", "in", statuses)]
+
+    @staticmethod
+    def _count_filters(status=None, created_before: str = None) -> list[Filter]:
+        filters = []
+        if isinstance(status, (list, tuple)):
+            filters.append(("status", "in", list(status)))
+        elif status:
+            filters.append(("status", "eq", status))
+        if created_before:
+            filters.append(("created_at", "lt", created_before))
+        return filters
+
+    @staticmethod
+    def _timing_filters(since: str, assigned_to: str = None) -> list[Filter]:
+        filters = [
+            ("completed_at", "not_null", None),
+            ("started_at", "not_null", None),
+        ]
+        if assigned_to:
+            filters.append(("assigned_to", "eq", assigned_to))
+        filters.append(("completed_at", "gte", since))
+        return filters
+
+    @staticmethod
+    def _event_filters(job_id: str = None, event_type: str = None, since: str = None) -> list[Filter]:
+        filters = []
+        if job_id:
+            filters.append(("job_id", "eq", job_id))
+        if event_type:
+            filters.append(("type", "eq", event_type))
+        if since:
+            filters.append(("timestamp", "gte", since))
+        return filters
+
+    def _row_to_summary(self, row: dict) -> JobSummary:
+        """Convert a summary projection row to JobSummary, caching its short_id."""
+        self._id_cache.put(row["short_id"], row["id"])
+        return JobSummary(
+            id=row["id"],
+            short_id=row["short_id"],
+            job_type=row["job_type"],
+            status=JobStatus(row["status"]),
+            pid=row.get("pid"),
+            hostname=row.get("hostname"),
+            worker_id=row.get("worker_id"),
+            assigned_to=row.get("assigned_to"),
+            parent_job_id=row.get("parent_job_id"),
+            created_at=row.get("created_at"),
+            started_at=row.get("started_at"),
+            completed_at=row.get("completed_at"),
+            last_heartbeat=row.get("last_heartbeat"),
+            exit_code=row.get("exit_code"),
+            error_message=row.get("error_message")
+        )
+
+    def _row_to_job(self, row: dict) -> Job:
+        """Wrap a database row as a Job, caching its short_id."""
+        self._id_cache.put(row["short_id"], row["id"])
+        return Job.from_row(row)
+
+
+class JobStore(_JobStoreBase):
+    """
+    Manages jobs with full observability.
 
     Provides methods for creating, updating, querying, and managing
-    the lifecycle of jobs in the Persona agent system.
+    the lifecycle of jobs in the Persona agent system. Storage is delegated
+    to a StorageBackend: Supabase by default, or a local SQLite database
+    when PERSONA_BACKEND=sqlite.
     """
 
-    def __init__(self, supabase_url: str = None, supabase_key: str = None):
+    def __init__(
+        self,
+        supabase_url: str = None,
+        supabase_key: str = None,
+        id_cache_size: int = 1024,
+        backend: StorageBackend = None,
+        job_types: JobTypeRegistry = None,
+        scheduling: SchedulingPolicy = None
+    ):
         """
         Initialize JobStore.
 
         Args:
             supabase_url: Supabase project URL (defaults to SUPABASE_URL env var)
             supabase_key: Supabase service role key (defaults to SUPABASE_KEY env var)
+            id_cache_size: Maximum number of short_id -> UUID mappings to cache
+            backend: Storage backend to use instead of the one selected by
+                PERSONA_BACKEND (supabase or sqlite)
+            job_types: Registry used to validate new jobs (default: default_registry())
+            scheduling: Weights and aging used when claiming (default: default_policy())
         """
+        if backend is None:
+            backend = self._backend_from_env(supabase_url, supabase_key)
+
+        self.backend = backend
+        # Raw Supabase client for Supabase-only features (None for SQLite)
+        self.client: Optional[Client] = getattr(backend, "client", None)
+        self.hostname = os.uname().nodename
+        self.job_types = job_types or default_registry()
+        self.scheduling = scheduling or default_policy()
+        self._id_cache = _IdCache(id_cache_size)
+
+    @staticmethod
+    def _backend_from_env(supabase_url: str = None, supabase_key: str = None) -> StorageBackend:
+        """Build the storage backend selected by PERSONA_BACKEND."""
+        kind = os.environ.get("PERSONA_BACKEND", "supabase").lower()
+
+        if kind == "sqlite":
+            path = os.environ.get(
+                "PERSONA_SQLITE_PATH",
+                os.path.expanduser("~/.persona/persona.db")
+            )
+            return SqliteBackend(path)
+
+        if kind != "supabase":
+            raise ValueError(f"Unknown PERSONA_BACKEND: {kind}")
+
         url = supabase_url or os.environ.get("SUPABASE_URL")
         key = supabase_key or os.environ.get("SUPABASE_KEY")
 
         if not url or not key:
             raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set")
 
-        self.client: Client = create_client(url, key)
-        self.hostname = os.uname().nodename
+        return SupabaseBackend(create_client(url, key))
 
     def create_job(
         self,
@@ -83,7 +615,8 @@ class JobStore:
         delegated_by: str = None,
         source_file: str = None,
         source_line: int = None,
-        tags: list[str] = None
+        tags: list[str] = None,
+        priority: int = None
     ) -> Job:
         """
         Create a new job in the queue.
@@ -97,25 +630,61 @@ class JobStore:
             source_file: Source file that triggered this job
             source_line: Line number in source file
             tags: Tags for categorization
+            priority: Queue priority within the agent, higher first
+                (default: the job type's priority)
 
         Returns:
             Created Job object
+
+        Raises:
+            InvalidJobError: If the payload does not match the job type's schema
         """
-        data = {
-            "job_type": job_type,
-            "payload": payload,
-            "status": JobStatus.PENDING.value,
-            "hostname": self.hostname,
-            "assigned_to": assigned_to,
-            "parent_job_id": parent_id,
-            "delegated_by": delegated_by,
-            "source_file": source_file,
-            "source_line": source_line,
-            "tags": tags or []
-        }
+        data = self._build_job_row(
+            job_type,
+            payload,
+            assigned_to=assigned_to,
+            parent_id=parent_id,
+            delegated_by=delegated_by,
+            source_file=source_file,
+            source_line=source_line,
+            tags=tags,
+            priority=priority
+        )
+
+        return self._row_to_job(self.backend.insert_job(data))
+
+    def create_jobs(self, specs: list[dict], chunk_size: int = 500) -> list[Job]:
+        """
+        Create many jobs with one insert request per chunk.
+
+        Each spec is a dict of create_job keyword arguments. IDs are assigned
+        client-side so the returned jobs can be matched back to their specs
+        regardless of the order the database returns rows in.
+
+        Args:
+            specs: Job specs (job_type, payload, assigned_to, parent_id, ...)
+            chunk_size: Maximum number of rows per insert request
 
-        result = self.client.table("jobs").insert(data).execute()
-        return self._row_to_job(result.data[0])
+        Returns:
+            Created Job objects, in the same order as specs
+
+        Raises:
+            InvalidJobError: If any payload does not match its job type's schema
+                (nothing is inserted)
+        """
+        rows = []
+        for spec in specs:
+            row = self._build_job_row(**spec)
+            row["id"] = str(uuid.uuid4())
+            rows.append(row)
+
+        jobs = []
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            created = {r["id"]: r for r in self.backend.insert_jobs(chunk)}
+            jobs.extend(self._row_to_job(created[row["id"]]) for row in chunk)
+
+        return jobs
 
     def get_job(self, job_id: str) -> Optional[Job]:
         """
@@ -128,29 +697,62 @@ class JobStore:
             Job object if found, None otherwise
         """
         # Determine if this is a UUID (36 chars with dashes) or short_id (8 chars)
-        # UUID format: xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx
-        is_uuid = len(job_id) == 36 and job_id.count('-') == 4
-
-        if is_uuid:
-            result = self.client.table("jobs").select("*").eq("id", job_id).execute()
-        else:
-            result = self.client.table("jobs").select("*").eq("short_id", job_id).execute()
+        column = "id" if _is_uuid(job_id) else "short_id"
+        rows = self.backend.select_jobs([(column, "eq", job_id)])
 
-        if result.data:
-            return self._row_to_job(result.data[0])
+        if rows:
+            return self._row_to_job(rows[0])
         return None
 
-    def update_job(self, job_id: str, max_retries: int = 3, **updates) -> Job:
+    def resolve_id(self, job_id: str) -> Optional[str]:
         """
-        Update job fields with optimistic locking to prevent TOCTOU races.
+        Resolve a job ID or short_id to the job's UUID.
 
-        Uses updated_at field for optimistic concurrency control. If another
-        process updates the job between our read and write, we'll detect it
-        and retry with fresh data.
+        UUIDs are returned as-is without a lookup. Short IDs are served from
+        the id cache when possible, otherwise resolved with a narrow query
+        and cached.
+
+        Args:
+            job_id: Full UUID or 8-character short ID
+
+        Returns:
+            Job UUID, or None if no job has this short_id
+        """
+        if _is_uuid(job_id):
+            return job_id
+
+        job_uuid = self._id_cache.get(job_id)
+        if job_uuid:
+            return job_uuid
+
+        rows = self.backend.select_jobs([("short_id", "eq", job_id)], columns="id, short_id")
+        if not rows:
+            return None
+
+        job_uuid = rows[0]["id"]
+        self._id_cache.put(job_id, job_uuid)
+        return job_uuid
+
+    def update_job(
+        self,
+        job_id: str,
+        max_retries: int = 3,
+        expected_version: int = None,
+        **updates
+    ) -> Job:
+        """
+        Update job fields with a single transition_job round trip.
+
+        The patch is applied atomically by the transition_job database
+        function, which returns the new row. Without expected_version the
+        patch applies unconditionally. With expected_version it is a
+        compare-and-set: if another process changed the job first, we back
+        off, pick up the current version and retry.
 
         Args:
             job_id: Job ID (full UUID or short ID)
-            max_retries: Maximum number of retry attempts on conflict
+            max_retries: Maximum number of attempts on version conflict
+            expected_version: Only apply if the job is still at this version
             **updates: Fields to update
 
         Returns:
@@ -164,36 +766,29 @@ class JobStore:
         if 'status' in updates and isinstance(updates['status'], JobStatus):
             updates['status'] = updates['status'].value
 
-        for attempt in range(max_retries):
-            # Get the current job state
-            job = self.get_job(job_id)
-            if not job:
-                raise ValueError(f"Job {job_id} not found")
-
-            # Always update the updated_at timestamp
-            new_updated_at = datetime.now(timezone.utc).isoformat()
-            updates['updated_at'] = new_updated_at
+        job_uuid = self.resolve_id(job_id)
+        if not job_uuid:
+            raise ValueError(f"Job {job_id} not found")
 
-            # Build query with optimistic lock
-            query = self.client.table("jobs").update(updates).eq("id", job.id)
+        for attempt in range(max_retries):
+            row = self.backend.transition_job(job_uuid, expected_version, updates)
 
-            # If the job has an updated_at, use it for optimistic locking
-            # This ensures no one else modified the row since we read it
-            if job.updated_at:
-                query = query.eq("updated_at", job.updated_at)
+            if row:
+                return self._row_to_job(row)
 
-            result = query.execute()
+            # No row returned. Without a version check that can only mean
+            # the job doesn't exist; with one it may be a real conflict.
+            if expected_version is None:
+                raise ValueError(f"Job {job_id} not found")
 
-            if result.data:
-                return self._row_to_job(result.data[0])
+            current = self.get_job(job_uuid)
+            if not current:
+                raise ValueError(f"Job {job_id} not found")
 
-            # No data returned - could be a conflict (another process updated)
-            # Retry with fresh data
             if attempt < max_retries - 1:
-                import time
-                # Small backoff before retry
+                # Small backoff before retrying against the current version
                 time.sleep(0.1 * (attempt + 1))
-                continue
+                expected_version = current.version
 
         # Exhausted retries - raise specific conflict error
         raise UpdateConflictError(
@@ -211,13 +806,7 @@ class JobStore:
         Returns:
             Updated Job object
         """
-        return self.update_job(
-            job_id,
-            status=JobStatus.RUNNING,
-            pid=pid,
-            started_at=datetime.now(timezone.utc).isoformat(),
-            last_heartbeat=datetime.now(timezone.utc).isoformat()
-        )
+        return self.update_job(job_id, **self._start_patch(pid))
 
     def heartbeat(self, job_id: str) -> None:
         """
@@ -226,32 +815,45 @@ class JobStore:
         Args:
             job_id: Job ID
         """
-        job = self.get_job(job_id)
-        if job:
-            self.client.table("jobs").update({
-                "last_heartbeat": datetime.now(timezone.utc).isoformat()
-            }).eq("id", job.id).execute()
+        job_uuid = self.resolve_id(job_id)
+        if job_uuid:
+            self.backend.update_jobs([("id", "eq", job_uuid)], self._heartbeat_values())
+
+    def heartbeat_many(self, job_ids: list[str]) -> None:
+        """
+        Update the heartbeat timestamp for several jobs in one request.
+
+        Args:
+            job_ids: Full job UUIDs
+        """
+        if not job_ids:
+            return
 
-    def complete_job(self, job_id: str, result: dict = None) -> Job:
+        self.backend.update_jobs([("id", "in", list(job_ids))], self._heartbeat_values())
+
+    def complete_job(self, job_id: str, result: dict = None, expected_version: int = None) -> Optional[Job]:
         """
         Mark a job as completed.
 
         Args:
             job_id: Job ID
             result: Optional result data to store
+            expected_version: Version the caller last read; if given, only
+                complete the job while it is still running (see _finish_running)
 
         Returns:
-            Updated Job object
+            Updated Job object, or None if the job's outcome was already recorded
         """
-        return self.update_job(
-            job_id,
-            status=JobStatus.COMPLETED,
-            completed_at=datetime.now(timezone.utc).isoformat(),
-            exit_code=0,
-            result=result
-        )
+        return self._finish_running(job_id, expected_version, self._complete_patch(result))
 
-    def fail_job(self, job_id: str, error: str, exit_code: int = 1) -> Job:
+    def fail_job(
+        self,
+        job_id: str,
+        error: str,
+        exit_code: int = 1,
+        result: dict = None,
+        expected_version: int = None
+    ) -> Optional[Job]:
         """
         Mark a job as failed.
 
@@ -259,33 +861,107 @@ class JobStore:
             job_id: Job ID
             error: Error message
             exit_code: Exit code (default 1)
+            result: Optional result data to store (existing result kept if None)
+            expected_version: Version the caller last read; if given, only
+                fail the job while it is still running (see _finish_running)
 
         Returns:
-            Updated Job object
+            Updated Job object, or None if the job's outcome was already recorded
         """
-        return self.update_job(
-            job_id,
-            status=JobStatus.FAILED,
-            completed_at=datetime.now(timezone.utc).isoformat(),
-            exit_code=exit_code,
-            error_message=error
-        )
+        return self._finish_running(job_id, expected_version, self._fail_patch(error, exit_code, result))
 
-    def cancel_job(self, job_id: str) -> Job:
+    def cancel_job(self, job_id: str, expected_version: int = None) -> Optional[Job]:
         """
         Cancel a job.
 
         Args:
             job_id: Job ID
+            expected_version: Version the caller last read; if given, only
+                cancel the job while it is still running (see _finish_running)
 
         Returns:
-            Updated Job object
+            Updated Job object, or None if the job's outcome was already recorded
         """
-        return self.update_job(
-            job_id,
-            status=JobStatus.CANCELLED,
-            completed_at=datetime.now(timezone.utc).isoformat()
-        )
+        return self._finish_running(job_id, expected_version, self._cancel_patch())
+
+    def _finish_running(self, job_id: str, expected_version: Optional[int], patch: dict) -> Optional[Job]:
+        """
+        Apply a terminal patch, as a compare-and-set when a version is given.
+
+        A conflict means the job changed after the caller read it. If it is
+        no longer running, another process (kill_job, the reaper, a cancel)
+        already recorded its outcome and that outcome is kept. If it is
+        still running, the change was something else, such as a progress
+        update, and the patch is retried against the current version.
+
+        Args:
+            job_id: Job ID
+            expected_version: Version the caller last read, or None to apply
+                the patch unconditionally
+            patch: Terminal status patch
+
+        Returns:
+            Updated Job object, or None if the outcome was already recorded
+
+        Raises:
+            UpdateConflictError: If the running job keeps changing
+        """
+        if expected_version is None:
+            return self.update_job(job_id, **patch)
+
+        for _ in range(3):
+            try:
+                return self.update_job(job_id, max_retries=1, expected_version=expected_version, **patch)
+            except UpdateConflictError:
+                current = self.get_job(job_id)
+                if not current or current.status != JobStatus.RUNNING:
+                    return None
+                expected_version = current.version
+
+        raise UpdateConflictError(f"Update conflict: running job {job_id} kept changing")
+
+    def requeue_job(self, job_id: str) -> Optional[Job]:
+        """
+        Put a running job back in the queue so another worker can claim it.
+
+        Only applies while the job is still running at the version read
+        here, so a job cancelled or finished meanwhile is left alone.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            Updated Job object, or None if the job is no longer running
+        """
+        job = self.get_job(job_id)
+        if not job or job.status != JobStatus.RUNNING:
+            return None
+        try:
+            return self.update_job(job.id, max_retries=1, expected_version=job.version, **self._requeue_patch())
+        except UpdateConflictError:
+            return None
+
+    def mark_hung(self, job_id: str, reason: str) -> Optional[Job]:
+        """
+        Mark a running job as hung.
+
+        Like requeue_job, only applies while the job is still running at the
+        version read here, so a job that finished meanwhile keeps its outcome.
+
+        Args:
+            job_id: Job ID
+            reason: Stored as the job's error message
+
+        Returns:
+            Updated Job object, or None if the job is no longer running
+        """
+        job = self.get_job(job_id)
+        if not job or job.status != JobStatus.RUNNING:
+            return None
+        try:
+            return self.update_job(job.id, max_retries=1, expected_version=job.version, **self._hung_patch(reason))
+        except UpdateConflictError:
+            return None
 
     def cancel_all_pending(self, reason: str = "Batch cancelled") -> int:
         """
@@ -298,13 +974,13 @@ class JobStore:
             Number of jobs cancelled
         """
         now = datetime.now(timezone.utc).isoformat()
-        result = self.client.table("jobs").update({
+        rows = self.backend.update_jobs([("status", "eq", JobStatus.PENDING.value)], {
             "status": JobStatus.CANCELLED.value,
             "completed_at": now,
             "error_message": reason
-        }).eq("status", JobStatus.PENDING.value).execute()
+        })
 
-        return len(result.data) if result.data else 0
+        return len(rows)
 
     def log_batch(self, job_id: str, messages: list[str], level: str = "info") -> None:
         """
@@ -315,23 +991,16 @@ class JobStore:
             messages: List of log messages
             level: Log level for all messages
         """
-        job = self.get_job(job_id)
-        if not job or not messages:
+        if not messages:
             return
 
-        entries = [
-            {
-                "job_id": job.id,
-                "level": level,
-                "message": msg,
-                "metadata": {}
-            }
-            for msg in messages
-        ]
+        job_uuid = self.resolve_id(job_id)
+        if not job_uuid:
+            return
 
-        self.client.table("job_logs").insert(entries).execute()
+        self.backend.insert_logs(self._log_rows(job_uuid, messages, level))
 
-    def get_pending_jobs(self, assigned_to: str = None, limit: int = 10) -> list[Job]:
+    def get_pending_jobs(self, assigned_to: str = None, limit: int = 10) -> list[JobSummary]:
         """
         Get pending jobs, optionally filtered by agent.
 
@@ -340,33 +1009,229 @@ class JobStore:
             limit: Maximum number of jobs to return
 
         Returns:
-            List of pending jobs
+            List of pending job summaries (use get_job for the full row)
         """
-        query = self.client.table("jobs").select("*").eq("status", "pending")
+        rows = self.backend.select_jobs(
+            self._pending_filters(assigned_to), columns=_JOB_SUMMARY_SELECT, order="created_at", limit=limit
+        )
+        return [self._row_to_summary(r) for r in rows]
 
-        if assigned_to:
-            query = query.eq("assigned_to", assigned_to)
+    def claim_jobs(
+        self,
+        worker_id: str,
+        assigned_to: str = None,
+        limit: int = 1,
+        exclude_types: list[str] = None
+    ) -> list[Job]:
+        """
+        Atomically claim pending jobs for a worker.
+
+        Uses the claim_jobs database function, which locks rows with
+        FOR UPDATE SKIP LOCKED and flips them to running in the same
+        statement, so concurrent workers never receive the same job.
+        Jobs are picked by the store's SchedulingPolicy: weighted fair
+        shares across agents, then aged priority and age within an agent.
 
-        result = query.order("created_at").limit(limit).execute()
-        return [self._row_to_job(r) for r in result.data]
+        Args:
+            worker_id: Identifier of the claiming worker
+            assigned_to: Only claim jobs for this agent (None = any agent)
+            limit: Maximum number of jobs to claim
+            exclude_types: Job types to leave pending (e.g. classes at their limit)
 
-    def get_running_jobs(self, assigned_to: str = None) -> list[Job]:
+        Returns:
+            List of claimed jobs, now in running status
+        """
+        if limit <= 0:
+            return []
+
+        rows = self.backend.claim_jobs(worker_id, self.hostname, assigned_to, limit, exclude_types, self.scheduling)
+        return [self._row_to_job(r) for r in rows]
+
+    def get_running_jobs(
+        self,
+        assigned_to: str = None,
+        started_before: str = None,
+        worker_id: str = None
+    ) -> list[JobSummary]:
         """
         Get all currently running jobs.
 
         Args:
             assigned_to: Optional agent ID to filter by
+            started_before: Optional ISO timestamp; only jobs started earlier
+            worker_id: Optional worker to filter by
 
         Returns:
-            List of running jobs
+            List of running job summaries (use get_job for the full row)
         """
-        query = self.client.table("jobs").select("*").eq("status", "running")
+        filters = self._running_filters(assigned_to, started_before, worker_id)
+        rows = self.backend.select_jobs(filters, columns=_JOB_SUMMARY_SELECT)
+        return [self._row_to_summary(r) for r in rows]
 
-        if assigned_to:
-            query = query.eq("assigned_to", assigned_to)
+    def get_finished_jobs(self, statuses: list[str], limit: int = 20) -> list[JobSummary]:
+        """
+        Get recently finished jobs, newest completion first.
+
+        Args:
+            statuses: Terminal statuses to include (e.g. ['completed', 'failed'])
+            limit: Maximum number of jobs to return
+
+        Returns:
+            List of job summaries (use get_job for the full row)
+        """
+        rows = self.backend.select_jobs(
+            self._status_filters(statuses), columns=_JOB_SUMMARY_SELECT, order="completed_at", desc=True, limit=limit
+        )
+        return [self._row_to_summary(r) for r in rows]
+
+    def count_jobs(self, status=None, created_before: str = None) -> int:
+        """
+        Count jobs, optionally by status and age.
+
+        Args:
+            status: Status value, or list of status values
+            created_before: Optional ISO timestamp; only jobs created earlier
 
-        result = query.execute()
-        return [self._row_to_job(r) for r in result.data]
+        Returns:
+            Number of matching jobs
+        """
+        return self.backend.count_jobs(self._count_filters(status, created_before))
+
+    def cleanup_old_jobs(self, days_to_keep: int = 30) -> int:
+        """
+        Delete completed and cancelled jobs older than days_to_keep.
+
+        Args:
+            days_to_keep: Keep jobs created within this many days
+
+        Returns:
+            Number of jobs deleted
+        """
+        return self.backend.cleanup_old_jobs(days_to_keep)
+
+    def iter_finished_job_timings(
+        self,
+        since: str,
+        assigned_to: str = None,
+        page_size: int = DEFAULT_PAGE_SIZE
+    ) -> Iterator[dict]:
+        """
+        Stream start/finish timestamps of jobs that finished since a point in time.
+
+        Args:
+            since: ISO timestamp; only jobs completed at or after it
+            assigned_to: Optional agent ID to filter by
+            page_size: Rows fetched per request
+
+        Yields:
+            Dicts with assigned_to, started_at, completed_at, status
+        """
+        yield from self._iter_pages(
+            "jobs",
+            self._timing_filters(since, assigned_to),
+            ("created_at", "id"),
+            columns="id, created_at, assigned_to, started_at, completed_at, status",
+            page_size=page_size
+        )
+
+    def iter_jobs(
+        self,
+        filters: list[Filter] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        summary: bool = False
+    ) -> Iterator:
+        """
+        Stream jobs oldest first using keyset pagination on (created_at, id).
+
+        Only one page is held in memory at a time, so this is safe for
+        exporting or aggregating the whole history.
+
+        Args:
+            filters: (column, op, value) filters, e.g. [("status", "eq", "failed")]
+            page_size: Rows fetched per request
+            summary: Yield JobSummary projections instead of full Job rows
+
+        Yields:
+            Job (or JobSummary) objects
+        """
+        columns = _JOB_SUMMARY_SELECT if summary else "*"
+        convert = self._row_to_summary if summary else self._row_to_job
+
+        for row in self._iter_pages("jobs", filters, ("created_at", "id"), columns, page_size):
+            yield convert(row)
+
+    def iter_logs(
+        self,
+        job_id: str = None,
+        since: str = None,
+        page_size: int = DEFAULT_PAGE_SIZE
+    ) -> Iterator[dict]:
+        """
+        Stream log entries oldest first using keyset pagination on (timestamp, id).
+
+        Args:
+            job_id: Optional job ID or short ID to restrict to
+            since: Optional ISO timestamp; only entries at or after it
+            page_size: Rows fetched per request
+
+        Yields:
+            Log entry dicts
+        """
+        filters = []
+        if job_id:
+            job_uuid = self.resolve_id(job_id)
+            if not job_uuid:
+                return
+            filters.append(("job_id", "eq", job_uuid))
+        if since:
+            filters.append(("timestamp", "gte", since))
+
+        yield from self._iter_pages("job_logs", filters, ("timestamp", "id"), page_size=page_size)
+
+    def iter_events(
+        self,
+        job_id: str = None,
+        event_type: str = None,
+        since: str = None,
+        page_size: int = DEFAULT_PAGE_SIZE
+    ) -> Iterator[dict]:
+        """
+        Stream audit events oldest first using keyset pagination on (timestamp, id).
+
+        Args:
+            job_id: Optional job ID filter
+            event_type: Optional event type filter
+            since: Optional ISO timestamp; only events at or after it
+            page_size: Rows fetched per request
+
+        Yields:
+            Event dicts
+        """
+        filters = self._event_filters(job_id, event_type, since)
+        yield from self._iter_pages("events", filters, ("timestamp", "id"), page_size=page_size)
+
+    def _iter_pages(
+        self,
+        table: str,
+        filters: list[Filter],
+        order: tuple[str, ...],
+        columns: str = "*",
+        page_size: int = DEFAULT_PAGE_SIZE
+    ) -> Iterator[dict]:
+        """Yield rows page by page, resuming each page after the previous page's last key."""
+        if page_size <= 0:
+            raise ValueError("page_size must be positive")
+
+        after = None
+        while True:
+            rows = self.backend.select_page(
+                table, filters, order, after=after, columns=columns, limit=page_size
+            )
+            yield from rows
+
+            if len(rows) < page_size:
+                return
+            after = tuple(rows[-1][column] for column in order)
 
     def get_hung_jobs(self, timeout_seconds: int = 300) -> list[Job]:
         """
@@ -378,8 +1243,8 @@ class JobStore:
         Returns:
             List of hung jobs
         """
-        result = self.client.rpc("detect_hung_jobs", {"timeout_seconds": timeout_seconds}).execute()
-        return [self._row_to_job(r) for r in result.data]
+        rows = self.backend.detect_hung_jobs(timeout_seconds)
+        return [self._row_to_job(r) for r in rows]
 
     def get_job_tree(self, job_id: str) -> list[Job]:
         """
@@ -391,12 +1256,12 @@ class JobStore:
         Returns:
             List of jobs in the tree
         """
-        job = self.get_job(job_id)
-        if not job:
+        job_uuid = self.resolve_id(job_id)
+        if not job_uuid:
             return []
 
-        result = self.client.rpc("get_job_tree", {"job_uuid": job.id}).execute()
-        return [self._row_to_job(r) for r in result.data]
+        rows = self.backend.get_job_tree(job_uuid)
+        return [self._row_to_job(r) for r in rows]
 
     def log(self, job_id: str, level: str, message: str, metadata: dict = None):
         """
@@ -408,14 +1273,9 @@ class JobStore:
             message: Log message
             metadata: Optional metadata dict
         """
-        job = self.get_job(job_id)
-        if job:
-            self.client.table("job_logs").insert({
-                "job_id": job.id,
-                "level": level,
-                "message": message,
-                "metadata": metadata or {}
-            }).execute()
+        job_uuid = self.resolve_id(job_id)
+        if job_uuid:
+            self.backend.insert_logs(self._log_rows(job_uuid, [message], level, metadata))
 
     def get_logs(self, job_id: str, limit: int = 100) -> list[dict]:
         """
@@ -428,14 +1288,40 @@ class JobStore:
         Returns:
             List of log entries
         """
-        job = self.get_job(job_id)
-        if not job:
+        job_uuid = self.resolve_id(job_id)
+        if not job_uuid:
+            return []
+
+        return self.backend.select_logs(job_uuid, limit)
+
+    def record_metrics(self, rows: list[dict]) -> None:
+        """
+        Insert downsampled resource usage rows in one request.
+
+        Args:
+            rows: Rows with job_id (full UUID), samples, cpu_percent,
+                cpu_percent_max, rss_bytes, io_read_bytes, io_write_bytes,
+                children and optionally sampled_at
+        """
+        if rows:
+            self.backend.insert_job_metrics(rows)
+
+    def get_metrics(self, job_id: str, limit: int = 100) -> list[dict]:
+        """
+        Get resource usage rows for a job.
+
+        Args:
+            job_id: Job ID
+            limit: Maximum number of rows to return
+
+        Returns:
+            Metric rows, newest first
+        """
+        job_uuid = self.resolve_id(job_id)
+        if not job_uuid:
             return []
 
-        result = self.client.table("job_logs").select("*").eq(
-            "job_id", job.id
-        ).order("timestamp", desc=True).limit(limit).execute()
-        return result.data
+        return self.backend.select_job_metrics(job_uuid, limit)
 
     def get_jobs_by_type(self, job_type: str, limit: int = 50) -> list[Job]:
         """
@@ -448,10 +1334,10 @@ class JobStore:
         Returns:
             List of jobs
         """
-        result = self.client.table("jobs").select("*").eq(
-            "job_type", job_type
-        ).order("created_at", desc=True).limit(limit).execute()
-        return [self._row_to_job(r) for r in result.data]
+        rows = self.backend.select_jobs(
+            [("job_type", "eq", job_type)], order="created_at", desc=True, limit=limit
+        )
+        return [self._row_to_job(r) for r in rows]
 
     def get_jobs_by_source(self, source_file: str, limit: int = 50) -> list[Job]:
         """
@@ -464,33 +1350,69 @@ class JobStore:
         Returns:
             List of jobs
         """
-        result = self.client.table("jobs").select("*").eq(
-            "source_file", source_file
-        ).order("created_at", desc=True).limit(limit).execute()
-        return [self._row_to_job(r) for r in result.data]
-
-    def _row_to_job(self, row: dict) -> Job:
-        """Convert database row to Job object."""
-        return Job(
-            id=row["id"],
-            short_id=row["short_id"],
-            job_type=row["job_type"],
-            payload=row["payload"],
-            status=JobStatus(row["status"]),
-            pid=row.get("pid"),
-            hostname=row.get("hostname"),
-            created_at=row.get("created_at"),
-            started_at=row.get("started_at"),
-            completed_at=row.get("completed_at"),
-            updated_at=row.get("updated_at"),
-            last_heartbeat=row.get("last_heartbeat"),
-            exit_code=row.get("exit_code"),
-            error_message=row.get("error_message"),
-            result=row.get("result"),
-            parent_job_id=row.get("parent_job_id"),
-            delegated_by=row.get("delegated_by"),
-            assigned_to=row.get("assigned_to"),
-            source_file=row.get("source_file"),
-            source_line=row.get("source_line"),
-            tags=row.get("tags", [])
+        rows = self.backend.select_jobs(
+            [("source_file", "eq", source_file)], order="created_at", desc=True, limit=limit
         )
+        return [self._row_to_job(r) for r in rows]
+
+    def publish_event(
+        self,
+        event_type: str,
+        job_id: str,
+        source: str = "python",
+        trace_id: str = "",
+        data: dict = None
+    ) -> dict:
+        """
+        Publish a job lifecycle event to the event queue and audit table.
+
+        Args:
+            event_type: Event type (e.g. 'job.started')
+            job_id: Job ID or short ID the event refers to
+            source: Event source ('typescript', 'python', 'bash', 'claude')
+            trace_id: Optional trace ID for correlating events
+            data: Event-specific data
+
+        Returns:
+            Backend result (msg_id and event)
+        """
+        return self.backend.publish_event(event_type, job_id, source, trace_id, data or {})
+
+    def read_events(self, qty: int = 10, visibility_timeout: int = 30) -> list[dict]:
+        """
+        Read events from the job event queue.
+
+        Args:
+            qty: Maximum number of events to read
+            visibility_timeout: Seconds to hide read events from other consumers
+
+        Returns:
+            List of queue messages
+        """
+        return self.backend.read_events(qty, visibility_timeout)
+
+    def delete_event(self, msg_id: int) -> bool:
+        """
+        Delete a processed event from the queue.
+
+        Args:
+            msg_id: Message ID from read_events
+
+        Returns:
+            True if the message was deleted
+        """
+        return self.backend.delete_event(msg_id)
+
+    def get_events(self, job_id: str = None, event_type: str = None, limit: int = 50) -> list[dict]:
+        """
+        Query the events audit table, newest first.
+
+        Args:
+            job_id: Optional job ID filter
+            event_type: Optional event type filter
+            limit: Maximum events to return
+
+        Returns:
+            List of events
+        """
+        return self.backend.select_events(self._event_filters(job_id, event_type), limit)
@@ -0,0 +1,537 @@
+"""Registry of job types: payload schemas, prompt templates and commands.
+
+Each job type declares a pydantic payload model, a prompt template (sent to
+Claude) or a command template, and defaults for model, timeout and
+concurrency class. Templates are parsed once when the type is loaded, and
+payloads are validated when a job is created rather than when it starts.
+
+Built-in types are defined here. More can be added by installed packages
+through the `persona.job_types` entry point group, or as YAML files in
+$PERSONA_ROOT/config/job_types (PERSONA_JOB_TYPES_DIR). Later sources
+replace earlier ones with the same name.
+"""
+
+import os
+import string
+from collections.abc import Mapping
+from dataclasses import dataclass
+from functools import lru_cache
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
+
+import yaml
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model
+
+if TYPE_CHECKING:
+    from .job_store import Job
+
+ENTRY_POINT_GROUP = "persona.job_types"
+
+# Names a template may start a field with
+TEMPLATE_ROOTS = frozenset({"job", "payload", "vault_path", "persona_root", "business"})
+
+# Payload field types allowed in YAML job type files
+_FIELD_TYPES = {"str": str, "int": int, "float": float, "bool": bool, "dict": dict, "list": list, "any": Any}
+
+_YAML_KEYS = {"name", "description", "payload", "prompt", "command", "model", "timeout", "concurrency", "priority"}
+
+
+class InvalidJobError(ValueError):
+    """Raised when a job's payload does not match its job type's schema."""
+    pass
+
+
+class PromptTemplate:
+    """
+    A str.format-style template parsed once, then rendered per job.
+
+    Fields are dotted paths starting at one of TEMPLATE_ROOTS, e.g.
+    `{payload.question}` or `{job.short_id}`. Mapping keys and attributes
+    are both followed; a missing value renders as an empty string.
+    """
+
+    __slots__ = ("source", "_parts")
+
+    def __init__(self, source: str):
+        """
+        Parse a template.
+
+        Args:
+            source: Template text
+
+        Raises:
+            ValueError: If the template is malformed or uses an unknown field
+        """
+        self.source = source
+        self._parts: list[tuple[str, Optional[tuple[str, ...]], Optional[str], str]] = []
+
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            if field is None:
+                self._parts.append((literal, None, None, ""))
+                continue
+            path = tuple(field.split("."))
+            if "[" in field or path[0] not in TEMPLATE_ROOTS or not all(path):
+                raise ValueError(f"Unknown template field {{{field}}}")
+            self._parts.append((literal, path, conversion, spec or ""))
+
+    @property
+    def fields(self) -> list[str]:
+        """Dotted field names used by the template."""
+        return [".".join(path) for _, path, _, _ in self._parts if path]
+
+    def render(self, context: dict) -> str:
+        """
+        Fill in the template.
+
+        Args:
+            context: Values for the template roots
+
+        Returns:
+            Rendered text
+        """
+        out = []
+        for literal, path, conversion, spec in self._parts:
+            out.append(literal)
+            if path is None:
+                continue
+
+            value = context.get(path[0])
+            for name in path[1:]:
+                if value is None:
+                    break
+                value = value.get(name) if isinstance(value, Mapping) else getattr(value, name, None)
+
+            if value is None:
+                continue
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "s":
+                value = str(value)
+            out.append(format(value, spec))
+        return "".join(out)
+
+
+class _Payload(BaseModel):
+    """Base for payload models. Undeclared keys (model, timeout, ...) are kept."""
+    model_config = ConfigDict(extra="allow")
+
+
+@dataclass(frozen=True)
+class JobType:
+    """
+    Definition of one job type.
+
+    Exactly one of prompt, command or builder says what to run: a prompt is
+    sent to Claude, a command is a list of templated arguments, and a
+    builder is a function (job, context) -> command for plugins.
+    priority is the default queue priority of new jobs (higher runs first).
+    """
+    name: str
+    payload_model: type[BaseModel] = _Payload
+    prompt: Optional[PromptTemplate] = None
+    command: Optional[tuple[PromptTemplate, ...]] = None
+    builder: Optional[Callable[["Job", dict], list[str]]] = None
+    model: Optional[str] = None
+    timeout: Optional[float] = None
+    concurrency: str = "default"
+    priority: int = 0
+    description: str = ""
+
+    def __post_init__(self):
+        if sum(x is not None for x in (self.prompt, self.command, self.builder)) != 1:
+            raise ValueError(f"Job type '{self.name}' needs exactly one of prompt, command or builder")
+        if self.timeout is not None and self.timeout <= 0:
+            raise ValueError(f"Job type '{self.name}' timeout must be positive")
+
+    def validate(self, payload: Optional[dict]) -> dict:
+        """
+        Check a payload against the type's schema.
+
+        Args:
+            payload: Job payload
+
+        Returns:
+            Payload with defaults filled in
+
+        Raises:
+            InvalidJobError: If the payload does not match
+        """
+        try:
+            return self.payload_model.model_validate(payload or {}).model_dump()
+        except ValidationError as e:
+            problems = "; ".join(
+                f"{'.'.join(str(p) for p in err['loc']) or 'payload'}: {err['msg']}" for err in e.errors()
+            )
+            raise InvalidJobError(f"Invalid payload for job type '{self.name}': {problems}") from None
+
+    def build_command(self, job: "Job", context: dict) -> list[str]:
+        """
+        Build the command for a job of this type.
+
+        Args:
+            job: Job to run
+            context: vault_path, persona_root and business
+
+        Returns:
+            Command list suitable for subprocess.Popen
+
+        Raises:
+            InvalidJobError: If the job's payload does not match the schema
+        """
+        context = {**context, "job": job, "payload": self.validate(job.payload)}
+
+        if self.builder is not None:
+            return self.builder(job, context)
+        if self.command is not None:
+            return [arg.render(context) for arg in self.command]
+
+        model = context["payload"].get("model") or self.model or os.environ.get('CLAUDE_MODEL', 'opus')
+        return claude_command(self.prompt.render(context), model)
+
+
+def claude_command(prompt: str, model: str) -> list[str]:
+    """
+    Build a Claude CLI command.
+
+    Args:
+        prompt: Prompt to send to Claude
+        model: Model name
+
+    Returns:
+        Command list
+    """
+    return [
+        "claude",
+        "-p", prompt,
+        "--output-format", "text",
+        "--max-turns", "20",
+        "--model", model,
+    ]
+
+
+class JobTypeRegistry:
+    """
+    Job types by name.
+
+    Jobs whose type is not registered use the `fallback` type, which sends
+    the payload's `prompt` to Claude and validates nothing.
+    """
+
+    def __init__(self, types: Iterable[JobType] = (), fallback: JobType = None):
+        """
+        Initialize JobTypeRegistry.
+
+        Args:
+            types: Job types to register
+            fallback: Type used for unregistered job types (default: generic prompt)
+        """
+        self._types: dict[str, JobType] = {}
+        self.fallback = fallback or GENERIC
+        for job_type in types:
+            self.register(job_type)
+
+    def register(self, job_type: JobType, replace: bool = True) -> None:
+        """
+        Add a job type.
+
+        Args:
+            job_type: Type to add
+            replace: Allow replacing an existing type of the same name
+
+        Raises:
+            ValueError: If the name is taken and replace is False
+        """
+        if not replace and job_type.name in self._types:
+            raise ValueError(f"Job type '{job_type.name}' is already registered")
+        self._types[job_type.name] = job_type
+
+    def get(self, name: str) -> JobType:
+        """Get a job type, or the fallback if it is not registered."""
+        return self._types.get(name, self.fallback)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._types
+
+    def names(self) -> list[str]:
+        """Registered job type names, sorted."""
+        return sorted(self._types)
+
+    def in_classes(self, classes: set[str]) -> list[str]:
+        """Registered job types whose concurrency class is in classes."""
+        return sorted(name for name, t in self._types.items() if t.concurrency in classes)
+
+    def validate(self, name: str, payload: Optional[dict]) -> None:
+        """
+        Validate a new job's payload.
+
+        Raises:
+            InvalidJobError: If the payload does not match the type's schema
+        """
+        self.get(name).validate(payload)
+
+    @classmethod
+    def load(cls, directory: Path = None, plugins: bool = True) -> "JobTypeRegistry":
+        """
+        Build a registry from the built-in types, entry points and a YAML directory.
+
+        Args:
+            directory: Directory of *.yaml job type files (missing is fine)
+            plugins: Load the persona.job_types entry point group
+
+        Returns:
+            JobTypeRegistry
+
+        Raises:
+            ValueError: If a YAML file is malformed
+        """
+        registry = cls(BUILTIN_TYPES)
+
+        if plugins:
+            for job_type in _load_entry_points():
+                registry.register(job_type)
+
+        if directory is not None and Path(directory).is_dir():
+            for path in sorted(Path(directory).glob("*.y*ml")):
+                registry.register(load_job_type(path))
+
+        return registry
+
+
+def load_job_type(path: Path) -> JobType:
+    """
+    Load a job type from a YAML file.
+
+    The file has a `name`, a `prompt` or `command`, and optionally
+    `payload` (field name to type, or to a mapping with type, required,
+    default and description), `model`, `timeout`, `concurrency`,
+    `priority` and `description`.
+
+    Args:
+        path: YAML file
+
+    Returns:
+        JobType
+
+    Raises:
+        ValueError: If the file is malformed
+    """
+    path = Path(path)
+    data = yaml.safe_load(path.read_text())
+    if not isinstance(data, dict) or not data.get("name"):
+        raise ValueError(f"{path} must be a mapping with a name")
+
+    unknown = set(data) - _YAML_KEYS
+    if unknown:
+        raise ValueError(f"Unknown key(s) in {path}: {', '.join(sorted(unknown))}")
+
+    command = data.get("command")
+    if command is not None and (not isinstance(command, list) or not command):
+        raise ValueError(f"'command' in {path} must be a non-empty list")
+
+    try:
+        return JobType(
+            name=data["name"],
+            payload_model=_payload_model(data["name"], data.get("payload") or {}),
+            prompt=PromptTemplate(data["prompt"]) if data.get("prompt") is not None else None,
+            command=tuple(PromptTemplate(str(arg)) for arg in command) if command else None,
+            model=data.get("model"),
+            timeout=float(data["timeout"]) if data.get("timeout") is not None else None,
+            concurrency=data.get("concurrency") or "default",
+            priority=int(data.get("priority") or 0),
+            description=data.get("description") or "",
+        )
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"{path}: {e}") from None
+
+
+def _payload_model(name: str, fields: dict) -> type[BaseModel]:
+    """Build a payload model from a YAML field mapping."""
+    if not isinstance(fields, dict):
+        raise ValueError("'payload' must be a mapping of field names")
+
+    definitions = {}
+    for field, spec in fields.items():
+        if isinstance(spec, str):
+            spec = {"type": spec}
+        if not isinstance(spec, dict) or spec.get("type", "any") not in _FIELD_TYPES:
+            raise ValueError(f"Payload field '{field}' needs a type from {', '.join(_FIELD_TYPES)}")
+
+        annotation = _FIELD_TYPES[spec.get("type", "any")]
+        description = spec.get("description")
+        if "default" in spec:
+            definitions[field] = (annotation, Field(spec["default"], description=description))
+        elif spec.get("required", True):
+            definitions[field] = (annotation, Field(..., description=description))
+        else:
+            definitions[field] = (Optional[annotation], Field(None, description=description))
+
+    return create_model(f"{name.title().replace('_', '')}Payload", __base__=_Payload, **definitions)
+
+
+def _load_entry_points() -> list[JobType]:
+    """Load job types from installed plugins; broken plugins are skipped."""
+    found = []
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            obj = ep.load()
+            if callable(obj) and not isinstance(obj, JobType):
+                obj = obj()
+            found.extend([obj] if isinstance(obj, JobType) else list(obj))
+        except Exception as e:
+            print(f"Failed to load job types from {ep.name}: {e}")
+    return found
+
+
+def parse_class_limits(text: str) -> dict[str, int]:
+    """
+    Parse concurrency class limits such as "heavy=1,interactive=2".
+
+    Raises:
+        ValueError: If an entry is not name=positive integer
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        name, sep, value = item.partition("=")
+        if not sep or not name.strip() or not value.strip().isdigit() or int(value) <= 0:
+            raise ValueError(f"Invalid concurrency class limit: {item!r}")
+        limits[name.strip()] = int(value)
+    return limits
+
+
+@lru_cache(maxsize=None)
+def default_registry() -> JobTypeRegistry:
+    """
+    Get the process-wide registry, loaded on first use.
+
+    Reads YAML job types from PERSONA_JOB_TYPES_DIR, or config/job_types
+    under PERSONA_ROOT.
+    """
+    directory = os.environ.get("PERSONA_JOB_TYPES_DIR") or (
+        Path(os.environ.get("PERSONA_ROOT", Path.home() / "vault/Projects/Persona")) / "config" / "job_types"
+    )
+    return JobTypeRegistry.load(Path(directory))
+
+
+# ---------------------------------------------------------------------------
+# Built-in job types
+# ---------------------------------------------------------------------------
+
+class ResearchPayload(_Payload):
+    question: str = Field(min_length=1)
+
+
+class Meeting(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    title: str = Field(min_length=1)
+    time_str: str = ""
+
+
+class MeetingExtractPayload(_Payload):
+    meeting: Meeting
+
+
+class DelegatePayload(_Payload):
+    task: str = Field(min_length=1)
+    context: str = ""
+
+
+class AgentActionPayload(_Payload):
+    agent: str = Field(min_length=1)
+    action: str = Field(min_length=1)
+    timeout: float = 300
+
+
+class GenericPayload(_Payload):
+    prompt: str = "No prompt provided"
+
+
+RESEARCH = JobType(
+    name="research",
+    description="Answer a research question from a daily note",
+    payload_model=ResearchPayload,
+    prompt=PromptTemplate("""You are a research agent. Research the following question thoroughly:
+
+Question: {payload.question}
+
+Requirements:
+1. Search for authoritative sources using web search
+2. Synthesize findings into a clear, structured summary
+3. Save your findings to: {vault_path}/Resources/General/Embeds/{job.short_id}-research.md
+4. Include citations and key insights
+5. Structure the response with clear sections
+
+When complete, output: PERSONA_COMPLETE
+If you encounter an error, output: PERSONA_ERROR: <description>
+"""),
+    timeout=1200,
+    concurrency="heavy",
+)
+
+MEETING_EXTRACT = JobType(
+    name="meeting_extract",
+    description="Extract meeting notes from a daily note",
+    payload_model=MeetingExtractPayload,
+    prompt=PromptTemplate("""Extract meeting notes from the daily note.
+
+Meeting: {payload.meeting.title} at {payload.meeting.time_str}
+Source file: {job.source_file}
+
+Create a meeting note at: {vault_path}/Meetings/{job.short_id}-{payload.meeting.title}.md
+
+Include:
+- Attendees
+- Key discussion points
+- Action items with owners
+- Follow-ups and deadlines
+
+When complete, output: PERSONA_COMPLETE
+"""),
+    timeout=600,
+    concurrency="interactive",
+    # Someone is usually waiting on the notes, so run ahead of background research
+    priority=10,
+)
+
+DELEGATE = JobType(
+    name="delegate",
+    description="Task delegated from one agent to another",
+    payload_model=DelegatePayload,
+    prompt=PromptTemplate("""You are the {job.assigned_to} agent.
+
+Task delegated by {job.delegated_by}:
+{payload.task}
+
+Context:
+{payload.context}
+
+Complete this task according to your role capabilities.
+Save any outputs to appropriate locations in the vault.
+
+When complete, output: PERSONA_COMPLETE
+If you need to delegate to another agent, output: PERSONA_DELEGATE: <agent_id>: <task>
+"""),
+)
+
+AGENT_ACTION = JobType(
+    name="agent_action",
+    description="Legacy agent execution via scripts/run-agent.sh",
+    payload_model=AgentActionPayload,
+    command=tuple(PromptTemplate(arg) for arg in (
+        "bash",
+        "{persona_root}/scripts/run-agent.sh",
+        "{business}",
+        "{payload.agent}",
+        "{payload.action}",
+        "{payload.timeout:g}",
+    )),
+)
+
+GENERIC = JobType(
+    name="generic",
+    description="Send the payload's prompt to Claude",
+    payload_model=GenericPayload,
+    prompt=PromptTemplate("{payload.prompt}"),
+)
+
+BUILTIN_TYPES = (RESEARCH, MEETING_EXTRACT, DELEGATE, AGENT_ACTION)
@@ -0,0 +1,447 @@
+"""Resource limits for agent processes: rlimits and cgroup v2."""
+
+import os
+import signal
+import sys
+import time
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import Callable, Optional
+
+import yaml
+
+from .job_store import Job
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_CGROUP_FS = Path("/sys/fs/cgroup")
+
+# stderr phrases that show an agent hit an rlimit rather than failing on its own
+_MEMORY_ERRORS = ("MemoryError", "Cannot allocate memory", "heap out of memory", "std::bad_alloc")
+_OPEN_FILE_ERRORS = ("Too many open files", "EMFILE")
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    """
+    Limits applied to one job's process tree. None means unlimited.
+
+    memory_mb, cpu_seconds and open_files are rlimits (RLIMIT_AS,
+    RLIMIT_CPU, RLIMIT_NOFILE). They apply to each process separately, and
+    every process the agent starts inherits them.
+    memory_max_mb and cpu_weight are cgroup v2 settings (memory.max,
+    cpu.weight) and apply only when a cgroup subtree is available.
+    """
+    memory_mb: Optional[int] = None
+    cpu_seconds: Optional[int] = None
+    open_files: Optional[int] = None
+    memory_max_mb: Optional[int] = None
+    cpu_weight: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: dict, source: str = "limits") -> "ResourceLimits":
+        """
+        Build limits from a config mapping.
+
+        Args:
+            data: Mapping of limit name to positive integer (or null)
+            source: Where the mapping came from, for error messages
+
+        Returns:
+            ResourceLimits
+
+        Raises:
+            ValueError: If a key is unknown or a value is not a positive integer
+        """
+        known = {f.name for f in fields(cls)}
+        values = {}
+        for key, value in (data or {}).items():
+            if key not in known:
+                raise ValueError(f"Unknown limit '{key}' in {source}")
+            if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value <= 0):
+                raise ValueError(f"Limit '{key}' in {source} must be a positive integer, got {value!r}")
+            values[key] = value
+
+        if values.get("cpu_weight") is not None and not 1 <= values["cpu_weight"] <= 10000:
+            raise ValueError(f"cpu_weight in {source} must be between 1 and 10000")
+        return cls(**values)
+
+    def merged(self, other: "ResourceLimits") -> "ResourceLimits":
+        """Return these limits overridden by the ones set in other."""
+        return replace(self, **{f.name: getattr(other, f.name) for f in fields(other) if getattr(other, f.name) is not None})
+
+    @property
+    def uses_rlimits(self) -> bool:
+        return any(v is not None for v in (self.memory_mb, self.cpu_seconds, self.open_files))
+
+    @property
+    def uses_cgroup(self) -> bool:
+        return self.memory_max_mb is not None or self.cpu_weight is not None
+
+
+class LimitsConfig:
+    """
+    Per-job-type and per-agent resource limits loaded from YAML.
+
+    The file has optional `defaults`, `agents` and `job_types` sections,
+    each mapping limit names to values. A job gets the defaults, overridden
+    by its agent's limits, overridden by its job type's limits.
+    """
+
+    def __init__(
+        self,
+        defaults: ResourceLimits = None,
+        agents: dict[str, ResourceLimits] = None,
+        job_types: dict[str, ResourceLimits] = None
+    ):
+        """
+        Initialize LimitsConfig.
+
+        Args:
+            defaults: Limits for every job
+            agents: Limits by agent ID
+            job_types: Limits by job type
+        """
+        self.defaults = defaults or ResourceLimits()
+        self.agents = agents or {}
+        self.job_types = job_types or {}
+
+    @classmethod
+    def load(cls, path: Path) -> "LimitsConfig":
+        """
+        Load limits from a YAML file. A missing file means no limits.
+
+        Args:
+            path: Path to limits.yaml
+
+        Returns:
+            LimitsConfig
+
+        Raises:
+            ValueError: If the file is malformed
+        """
+        path = Path(path)
+        if not path.exists():
+            return cls()
+
+        data = yaml.safe_load(path.read_text()) or {}
+        if not isinstance(data, dict):
+            raise ValueError(f"{path} must contain a mapping")
+
+        def section(name: str) -> dict[str, ResourceLimits]:
+            entries = data.get(name) or {}
+            if not isinstance(entries, dict):
+                raise ValueError(f"'{name}' in {path} must be a mapping")
+            return {key: ResourceLimits.from_dict(value, f"{path}:{name}.{key}") for key, value in entries.items()}
+
+        unknown = set(data) - {"defaults", "agents", "job_types"}
+        if unknown:
+            raise ValueError(f"Unknown section(s) in {path}: {', '.join(sorted(unknown))}")
+
+        return cls(
+            defaults=ResourceLimits.from_dict(data.get("defaults"), f"{path}:defaults"),
+            agents=section("agents"),
+            job_types=section("job_types"),
+        )
+
+    def for_job(self, job: Job) -> ResourceLimits:
+        """
+        Resolve the limits for a job.
+
+        Args:
+            job: Job about to start
+
+        Returns:
+            Effective ResourceLimits
+        """
+        limits = self.defaults
+        agent = job.assigned_to or (job.payload or {}).get('agent')
+        if agent in self.agents:
+            limits = limits.merged(self.agents[agent])
+        if job.job_type in self.job_types:
+            limits = limits.merged(self.job_types[job.job_type])
+        return limits
+
+    @property
+    def uses_cgroup(self) -> bool:
+        """True if any job could need a cgroup."""
+        return any(l.uses_cgroup for l in [self.defaults, *self.agents.values(), *self.job_types.values()])
+
+
+def _rlimit_values(limits: ResourceLimits) -> list[tuple[int, tuple[int, int]]]:
+    values = []
+    if limits.memory_mb is not None:
+        size = limits.memory_mb * 1024 * 1024
+        values.append((resource.RLIMIT_AS, (size, size)))
+    if limits.cpu_seconds is not None:
+        # SIGXCPU at the soft limit, SIGKILL shortly after if it is ignored
+        values.append((resource.RLIMIT_CPU, (limits.cpu_seconds, limits.cpu_seconds + 5)))
+    if limits.open_files is not None:
+        values.append((resource.RLIMIT_NOFILE, (limits.open_files, limits.open_files)))
+    return values
+
+
+def rlimit_preexec(limits: ResourceLimits) -> Optional[Callable[[], None]]:
+    """
+    Get a preexec_fn that sets rlimits, for platforms without prlimit().
+
+    Returns:
+        Callable for Popen(preexec_fn=...), or None if nothing needs setting
+        in the child (no rlimits, or they are applied with prlimit after spawn)
+    """
+    if resource is None or not limits.uses_rlimits or hasattr(resource, "prlimit"):
+        return None
+
+    values = _rlimit_values(limits)
+
+    def apply():
+        for which, value in values:
+            resource.setrlimit(which, value)
+
+    return apply
+
+
+def apply_rlimits(pid: int, limits: ResourceLimits) -> None:
+    """
+    Set rlimits on a just-started process with prlimit() (Linux).
+
+    Processes it starts later inherit them. Does nothing where prlimit is
+    unavailable; rlimit_preexec() covers those platforms.
+
+    Args:
+        pid: Process ID
+        limits: Limits to apply
+
+    Raises:
+        OSError: If the limits cannot be set
+    """
+    if resource is None or not hasattr(resource, "prlimit"):
+        return
+    for which, value in _rlimit_values(limits):
+        resource.prlimit(pid, which, value)
+
+
+class CgroupManager:
+    """
+    Creates one cgroup v2 child per job under a delegated subtree.
+
+    The subtree is PERSONA_CGROUP_ROOT, or the worker's own cgroup. In the
+    second case the worker first moves itself into a `worker` leaf, because
+    cgroup v2 only lets a group hand controllers to children while it has
+    no processes of its own. Under systemd this needs Delegate=yes.
+    """
+
+    def __init__(self, root: Path, controllers: set[str]):
+        """
+        Initialize CgroupManager. Use create() to detect and prepare a subtree.
+
+        Args:
+            root: Cgroup directory that job cgroups are created in
+            controllers: Controllers enabled for children of root
+        """
+        self.root = root
+        self.controllers = controllers
+
+    @classmethod
+    def create(cls, root: Path = None) -> Optional["CgroupManager"]:
+        """
+        Prepare a cgroup subtree for jobs if the host allows it.
+
+        Args:
+            root: Delegated cgroup directory (default: PERSONA_CGROUP_ROOT or own cgroup)
+
+        Returns:
+            CgroupManager, or None if cgroup v2 is unavailable or not writable
+        """
+        if not sys.platform.startswith("linux") or not (_CGROUP_FS / "cgroup.controllers").exists():
+            return None
+
+        try:
+            own = _CGROUP_FS / _own_cgroup().lstrip("/")
+            root = Path(root or os.environ.get("PERSONA_CGROUP_ROOT") or own)
+            root.mkdir(exist_ok=True)
+
+            if own == root:
+                leaf = root / "worker"
+                leaf.mkdir(exist_ok=True)
+                (leaf / "cgroup.procs").write_text(str(os.getpid()))
+
+            available = set((root / "cgroup.controllers").read_text().split())
+            wanted = {"cpu", "memory"} & available
+            if wanted:
+                (root / "cgroup.subtree_control").write_text(" ".join(f"+{c}" for c in sorted(wanted)))
+            enabled = set((root / "cgroup.subtree_control").read_text().split())
+        except OSError as e:
+            print(f"cgroup limits unavailable: {e}")
+            return None
+
+        return cls(root, enabled)
+
+    @staticmethod
+    def prepare_pool() -> Optional[Path]:
+        """
+        Split this process's delegated cgroup for a pool of worker processes.
+
+        Moves this process into a `pool` leaf and enables cpu and memory
+        for a sibling `workers` subtree. Workers given that subtree as
+        PERSONA_CGROUP_ROOT create job cgroups in it. If the pool stayed in
+        the delegated root, cgroup v2's no-internal-processes rule would
+        stop the workers enabling controllers there.
+
+        Returns:
+            Path of the workers subtree, or None if cgroup v2 is unavailable
+            or not writable
+        """
+        if not sys.platform.startswith("linux") or not (_CGROUP_FS / "cgroup.controllers").exists():
+            return None
+
+        try:
+            own = _CGROUP_FS / _own_cgroup().lstrip("/")
+            leaf = own / "pool"
+            leaf.mkdir(exist_ok=True)
+            (leaf / "cgroup.procs").write_text(str(os.getpid()))
+
+            available = set((own / "cgroup.controllers").read_text().split())
+            wanted = {"cpu", "memory"} & available
+            if wanted:
+                (own / "cgroup.subtree_control").write_text(" ".join(f"+{c}" for c in sorted(wanted)))
+
+            workers = own / "workers"
+            workers.mkdir(exist_ok=True)
+        except OSError as e:
+            print(f"cgroup limits unavailable: {e}")
+            return None
+
+        return workers
+
+    def attach(self, name: str, pid: int, limits: ResourceLimits) -> Optional[Path]:
+        """
+        Create a cgroup for a job, apply its limits and move its process in.
+
+        Args:
+            name: Cgroup directory name (the job's short ID)
+            pid: Process ID to move
+            limits: Limits with memory_max_mb / cpu_weight
+
+        Returns:
+            Path of the job's cgroup
+
+        Raises:
+            OSError: If the cgroup cannot be created or joined; a cgroup
+                created here is removed again first
+        """
+        path = self.root / f"job-{name}"
+        created = not path.exists()
+        path.mkdir(exist_ok=True)
+
+        try:
+            if limits.memory_max_mb is not None and "memory" in self.controllers:
+                (path / "memory.max").write_text(str(limits.memory_max_mb * 1024 * 1024))
+                # Fail fast instead of thrashing in swap
+                if (path / "memory.swap.max").exists():
+                    (path / "memory.swap.max").write_text("0")
+            if limits.cpu_weight is not None and "cpu" in self.controllers:
+                (path / "cpu.weight").write_text(str(limits.cpu_weight))
+
+            (path / "cgroup.procs").write_text(str(pid))
+        except OSError:
+            if created:
+                self.remove(path)
+            raise
+        return path
+
+    @staticmethod
+    def oom_killed(path: Path) -> bool:
+        """Check whether the kernel OOM-killed anything in a job's cgroup."""
+        try:
+            for line in (path / "memory.events").read_text().splitlines():
+                key, _, value = line.partition(" ")
+                if key == "oom_kill" and int(value) > 0:
+                    return True
+        except OSError:
+            pass
+        return False
+
+    @staticmethod
+    def remove(path: Path, timeout: float = 5.0) -> None:
+        """
+        Remove a job's cgroup, killing anything the agent left behind.
+
+        The kill is asynchronous and rmdir fails while the cgroup still has
+        processes, so this waits up to `timeout` seconds for cgroup.events to
+        report it empty before removing it.
+
+        Args:
+            path: Job cgroup directory
+            timeout: Longest wait for killed processes to exit
+        """
+        try:
+            if (path / "cgroup.kill").exists():
+                (path / "cgroup.kill").write_text("1")
+            CgroupManager._wait_until_empty(path, timeout)
+            path.rmdir()
+        except OSError as e:
+            print(f"Failed to remove cgroup {path}: {e}")
+
+    @staticmethod
+    def _wait_until_empty(path: Path, timeout: float) -> bool:
+        """Poll cgroup.events until `populated 0`; False if it never gets there."""
+        events = path / "cgroup.events"
+        if not events.exists():
+            return True
+
+        deadline = time.monotonic() + timeout
+        while True:
+            if "populated 0" in events.read_text().splitlines():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+
+def classify_limit_exit(
+    limits: ResourceLimits,
+    returncode: int,
+    stderr_tail: str = "",
+    oom_killed: bool = False
+) -> Optional[tuple[str, str]]:
+    """
+    Work out whether a job's exit was caused by one of its limits.
+
+    Args:
+        limits: Limits the job ran with
+        returncode: Process return code (negative for signals)
+        stderr_tail: Recent stderr output
+        oom_killed: Whether the job's cgroup recorded an OOM kill
+
+    Returns:
+        (kind, message) with kind 'memory', 'cpu_time' or 'open_files',
+        or None if no limit was hit
+    """
+    if oom_killed:
+        return "memory", f"Memory limit exceeded (memory.max {limits.memory_max_mb} MB)"
+
+    if returncode == 0:
+        return None
+
+    if limits.cpu_seconds is not None and returncode in (-signal.SIGXCPU, 128 + signal.SIGXCPU):
+        return "cpu_time", f"CPU time limit exceeded ({limits.cpu_seconds}s)"
+
+    if limits.memory_mb is not None and any(e in stderr_tail for e in _MEMORY_ERRORS):
+        return "memory", f"Memory limit exceeded (address space {limits.memory_mb} MB)"
+
+    if limits.open_files is not None and any(e in stderr_tail for e in _OPEN_FILE_ERRORS):
+        return "open_files", f"Open file limit exceeded ({limits.open_files})"
+
+    return None
+
+
+def _own_cgroup() -> str:
+    """Return this process's cgroup v2 path, e.g. /system.slice/persona-worker.service."""
+    for line in Path("/proc/self/cgroup").read_text().splitlines():
+        if line.startswith("0::"):
+            return line[3:]
+    raise OSError("No cgroup v2 entry in /proc/self/cgroup")
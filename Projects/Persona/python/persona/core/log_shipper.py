@@ -0,0 +1,508 @@
+"""Background shipping of agent output to the job log table."""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from .job_store import JobStore
+
+# Retryable HTTP statuses among the 4xx range
+_TRANSIENT_STATUSES = {408, 425, 429}
+
+
+def _is_permanent(error: Exception) -> bool:
+    """
+    Whether an insert that raised `error` would fail the same way on retry.
+
+    Covers SQLite constraint errors, PostgreSQL data, constraint and schema
+    errors (SQLSTATE classes 22, 23 and 42, as reported by PostgREST) and
+    other 4xx responses.
+    """
+    if isinstance(error, (ValueError, TypeError, sqlite3.IntegrityError)):
+        return True
+    code = str(getattr(error, "code", None) or "")
+    if code[:2] in ("22", "23", "42"):
+        return True
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in _TRANSIENT_STATUSES
+
+
+class _Spool:
+    """
+    Append-only on-disk log segments used while the backend is unreachable.
+
+    Records are JSON lines of {"job_id", "level", "message"}. Segments are
+    replayed oldest first; a small .offset file next to the segment being
+    replayed records how many lines have been shipped, so a crash mid-replay
+    does not ship them twice.
+
+    A batch that fails with a permanent error, or fails max_attempts times,
+    is moved to dead-letter.jsonl so it cannot hold up the batches behind
+    it. Segments stay under max_bytes; appends past that are refused.
+    Dead letters have their own budget: once dead-letter.jsonl would
+    exceed max_dead_letter_bytes it is rotated to dead-letter.1.jsonl,
+    replacing the previous one, so the oldest dead letters expire first.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        segment_bytes: int = 1024 * 1024,
+        max_bytes: int = 100 * 1024 * 1024,
+        max_attempts: int = 5,
+        max_dead_letter_bytes: int = 10 * 1024 * 1024
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.max_attempts = max_attempts
+        self.max_dead_letter_bytes = max_dead_letter_bytes
+        self.dead_letter_path = self.directory / "dead-letter.jsonl"
+        self._writer = None
+        self._writer_path: Optional[Path] = None
+        # Failed replay attempts per (segment name, offset)
+        self._attempts: dict[tuple[str, int], int] = {}
+
+        existing = self.segments()
+        self._next_seq = int(existing[-1].stem.split("-")[1]) + 1 if existing else 0
+        # Segments left by a previous run are replayed first
+        self._has_pending = bool(existing)
+        self._bytes = sum(p.stat().st_size for p in existing)
+        self._dead_bytes = self.dead_letter_path.stat().st_size if self.dead_letter_path.exists() else 0
+
+    def segments(self) -> list[Path]:
+        return sorted(self.directory.glob("segment-*.jsonl"))
+
+    def has_pending(self) -> bool:
+        return self._has_pending
+
+    def append(self, job_id: str, level: str, messages: list[str]) -> bool:
+        """
+        Write records to the current segment.
+
+        Returns:
+            False if the spool is full and nothing was written
+        """
+        data = self._encode(job_id, level, messages)
+        if self._bytes + len(data) > self.max_bytes:
+            return False
+
+        if self._writer is None:
+            self._writer_path = self.directory / f"segment-{self._next_seq:010d}.jsonl"
+            self._next_seq += 1
+            self._writer = open(self._writer_path, "a")
+            self._has_pending = True
+
+        self._writer.write(data)
+        self._writer.flush()
+        self._bytes += len(data)
+
+        if self._writer.tell() >= self.segment_bytes:
+            self.seal()
+        return True
+
+    def dead_letter(self, job_id: str, level: str, messages: list[str]) -> None:
+        """Set records aside that will never be accepted, rotating the file when full."""
+        data = self._encode(job_id, level, messages)
+        if self._dead_bytes and self._dead_bytes + len(data) > self.max_dead_letter_bytes:
+            self.dead_letter_path.replace(self.dead_letter_path.with_name("dead-letter.1.jsonl"))
+            self._dead_bytes = 0
+        with open(self.dead_letter_path, "a") as f:
+            f.write(data)
+        self._dead_bytes += len(data)
+
+    @staticmethod
+    def _encode(job_id: str, level: str, messages: list[str]) -> str:
+        return "".join(
+            json.dumps({"job_id": job_id, "level": level, "message": message}) + "\n"
+            for message in messages
+        )
+
+    def seal(self) -> None:
+        """Close the segment being written so it can be replayed."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._writer_path = None
+
+    def replay(
+        self,
+        ship: Callable[[str, str, list[str]], None],
+        batch_size: int,
+        on_dead_letter: Callable[[int, Exception], None] = None
+    ) -> int:
+        """
+        Ship spooled records oldest first until done or ship() raises.
+
+        A batch whose failure is permanent, or that has failed max_attempts
+        times, is dead-lettered and replay moves on to the next one.
+
+        Args:
+            ship: Inserts one batch; raises on failure
+            batch_size: Most lines per batch
+            on_dead_letter: Called with the line count and error for each
+                batch set aside
+
+        Returns:
+            Number of lines shipped
+        """
+        self.seal()
+        shipped = 0
+
+        for segment in self.segments():
+            offset_path = segment.with_suffix(".offset")
+            done = int(offset_path.read_text()) if offset_path.exists() else 0
+
+            for job_id, level, messages, end in self._batches(segment, done, batch_size):
+                key = (segment.name, done)
+                try:
+                    ship(job_id, level, messages)
+                    shipped += len(messages)
+                except Exception as e:
+                    attempts = self._attempts.get(key, 0) + 1
+                    if attempts < self.max_attempts and not _is_permanent(e):
+                        self._attempts[key] = attempts
+                        raise
+                    self.dead_letter(job_id, level, messages)
+                    if on_dead_letter:
+                        on_dead_letter(len(messages), e)
+                self._attempts.pop(key, None)
+                offset_path.write_text(str(end))
+                done = end
+
+            self._bytes -= segment.stat().st_size
+            segment.unlink()
+            offset_path.unlink(missing_ok=True)
+
+        self._has_pending = False
+        return shipped
+
+    @staticmethod
+    def _batches(segment: Path, skip: int, batch_size: int) -> Iterator[tuple[str, str, list[str], int]]:
+        """Group consecutive records for the same job and level, after skipping `skip` lines."""
+        key = None
+        messages: list[str] = []
+        line_no = 0
+
+        with open(segment) as f:
+            for line_no, line in enumerate(f, start=1):
+                if line_no <= skip:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash; nothing after it is trustworthy
+                    break
+                record_key = (record["job_id"], record["level"])
+                if messages and (record_key != key or len(messages) >= batch_size):
+                    yield key[0], key[1], messages, line_no - 1
+                    messages = []
+                key = record_key
+                messages.append(record["message"])
+
+        if messages:
+            yield key[0], key[1], messages, line_no
+
+
+class LogShipper:
+    """
+    Ships agent output lines to the job log table from one background thread.
+
+    Producers call push(), which never blocks: lines go into a bounded queue
+    and are counted as dropped if it is full. The shipper groups lines by
+    job and level and sends a batch when it reaches batch_size or has waited
+    flush_interval seconds. A failed insert is retried with backoff. If it
+    still fails, the batch is spilled to an on-disk spool. From then on, new
+    batches also go to the spool so order is kept. The spool is replayed in
+    order, with exponential backoff, once the backend answers again.
+
+    Batches the backend rejects outright (constraint violations, 4xx) are
+    never retried or spooled; they go to a dead-letter file, as do spooled
+    batches that keep failing. The spool is capped at max_spool_bytes, and
+    lines that do not fit are dropped and counted. The dead-letter file is
+    rotated at max_dead_letter_bytes and does not count against the spool.
+    """
+
+    def __init__(
+        self,
+        job_store: JobStore,
+        spool_dir: Path,
+        batch_size: int = None,
+        flush_interval: float = None,
+        max_queue: int = None,
+        retries: int = 2,
+        retry_backoff: float = 0.2,
+        replay_backoff: float = 1.0,
+        replay_backoff_max: float = 60.0,
+        max_spool_bytes: int = None,
+        max_replay_attempts: int = None,
+        max_dead_letter_bytes: int = None,
+        on_shipped: Callable[[str], None] = None
+    ):
+        """
+        Initialize LogShipper.
+
+        Args:
+            job_store: JobStore used for log_batch inserts
+            spool_dir: Directory for spilled log segments
+            batch_size: Lines per insert (default: LOG_BATCH_SIZE or 10)
+            flush_interval: Max seconds a line waits (default: LOG_FLUSH_INTERVAL or 5)
+            max_queue: Queue bound in lines (default: LOG_QUEUE_SIZE or 10000)
+            retries: Immediate retries for a failed insert before spilling
+            retry_backoff: Delay before the first retry, doubled per retry
+            replay_backoff: First wait before replaying the spool, doubled per failure
+            replay_backoff_max: Longest wait between spool replay attempts
+            max_spool_bytes: Disk budget for spooled lines
+                (default: LOG_SPOOL_MAX_BYTES or 100 MiB)
+            max_replay_attempts: Failed replays of one batch before it is
+                dead-lettered (default: LOG_REPLAY_MAX_ATTEMPTS or 5)
+            max_dead_letter_bytes: Size at which the dead-letter file is
+                rotated, keeping one previous file
+                (default: LOG_DEAD_LETTER_MAX_BYTES or 10 MiB)
+            on_shipped: Called with the job ID after each successful insert
+        """
+        self.job_store = job_store
+        self.batch_size = batch_size or int(os.environ.get('LOG_BATCH_SIZE', '10'))
+        self.flush_interval = flush_interval or float(os.environ.get('LOG_FLUSH_INTERVAL', '5.0'))
+        self.max_queue = max_queue or int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.replay_backoff = replay_backoff
+        self.replay_backoff_max = replay_backoff_max
+        self.on_shipped = on_shipped
+
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_queue)
+        self._spool = _Spool(
+            spool_dir,
+            max_bytes=max_spool_bytes or int(os.environ.get('LOG_SPOOL_MAX_BYTES', str(100 * 1024 * 1024))),
+            max_attempts=max_replay_attempts or int(os.environ.get('LOG_REPLAY_MAX_ATTEMPTS', '5')),
+            max_dead_letter_bytes=max_dead_letter_bytes or int(
+                os.environ.get('LOG_DEAD_LETTER_MAX_BYTES', str(10 * 1024 * 1024))
+            )
+        )
+        self._pending: dict[tuple[str, str], list[str]] = defaultdict(list)
+        self._oldest_pending: Optional[float] = None
+        self._replay_delay = replay_backoff
+        self._next_replay = time.monotonic()
+
+        self._counts = {
+            "shipped": 0, "dropped": 0, "spilled": 0, "replayed": 0, "failures": 0, "dead_lettered": 0
+        }
+        self._counts_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def push(self, job_id: str, level: str, message: str) -> bool:
+        """
+        Queue one line for shipping without blocking.
+
+        Args:
+            job_id: Job UUID
+            level: Log level
+            message: Log line
+
+        Returns:
+            False if the queue was full and the line was dropped
+        """
+        try:
+            self._queue.put_nowait((job_id, level, message))
+            return True
+        except queue.Full:
+            self._count("dropped")
+            return False
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait until every line pushed so far has been shipped or spooled.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if the flush completed in time
+        """
+        if not (self._thread and self._thread.is_alive()):
+            return False
+
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def stats(self) -> dict:
+        """
+        Get shipping metrics.
+
+        Returns:
+            Dict with queue_depth, max_queue, shipped, dropped, spilled,
+            replayed, failures, dead_lettered, spool_segments and spooling
+        """
+        with self._counts_lock:
+            counts = dict(self._counts)
+        segments = self._spool.segments()
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            **counts,
+            "spool_segments": len(segments),
+            "spooling": self._spool.has_pending(),
+        }
+
+    def start(self):
+        """Start the shipper thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="persona-log-shipper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """
+        Ship or spool everything queued, then stop the shipper thread.
+
+        Args:
+            timeout: Seconds to wait for the thread to finish
+        """
+        self._stop.set()
+        try:
+            # Wake the thread; a full queue means it is busy anyway
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self._wait_time())
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, threading.Event):
+                self._ship_pending()
+                item.set()
+            elif item is not None:
+                self._add(*item)
+
+            now = time.monotonic()
+            if self._oldest_pending is not None and now - self._oldest_pending >= self.flush_interval:
+                self._ship_pending()
+            if self._spool.has_pending() and now >= self._next_replay:
+                self._replay()
+
+            if self._stop.is_set() and self._queue.empty():
+                self._ship_pending()
+                self._spool.seal()
+                return
+
+    def _wait_time(self) -> float:
+        if self._stop.is_set():
+            return 0.05
+        deadlines = [self.flush_interval]
+        now = time.monotonic()
+        if self._oldest_pending is not None:
+            deadlines.append(self._oldest_pending + self.flush_interval - now)
+        if self._spool.has_pending():
+            deadlines.append(self._next_replay - now)
+        return max(0.01, min(deadlines))
+
+    def _add(self, job_id: str, level: str, message: str):
+        key = (job_id, level)
+        lines = self._pending[key]
+        lines.append(message)
+        if self._oldest_pending is None:
+            self._oldest_pending = time.monotonic()
+        if len(lines) >= self.batch_size:
+            self._ship(job_id, level, self._pending.pop(key))
+
+    def _ship_pending(self):
+        pending, self._pending = self._pending, defaultdict(list)
+        self._oldest_pending = None
+        for (job_id, level), lines in pending.items():
+            self._ship(job_id, level, lines)
+
+    def _ship(self, job_id: str, level: str, lines: list[str]):
+        if self._spool.has_pending():
+            # Keep order: nothing bypasses lines already waiting on disk
+            self._spill(job_id, level, lines)
+            return
+
+        for attempt in range(self.retries + 1):
+            try:
+                self._insert(job_id, level, lines)
+                self._count("shipped", len(lines))
+                return
+            except Exception as e:
+                error = e
+                if _is_permanent(e):
+                    break
+                if attempt < self.retries:
+                    time.sleep(self.retry_backoff * (2 ** attempt))
+
+        self._count("failures")
+        if _is_permanent(error):
+            self._reject(job_id, level, lines, error)
+            return
+
+        print(f"Log shipping failed, spooling to disk: {error}")
+        self._spill(job_id, level, lines)
+        self._next_replay = time.monotonic() + self._replay_delay
+
+    def _spill(self, job_id: str, level: str, lines: list[str]):
+        if self._spool.append(job_id, level, lines):
+            self._count("spilled", len(lines))
+        else:
+            self._count("dropped", len(lines))
+
+    def _reject(self, job_id: str, level: str, lines: list[str], error: Exception):
+        """Set aside lines the backend will never accept."""
+        print(f"Log lines rejected for job {job_id}, moving to dead letters: {error}")
+        self._spool.dead_letter(job_id, level, lines)
+        self._count("dead_lettered", len(lines))
+
+    def _replay(self):
+        replayed = 0
+
+        def ship(job_id, level, lines):
+            nonlocal replayed
+            self._insert(job_id, level, lines)
+            replayed += len(lines)
+
+        def dead_lettered(count, error):
+            print(f"Spooled log lines keep failing, moving to dead letters: {error}")
+            self._count("dead_lettered", count)
+
+        try:
+            self._spool.replay(ship, self.batch_size, on_dead_letter=dead_lettered)
+            self._replay_delay = self.replay_backoff
+        except Exception:
+            self._count("failures")
+            self._next_replay = time.monotonic() + self._replay_delay
+            self._replay_delay = min(self._replay_delay * 2, self.replay_backoff_max)
+        finally:
+            if replayed:
+                self._count("replayed", replayed)
+
+    def _insert(self, job_id: str, level: str, lines: list[str]):
+        self.job_store.log_batch(job_id, lines, level)
+        if self.on_shipped:
+            try:
+                self.on_shipped(job_id)
+            except Exception as e:
+                print(f"Log shipped callback failed for {job_id}: {e}")
+
+    def _count(self, name: str, n: int = 1):
+        with self._counts_lock:
+            self._counts[name] += n
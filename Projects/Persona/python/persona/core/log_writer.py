@@ -0,0 +1,310 @@
+"""Buffered local log files for agent output, with rotation and retention."""
+
+import gzip
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO
+
+# Suffixes of files the retention policy may delete
+_LOG_SUFFIXES = (".log", ".gz")
+
+
+class _TimestampCache:
+    """Formats the local wall-clock time at most once per second."""
+
+    __slots__ = ("_second", "_text")
+
+    def __init__(self):
+        self._second = -1
+        self._text = ""
+
+    def now(self) -> str:
+        second = int(time.time())
+        if second != self._second:
+            self._second = second
+            self._text = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+        return self._text
+
+
+@dataclass
+class _OpenLog:
+    """Log files for one running job."""
+    short_id: str
+    paths: dict[str, Path]
+    files: dict[str, IO[str]]
+    written: dict[str, int] = field(default_factory=dict)  # stream -> bytes in current file
+    rotations: int = 0
+    dirty: bool = False
+
+
+class LocalLogWriter:
+    """
+    Writes agent output to per-job files under logs_dir.
+
+    Lines are written through a large buffer instead of being flushed one
+    at a time; flush_due() (run on a timer) flushes files that have
+    unflushed output, so a line reaches disk within flush_interval seconds.
+    Timestamps are formatted once per second.
+
+    A live file larger than rotate_bytes is renamed to <name>.<n> and
+    compressed. When a job finishes its files are gzipped in the background,
+    after which the retention policy deletes logs older than max_age_days and
+    the oldest logs beyond max_total_bytes.
+
+    write(), flush_due() and close() are meant to be called from one thread
+    (the supervisor loop); compression and retention run on their own thread.
+    """
+
+    def __init__(
+        self,
+        logs_dir: Path,
+        flush_interval: float = None,
+        buffer_bytes: int = None,
+        rotate_bytes: int = None,
+        max_age_days: float = None,
+        max_total_bytes: int = None,
+        retention_interval: float = 60.0
+    ):
+        """
+        Initialize LocalLogWriter.
+
+        Args:
+            logs_dir: Directory for job log files
+            flush_interval: Max seconds output stays buffered (default: LOCAL_LOG_FLUSH_INTERVAL or 1)
+            buffer_bytes: Write buffer per file (default: LOCAL_LOG_BUFFER_BYTES or 64KB)
+            rotate_bytes: Live file size that triggers rotation (default: LOCAL_LOG_ROTATE_BYTES or 50MB)
+            max_age_days: Delete finished logs older than this (default: LOCAL_LOG_MAX_AGE_DAYS or 14)
+            max_total_bytes: Cap on finished logs in the directory (default: LOCAL_LOG_MAX_BYTES or 1GB)
+            retention_interval: Minimum seconds between retention sweeps
+        """
+        self.logs_dir = Path(logs_dir)
+        self.logs_dir.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval or float(os.environ.get('LOCAL_LOG_FLUSH_INTERVAL', '1.0'))
+        self.buffer_bytes = buffer_bytes or int(os.environ.get('LOCAL_LOG_BUFFER_BYTES', str(64 * 1024)))
+        self.rotate_bytes = rotate_bytes or int(os.environ.get('LOCAL_LOG_ROTATE_BYTES', str(50 * 1024 * 1024)))
+        self.max_age_days = max_age_days or float(os.environ.get('LOCAL_LOG_MAX_AGE_DAYS', '14'))
+        self.max_total_bytes = max_total_bytes or int(os.environ.get('LOCAL_LOG_MAX_BYTES', str(1024 ** 3)))
+        self.retention_interval = retention_interval
+
+        self._logs: dict[str, _OpenLog] = {}
+        self._lock = threading.Lock()
+        self._clock = _TimestampCache()
+        self._archiver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persona-log-archiver")
+        self._last_retention = 0.0
+
+    def paths(self, short_id: str) -> dict[str, Path]:
+        """
+        Get the live log file for each stream of a job.
+
+        Args:
+            short_id: Job short ID
+
+        Returns:
+            Dict of stream name ('stdout', 'stderr') to path
+        """
+        return {
+            'stdout': self.logs_dir / f"{short_id}.log",
+            'stderr': self.logs_dir / f"{short_id}.error.log",
+        }
+
+    def open(self, job_id: str, short_id: str) -> None:
+        """
+        Create a job's log files.
+
+        Args:
+            job_id: Job ID used as the key for write() and close()
+            short_id: Job short ID used in file names
+        """
+        paths = self.paths(short_id)
+        files = {stream: open(path, 'w', buffering=self.buffer_bytes) for stream, path in paths.items()}
+        with self._lock:
+            self._logs[job_id] = _OpenLog(short_id, paths, files, written=dict.fromkeys(paths, 0))
+
+    def write(self, job_id: str, stream: str, line: str) -> bool:
+        """
+        Append one timestamped line to a job's log.
+
+        Args:
+            job_id: Job ID
+            stream: 'stdout' or 'stderr'
+            line: Output line without its newline
+
+        Returns:
+            False if the job has no open log
+        """
+        log = self._logs.get(job_id)
+        if log is None:
+            return False
+
+        text = f"[{self._clock.now()}] {line}\n"
+        log.files[stream].write(text)
+        log.dirty = True
+
+        log.written[stream] += len(text)
+        if log.written[stream] >= self.rotate_bytes:
+            self._rotate(log, stream)
+        return True
+
+    def flush_due(self) -> None:
+        """Flush every log written to since the last call."""
+        with self._lock:
+            logs = list(self._logs.values())
+        for log in logs:
+            if log.dirty:
+                log.dirty = False
+                for f in log.files.values():
+                    f.flush()
+
+    def close(self, job_id: str) -> bool:
+        """
+        Close a job's log files and compress them in the background.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            False if the job had no open log
+        """
+        with self._lock:
+            log = self._logs.pop(job_id, None)
+        if log is None:
+            return False
+
+        for f in log.files.values():
+            f.close()
+        self.archive(*log.paths.values())
+        return True
+
+    def archive(self, *paths: Path) -> None:
+        """
+        Gzip finished log files in the background, then apply retention.
+
+        Missing and empty files are removed without compressing.
+
+        Args:
+            *paths: Log files that will not be written to again
+        """
+        self._archiver.submit(self._archive, list(paths))
+
+    def enforce_retention(self) -> int:
+        """
+        Delete logs past the age limit, then the oldest archives until under the size cap.
+
+        Uncompressed logs are only removed by age, since the job writing one
+        may not be running through this writer.
+
+        Returns:
+            Number of files deleted
+        """
+        with self._lock:
+            live = {path for log in self._logs.values() for path in log.paths.values()}
+
+        files = []
+        for path in self.logs_dir.iterdir():
+            if path in live or not path.is_file() or not self._is_log(path):
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+
+        files.sort()
+        cutoff = time.time() - self.max_age_days * 86400
+        total = sum(size for _, size, _ in files)
+        removed = 0
+
+        for mtime, size, path in files:
+            if mtime >= cutoff and (total <= self.max_total_bytes or path.suffix != ".gz"):
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        return removed
+
+    def stats(self) -> dict:
+        """
+        Get writer metrics.
+
+        Returns:
+            Dict with open_logs and total bytes of log files in the directory
+        """
+        total = 0
+        for path in self.logs_dir.iterdir():
+            if path.is_file() and self._is_log(path):
+                total += path.stat().st_size
+        return {"open_logs": len(self._logs), "bytes_on_disk": total}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Flush open logs and wait for pending compression.
+
+        Open logs stay open; agents keep running across worker restarts.
+
+        Args:
+            wait: Block until queued archive work has finished
+        """
+        with self._lock:
+            logs = list(self._logs.values())
+        for log in logs:
+            for f in log.files.values():
+                f.flush()
+        self._archiver.shutdown(wait=wait)
+
+    def _rotate(self, log: _OpenLog, stream: str):
+        log.rotations += 1
+        path = log.paths[stream]
+        rotated = path.with_name(f"{path.name}.{log.rotations}")
+
+        log.files[stream].close()
+        path.rename(rotated)
+        log.files[stream] = open(path, 'w', buffering=self.buffer_bytes)
+        log.written[stream] = 0
+        self.archive(rotated)
+
+    def _archive(self, paths: list[Path]):
+        for path in paths:
+            try:
+                if not path.exists():
+                    continue
+                if path.stat().st_size == 0:
+                    path.unlink()
+                    continue
+                self._compress(path)
+            except OSError as e:
+                print(f"Failed to archive {path}: {e}")
+
+        now = time.monotonic()
+        if now - self._last_retention >= self.retention_interval:
+            self._last_retention = now
+            try:
+                removed = self.enforce_retention()
+                if removed:
+                    print(f"Removed {removed} old log file(s) from {self.logs_dir}")
+            except OSError as e:
+                print(f"Log retention failed: {e}")
+
+    @staticmethod
+    def _compress(path: Path):
+        target = path.with_name(path.name + ".gz")
+        partial = path.with_name(path.name + ".gz.tmp")
+        with open(path, 'rb') as src, gzip.open(partial, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        # Keep the original mtime so age-based retention counts from the job's end
+        st = path.stat()
+        os.utime(partial, (st.st_atime, st.st_mtime))
+        os.replace(partial, target)
+        path.unlink()
+
+    @staticmethod
+    def _is_log(path: Path) -> bool:
+        name = path.name
+        # Rotated segments look like <short_id>.log.<n>
+        stem, _, last = name.rpartition(".")
+        return name.endswith(_LOG_SUFFIXES) or (last.isdigit() and stem.endswith(".log"))
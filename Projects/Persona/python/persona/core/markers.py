@@ -0,0 +1,97 @@
+"""Incremental detection of agent completion markers."""
+
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+from .control import ControlState
+
+COMPLETE_MARKER = "PERSONA_COMPLETE"
+ERROR_MARKER = "PERSONA_ERROR"
+DELEGATE_MARKER = "PERSONA_DELEGATE"
+
+
+class MarkerScanner:
+    """
+    Watches agent output line by line for PERSONA_* markers.
+
+    Records whether completion or error markers were seen, the first error
+    message and the first delegation, and keeps a bounded tail of recent
+    output for use as context. Memory use is constant however long the
+    agent runs, and the outcome is known the moment the marker is printed.
+
+    Lines in the structured control protocol (see control.py) are applied
+    to `control` instead and are never matched as legacy markers.
+    """
+
+    __slots__ = (
+        "complete", "error_seen", "error", "delegation", "control",
+        "_tail", "_tail_bytes", "max_tail_bytes",
+    )
+
+    def __init__(self, max_tail_bytes: int = 64 * 1024):
+        """
+        Initialize MarkerScanner.
+
+        Args:
+            max_tail_bytes: Approximate size of the recent-output tail to keep
+        """
+        self.complete = False
+        self.error_seen = False
+        self.error: Optional[str] = None
+        self.delegation: Optional[dict] = None
+        self.control = ControlState()
+        self.max_tail_bytes = max_tail_bytes
+        self._tail: deque[str] = deque()
+        self._tail_bytes = 0
+
+    def feed(self, line: str) -> None:
+        """
+        Scan one line of output.
+
+        Args:
+            line: Output line without its newline
+        """
+        self._remember(line)
+
+        if "PERSONA_" not in line or self.control.feed(line):
+            return
+
+        if COMPLETE_MARKER in line:
+            self.complete = True
+
+        if ERROR_MARKER in line:
+            self.error_seen = True
+            if self.error is None and f"{ERROR_MARKER}:" in line:
+                self.error = line.split(f"{ERROR_MARKER}:", 1)[1].strip()
+
+        if self.delegation is None and f"{DELEGATE_MARKER}:" in line:
+            parts = line.split(f"{DELEGATE_MARKER}:", 1)[1].strip().split(":", 1)
+            if len(parts) == 2 and parts[0].strip() and parts[1].strip():
+                self.delegation = {"agent": parts[0].strip(), "task": parts[1].strip()}
+
+    def feed_file(self, path: Path) -> "MarkerScanner":
+        """
+        Scan a log file line by line without loading it into memory.
+
+        Args:
+            path: Log file; missing files are ignored
+
+        Returns:
+            Self for chaining
+        """
+        if Path(path).exists():
+            with open(path, errors="replace") as f:
+                for line in f:
+                    self.feed(line.rstrip("\n"))
+        return self
+
+    def tail(self) -> str:
+        """Return the most recent output, newline-joined."""
+        return "\n".join(self._tail)
+
+    def _remember(self, line: str) -> None:
+        self._tail.append(line)
+        self._tail_bytes += len(line) + 1
+        while self._tail_bytes > self.max_tail_bytes and len(self._tail) > 1:
+            self._tail_bytes -= len(self._tail.popleft()) + 1
@@ -2,26 +2,35 @@
 
 import hashlib
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Iterator, Optional
 from supabase import Client
 
+from .backends import StorageBackend, SupabaseBackend
+
 
 class NoteStateStore:
     """
-    Manages daily note state in Supabase for diff detection.
+    Manages daily note state for diff detection.
 
     Tracks content hashes and parsed data to detect changes in daily notes
     without re-processing unchanged content.
     """
 
-    def __init__(self, client: Client):
+    def __init__(self, client: Client = None, backend: StorageBackend = None):
         """
         Initialize NoteStateStore.
 
         Args:
             client: Supabase client instance
+            backend: Storage backend to use instead of a Supabase client
+                (e.g. JobStore.backend)
         """
-        self.client = client
+        if backend is None:
+            if client is None:
+                raise ValueError("Either client or backend must be provided")
+            backend = SupabaseBackend(client)
+
+        self.backend = backend
 
     def get_state(self, note_path: str) -> Optional[dict]:
         """
@@ -33,10 +42,7 @@ class NoteStateStore:
         Returns:
             State dict if found, None otherwise
         """
-        result = self.client.table("daily_note_state").select("*").eq(
-            "note_path", note_path
-        ).execute()
-        return result.data[0] if result.data else None
+        return self.backend.get_note_state(note_path)
 
     def save_state(
         self,
@@ -54,13 +60,13 @@ class NoteStateStore:
         """
         content_hash = self._hash_content(content)
 
-        self.client.table("daily_note_state").upsert({
+        self.backend.upsert_note_state({
             "note_path": note_path,
             "content_hash": content_hash,
             "last_scanned": datetime.now(timezone.utc).isoformat(),
             "last_content": content,
             "parsed_data": parsed
-        }).execute()
+        })
 
     def has_changed(self, note_path: str, content: str) -> bool:
         """
@@ -114,9 +120,7 @@ class NoteStateStore:
         Args:
             note_path: Path to the daily note
         """
-        self.client.table("daily_note_state").delete().eq(
-            "note_path", note_path
-        ).execute()
+        self.backend.delete_note_state(note_path)
 
     def get_all_tracked_notes(self) -> list[dict]:
         """
@@ -125,5 +129,25 @@ class NoteStateStore:
         Returns:
             List of state dicts for all tracked notes
         """
-        result = self.client.table("daily_note_state").select("*").execute()
-        return result.data
+        return list(self.iter_tracked_notes())
+
+    def iter_tracked_notes(self, page_size: int = 500) -> Iterator[dict]:
+        """
+        Stream tracked note states ordered by path, one page at a time.
+
+        Args:
+            page_size: Rows fetched per request
+
+        Yields:
+            State dicts
+        """
+        after = None
+        while True:
+            rows = self.backend.select_page(
+                "daily_note_state", order=("note_path",), after=after, limit=page_size
+            )
+            yield from rows
+
+            if len(rows) < page_size:
+                return
+            after = (rows[-1]["note_path"],)
@@ -1,18 +1,40 @@
 """Process manager for running AI agent subprocesses."""
 
 import subprocess
+from collections import Counter
 import signal
 import os
-import threading
-import time
-import io
-import select
 from pathlib import Path
 from datetime import datetime
 import psutil
-from typing import Optional
-
-from .job_store import Job, JobStore
+from typing import Callable, Optional
+
+from .control import ControlState
+from .heartbeat import HeartbeatService
+from .limits import (
+    CgroupManager,
+    LimitsConfig,
+    ResourceLimits,
+    apply_rlimits,
+    classify_limit_exit,
+    rlimit_preexec,
+)
+from .job_store import Job, JobStatus, JobStore
+from .job_types import InvalidJobError, JobTypeRegistry, default_registry
+from .log_shipper import LogShipper
+from .log_writer import LocalLogWriter
+from .markers import MarkerScanner
+from .resource_sampler import ResourceSampler
+from .spawner import AgentSpawner
+from .supervisor import ProcessSupervisor
+from .timeouts import resolve_timeout
+
+
+# Log level recorded for each output stream
+_STREAM_LEVELS = {'stdout': 'info', 'stderr': 'error'}
+
+# Statuses whose outcome an agent's exit must not overwrite
+_FINISHED = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED, JobStatus.HUNG)
 
 
 class ProcessManager:
@@ -27,7 +49,8 @@ class ProcessManager:
         self,
         job_store: JobStore,
         logs_dir: Path,
-        persona_root: Path = None
+        persona_root: Path = None,
+        job_types: JobTypeRegistry = None
     ):
         """
         Initialize ProcessManager.
@@ -36,6 +59,7 @@ class ProcessManager:
             job_store: JobStore instance for updating job status
             logs_dir: Directory to write process logs
             persona_root: Root directory of Persona system
+            job_types: Job type registry (default: default_registry())
         """
         self.job_store = job_store
         self.logs_dir = logs_dir
@@ -49,12 +73,65 @@ class ProcessManager:
         )
         self.business = os.environ.get("PERSONA_BUSINESS", "PersonalMCO")
 
-        self._heartbeat_threads = {}
+        self.job_types = job_types or default_registry()
+        self._template_context = {
+            "vault_path": self.vault_path,
+            "persona_root": self.persona_root,
+            "business": self.business,
+        }
+
         self._processes = {}
+        # Called with the job ID after each job's outcome has been recorded
+        self.on_job_exit: Optional[Callable[[str], None]] = None
+        # Concurrency class of each running job, for per-class limits
+        self._job_classes: dict[str, str] = {}
+        # Per-job marker scanners for stdout and stderr, fed as output arrives
+        self._scanners: dict[str, dict[str, MarkerScanner]] = {}
+
+        # One bulk heartbeat per interval for every job on this host
+        self.heartbeats = HeartbeatService(job_store)
+
+        # One thread samples CPU, memory and IO of every job's process tree
+        self.resource_sampler = ResourceSampler(job_store)
+
+        # Output lines are queued for a single shipper thread; shipped log
+        # inserts refresh last_heartbeat server-side
+        self.log_shipper = LogShipper(
+            job_store,
+            self.logs_dir / "spool",
+            on_shipped=self.heartbeats.record_activity
+        )
 
-        # Log streaming configuration
-        self._log_batch_size = int(os.environ.get('LOG_BATCH_SIZE', '10'))
-        self._log_flush_interval = float(os.environ.get('LOG_FLUSH_INTERVAL', '5.0'))
+        # One loop thread reads every child's output and reaps every exit
+        self.supervisor = ProcessSupervisor()
+
+        # Starts agents with posix_spawn from a cached environment
+        self.spawner = AgentSpawner()
+
+        # Local copies of agent output, flushed on a timer rather than per line
+        self.log_writer = LocalLogWriter(self.logs_dir)
+        self.supervisor.every(self.log_writer.flush_interval, self.log_writer.flush_due)
+
+        # Run time limits: SIGTERM at the deadline, SIGKILL kill_grace later
+        self.kill_grace = float(os.environ.get('JOB_KILL_GRACE', '30'))
+        self._deadlines = {}
+        self._timed_out: dict[str, str] = {}
+        # Jobs stopped by hand_off(), requeued rather than failed when they exit
+        self._handed_off: set[str] = set()
+
+        # Per-job-type and per-agent resource limits, applied at spawn
+        self.limits = LimitsConfig.load(Path(
+            os.environ.get('PERSONA_LIMITS_FILE', self.persona_root / 'config' / 'limits.yaml')
+        ))
+        self._cgroups: Optional[CgroupManager] = None
+        self._cgroups_checked = False
+        self._job_limits: dict[str, tuple[ResourceLimits, Optional[Path]]] = {}
+        self._log_flush_timeout = float(os.environ.get('LOG_FLUSH_TIMEOUT', '30'))
+
+        # Progress, artifacts and usage from control messages are written at
+        # most once per interval per job
+        control_interval = float(os.environ.get('CONTROL_FLUSH_INTERVAL', '5'))
+        self.supervisor.every(control_interval, self._flush_control)
 
     def start_agent(self, job: Job, stream_to_supabase: bool = True) -> int:
         """
@@ -69,9 +146,10 @@ class ProcessManager:
 
         Raises:
             RuntimeError: If agent fails to start
+            ValueError: If the job's payload timeout is invalid
         """
-        log_file = self.logs_dir / f"{job.short_id}.log"
-        error_file = self.logs_dir / f"{job.short_id}.error.log"
+        timeout = resolve_timeout(job, self.job_types)
+        limits = self.limits.for_job(job)
 
         # Build command based on job type
         cmd = self._build_command(job)
@@ -80,395 +158,540 @@ class ProcessManager:
 
         # Use PIPE for streaming if enabled, otherwise write to files
         if stream_to_supabase:
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                start_new_session=True,  # Create new process group
-                bufsize=1,  # Line buffered
-                universal_newlines=True,  # Text mode for easier line reading
-                env={
-                    **os.environ,
-                    'PERSONA_JOB_ID': job.id,
-                    'PERSONA_SHORT_ID': job.short_id,
-                    'PERSONA_JOB_TYPE': job.job_type,
-                }
-            )
+            process = self._spawn(job, cmd, subprocess.PIPE, subprocess.PIPE, limits)
 
             # Update job with PID first
-            self.job_store.start_job(job.id, process.pid)
+            self._record_start(job, process)
 
             # Store process reference
             self._processes[job.id] = process
 
-            # Start streaming threads (write to both file and Supabase)
-            self._start_streaming_threads(job, process, log_file, error_file)
+            # Stream output to both local files and Supabase; the supervisor
+            # reports the exit as soon as it happens
+            self.log_writer.open(job.id, job.short_id)
+            self._scanners[job.id] = self._new_scanners()
+            self.log_shipper.start()
+            self.supervisor.watch(job.id, process, self._on_output, self._on_exit)
+            self.supervisor.start()
+
+            # Keep the job alive between log flushes and watch it for stalls
+            self.heartbeats.register(job.id, process, watch_progress=True)
+            self.heartbeats.start()
+            self.resource_sampler.register(job.id, process.pid)
+            self.resource_sampler.start()
+            self._deadlines[job.id] = self.supervisor.call_later(timeout, self._on_deadline, job.id, timeout)
         else:
             # Legacy: write directly to files
-            with open(log_file, 'w') as stdout, open(error_file, 'w') as stderr:
-                process = subprocess.Popen(
-                    cmd,
-                    stdout=stdout,
-                    stderr=stderr,
-                    start_new_session=True,
-                    env={
-                        **os.environ,
-                        'PERSONA_JOB_ID': job.id,
-                        'PERSONA_SHORT_ID': job.short_id,
-                        'PERSONA_JOB_TYPE': job.job_type,
-                    }
-                )
+            paths = self.log_writer.paths(job.short_id)
+            with open(paths['stdout'], 'w') as stdout, open(paths['stderr'], 'w') as stderr:
+                process = self._spawn(job, cmd, stdout, stderr, limits)
 
             # Update job with PID
-            self.job_store.start_job(job.id, process.pid)
+            self._record_start(job, process)
 
             # Store process reference
             self._processes[job.id] = process
 
-            # Start heartbeat and monitoring thread
-            self._start_heartbeat(job.id, process)
+            # Supervisor reports the exit; heartbeat service keeps the job alive
+            self.supervisor.watch(job.id, process, on_exit=self._on_exit)
+            self.supervisor.start()
+            self.heartbeats.register(job.id, process)
+            self.heartbeats.start()
+            self.resource_sampler.register(job.id, process.pid)
+            self.resource_sampler.start()
+            self._deadlines[job.id] = self.supervisor.call_later(timeout, self._on_deadline, job.id, timeout)
 
         return process.pid
 
-    def _start_streaming_threads(
-        self,
-        job: Job,
-        process: subprocess.Popen,
-        log_file: Path,
-        error_file: Path
-    ):
+    def _spawn(self, job: Job, cmd: list[str], stdout, stderr, limits: ResourceLimits) -> subprocess.Popen:
         """
-        Start threads to stream stdout/stderr to both local files and Supabase.
+        Start an agent process in its own session with the job's limits.
 
         Args:
-            job: Job being executed
-            process: Subprocess with PIPE stdout/stderr
-            log_file: Path to stdout log file
-            error_file: Path to stderr log file
-        """
-        stdout_buffer = []
-        stderr_buffer = []
-        buffer_lock = threading.Lock()
-        last_flush_time = [time.time()]
-
-        def stream_reader(stream, local_file_path, buffer, level):
-            """Read from stream, write to file, buffer for Supabase."""
-            with open(local_file_path, 'w') as f:
-                for line in iter(stream.readline, ''):
-                    if not line:
-                        break
-                    line = line.rstrip('\n')
-                    # Write to local file with timestamp
-                    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    f.write(f"[{timestamp}] {line}\n")
-                    f.flush()
-
-                    # Add to buffer for Supabase
-                    with buffer_lock:
-                        buffer.append(line)
-
-                        # Flush if batch size reached
-                        if len(buffer) >= self._log_batch_size:
-                            self._flush_log_buffer(job.id, buffer, level)
-                            buffer.clear()
-                            last_flush_time[0] = time.time()
-
-        def buffer_flusher():
-            """Periodically flush buffers even if not full."""
-            heartbeat_interval = int(os.environ.get('JOB_HEARTBEAT_INTERVAL', '30'))
-
-            while process.poll() is None:
-                try:
-                    self.job_store.heartbeat(job.id)
-                except Exception as e:
-                    print(f"Heartbeat failed for {job.short_id}: {e}")
-
-                # Check if we should flush buffers based on time
-                with buffer_lock:
-                    if time.time() - last_flush_time[0] >= self._log_flush_interval:
-                        if stdout_buffer:
-                            self._flush_log_buffer(job.id, stdout_buffer.copy(), 'info')
-                            stdout_buffer.clear()
-                        if stderr_buffer:
-                            self._flush_log_buffer(job.id, stderr_buffer.copy(), 'error')
-                            stderr_buffer.clear()
-                        last_flush_time[0] = time.time()
-
-                time.sleep(min(heartbeat_interval, self._log_flush_interval))
-
-            # Final flush when process exits
-            with buffer_lock:
-                if stdout_buffer:
-                    self._flush_log_buffer(job.id, stdout_buffer.copy(), 'info')
-                    stdout_buffer.clear()
-                if stderr_buffer:
-                    self._flush_log_buffer(job.id, stderr_buffer.copy(), 'error')
-                    stderr_buffer.clear()
-
-            # Handle process exit
-            self._handle_process_exit(job.id, process)
-
-        # Start stdout reader thread
-        stdout_thread = threading.Thread(
-            target=stream_reader,
-            args=(process.stdout, log_file, stdout_buffer, 'info'),
-            daemon=True
-        )
-        stdout_thread.start()
+            job: Job being started
+            cmd: Command to run
+            stdout: Popen stdout target
+            stderr: Popen stderr target
+            limits: Resource limits for the job
 
-        # Start stderr reader thread
-        stderr_thread = threading.Thread(
-            target=stream_reader,
-            args=(process.stderr, error_file, stderr_buffer, 'error'),
-            daemon=True
+        Returns:
+            Started process
+        """
+        env = self.spawner.env(
+            PERSONA_JOB_ID=job.id,
+            PERSONA_SHORT_ID=job.short_id,
+            PERSONA_JOB_TYPE=job.job_type,
         )
-        stderr_thread.start()
+        process = self.spawner.spawn(cmd, env, stdout, stderr, preexec_fn=rlimit_preexec(limits))
+        self._job_classes[job.id] = self.job_types.get(job.job_type).concurrency
+        self._apply_limits(job, process, limits)
+        return process
+
+    def _apply_limits(self, job: Job, process: subprocess.Popen, limits: ResourceLimits):
+        """
+        Apply rlimits and the job's cgroup to a just-started agent.
+
+        A limit that cannot be applied is logged on the job rather than
+        failing it.
+        """
+        cgroup = None
+        try:
+            if limits.uses_rlimits:
+                apply_rlimits(process.pid, limits)
+            if limits.uses_cgroup and self._cgroup_manager() is not None:
+                cgroup = self._cgroups.attach(job.short_id, process.pid, limits)
+        except OSError as e:
+            self.job_store.log(job.id, "warn", f"Could not apply resource limits: {e}")
+
+        if limits.uses_rlimits or cgroup is not None:
+            self._job_limits[job.id] = (limits, cgroup)
+
+    def _cgroup_manager(self) -> Optional[CgroupManager]:
+        # Set up lazily: only workers that start jobs with cgroup limits
+        # should move themselves into a cgroup leaf
+        if not self._cgroups_checked:
+            self._cgroups_checked = True
+            self._cgroups = CgroupManager.create()
+        return self._cgroups
+
+    def _record_start(self, job: Job, process: subprocess.Popen):
+        """
+        Record that a job's agent process has started.
 
-        # Start flusher/heartbeat thread
-        flusher_thread = threading.Thread(target=buffer_flusher, daemon=True)
-        flusher_thread.start()
+        Jobs claimed through JobStore.claim_jobs are already marked running
+        with their start time, so only the PID needs to be stored. If the
+        write fails the agent is killed and its slot released, since nothing
+        would be watching it.
 
-        self._heartbeat_threads[job.id] = flusher_thread
+        Args:
+            job: Job that was started
+            process: The agent process
 
-    def _flush_log_buffer(self, job_id: str, messages: list, level: str):
+        Raises:
+            Exception: Whatever the store raised
         """
-        Flush a buffer of log messages to Supabase.
+        try:
+            if job.status == JobStatus.RUNNING:
+                self.job_store.update_job(job.id, pid=process.pid)
+            else:
+                self.job_store.start_job(job.id, process.pid)
+        except Exception:
+            self._signal_group(process, signal.SIGKILL)
+            process.wait()
+            for pipe in (process.stdout, process.stderr):
+                if pipe is not None:
+                    pipe.close()
+            self._job_classes.pop(job.id, None)
+            _, cgroup = self._job_limits.pop(job.id, (None, None))
+            if cgroup is not None:
+                CgroupManager.remove(cgroup)
+            raise
+
+    def _on_output(self, job_id: str, stream: str, line: str):
+        """
+        Handle one line of agent output (supervisor loop thread).
+
+        Writes the line to the local log file and queues it for the log
+        shipper, which never blocks the loop.
 
         Args:
             job_id: Job ID
-            messages: List of log messages
-            level: Log level (info, error)
+            stream: 'stdout' or 'stderr'
+            line: Output line without its newline
         """
-        if not messages:
+        if not self.log_writer.write(job_id, stream, line):
             return
 
-        try:
-            self.job_store.log_batch(job_id, messages, level)
-        except Exception as e:
-            # Log locally but don't crash
-            print(f"Failed to flush logs to Supabase for {job_id}: {e}")
+        self.heartbeats.record_progress(job_id)
+        self._scanners[job_id][stream].feed(line)
+        self.log_shipper.push(job_id, _STREAM_LEVELS[stream], line)
 
-    def _build_command(self, job: Job) -> list[str]:
+    def _on_deadline(self, job_id: str, timeout: float):
         """
-        Build the command to execute for this job type.
+        Stop a job that has run past its time limit (supervisor loop thread).
 
-        Supports both new Python-based execution and legacy bash script execution.
+        Sends SIGTERM to the job's process group and schedules SIGKILL if
+        it is still running after kill_grace seconds.
 
         Args:
-            job: Job to build command for
-
-        Returns:
-            Command list suitable for subprocess.Popen
+            job_id: Job ID
+            timeout: The limit that was exceeded, in seconds
         """
-        if job.job_type == 'research':
-            # Research question from daily note
-            question = job.payload.get('question', '')
-            prompt = f"""You are a research agent. Research the following question thoroughly:
-
-Question: {question}
-
-Requirements:
-1. Search for authoritative sources using web search
-2. Synthesize findings into a clear, structured summary
-3. Save your findings to: {self.vault_path}/Resources/General/Embeds/{job.short_id}-research.md
-4. Include citations and key insights
-5. Structure the response with clear sections
-
-When complete, output: PERSONA_COMPLETE
-If you encounter an error, output: PERSONA_ERROR: <description>
-"""
-            return self._build_claude_command(job, prompt)
-
-        elif job.job_type == 'meeting_extract':
-            # Extract meeting notes from daily note
-            meeting = job.payload.get('meeting', {})
-            prompt = f"""Extract meeting notes from the daily note.
-
-Meeting: {meeting.get('title')} at {meeting.get('time_str')}
-Source file: {job.source_file}
-
-Create a meeting note at: {self.vault_path}/Meetings/{job.short_id}-{meeting.get('title', 'meeting')}.md
-
-Include:
-- Attendees
-- Key discussion points
-- Action items with owners
-- Follow-ups and deadlines
-
-When complete, output: PERSONA_COMPLETE
-"""
-            return self._build_claude_command(job, prompt)
-
-        elif job.job_type == 'delegate':
-            # Agent delegating to another agent
-            task = job.payload.get('task', '')
-            context = job.payload.get('context', '')
-            prompt = f"""You are the {job.assigned_to} agent.
-
-Task delegated by {job.delegated_by}:
-{task}
-
-Context:
-{context}
-
-Complete this task according to your role capabilities.
-Save any outputs to appropriate locations in the vault.
-
-When complete, output: PERSONA_COMPLETE
-If you need to delegate to another agent, output: PERSONA_DELEGATE: <agent_id>: <task>
-"""
-            return self._build_claude_command(job, prompt)
-
-        elif job.job_type == 'agent_action':
-            # Legacy agent execution via bash script
-            agent_name = job.payload.get('agent', '')
-            action = job.payload.get('action', '')
-            timeout = job.payload.get('timeout', 300)
-
-            return [
-                'bash',
-                str(self.persona_root / 'scripts/run-agent.sh'),
-                self.business,
-                agent_name,
-                action,
-                str(timeout)
-            ]
+        process = self._processes.get(job_id)
+        if process is None or process.returncode is not None:
+            return
 
-        else:
-            # Generic prompt execution
-            prompt = job.payload.get('prompt', 'No prompt provided')
-            return self._build_claude_command(job, prompt)
+        reason = f"Timed out after {timeout:g}s"
+        self._timed_out[job_id] = reason
+        if not self._signal_group(process, signal.SIGTERM):
+            return
+
+        self._deadlines[job_id] = self.supervisor.call_later(self.kill_grace, self._escalate, job_id)
+        self.supervisor.submit(job_id, self.job_store.log, job_id, "warn", f"{reason}, sent SIGTERM")
 
-    def _build_claude_command(self, job: Job, prompt: str) -> list[str]:
+    def hand_off(self) -> list[str]:
         """
-        Build a Claude CLI command.
+        Stop every in-flight job so another worker can run it.
 
-        Args:
-            job: Job context
-            prompt: Prompt to send to Claude
+        Each job's process group gets SIGTERM, and SIGKILL kill_grace
+        seconds later if it is still running. A job that then exits
+        unsuccessfully is put back to pending instead of failed; one that
+        still finishes cleanly is recorded as usual.
 
         Returns:
-            Command list
+            IDs of the jobs being stopped
         """
-        # Use the model specified in payload, or default
-        model = job.payload.get('model', os.environ.get('CLAUDE_MODEL', 'opus'))
+        job_ids = list(self._processes)
+        for job_id in job_ids:
+            self._handed_off.add(job_id)
+            self.supervisor.call_later(0, self._stop_for_hand_off, job_id)
+        return job_ids
+
+    def _stop_for_hand_off(self, job_id: str):
+        """Send SIGTERM to a job being handed off (supervisor loop thread)."""
+        process = self._processes.get(job_id)
+        if process is None or process.returncode is not None:
+            return
+        if not self._signal_group(process, signal.SIGTERM):
+            return
+
+        deadline = self._deadlines.pop(job_id, None)
+        if deadline is not None:
+            self.supervisor.cancel(deadline)
+        self._deadlines[job_id] = self.supervisor.call_later(self.kill_grace, self._escalate, job_id)
+        self.supervisor.submit(job_id, self.job_store.log, job_id, "warn", "Worker shutting down, sent SIGTERM")
+
+    def _escalate(self, job_id: str):
+        """Kill a timed-out or handed-off job that ignored SIGTERM (supervisor loop thread)."""
+        process = self._processes.get(job_id)
+        if process is None or process.returncode is not None:
+            return
+
+        if self._signal_group(process, signal.SIGKILL):
+            self.supervisor.submit(
+                job_id, self.job_store.log, job_id, "warn",
+                f"Still running {self.kill_grace:g}s after SIGTERM, sent SIGKILL"
+            )
 
-        return [
-            "claude",
-            "-p", prompt,
-            "--output-format", "text",
-            "--max-turns", "20",
-            "--model", model,
-        ]
+    @staticmethod
+    def _signal_group(process: subprocess.Popen, sig: signal.Signals) -> bool:
+        # Agents run in their own session, so the PID is also the group ID
+        try:
+            os.killpg(process.pid, sig)
+            return True
+        except ProcessLookupError:
+            return False
 
-    def _start_heartbeat(self, job_id: str, process: subprocess.Popen):
+    def _on_exit(self, job_id: str, returncode: int):
         """
-        Start a thread to send heartbeats and monitor process.
+        Handle an agent exit (supervisor loop thread).
+
+        Exit handling runs on the job's worker strand, after the shipper
+        has sent (or spooled) every line the agent wrote.
 
         Args:
-            job_id: Job ID to monitor
-            process: Process to monitor
+            job_id: Job ID
+            returncode: Process exit code
         """
-        def heartbeat_loop():
-            heartbeat_interval = int(os.environ.get('JOB_HEARTBEAT_INTERVAL', '30'))
+        self.log_writer.close(job_id)
+        # No more output is coming, so no more control updates either
+        scanners = self._scanners.pop(job_id, None)
+        deadline = self._deadlines.pop(job_id, None)
+        if deadline is not None:
+            self.supervisor.cancel(deadline)
+
+        process = self._processes.get(job_id)
+        if process is not None:
+            self.supervisor.submit(job_id, self._finish_job, job_id, process, scanners)
+
+    def _finish_job(self, job_id: str, process: subprocess.Popen, scanners: Optional[dict]):
+        """Wait for the job's output to be shipped, then record its outcome."""
+        if scanners is not None and not self.log_shipper.flush(timeout=self._log_flush_timeout):
+            print(f"Timed out shipping final logs for {job_id}")
+        self._handle_process_exit(job_id, process, scanners)
+
+    def _flush_control(self):
+        """Queue a store update for each job with new control state (supervisor loop thread)."""
+        for job_id, scanners in list(self._scanners.items()):
+            control = scanners['stdout'].control
+            if control.dirty:
+                control.dirty = False
+                self.supervisor.submit(job_id, self._push_control, job_id, control.snapshot())
+
+    def _push_control(self, job_id: str, snapshot: dict):
+        """Store a running job's reported progress in its result column."""
+        try:
+            self.job_store.update_job(job_id, result=snapshot)
+        except Exception as e:
+            print(f"Failed to store progress for {job_id}: {e}")
 
-            while process.poll() is None:  # While process is running
-                try:
-                    self.job_store.heartbeat(job_id)
-                except Exception as e:
-                    # Log but don't crash the heartbeat thread
-                    print(f"Heartbeat failed for {job_id}: {e}")
+    def _build_command(self, job: Job) -> list[str]:
+        """
+        Build the command to execute for this job type.
 
-                time.sleep(heartbeat_interval)
+        Args:
+            job: Job to build command for
 
-            # Process finished
-            self._handle_process_exit(job_id, process)
+        Returns:
+            Command list suitable for subprocess.Popen
 
-        thread = threading.Thread(target=heartbeat_loop, daemon=True)
-        thread.start()
-        self._heartbeat_threads[job_id] = thread
+        Raises:
+            InvalidJobError: If the job's payload does not match its type's schema
+        """
+        return self.job_types.get(job.job_type).build_command(job, self._template_context)
 
-    def _handle_process_exit(self, job_id: str, process: subprocess.Popen):
+    def _handle_process_exit(self, job_id: str, process: subprocess.Popen, scanners: dict = None):
         """
-        Handle process exit by checking logs and updating job status.
+        Handle process exit using the markers found while output streamed.
+
+        A job stopped by hand_off() goes back to pending, one cancelled or
+        marked hung by kill_job() keeps that status, one stopped at its
+        deadline fails with exit code 124, and one that hit a resource limit
+        fails with result.limit_exceeded set. Otherwise
+        control messages decide the outcome when the agent sent any, and the
+        legacy PERSONA_* markers are used if not. The outcome is written at
+        the version read here, so a cancel or hung mark that lands while
+        the exit is handled is kept rather than overwritten.
 
         Args:
             job_id: Job ID
             process: Finished process
+            scanners: Stream scanners fed while the job ran, if it streamed
         """
+        self.heartbeats.unregister(job_id)
+        timed_out = self._timed_out.pop(job_id, None)
+        handed_off = job_id in self._handed_off
+        self._handed_off.discard(job_id)
+        try:
+            self._record_outcome(job_id, process, scanners, timed_out, handed_off)
+        finally:
+            # Free the job's slot even if its outcome could not be recorded
+            self._processes.pop(job_id, None)
+            self._job_classes.pop(job_id, None)
+
+            if self.on_job_exit:
+                try:
+                    self.on_job_exit(job_id)
+                except Exception as e:
+                    print(f"Job exit callback failed for {job_id}: {e}")
+
+    def _record_outcome(
+        self,
+        job_id: str,
+        process: subprocess.Popen,
+        scanners: Optional[dict],
+        timed_out: Optional[str],
+        handed_off: bool
+    ):
+        """Record a finished job's outcome (see _handle_process_exit)."""
+        peaks = self.resource_sampler.finish(job_id)
+        resources = self._with_resources(None, peaks)
+        limits, cgroup = self._job_limits.pop(job_id, (None, None))
+        oom_killed = cgroup is not None and CgroupManager.oom_killed(cgroup)
+        if cgroup is not None:
+            CgroupManager.remove(cgroup)
+
         exit_code = process.returncode
         job = self.job_store.get_job(job_id)
 
         if not job:
             return
 
-        # Read logs to check for completion marker
-        log_file = self.logs_dir / f"{job.short_id}.log"
-        error_file = self.logs_dir / f"{job.short_id}.error.log"
+        if scanners is None:
+            # Output went straight to files; scan them line by line
+            paths = self.log_writer.paths(job.short_id)
+            scanners = self._new_scanners()
+            scanners['stdout'].feed_file(paths['stdout'])
+            scanners['stderr'].feed_file(paths['stderr'])
+            self.log_writer.archive(*paths.values())
+        stdout, stderr = scanners['stdout'], scanners['stderr']
+
+        breach = limits and classify_limit_exit(limits, exit_code, stderr.tail(), oom_killed)
+
+        if handed_off and exit_code != 0:
+            if self.job_store.requeue_job(job_id):
+                self.job_store.log(job_id, "warn", "Worker shut down before the job finished, requeued")
 
-        log_content = log_file.read_text() if log_file.exists() else ""
-        error_content = error_file.read_text() if error_file.exists() else ""
+        elif job.status in _FINISHED:
+            # Killed through kill_job() or reaped, which recorded the outcome
+            pass
 
-        if "PERSONA_COMPLETE" in log_content:
-            self.job_store.complete_job(job_id)
-            self.job_store.log(job_id, "info", "Job completed successfully")
+        elif timed_out:
+            # Same code as timeout(1) and run-agent.sh
+            self._fail(job, timed_out, 124, resources)
 
-        elif "PERSONA_ERROR" in log_content or exit_code != 0:
-            error = self._extract_error(log_content) or error_content or f"Exit code: {exit_code}"
-            self.job_store.fail_job(job_id, error, exit_code)
-            self.job_store.log(job_id, "error", f"Job failed: {error}")
+        elif breach:
+            kind, message = breach
+            result = {**(resources or {}), "limit_exceeded": kind}
+            self._fail(job, message, exit_code, result)
 
-        elif "PERSONA_DELEGATE" in log_content:
+        elif stdout.control.used:
+            self._apply_control_outcome(job, exit_code, stdout, stderr, peaks)
+
+        elif stdout.complete:
+            self._complete(job, resources, "Job completed successfully")
+
+        elif stdout.error_seen or exit_code != 0:
+            error = stdout.error or stderr.tail() or f"Exit code: {exit_code}"
+            self._fail(job, error, exit_code, resources)
+
+        elif stdout.delegation is not None:
             # Handle delegation
-            delegation = self._extract_delegation(log_content)
-            if delegation:
-                self.job_store.log(
-                    job_id,
-                    "info",
-                    f"Agent delegated to {delegation['agent']}: {delegation['task']}"
-                )
-                # Create delegated job
-                self.job_store.create_job(
-                    job_type="delegate",
-                    payload={"task": delegation['task'], "context": log_content},
-                    assigned_to=delegation['agent'],
-                    parent_id=job.id,
-                    delegated_by=job.assigned_to
-                )
-            self.job_store.complete_job(job_id)
+            if self._complete(job, resources):
+                self._delegate(job, [stdout.delegation], stdout.tail())
 
         else:
             # Assume success if no error markers
-            self.job_store.complete_job(job_id)
-            self.job_store.log(job_id, "info", "Job completed (no explicit marker)")
+            self._complete(job, resources, "Job completed (no explicit marker)")
 
-        # Clean up process reference
-        if job_id in self._processes:
-            del self._processes[job_id]
-
-    def _extract_error(self, log_content: str) -> Optional[str]:
-        """Extract error message from logs."""
-        for line in log_content.split('\n'):
-            if 'PERSONA_ERROR:' in line:
-                return line.split('PERSONA_ERROR:')[1].strip()
-        return None
-
-    def _extract_delegation(self, log_content: str) -> Optional[dict]:
-        """Extract delegation instruction from logs."""
-        for line in log_content.split('\n'):
-            if 'PERSONA_DELEGATE:' in line:
-                parts = line.split('PERSONA_DELEGATE:')[1].strip().split(':', 1)
-                if len(parts) == 2:
-                    return {'agent': parts[0].strip(), 'task': parts[1].strip()}
-        return None
-
-    def kill_job(self, job_id: str, force: bool = False) -> bool:
+    def _complete(self, job: Job, result: Optional[dict], message: str = None) -> bool:
+        """
+        Complete a job at the version read when it exited.
+
+        Returns:
+            False if its outcome was recorded meanwhile (e.g. it was
+            cancelled or marked hung), which is then kept
+        """
+        if not self.job_store.complete_job(job.id, result=result, expected_version=job.version):
+            return False
+        if message:
+            self.job_store.log(job.id, "info", message)
+        return True
+
+    def _fail(self, job: Job, error: str, exit_code: int, result: Optional[dict]):
+        """Fail a job at the version read when it exited, unless its outcome was recorded meanwhile."""
+        if self.job_store.fail_job(job.id, error, exit_code, result=result, expected_version=job.version):
+            self.job_store.log(job.id, "error", f"Job failed: {error}")
+
+    def _delegate(self, job: Job, delegations: list[dict], context: str):
+        """
+        Create the jobs an agent delegated, with one insert.
+
+        Delegations come from agent output, so each is validated first; one
+        that does not make a valid delegate job is logged on the parent and
+        skipped rather than failing the others.
+
+        Args:
+            job: Delegating job
+            delegations: Dicts with agent, task and optionally context
+            context: Context for delegations that did not give their own
+        """
+        specs = []
+        for d in delegations:
+            payload = {"task": d['task'], "context": d.get('context') or context}
+            try:
+                self.job_types.validate("delegate", payload)
+            except InvalidJobError as e:
+                self.job_store.log(job.id, "warn", f"Ignored delegation to {d['agent']}: {e}")
+                continue
+            specs.append({
+                "job_type": "delegate",
+                "payload": payload,
+                "assigned_to": d['agent'],
+                "parent_id": job.id,
+                "delegated_by": job.assigned_to,
+            })
+        if not specs:
+            return
+
+        self.job_store.create_jobs(specs)
+        self.job_store.log_batch(
+            job.id,
+            [f"Agent delegated to {s['assigned_to']}: {s['payload']['task']}" for s in specs]
+        )
+
+    def _apply_control_outcome(
+        self,
+        job: Job,
+        exit_code: int,
+        stdout: MarkerScanner,
+        stderr: MarkerScanner,
+        peaks: dict = None
+    ):
+        """
+        Record a job's outcome from its control messages.
+
+        Delegated jobs are created with one insert and the job's output,
+        artifacts, usage and resource peaks are stored with the final
+        status update.
+
+        Args:
+            job: Finished job
+            exit_code: Process exit code
+            stdout: Scanner fed with the job's stdout
+            stderr: Scanner fed with the job's stderr
+            peaks: Resource peaks from the sampler
+        """
+        control: ControlState = stdout.control
+        result = self._with_resources(control.snapshot() or None, peaks)
+        if control.invalid:
+            self.job_store.log(job.id, "warn", f"Ignored {control.invalid} malformed control message(s)")
+
+        if control.outcome == "error" or (control.outcome is None and exit_code != 0):
+            error = control.error or stderr.tail() or f"Exit code: {exit_code}"
+            self._fail(job, error, exit_code, result)
+            return
+
+        if control.outcome == "complete":
+            completed = self._complete(job, result, "Job completed successfully")
+        else:
+            completed = self._complete(job, result, "Job completed (no explicit marker)")
+
+        # A job cancelled before its completion was recorded delegates nothing
+        if completed and control.delegations:
+            self._delegate(job, control.delegations, stdout.tail())
+
+    @staticmethod
+    def _with_resources(result: Optional[dict], peaks: dict) -> Optional[dict]:
+        """Add resource peaks, if any were sampled, to a job result."""
+        if not peaks:
+            return result
+        return {**(result or {}), "resources": peaks}
+
+    @staticmethod
+    def _new_scanners() -> dict[str, MarkerScanner]:
+        # stderr is only used as a fallback error message, so keep less of it
+        return {'stdout': MarkerScanner(), 'stderr': MarkerScanner(max_tail_bytes=8 * 1024)}
+
+    def get_markers(self, job_id: str) -> Optional[dict]:
+        """
+        Get the markers seen so far in a running job's output.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            Dict with complete, error, delegation and progress, or None if
+            the job is not streaming through this manager
+        """
+        scanners = self._scanners.get(job_id)
+        if scanners is None:
+            return None
+
+        stdout = scanners['stdout']
+        control = stdout.control
+        if control.used:
+            return {
+                'complete': control.outcome == 'complete',
+                'error': control.error,
+                'delegation': control.delegations[0] if control.delegations else None,
+                'progress': control.progress,
+            }
+        return {
+            'complete': stdout.complete,
+            'error': stdout.error if stdout.error_seen else None,
+            'delegation': stdout.delegation,
+            'progress': None,
+        }
+
+    def kill_job(self, job_id: str, force: bool = False, hung_reason: str = None) -> bool:
         """
         Kill a running job.
 
         Args:
             job_id: Job ID to kill
             force: Use SIGKILL instead of SIGTERM
+            hung_reason: Mark the job hung with this reason instead of cancelled
 
         Returns:
             True if killed successfully, False otherwise
@@ -481,8 +704,11 @@ If you need to delegate to another agent, output: PERSONA_DELEGATE: <agent_id>:
             sig = signal.SIGKILL if force else signal.SIGTERM
             # Kill the entire process group
             os.killpg(os.getpgid(job.pid), sig)
-            self.job_store.cancel_job(job_id)
-            self.job_store.log(job_id, "warn", f"Job killed with signal {sig.name}")
+            if hung_reason:
+                if self.job_store.mark_hung(job_id, hung_reason):
+                    self.job_store.log(job_id, "error", f"{hung_reason}, killed with signal {sig.name}")
+            elif self.job_store.cancel_job(job_id, expected_version=job.version):
+                self.job_store.log(job_id, "warn", f"Job killed with signal {sig.name}")
             return True
         except ProcessLookupError:
             # Process already dead
@@ -493,7 +719,11 @@ If you need to delegate to another agent, output: PERSONA_DELEGATE: <agent_id>:
 
     def get_process_info(self, job_id: str) -> Optional[dict]:
         """
-        Get detailed process info for a job.
+        Get process info for a job without blocking on measurements.
+
+        Usage figures come from the resource sampler's latest sample when
+        this manager runs the job, or from the newest job_metrics row
+        otherwise.
 
         Args:
             job_id: Job ID
@@ -507,18 +737,49 @@ If you need to delegate to another agent, output: PERSONA_DELEGATE: <agent_id>:
 
         try:
             proc = psutil.Process(job.pid)
-            return {
-                'pid': job.pid,
-                'status': proc.status(),
-                'cpu_percent': proc.cpu_percent(interval=0.1),
-                'memory_mb': proc.memory_info().rss / 1024 / 1024,
-                'create_time': datetime.fromtimestamp(proc.create_time()).isoformat(),
-                'children': len(proc.children(recursive=True)),
-                'cmdline': proc.cmdline(),
-            }
+            with proc.oneshot():
+                info = {
+                    'pid': job.pid,
+                    'status': proc.status(),
+                    'create_time': datetime.fromtimestamp(proc.create_time()).isoformat(),
+                    'cmdline': proc.cmdline(),
+                }
         except psutil.NoSuchProcess:
             return {'pid': job.pid, 'status': 'terminated'}
 
+        sample = self.resource_sampler.latest(job.id)
+        if sample is not None:
+            usage = sample.to_dict()
+            usage['sampled_at'] = usage.pop('timestamp')
+        else:
+            rows = self.job_store.get_metrics(job.id, limit=1)
+            usage = rows[0] if rows else None
+
+        if usage:
+            info.update({
+                'cpu_percent': usage['cpu_percent'],
+                'memory_mb': usage['rss_bytes'] / 1024 / 1024,
+                'children': usage['children'],
+                'io_read_bytes': usage['io_read_bytes'],
+                'io_write_bytes': usage['io_write_bytes'],
+                'sampled_at': usage['sampled_at'],
+            })
+        return info
+
+    def shutdown(self, timeout: float = 10.0):
+        """
+        Stop background services, shipping or spooling any queued log lines.
+
+        Agent processes keep running in their own sessions.
+
+        Args:
+            timeout: Seconds to wait for each service
+        """
+        self.log_shipper.stop(timeout)
+        self.heartbeats.stop(timeout)
+        self.resource_sampler.stop(timeout)
+        self.log_writer.shutdown()
+
     def is_running(self, job_id: str) -> bool:
         """
         Check if a job is currently running.
@@ -533,3 +794,21 @@ If you need to delegate to another agent, output: PERSONA_DELEGATE: <agent_id>:
             process = self._processes[job_id]
             return process.poll() is None
         return False
+
+    def in_flight(self) -> int:
+        """
+        Count jobs this manager started whose outcome is not recorded yet.
+
+        Returns:
+            Number of in-flight jobs
+        """
+        return len(self._processes)
+
+    def running_classes(self) -> Counter:
+        """
+        Count this manager's running jobs by concurrency class.
+
+        Returns:
+            Counter of class name to running jobs
+        """
+        return Counter(self._job_classes.values())
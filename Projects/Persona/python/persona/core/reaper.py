@@ -0,0 +1,141 @@
+"""Hung job detection for the worker."""
+
+import os
+import time
+from typing import Optional
+
+from .job_store import Job, JobStore
+from .process_manager import ProcessManager
+
+
+class HungJobReaper:
+    """
+    Finds and stops hung jobs.
+
+    Jobs this worker runs are hung when their agent is alive but has
+    printed nothing for JOB_STALL_TIMEOUT. The heartbeat service keeps
+    their stall deadlines in a min-heap, moved by every output line, so
+    reap() only pops expired entries and never queries the database. A
+    reaped job is killed through kill_job() and marked hung. Deadlines do
+    not depend on heartbeat writes succeeding, so a database outage never
+    kills healthy agents.
+
+    Jobs owned by other workers are left to those workers. A periodic
+    sweep() marks hung only the jobs of workers that have vanished: jobs
+    whose last_heartbeat is older than JOB_HUNG_TIMEOUT (the rule of
+    detect_hung_jobs, `persona hung` and the bridge) when none of their
+    worker's running jobs has a fresh heartbeat. The sweep cannot signal
+    processes on other hosts, so it only updates the status.
+    """
+
+    def __init__(
+        self,
+        job_store: JobStore,
+        process_manager: ProcessManager,
+        worker_id: str,
+        sweep_interval: float = None,
+        hung_timeout: float = None
+    ):
+        """
+        Initialize HungJobReaper.
+
+        Args:
+            job_store: JobStore for the sweep
+            process_manager: ProcessManager running this worker's jobs
+            worker_id: This worker's ID, whose jobs the sweep skips
+            sweep_interval: Seconds between sweeps for vanished workers
+                (default: WORKER_REAP_INTERVAL or 60)
+            hung_timeout: Heartbeat age at which the sweep considers a job
+                stale (default: JOB_HUNG_TIMEOUT or 300)
+        """
+        self.job_store = job_store
+        self.process_manager = process_manager
+        self.worker_id = worker_id
+        self.heartbeats = process_manager.heartbeats
+        self.stall_timeout = self.heartbeats.deadlines.timeout
+        self.hung_timeout = hung_timeout or float(os.environ.get('JOB_HUNG_TIMEOUT', '300'))
+        self.sweep_interval = sweep_interval or float(os.environ.get('WORKER_REAP_INTERVAL', '60'))
+        self._next_sweep = time.monotonic() + self.sweep_interval
+
+    def check(self) -> list[str]:
+        """
+        Reap local jobs past their deadline, and sweep if one is due.
+
+        Returns:
+            IDs of the jobs killed or marked hung
+        """
+        reaped = self.reap()
+        if time.monotonic() >= self._next_sweep:
+            self._next_sweep = time.monotonic() + self.sweep_interval
+            try:
+                reaped += [job.id for job in self.sweep()]
+            except Exception as e:
+                print(f"Hung job sweep failed: {e}")
+        return reaped
+
+    def reap(self) -> list[str]:
+        """
+        Kill this worker's jobs whose agent has stopped producing output.
+
+        Returns:
+            IDs of the jobs killed
+        """
+        reaped = []
+        for job_id in self.heartbeats.expired():
+            if not self.process_manager.is_running(job_id):
+                continue
+            reason = f"No output for {self.stall_timeout:g}s"
+            print(f"Detected hung job: {job_id[:8]} ({reason})")
+            try:
+                killed = self.process_manager.kill_job(job_id, force=True, hung_reason=reason)
+            except Exception as e:
+                # kill_job reads the job first; try again after another stall period
+                print(f"Failed to reap job {job_id[:8]}: {e}")
+                self.heartbeats.record_progress(job_id)
+                continue
+            if killed:
+                reaped.append(job_id)
+        return reaped
+
+    def sweep(self) -> list[Job]:
+        """
+        Mark hung the stale jobs of workers that no longer heartbeat.
+
+        One detect_hung_jobs query when nothing is stale; the running jobs
+        are read only when there are stale jobs to attribute.
+
+        Returns:
+            Jobs marked hung
+        """
+        stale = [
+            job for job in self.job_store.get_hung_jobs(int(self.hung_timeout))
+            if job.worker_id != self.worker_id
+        ]
+        if not stale:
+            return []
+
+        stale_ids = {job.id for job in stale}
+        alive = {
+            job.worker_id for job in self.job_store.get_running_jobs()
+            if job.worker_id and job.id not in stale_ids
+        }
+
+        marked = []
+        for job in stale:
+            # Jobs without a worker_id have no reaper of their own either
+            if job.worker_id in alive:
+                continue
+            owner = job.worker_id or job.hostname or "unknown worker"
+            reason = f"No heartbeat for {self.hung_timeout:g}s and {owner} is gone"
+            if self.job_store.mark_hung(job.id, reason):
+                self.job_store.log(job.id, "error", reason)
+                print(f"Marked job {job.short_id} hung ({owner} is gone)")
+                marked.append(job)
+        return marked
+
+    def seconds_until_deadline(self) -> Optional[float]:
+        """Return seconds until the next local job could be reaped, or None."""
+        deadline = self.heartbeats.next_deadline()
+        if deadline is None:
+            return None
+        return max(deadline - time.monotonic(), 0)
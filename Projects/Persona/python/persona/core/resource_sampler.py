@@ -0,0 +1,306 @@
+"""Background resource sampling for running agent process trees."""
+
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+import psutil
+
+from .job_store import JobStore
+
+
+@dataclass(slots=True)
+class ResourceSample:
+    """Resource usage of one job's whole process tree at one moment."""
+    timestamp: float
+    cpu_percent: float
+    rss_bytes: int
+    io_read_bytes: int
+    io_write_bytes: int
+    children: int
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary."""
+        return {
+            "timestamp": datetime.fromtimestamp(self.timestamp, timezone.utc).isoformat(),
+            "cpu_percent": self.cpu_percent,
+            "rss_bytes": self.rss_bytes,
+            "io_read_bytes": self.io_read_bytes,
+            "io_write_bytes": self.io_write_bytes,
+            "children": self.children,
+        }
+
+
+@dataclass
+class _Series:
+    """Samples and running aggregates for one job."""
+    pid: int
+    ring: deque
+    procs: dict[int, psutil.Process] = field(default_factory=dict)
+    window: list[ResourceSample] = field(default_factory=list)
+    window_start: float = 0.0
+    peaks: dict = field(default_factory=dict)
+
+
+class ResourceSampler:
+    """
+    Samples CPU, memory, IO and child counts for every running job.
+
+    One thread walks each registered job's process tree every interval
+    seconds. psutil.Process handles are kept between rounds, so CPU
+    percentages come from the time since the previous round and nothing
+    blocks to measure them. Each job keeps its last buffer_size samples in
+    memory. Every window seconds the samples are averaged into one job_metrics
+    row per job, and all rows go out in one insert. Peak values are tracked
+    for the job's whole run.
+    """
+
+    def __init__(
+        self,
+        job_store: JobStore,
+        interval: float = None,
+        window: float = None,
+        buffer_size: int = None
+    ):
+        """
+        Initialize ResourceSampler.
+
+        Args:
+            job_store: JobStore used to write job_metrics rows
+            interval: Seconds between samples (default: JOB_SAMPLE_INTERVAL or 5)
+            window: Seconds of samples per stored row (default: JOB_METRICS_WINDOW or 60)
+            buffer_size: Samples kept in memory per job (default: JOB_SAMPLE_BUFFER or 720)
+        """
+        self.job_store = job_store
+        self.interval = interval or float(os.environ.get('JOB_SAMPLE_INTERVAL', '5'))
+        self.window = window or float(os.environ.get('JOB_METRICS_WINDOW', '60'))
+        self.buffer_size = buffer_size or int(os.environ.get('JOB_SAMPLE_BUFFER', '720'))
+
+        self._series: dict[str, _Series] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, job_id: str, pid: int):
+        """
+        Start sampling a job's process tree.
+
+        Args:
+            job_id: Job UUID
+            pid: PID of the job's root process
+        """
+        with self._lock:
+            self._series[job_id] = _Series(pid=pid, ring=deque(maxlen=self.buffer_size))
+
+    def finish(self, job_id: str) -> dict:
+        """
+        Stop sampling a job, store its last partial window and return its peaks.
+
+        Args:
+            job_id: Job UUID
+
+        Returns:
+            Peak values for the run (empty if the job was never sampled)
+        """
+        with self._lock:
+            series = self._series.pop(job_id, None)
+        if series is None:
+            return {}
+
+        row = self._close_window(job_id, series)
+        if row:
+            self._write([row])
+        return dict(series.peaks)
+
+    def latest(self, job_id: str) -> Optional[ResourceSample]:
+        """
+        Get the most recent sample for a job without blocking.
+
+        Args:
+            job_id: Job UUID
+
+        Returns:
+            Latest sample, or None if the job has not been sampled yet
+        """
+        with self._lock:
+            series = self._series.get(job_id)
+            return series.ring[-1] if series and series.ring else None
+
+    def samples(self, job_id: str) -> list[ResourceSample]:
+        """
+        Get the buffered samples for a job, oldest first.
+
+        Args:
+            job_id: Job UUID
+
+        Returns:
+            Samples still held in the job's ring buffer
+        """
+        with self._lock:
+            series = self._series.get(job_id)
+            return list(series.ring) if series else []
+
+    def peaks(self, job_id: str) -> dict:
+        """
+        Get peak values for a running job.
+
+        Args:
+            job_id: Job UUID
+
+        Returns:
+            Dict with cpu_percent_max, rss_bytes_max, children_max,
+            io_read_bytes, io_write_bytes and samples
+        """
+        with self._lock:
+            series = self._series.get(job_id)
+            return dict(series.peaks) if series else {}
+
+    def sample(self) -> int:
+        """
+        Run one sampling round over every registered job.
+
+        Returns:
+            Number of jobs sampled
+        """
+        with self._lock:
+            jobs = list(self._series.items())
+
+        now = time.time()
+        rows = []
+        sampled = 0
+
+        for job_id, series in jobs:
+            point = self._sample_tree(series, now)
+            if point is None:
+                continue
+            sampled += 1
+
+            with self._lock:
+                series.ring.append(point)
+                self._update_peaks(series.peaks, point)
+                if not series.window:
+                    series.window_start = now
+                series.window.append(point)
+                if now - series.window_start >= self.window:
+                    rows.append(self._close_window(job_id, series))
+
+        self._write([row for row in rows if row])
+        return sampled
+
+    def start(self):
+        """Start the sampler thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="persona-resource-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """
+        Stop the sampler thread.
+
+        Args:
+            timeout: Seconds to wait for the thread to finish
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                # Metrics are best effort; keep sampling
+                print(f"Resource sampling failed: {e}")
+
+    def _sample_tree(self, series: _Series, now: float) -> Optional[ResourceSample]:
+        """Measure a job's process tree, reusing handles from the previous round."""
+        try:
+            root = series.procs.get(series.pid) or psutil.Process(series.pid)
+            tree = [root, *root.children(recursive=True)]
+        except psutil.NoSuchProcess:
+            return None
+
+        cpu = 0.0
+        rss = read_bytes = write_bytes = 0
+        procs = {}
+
+        for proc in tree:
+            # psutil.Process equality also compares create time, so a
+            # recycled PID gets a fresh handle
+            cached = series.procs.get(proc.pid)
+            if cached is not None and cached == proc:
+                proc = cached
+            try:
+                with proc.oneshot():
+                    cpu += proc.cpu_percent(interval=None)
+                    rss += proc.memory_info().rss
+                    io = self._io_counters(proc)
+                    if io is not None:
+                        read_bytes += io.read_bytes
+                        write_bytes += io.write_bytes
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            procs[proc.pid] = proc
+
+        series.procs = procs
+        return ResourceSample(
+            timestamp=now,
+            cpu_percent=round(cpu, 1),
+            rss_bytes=rss,
+            io_read_bytes=read_bytes,
+            io_write_bytes=write_bytes,
+            children=len(tree) - 1,
+        )
+
+    @staticmethod
+    def _io_counters(proc: psutil.Process):
+        # io_counters() does not exist on macOS
+        try:
+            return proc.io_counters()
+        except (AttributeError, psutil.AccessDenied, NotImplementedError):
+            return None
+
+    @staticmethod
+    def _update_peaks(peaks: dict, point: ResourceSample):
+        peaks["cpu_percent_max"] = max(peaks.get("cpu_percent_max", 0.0), point.cpu_percent)
+        peaks["rss_bytes_max"] = max(peaks.get("rss_bytes_max", 0), point.rss_bytes)
+        peaks["children_max"] = max(peaks.get("children_max", 0), point.children)
+        peaks["io_read_bytes"] = max(peaks.get("io_read_bytes", 0), point.io_read_bytes)
+        peaks["io_write_bytes"] = max(peaks.get("io_write_bytes", 0), point.io_write_bytes)
+        peaks["samples"] = peaks.get("samples", 0) + 1
+
+    @staticmethod
+    def _close_window(job_id: str, series: _Series) -> Optional[dict]:
+        """Turn the samples in a job's current window into one job_metrics row."""
+        window, series.window = series.window, []
+        if not window:
+            return None
+
+        last = window[-1]
+        return {
+            "job_id": job_id,
+            "sampled_at": datetime.fromtimestamp(last.timestamp, timezone.utc).isoformat(),
+            "samples": len(window),
+            "cpu_percent": round(sum(p.cpu_percent for p in window) / len(window), 1),
+            "cpu_percent_max": max(p.cpu_percent for p in window),
+            "rss_bytes": max(p.rss_bytes for p in window),
+            "io_read_bytes": last.io_read_bytes,
+            "io_write_bytes": last.io_write_bytes,
+            "children": max(p.children for p in window),
+        }
+
+    def _write(self, rows: list[dict]):
+        if not rows:
+            return
+        try:
+            self.job_store.record_metrics(rows)
+        except Exception as e:
+            print(f"Failed to store metrics for {len(rows)} jobs: {e}")
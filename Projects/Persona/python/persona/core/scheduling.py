@@ -0,0 +1,104 @@
+"""Weighted fair scheduling of the job queue."""
+
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+# Waiting this long raises a pending job's priority by one
+DEFAULT_AGING_SECONDS = 120
+
+
+@dataclass(frozen=True)
+class SchedulingPolicy:
+    """
+    How claim_jobs picks among pending jobs.
+
+    Each agent (a job's assigned_to) is a flow that gets slots in
+    proportion to its weight, by weighted fair queueing: a pending job's
+    finish tag is the work its agent already has running plus the work
+    queued ahead of it, divided by the agent's weight, and the smallest tag
+    is claimed first. A job counts as 1 / (its job type's weight) units of
+    work, so types with a higher weight take less of their agent's share.
+
+    Within an agent, jobs run by effective priority, then age. Effective
+    priority is the job's priority plus one for every aging_seconds it has
+    been waiting, so low-priority work cannot starve.
+    """
+    agent_weights: dict[str, float] = field(default_factory=dict)
+    type_weights: dict[str, float] = field(default_factory=dict)
+    aging_seconds: Optional[int] = DEFAULT_AGING_SECONDS
+
+    @classmethod
+    def load(cls, path: Path) -> "SchedulingPolicy":
+        """
+        Load a policy from a YAML file. A missing file means the defaults.
+
+        The file has optional `agents` and `job_types` mappings of name to
+        weight (default 1) and `aging_seconds` (0 or null disables aging).
+
+        Args:
+            path: Path to scheduling.yaml
+
+        Returns:
+            SchedulingPolicy
+
+        Raises:
+            ValueError: If the file is malformed
+        """
+        path = Path(path)
+        if not path.exists():
+            return cls()
+
+        data = yaml.safe_load(path.read_text()) or {}
+        if not isinstance(data, dict):
+            raise ValueError(f"{path} must contain a mapping")
+
+        unknown = set(data) - {"agents", "job_types", "aging_seconds"}
+        if unknown:
+            raise ValueError(f"Unknown key(s) in {path}: {', '.join(sorted(unknown))}")
+
+        def weights(name: str) -> dict[str, float]:
+            entries = data.get(name) or {}
+            if not isinstance(entries, dict):
+                raise ValueError(f"'{name}' in {path} must be a mapping")
+            for key, value in entries.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+                    raise ValueError(f"Weight for '{key}' in {path}:{name} must be a positive number, got {value!r}")
+            return {str(key): float(value) for key, value in entries.items()}
+
+        aging = data.get("aging_seconds", DEFAULT_AGING_SECONDS)
+        if aging is not None and (isinstance(aging, bool) or not isinstance(aging, int) or aging < 0):
+            raise ValueError(f"aging_seconds in {path} must be a non-negative integer")
+
+        return cls(
+            agent_weights=weights("agents"),
+            type_weights=weights("job_types"),
+            aging_seconds=aging or None,
+        )
+
+    def rpc_params(self) -> dict:
+        """Arguments for the claim_jobs database function."""
+        return {
+            "p_agent_weights": self.agent_weights or None,
+            "p_type_weights": self.type_weights or None,
+            "p_aging_seconds": self.aging_seconds,
+        }
+
+
+@lru_cache(maxsize=None)
+def default_policy() -> SchedulingPolicy:
+    """
+    Get the process-wide policy, loaded on first use.
+
+    Reads PERSONA_SCHEDULING_FILE, or config/scheduling.yaml next to the
+    business's hierarchy.yaml under PERSONA_ROOT.
+    """
+    path = os.environ.get("PERSONA_SCHEDULING_FILE") or (
+        Path(os.environ.get("PERSONA_ROOT", Path.home() / "vault/Projects/Persona"))
+        / "instances" / os.environ.get("PERSONA_BUSINESS", "PersonalMCO") / "config" / "scheduling.yaml"
+    )
+    return SchedulingPolicy.load(Path(path))
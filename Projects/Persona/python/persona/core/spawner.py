@@ -0,0 +1,233 @@
+"""Low-overhead process spawning for agent subprocesses."""
+
+import os
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from typing import Callable, Optional, Union
+
+# Signals Python ignores that an exec'd program expects at their defaults
+# (subprocess.Popen's restore_signals does the same)
+_RESTORE_SIGNALS = tuple(
+    getattr(signal, name) for name in ("SIGPIPE", "SIGXFZ", "SIGXFSZ") if hasattr(signal, name)
+)
+
+
+class SpawnedProcess:
+    """
+    Popen-compatible handle for a process started with os.posix_spawn().
+
+    Supports what the supervisor, heartbeats and ProcessManager use: pid,
+    stdout/stderr pipes, returncode, poll(), wait() and signalling.
+    """
+
+    def __init__(self, args: list[str], pid: int, stdout=None, stderr=None):
+        """
+        Initialize SpawnedProcess.
+
+        Args:
+            args: Command that was started
+            pid: Process ID
+            stdout: Read end of the stdout pipe, if piped
+            stderr: Read end of the stderr pipe, if piped
+        """
+        self.args = args
+        self.pid = pid
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode: Optional[int] = None
+        self._waitpid_lock = threading.Lock()
+
+    def poll(self) -> Optional[int]:
+        """Return the exit code if the process has exited, else None."""
+        if self.returncode is None and self._waitpid_lock.acquire(blocking=False):
+            try:
+                if self.returncode is None:
+                    self._reap(os.WNOHANG)
+            finally:
+                self._waitpid_lock.release()
+        return self.returncode
+
+    def wait(self, timeout: float = None) -> int:
+        """
+        Wait for the process to exit.
+
+        Args:
+            timeout: Seconds to wait (None waits forever)
+
+        Returns:
+            Exit code, negative for a signal
+
+        Raises:
+            subprocess.TimeoutExpired: If the process is still running after timeout
+        """
+        if timeout is None:
+            with self._waitpid_lock:
+                if self.returncode is None:
+                    self._reap(0)
+            return self.returncode
+
+        deadline = time.monotonic() + timeout
+        delay = 0.0005
+        while self.poll() is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(self.args, timeout)
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.05)
+        return self.returncode
+
+    def send_signal(self, sig: int):
+        """Send a signal to the process unless it has already been reaped."""
+        if self.poll() is None:
+            os.kill(self.pid, sig)
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+    def _reap(self, flags: int):
+        try:
+            pid, status = os.waitpid(self.pid, flags)
+        except ChildProcessError:
+            # Reaped elsewhere; the status is lost (Popen reports 0 too)
+            self.returncode = 0
+            return
+        if pid == self.pid:
+            self.returncode = os.waitstatus_to_exitcode(status)
+
+
+class AgentSpawner:
+    """
+    Starts agent processes without forking the worker interpreter.
+
+    The base environment is copied from os.environ once and each spawn only
+    adds the job's variables to that copy. On platforms with posix_spawn the
+    child is created with vfork-style spawning, so start time does not grow
+    with the worker's memory use, and gets its own session for process-group
+    signalling. Spawns that need a preexec_fn, or platforms without
+    posix_spawn, go through subprocess.Popen.
+    """
+
+    def __init__(self, base_env: dict = None, method: str = None):
+        """
+        Initialize AgentSpawner.
+
+        Args:
+            base_env: Environment for every agent (default: snapshot of os.environ)
+            method: 'posix_spawn' or 'popen' (default: PERSONA_SPAWN_METHOD, else
+                posix_spawn where available)
+
+        Raises:
+            ValueError: If method is not recognised
+        """
+        self.base_env = dict(os.environ if base_env is None else base_env)
+        method = method or os.environ.get('PERSONA_SPAWN_METHOD') or (
+            'posix_spawn' if hasattr(os, 'posix_spawn') else 'popen'
+        )
+        if method not in ('posix_spawn', 'popen'):
+            raise ValueError(f"Unknown spawn method: {method}")
+        self.method = method
+        self._executables: dict[str, str] = {}
+
+    def env(self, **extra: str) -> dict:
+        """
+        Build a child environment: the cached base plus extra variables.
+
+        Args:
+            **extra: Per-job variables
+
+        Returns:
+            New environment dict
+        """
+        env = self.base_env.copy()
+        env.update(extra)
+        return env
+
+    def spawn(
+        self,
+        cmd: list[str],
+        env: dict,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        preexec_fn: Callable[[], None] = None
+    ) -> Union[subprocess.Popen, SpawnedProcess]:
+        """
+        Start a process in a new session.
+
+        Args:
+            cmd: Command and arguments
+            env: Complete environment for the child
+            stdout: subprocess.PIPE or an open file
+            stderr: subprocess.PIPE or an open file
+            preexec_fn: Function to run in the child before exec (forces Popen)
+
+        Returns:
+            Popen or SpawnedProcess handle; piped streams are unbuffered
+
+        Raises:
+            FileNotFoundError: If the executable cannot be found
+            OSError: If the process cannot be started
+        """
+        if self.method == 'popen' or preexec_fn is not None:
+            return subprocess.Popen(
+                cmd,
+                stdout=stdout,
+                stderr=stderr,
+                start_new_session=True,
+                bufsize=0,
+                preexec_fn=preexec_fn,
+                env=env,
+            )
+
+        path = self._resolve(cmd[0], env)
+        parent_ends = {}
+        child_ends = []
+        file_actions = []
+
+        try:
+            for name, target, child_fd in (('stdout', stdout, 1), ('stderr', stderr, 2)):
+                if target is subprocess.PIPE:
+                    read_fd, write_fd = os.pipe()
+                    parent_ends[name] = read_fd
+                    child_ends.append(write_fd)
+                    file_actions.append((os.POSIX_SPAWN_DUP2, write_fd, child_fd))
+                elif target is not None:
+                    file_actions.append((os.POSIX_SPAWN_DUP2, target.fileno(), child_fd))
+
+            pid = os.posix_spawn(
+                path, cmd, env,
+                file_actions=file_actions,
+                setsid=True,
+                setsigdef=_RESTORE_SIGNALS,
+            )
+        except BaseException:
+            for fd in parent_ends.values():
+                os.close(fd)
+            raise
+        finally:
+            # The pipes are close-on-exec, so only the child's dup2 copies survive
+            for fd in child_ends:
+                os.close(fd)
+
+        streams = {name: open(fd, 'rb', buffering=0) for name, fd in parent_ends.items()}
+        return SpawnedProcess(cmd, pid, streams.get('stdout'), streams.get('stderr'))
+
+    def _resolve(self, program: str, env: dict) -> str:
+        """Find an executable on the child's PATH, caching the result."""
+        if os.sep in program:
+            return program
+
+        search = env.get('PATH', os.defpath)
+        key = f"{program}\0{search}"
+        path = self._executables.get(key)
+        if path is None:
+            path = shutil.which(program, path=search)
+            if path is None:
+                raise FileNotFoundError(f"No such file or directory: '{program}'")
+            self._executables[key] = path
+        return path
@@ -0,0 +1,77 @@
+"""Rolling latency statistics for worker metrics."""
+
+import math
+import threading
+from collections import deque
+from typing import Optional
+
+
+class LatencyStats:
+    """
+    Keeps the most recent latency samples and summarizes them as percentiles.
+
+    Only the last `window` samples count towards percentiles, so the numbers
+    follow current behaviour rather than the worker's whole lifetime;
+    `count` is the lifetime total.
+    """
+
+    def __init__(self, window: int = 1000):
+        """
+        Initialize LatencyStats.
+
+        Args:
+            window: Number of recent samples to keep
+        """
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        """
+        Add one sample.
+
+        Args:
+            seconds: Latency in seconds (negative values, from clock skew, count as 0)
+        """
+        with self._lock:
+            self._samples.append(max(seconds, 0.0))
+            self.count += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Get a percentile of the recent samples (nearest rank).
+
+        Args:
+            p: Percentile between 0 and 100
+
+        Returns:
+            Latency in seconds, or None if there are no samples
+        """
+        with self._lock:
+            ordered = sorted(self._samples)
+        return self._rank(ordered, p)
+
+    def summary(self) -> dict:
+        """
+        Summarize the recent samples.
+
+        Returns:
+            Dict with count, p50, p90, p99 and max (None when empty)
+        """
+        with self._lock:
+            ordered = sorted(self._samples)
+            count = self.count
+        return {
+            "count": count,
+            "p50": self._rank(ordered, 50),
+            "p90": self._rank(ordered, 90),
+            "p99": self._rank(ordered, 99),
+            "max": ordered[-1] if ordered else None,
+        }
+
+    @staticmethod
+    def _rank(ordered: list[float], p: float) -> Optional[float]:
+        if not ordered:
+            return None
+        index = max(math.ceil(p / 100 * len(ordered)) - 1, 0)
+        return ordered[min(index, len(ordered) - 1)]
@@ -0,0 +1,436 @@
+"""Single-threaded supervisor for agent subprocesses."""
+
+import heapq
+import itertools
+import os
+import selectors
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+# Bytes read per os.read() on a ready pipe
+_READ_SIZE = 65536
+
+OutputCallback = Callable[[str, str, str], None]
+ExitCallback = Callable[[str, int], None]
+
+
+@dataclass
+class _Child:
+    """A supervised process and the pipes still open for it."""
+    key: str
+    process: subprocess.Popen
+    on_output: Optional[OutputCallback]
+    on_exit: Optional[ExitCallback]
+    pipes: dict[int, str] = field(default_factory=dict)      # fd -> stream name
+    partial: dict[int, bytes] = field(default_factory=dict)  # fd -> unterminated line
+    pidfd: Optional[int] = None
+
+
+@dataclass
+class _Timer:
+    """A callback run on the loop thread every interval seconds."""
+    interval: float
+    callback: Callable[[], None]
+    due: float
+
+
+@dataclass(order=True)
+class _Scheduled:
+    """A one-shot callback run on the loop thread at a monotonic time."""
+    due: float
+    seq: int
+    callback: Callable = field(compare=False)
+    args: tuple = field(compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+
+class _Strand:
+    """Runs tasks on a shared pool, one at a time and in order for each key."""
+
+    def __init__(self, executor: ThreadPoolExecutor):
+        self._executor = executor
+        self._queues: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, fn: Callable, *args) -> None:
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is not None:
+                # A drain task for this key is already scheduled
+                queue.append((fn, args))
+                return
+            self._queues[key] = deque([(fn, args)])
+        self._executor.submit(self._drain, key)
+
+    def _drain(self, key: str) -> None:
+        while True:
+            with self._lock:
+                queue = self._queues[key]
+                if not queue:
+                    del self._queues[key]
+                    return
+                fn, args = queue.popleft()
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Supervisor task failed for {key}: {e}")
+
+
+class ProcessSupervisor:
+    """
+    Watches every agent subprocess from one selector loop.
+
+    Each child's stdout/stderr pipes and, on Linux, a pidfd that becomes
+    readable when the child exits are registered with a single selector,
+    so output is read and exits are handled the moment they happen. Work
+    that may block (database writes, exit handling) is handed to a fixed
+    pool via submit(), serialized per job. The thread count is therefore
+    1 + workers however many jobs are running. Periodic timers and one-shot
+    callbacks (call_later) run on the loop thread too, from one heap.
+
+    Where pidfd_open is unavailable (macOS, Linux < 5.3) exits are detected
+    by polling the children every poll_interval seconds instead.
+    """
+
+    def __init__(self, workers: int = None, poll_interval: float = 0.2):
+        """
+        Initialize ProcessSupervisor.
+
+        Args:
+            workers: Threads for submitted work (default: SUPERVISOR_WORKERS or 4)
+            poll_interval: Exit polling period when pidfds are unavailable
+        """
+        workers = workers or int(os.environ.get('SUPERVISOR_WORKERS', '4'))
+        self.poll_interval = poll_interval
+
+        self._selector = selectors.DefaultSelector()
+        self._children: dict[str, _Child] = {}
+        self._timers: list[_Timer] = []
+        # One heap holds every one-shot callback (job deadlines, escalations)
+        self._scheduled: list[_Scheduled] = []
+        self._cancelled = 0
+        self._seq = itertools.count()
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="persona-supervisor")
+        self._strand = _Strand(self._executor)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        # Self-pipe so other threads can wake the selector
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+    def start(self):
+        """Start the supervisor loop (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="persona-supervisor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """
+        Stop the loop and wait for submitted work to finish.
+
+        Children are left running and are no longer watched.
+
+        Args:
+            timeout: Seconds to wait for the loop thread to finish
+        """
+        self._stopping = True
+        self._wake()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self._executor.shutdown(wait=True)
+
+    def watch(
+        self,
+        key: str,
+        process: subprocess.Popen,
+        on_output: OutputCallback = None,
+        on_exit: ExitCallback = None
+    ):
+        """
+        Start supervising a process.
+
+        on_output(key, stream, line) is called on the loop thread for every
+        complete line on the process's stdout/stderr pipes (if they are
+        pipes). on_exit(key, returncode) is called on the loop thread once
+        the process has exited and its pipes are drained. Both must be
+        quick; use submit() for anything that blocks.
+
+        Args:
+            key: Identifier for the process (the job ID)
+            process: Started Popen handle
+            on_output: Line callback
+            on_exit: Exit callback
+        """
+        child = _Child(key=key, process=process, on_output=on_output, on_exit=on_exit)
+
+        for name in ("stdout", "stderr"):
+            stream = getattr(process, name)
+            if stream is not None:
+                fd = stream.fileno()
+                os.set_blocking(fd, False)
+                child.pipes[fd] = name
+
+        child.pidfd = _open_pidfd(process.pid)
+
+        with self._lock:
+            self._pending.append(child)
+        self._wake()
+
+    def every(self, interval: float, callback: Callable[[], None]):
+        """
+        Run callback on the loop thread every interval seconds.
+
+        Args:
+            interval: Seconds between calls
+            callback: Quick, non-blocking function
+        """
+        with self._lock:
+            self._timers.append(_Timer(interval, callback, time.monotonic() + interval))
+        self._wake()
+
+    def call_later(self, delay: float, callback: Callable, *args) -> _Scheduled:
+        """
+        Run callback(*args) once on the loop thread after delay seconds.
+
+        Args:
+            delay: Seconds from now
+            callback: Quick, non-blocking function
+            *args: Arguments for callback
+
+        Returns:
+            Handle for cancel()
+        """
+        entry = _Scheduled(time.monotonic() + delay, next(self._seq), callback, args)
+        with self._lock:
+            heapq.heappush(self._scheduled, entry)
+        self._wake()
+        return entry
+
+    def cancel(self, handle: _Scheduled):
+        """
+        Cancel a callback from call_later() if it has not run yet.
+
+        Args:
+            handle: Handle returned by call_later()
+        """
+        with self._lock:
+            if handle.cancelled:
+                return
+            handle.cancelled = True
+            self._cancelled += 1
+            # Cancelled entries are skipped lazily; rebuild once they dominate
+            if self._cancelled > 64 and self._cancelled > len(self._scheduled) // 2:
+                self._scheduled = [e for e in self._scheduled if not e.cancelled]
+                heapq.heapify(self._scheduled)
+                self._cancelled = 0
+
+    def submit(self, key: str, fn: Callable, *args):
+        """
+        Run fn(*args) on the worker pool.
+
+        Tasks with the same key run one at a time in submission order.
+
+        Args:
+            key: Serialization key (the job ID)
+            fn: Function to run
+            *args: Arguments for fn
+        """
+        self._strand.submit(key, fn, *args)
+
+    def watched(self) -> list[str]:
+        """Return the keys of all processes still being supervised."""
+        with self._lock:
+            return list(self._children) + [c.key for c in self._pending]
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            # Pipe already full, the loop will wake anyway
+            pass
+
+    def _run(self):
+        while not self._stopping:
+            self._adopt_pending()
+            events = self._selector.select(self._select_timeout())
+
+            for key, _ in events:
+                if key.data is None:
+                    self._drain_wakeups()
+                    continue
+                child, kind = key.data
+                if kind == "pidfd":
+                    self._finish(child)
+                elif key.fd in child.pipes:
+                    # (skip pipes closed by a _finish earlier in this batch)
+                    self._read(child, key.fd)
+
+            if not _PIDFD_SUPPORTED:
+                for child in list(self._children.values()):
+                    if child.process.poll() is not None:
+                        self._finish(child)
+
+            self._run_timers()
+
+    def _adopt_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, deque()
+
+        for child in pending:
+            with self._lock:
+                self._children[child.key] = child
+            for fd in child.pipes:
+                self._selector.register(fd, selectors.EVENT_READ, (child, "pipe"))
+            if child.pidfd is not None:
+                self._selector.register(child.pidfd, selectors.EVENT_READ, (child, "pidfd"))
+            elif _PIDFD_SUPPORTED:
+                # Exited (and was reaped) before we could open a pidfd
+                self._finish(child)
+
+    def _select_timeout(self) -> Optional[float]:
+        now = time.monotonic()
+        timeouts = [max(0.0, t.due - now) for t in self._timers]
+        with self._lock:
+            if self._scheduled:
+                timeouts.append(max(0.0, self._scheduled[0].due - now))
+        if not _PIDFD_SUPPORTED and self._children:
+            timeouts.append(self.poll_interval)
+        return min(timeouts) if timeouts else None
+
+    def _drain_wakeups(self):
+        try:
+            while os.read(self._wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _read(self, child: _Child, fd: int, until_blocked: bool = False):
+        """Read available output from one pipe and emit complete lines."""
+        while True:
+            try:
+                data = os.read(fd, _READ_SIZE)
+            except BlockingIOError:
+                return
+            except OSError:
+                data = b""
+
+            if not data:
+                # EOF: emit any unterminated last line and stop watching the pipe
+                rest = child.partial.pop(fd, b"")
+                if rest:
+                    self._emit(child, fd, rest)
+                self._close_pipe(child, fd)
+                return
+
+            lines = (child.partial.pop(fd, b"") + data).split(b"\n")
+            if lines[-1]:
+                child.partial[fd] = lines[-1]
+            for line in lines[:-1]:
+                self._emit(child, fd, line)
+
+            if not until_blocked:
+                return
+
+    def _emit(self, child: _Child, fd: int, line: bytes):
+        if child.on_output is None:
+            return
+        text = line.decode("utf-8", errors="replace").rstrip("\r")
+        try:
+            child.on_output(child.key, child.pipes[fd], text)
+        except Exception as e:
+            print(f"Output handler failed for {child.key}: {e}")
+
+    def _close_pipe(self, child: _Child, fd: int):
+        if fd in child.pipes:
+            self._selector.unregister(fd)
+            stream = getattr(child.process, child.pipes.pop(fd))
+            stream.close()
+
+    def _finish(self, child: _Child):
+        """Handle a process exit: drain its pipes, then report the exit code."""
+        with self._lock:
+            if self._children.pop(child.key, None) is None:
+                return
+
+        if child.pidfd is not None:
+            self._selector.unregister(child.pidfd)
+            os.close(child.pidfd)
+            child.pidfd = None
+
+        # Output written just before exit may still be in the pipes
+        for fd in list(child.pipes):
+            self._read(child, fd, until_blocked=True)
+            rest = child.partial.pop(fd, b"")
+            if rest:
+                self._emit(child, fd, rest)
+            self._close_pipe(child, fd)
+
+        returncode = child.process.wait()
+        if child.on_exit:
+            try:
+                child.on_exit(child.key, returncode)
+            except Exception as e:
+                print(f"Exit handler failed for {child.key}: {e}")
+
+    def _run_timers(self):
+        now = time.monotonic()
+        with self._lock:
+            due = [t for t in self._timers if t.due <= now]
+        for timer in due:
+            timer.due = now + timer.interval
+            try:
+                timer.callback()
+            except Exception as e:
+                print(f"Supervisor timer failed: {e}")
+
+        while True:
+            with self._lock:
+                if not self._scheduled or self._scheduled[0].due > now:
+                    return
+                entry = heapq.heappop(self._scheduled)
+                if entry.cancelled:
+                    self._cancelled -= 1
+                    continue
+                # Mark as done so a late cancel() is a no-op
+                entry.cancelled = True
+            try:
+                entry.callback(*entry.args)
+            except Exception as e:
+                print(f"Supervisor callback failed: {e}")
+
+
+def _open_pidfd(pid: int) -> Optional[int]:
+    """Open a pidfd for pid, or return None if unsupported or already reaped."""
+    if not _PIDFD_SUPPORTED:
+        return None
+    try:
+        return os.pidfd_open(pid)
+    except ProcessLookupError:
+        return None
+
+
+def _pidfd_supported() -> bool:
+    if not hasattr(os, "pidfd_open"):
+        return False
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+        return True
+    except OSError:
+        return False
+
+
+_PIDFD_SUPPORTED = _pidfd_supported()
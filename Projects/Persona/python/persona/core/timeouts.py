@@ -0,0 +1,51 @@
+"""Per-job run time limits."""
+
+import os
+
+from .job_store import Job
+from .job_types import JobTypeRegistry, default_registry
+
+# Seconds each agent may run (matches scripts/run-agent.sh)
+AGENT_TIMEOUTS = {
+    'ceo': 900,
+    'cro': 600,
+    'director': 300,
+    'researcher': 1200,
+    'assistant': 300,
+}
+
+
+def resolve_timeout(job: Job, job_types: JobTypeRegistry = None) -> float:
+    """
+    Get the number of seconds a job may run before it is stopped.
+
+    The first of these that is set wins: the payload's `timeout`, the job
+    type's declared timeout, the assigned agent's default (or the payload's
+    `agent` for agent_action jobs), then JOB_DEFAULT_TIMEOUT (default 600).
+
+    Args:
+        job: Job about to start
+        job_types: Registry to look the job type up in (default: default_registry())
+
+    Returns:
+        Timeout in seconds
+
+    Raises:
+        ValueError: If the payload timeout is not a positive number
+    """
+    payload = job.payload or {}
+    if payload.get('timeout') is not None:
+        timeout = float(payload['timeout'])
+        if timeout <= 0:
+            raise ValueError(f"Job timeout must be positive, got {payload['timeout']!r}")
+        return timeout
+
+    type_timeout = (job_types or default_registry()).get(job.job_type).timeout
+    if type_timeout is not None:
+        return float(type_timeout)
+
+    agent = job.assigned_to or payload.get('agent')
+    if agent in AGENT_TIMEOUTS:
+        return float(AGENT_TIMEOUTS[agent])
+
+    return float(os.environ.get('JOB_DEFAULT_TIMEOUT', '600'))
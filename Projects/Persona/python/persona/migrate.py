@@ -118,27 +118,28 @@ class StateMigrator:
         with open(pending_file) as f:
             data = json.load(f)
 
-        migrated = 0
-
-        for note_path, updates in data.items():
-            # Create a job to apply these updates
-            try:
-                job = self.job_store.create_job(
-                    job_type="apply_note_updates",
-                    payload={
-                        "note_path": note_path,
-                        "updates": updates,
-                        "legacy_pending": True
-                    },
-                    assigned_to="assistant",
-                    tags=["migrated", "pending_update"]
-                )
-                migrated += 1
+        specs = [
+            {
+                "job_type": "apply_note_updates",
+                "payload": {
+                    "note_path": note_path,
+                    "updates": updates,
+                    "legacy_pending": True
+                },
+                "assigned_to": "assistant",
+                "tags": ["migrated", "pending_update"]
+            }
+            for note_path, updates in data.items()
+        ]
+
+        # Create all note update jobs in one bulk insert
+        try:
+            jobs = self.job_store.create_jobs(specs)
+        except Exception as e:
+            click.echo(f"Failed to migrate pending notes: {e}", err=True)
+            return 0
 
-            except Exception as e:
-                click.echo(f"Failed to migrate pending note {note_path}: {e}", err=True)
-
-        return migrated
+        return len(jobs)
 
     def import_agent_definitions(self) -> int:
         """
@@ -149,6 +150,11 @@ class StateMigrator:
         """
         agents_dir = self.instance_root / "agents"
 
+        if self.job_store.client is None:
+            # The agents registry only exists in the Supabase schema
+            click.echo("Agent registry requires the Supabase backend, skipping")
+            return 0
+
         if not agents_dir.exists():
             click.echo(f"No agents directory found at {agents_dir}")
             return 0
@@ -209,7 +215,7 @@ class StateMigrator:
             return 0
 
         from persona.core.note_state import NoteStateStore
-        note_store = NoteStateStore(self.job_store.client)
+        note_store = NoteStateStore(backend=self.job_store.backend)
 
         indexed = 0
 
@@ -5,11 +5,17 @@ import time
 import os
 import signal
 import sys
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
 from pathlib import Path
 from dotenv import load_dotenv
 
-from persona.core.job_store import JobStore, JobStatus
+from persona.core.job_store import Job, JobStore, parse_timestamp
+from persona.core.job_types import parse_class_limits
+from persona.core.stats import LatencyStats
 from persona.core.process_manager import ProcessManager
+from persona.core.reaper import HungJobReaper
 
 
 load_dotenv()
@@ -22,7 +28,12 @@ class Worker:
         self,
         agent_id: str = None,
         concurrency: int = 3,
-        poll_interval: int = 5
+        poll_interval: int = 5,
+        worker_id: str = None,
+        class_limits: dict[str, int] = None,
+        safety_poll_interval: float = None,
+        max_poll_interval: float = None,
+        drain_timeout: float = None
     ):
         """
         Initialize worker.
@@ -30,77 +41,310 @@ class Worker:
         Args:
             agent_id: Only process jobs for this agent (None = process all)
             concurrency: Maximum number of concurrent jobs
-            poll_interval: Seconds between queue checks
+            poll_interval: Seconds between queue checks without push notifications
+            worker_id: Identifier recorded on claimed jobs (defaults to hostname:pid)
+            class_limits: Max running jobs per concurrency class on this worker
+                (defaults to WORKER_CLASS_LIMITS, e.g. "heavy=1,interactive=2")
+            safety_poll_interval: Seconds between queue checks while push
+                notifications are connected (default: WORKER_SAFETY_POLL_INTERVAL or 60)
+            max_poll_interval: Longest poll interval after backing off on an
+                empty queue (default: WORKER_MAX_POLL_INTERVAL or 60)
+            drain_timeout: Seconds to let in-flight jobs finish on shutdown
+                before requeueing them (default: WORKER_DRAIN_TIMEOUT or 300)
         """
         self.agent_id = agent_id
         self.concurrency = concurrency
         self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{os.uname().nodename}:{os.getpid()}"
+        self.class_limits = class_limits if class_limits is not None else parse_class_limits(
+            os.environ.get('WORKER_CLASS_LIMITS', '')
+        )
+        self.safety_poll_interval = safety_poll_interval or float(
+            os.environ.get('WORKER_SAFETY_POLL_INTERVAL', '60')
+        )
+        self.max_poll_interval = max(
+            max_poll_interval or float(os.environ.get('WORKER_MAX_POLL_INTERVAL', '60')),
+            poll_interval
+        )
+        # Current wait between polls; doubles while the queue is empty
+        self.idle_interval = poll_interval
+        self.drain_timeout = drain_timeout if drain_timeout is not None else float(
+            os.environ.get('WORKER_DRAIN_TIMEOUT', '300')
+        )
         self.running = True
+        # Set by a second shutdown signal to requeue in-flight jobs at once
+        self._hurry = False
+        self._shipping_stats = {}
+
+        # Set by job insert notifications, finished jobs and shutdown so the
+        # loop claims (or exits) at once instead of sleeping out the interval
+        self._wake = threading.Event()
+        # Seconds from job creation to this worker claiming it
+        self.pickup_latency = LatencyStats()
+        # The same wait split by job type concurrency class
+        self.queue_wait: dict[str, LatencyStats] = defaultdict(LatencyStats)
+        self.metrics_interval = float(os.environ.get('WORKER_METRICS_INTERVAL', '300'))
+        self._last_metrics = time.monotonic()
+        self._reported_pickups = 0
 
         self.job_store = JobStore()
         self.process_manager = ProcessManager(
             self.job_store,
             Path.home() / ".persona/logs"
         )
+        self.process_manager.on_job_exit = lambda job_id: self._wake.set()
+        self.reaper = HungJobReaper(self.job_store, self.process_manager, self.worker_id)
+        self.listener = self._create_listener()
 
         # Set up signal handlers for graceful shutdown
         signal.signal(signal.SIGTERM, self._signal_handler)
         signal.signal(signal.SIGINT, self._signal_handler)
 
     def _signal_handler(self, signum, frame):
-        """Handle shutdown signals."""
-        print(f"\nReceived signal {signum}, shutting down gracefully...")
+        """Handle shutdown signals; a second one cuts the drain short."""
+        if self.running:
+            print(f"\nReceived signal {signum}, shutting down gracefully...")
+        else:
+            print(f"\nReceived signal {signum} again, requeueing in-flight jobs now...")
+            self._hurry = True
         self.running = False
+        self._wake.set()
+
+    def _create_listener(self):
+        """Build a Realtime listener for new jobs, or None on SQLite or when disabled."""
+        if self.job_store.client is None or os.environ.get('WORKER_REALTIME', '1') == '0':
+            return None
+        try:
+            # Needs the async client and realtime states of newer supabase releases
+            from persona.core.job_listener import JobListener
+        except ImportError as e:
+            print(f"Realtime notifications unavailable, polling instead: {e}")
+            return None
+        return JobListener(
+            os.environ["SUPABASE_URL"],
+            os.environ["SUPABASE_KEY"],
+            on_job=lambda row: self._wake.set(),
+            on_connected=self._wake.set,
+            agent=self.agent_id
+        )
 
     def run(self):
         """Main worker loop."""
-        print(f"Worker started (agent: {self.agent_id or 'all'}, concurrency: {self.concurrency})")
+        print(
+            f"Worker {self.worker_id} started "
+            f"(agent: {self.agent_id or 'all'}, concurrency: {self.concurrency})"
+        )
+        if self.listener:
+            self.listener.start()
 
         while self.running:
+            # Clear before claiming so a notification that arrives meanwhile
+            # triggers another round
+            self._wake.clear()
             try:
-                # Check how many jobs we're currently running
-                running = self.job_store.get_running_jobs(assigned_to=self.agent_id)
-                active_count = len(running)
-
-                if active_count < self.concurrency:
-                    # We have capacity, get pending jobs
-                    available_slots = self.concurrency - active_count
-                    pending = self.job_store.get_pending_jobs(
-                        assigned_to=self.agent_id,
-                        limit=available_slots
-                    )
-
-                    for job in pending:
-                        print(f"Starting job {job.short_id} ({job.job_type})")
-                        try:
-                            self.process_manager.start_agent(job)
-                        except Exception as e:
-                            print(f"Failed to start job {job.short_id}: {e}")
-                            self.job_store.fail_job(job.id, str(e))
-
-                # Sleep before next poll
-                time.sleep(self.poll_interval)
+                self._tick()
+
+                # Wait for a notification, a finished job or the next poll
+                self._wake.wait(self._poll_timeout())
 
             except KeyboardInterrupt:
                 print("\nKeyboard interrupt, shutting down...")
                 break
             except Exception as e:
                 print(f"Error in worker loop: {e}")
-                time.sleep(self.poll_interval)
+                self._wake.wait(self.poll_interval)
 
+        if self.listener:
+            self.listener.stop(timeout=5)
+        self.drain()
+        self.process_manager.shutdown()
         print("Worker stopped")
 
-    def check_hung_jobs(self):
-        """Check for and handle hung jobs."""
-        timeout = int(os.environ.get('JOB_HUNG_TIMEOUT', '300'))
-        hung_jobs = self.job_store.get_hung_jobs(timeout)
+    def _tick(self):
+        """
+        Fill free slots from the queue and adjust the idle poll interval.
+
+        Capacity comes from this worker's own running processes, so jobs on
+        other workers do not count against it. An empty queue doubles the
+        poll interval up to max_poll_interval; a successful claim resets it.
+        """
+        free = self.concurrency - self.process_manager.in_flight()
+
+        if free > 0:
+            # Atomically claim pending jobs so no other worker can start the same ones
+            claimed = self._claim(free)
+            self._record_pickups(claimed)
+
+            for job in claimed:
+                print(f"Starting job {job.short_id} ({job.job_type})")
+                try:
+                    self.process_manager.start_agent(job)
+                except Exception as e:
+                    print(f"Failed to start job {job.short_id}: {e}")
+                    self.job_store.fail_job(job.id, str(e))
+
+            if claimed:
+                self.idle_interval = self.poll_interval
+            else:
+                self.idle_interval = min(self.idle_interval * 2, self.max_poll_interval)
+
+        self.check_hung_jobs()
+        self._report_log_shipping()
+        self._report_pickup_latency()
+
+    def drain(self):
+        """
+        Wait for in-flight jobs after claiming has stopped, then requeue the rest.
+
+        Jobs get up to drain_timeout seconds to finish and record their
+        outcome. Any still running are stopped with hand_off() and put back
+        to pending for another worker, so a restart neither loses them nor
+        leaves them marked running with nobody watching.
+        """
+        if not self.process_manager.in_flight():
+            return
+
+        print(f"Waiting up to {self.drain_timeout:g}s for {self.process_manager.in_flight()} running job(s)...")
+        self._wait_for_in_flight(self.drain_timeout)
+
+        if self.process_manager.in_flight():
+            job_ids = self.process_manager.hand_off()
+            print(f"Requeueing {len(job_ids)} unfinished job(s)")
+            # Exits are recorded by the supervisor; allow for SIGKILL after the grace period
+            self._hurry = False
+            self._wait_for_in_flight(self.process_manager.kill_grace + 10)
+
+        if self.process_manager.in_flight():
+            print(f"{self.process_manager.in_flight()} job(s) did not exit in time")
+
+    def _wait_for_in_flight(self, timeout: float):
+        """Wait until no jobs are in flight, timeout passes or a second signal arrives."""
+        deadline = time.monotonic() + timeout
+        while self.process_manager.in_flight() and not self._hurry:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._wake.clear()
+            if self.process_manager.in_flight():
+                self._wake.wait(min(remaining, 1.0))
+
+    def _claim(self, slots: int) -> list[Job]:
+        """
+        Claim up to slots pending jobs without exceeding concurrency class limits.
+
+        With class limits set, jobs are claimed one at a time and job types
+        whose class is full are left pending for another worker.
 
-        for job in hung_jobs:
-            print(f"Detected hung job: {job.short_id} (last heartbeat: {job.last_heartbeat})")
-            # Mark as hung in database
-            self.job_store.update_job(job.id, status=JobStatus.HUNG)
-            # Optionally kill the process
-            self.process_manager.kill_job(job.id, force=True)
+        Args:
+            slots: Free job slots on this worker
+
+        Returns:
+            Claimed jobs
+        """
+        if not self.class_limits:
+            return self.job_store.claim_jobs(self.worker_id, assigned_to=self.agent_id, limit=slots)
+
+        job_types = self.job_store.job_types
+        running = self.process_manager.running_classes()
+        claimed = []
+
+        while len(claimed) < slots:
+            full = {name for name, limit in self.class_limits.items() if running[name] >= limit}
+            jobs = self.job_store.claim_jobs(
+                self.worker_id,
+                assigned_to=self.agent_id,
+                limit=1,
+                exclude_types=job_types.in_classes(full)
+            )
+            if not jobs:
+                break
+            claimed.extend(jobs)
+            running[job_types.get(jobs[0].job_type).concurrency] += 1
+
+        return claimed
+
+    def _poll_timeout(self) -> float:
+        """Seconds to wait for a wake-up before checking the queue anyway."""
+        if self.listener and self.listener.connected:
+            interval = self.safety_poll_interval
+        else:
+            interval = self.idle_interval
+        # Wake for the next hung deadline rather than sleeping past it
+        deadline = self.reaper.seconds_until_deadline()
+        return interval if deadline is None else min(interval, deadline)
+
+    def _record_pickups(self, jobs: list[Job]):
+        """Record how long each claimed job waited in the queue, overall and per class."""
+        now = datetime.now(timezone.utc)
+        for job in jobs:
+            created = parse_timestamp(job.created_at)
+            if created is None:
+                continue
+            waited = (now - created).total_seconds()
+            self.pickup_latency.record(waited)
+            self.queue_wait[self.job_store.job_types.get(job.job_type).concurrency].record(waited)
+
+    def _report_pickup_latency(self):
+        """Print pickup latency every metrics_interval seconds when jobs were claimed."""
+        now = time.monotonic()
+        if now - self._last_metrics < self.metrics_interval:
+            return
+        self._last_metrics = now
+
+        summary = self.pickup_latency.summary()
+        if summary["count"] == self._reported_pickups:
+            return
+        self._reported_pickups = summary["count"]
+        print(
+            f"Pickup latency: median {summary['p50']:.2f}s, p90 {summary['p90']:.2f}s, "
+            f"max {summary['max']:.2f}s ({summary['count']} jobs claimed)"
+        )
+        for name, stats in sorted(self.queue_wait.items()):
+            wait = stats.summary()
+            print(
+                f"  {name}: median {wait['p50']:.2f}s, p90 {wait['p90']:.2f}s, "
+                f"p99 {wait['p99']:.2f}s ({wait['count']} jobs)"
+            )
+
+    def stats(self) -> dict:
+        """
+        Get worker metrics.
+
+        Returns:
+            Dict with pickup_latency (seconds from job creation to claim),
+            queue_wait (the same by concurrency class), listener state and
+            log shipping counters
+        """
+        return {
+            "pickup_latency": self.pickup_latency.summary(),
+            "queue_wait": {name: stats.summary() for name, stats in self.queue_wait.items()},
+            "listener": self.listener.stats() if self.listener else None,
+            "log_shipping": self.process_manager.log_shipper.stats(),
+        }
+
+    def _report_log_shipping(self):
+        """Print log shipping metrics when lines are being dropped or spooled."""
+        stats = self.process_manager.log_shipper.stats()
+        previous = self._shipping_stats
+        self._shipping_stats = stats
+
+        if stats["dropped"] > previous.get("dropped", 0) or stats["spooling"] != previous.get("spooling", False):
+            print(
+                f"Log shipping: queue {stats['queue_depth']}/{stats['max_queue']}, "
+                f"dropped {stats['dropped']}, spooled segments {stats['spool_segments']}, "
+                f"replayed {stats['replayed']}"
+            )
+
+    def check_hung_jobs(self) -> list[str]:
+        """
+        Kill this worker's hung jobs and mark those of vanished workers hung.
+
+        Runs every loop iteration; see HungJobReaper for what it costs.
+
+        Returns:
+            IDs of the jobs reaped
+        """
+        return self.reaper.check()
 
 
 def main():
@@ -122,11 +366,27 @@ def main():
         '--poll-interval', '-p',
         type=int,
         default=int(os.environ.get('WORKER_POLL_INTERVAL', '5')),
-        help='Seconds between queue checks'
+        help='Seconds between queue checks when push notifications are unavailable'
+    )
+    parser.add_argument(
+        '--processes', '-n',
+        type=int,
+        default=int(os.environ.get('WORKER_PROCESSES', '1')),
+        help='Worker processes to run under a supervisor that restarts and drains them'
     )
 
     args = parser.parse_args()
 
+    if args.processes > 1:
+        from persona.worker_pool import WorkerPool
+
+        WorkerPool(args.processes, {
+            "agent_id": args.agent,
+            "concurrency": args.concurrency,
+            "poll_interval": args.poll_interval,
+        }).run()
+        return
+
     worker = Worker(
         agent_id=args.agent,
         concurrency=args.concurrency,
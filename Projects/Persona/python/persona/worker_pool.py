@@ -0,0 +1,246 @@
+"""Supervisor that runs several worker processes on one host."""
+
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from typing import Optional
+
+import psutil
+
+# A worker that stays up this long is considered healthy again
+_HEALTHY_AFTER = 60.0
+
+# claim_jobs sets started_at just before the worker spawns the agent
+_SPAWN_SLACK = 30.0
+
+
+def _run_worker(options: dict):
+    """Worker process entry point."""
+    # Leave the pool's process group so signals sent to the whole group
+    # (Ctrl-C, timeout(1)) reach only the pool, which forwards them once;
+    # a second SIGTERM would make the worker skip its drain
+    os.setsid()
+
+    from persona.worker import Worker
+
+    Worker(**options).run()
+
+
+class WorkerPool:
+    """
+    Runs N worker processes and keeps them running.
+
+    Each process is a complete Worker with its own store connection,
+    listener and ProcessManager; they share the queue through the atomic
+    claim path like workers on separate hosts. A worker that exits while
+    the pool is running is restarted, with exponential backoff if it keeps
+    crashing. Jobs a dead worker left marked running are stopped and put
+    back in the queue.
+
+    On SIGTERM or SIGINT the pool forwards SIGTERM to every worker, which
+    stops claiming and drains (see Worker.drain), and waits for them to
+    exit. A second signal is forwarded too, telling the workers to requeue
+    their jobs at once. Workers still running after the drain deadline are
+    killed.
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        worker_options: dict = None,
+        drain_timeout: float = None,
+        max_restart_delay: float = 60.0
+    ):
+        """
+        Initialize WorkerPool.
+
+        Args:
+            processes: Number of worker processes
+            worker_options: Keyword arguments for each Worker
+            drain_timeout: Seconds each worker may spend draining
+                (default: WORKER_DRAIN_TIMEOUT or 300)
+            max_restart_delay: Longest wait before restarting a crashing worker
+
+        Raises:
+            ValueError: If processes is less than 1
+        """
+        if processes < 1:
+            raise ValueError("processes must be at least 1")
+
+        self.processes = processes
+        self.drain_timeout = drain_timeout if drain_timeout is not None else float(
+            os.environ.get('WORKER_DRAIN_TIMEOUT', '300')
+        )
+        self.worker_options = {**(worker_options or {}), "drain_timeout": self.drain_timeout}
+        self.max_restart_delay = max_restart_delay
+        self.restarts = 0
+
+        # Fresh interpreters: no inherited threads, locks or connections
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: list[Optional[multiprocessing.Process]] = [None] * processes
+        self._started_at = [0.0] * processes
+        self._restart_at = [0.0] * processes
+        self._delays = [1.0] * processes
+        self._stop = threading.Event()
+        self._signals = 0
+        self._job_store = None
+
+    def run(self):
+        """Start the workers and supervise them until a shutdown signal."""
+        signal.signal(signal.SIGTERM, self._signal_handler)
+        signal.signal(signal.SIGINT, self._signal_handler)
+        self._prepare_cgroups()
+
+        print(f"Worker pool started with {self.processes} processes (pid {os.getpid()})")
+        for slot in range(self.processes):
+            self._start(slot)
+
+        while not self._stop.is_set():
+            self._check()
+            self._stop.wait(1.0)
+
+        self.shutdown()
+
+    def stop(self):
+        """Ask run() to shut the pool down."""
+        self._stop.set()
+
+    def shutdown(self):
+        """Drain every worker, killing those that outlive the drain deadline."""
+        alive = [p for p in self._workers if p is not None and p.is_alive()]
+        print(f"Draining {len(alive)} worker(s)...")
+        for process in alive:
+            self._signal(process, signal.SIGTERM)
+
+        # Workers drain for drain_timeout, then give requeued jobs time to exit
+        deadline = time.monotonic() + self.drain_timeout + 60
+        for process in alive:
+            process.join(max(deadline - time.monotonic(), 0))
+
+        for process in alive:
+            if process.is_alive():
+                print(f"Worker {process.pid} did not stop in time, killing it")
+                process.kill()
+                process.join(5)
+                self._recover(process.pid)
+        print("Worker pool stopped")
+
+    def alive(self) -> int:
+        """Number of worker processes currently running."""
+        return sum(1 for p in self._workers if p is not None and p.is_alive())
+
+    def _prepare_cgroups(self):
+        """
+        Give the workers a cgroup subtree for job limits, before any start.
+
+        A lone worker moves itself out of its delegated cgroup (see
+        CgroupManager.create). Workers in a pool cannot, because the pool
+        process stays in that cgroup. So the pool moves itself into a leaf
+        and hands the workers a sibling subtree through PERSONA_CGROUP_ROOT,
+        which spawned children inherit.
+        """
+        if os.environ.get("PERSONA_CGROUP_ROOT"):
+            return
+        from persona.core.limits import CgroupManager
+
+        root = CgroupManager.prepare_pool()
+        if root is not None:
+            os.environ["PERSONA_CGROUP_ROOT"] = str(root)
+
+    def _start(self, slot: int):
+        process = self._context.Process(
+            target=_run_worker,
+            args=(self.worker_options,),
+            name=f"persona-worker-{slot}",
+        )
+        process.start()
+        self._workers[slot] = process
+        self._started_at[slot] = time.monotonic()
+        self._restart_at[slot] = 0.0
+
+    def _check(self):
+        """Restart workers that have exited, backing off if they keep crashing."""
+        now = time.monotonic()
+        for slot, process in enumerate(self._workers):
+            if process is None or process.is_alive():
+                continue
+
+            if not self._restart_at[slot]:
+                process.join()
+                if now - self._started_at[slot] >= _HEALTHY_AFTER:
+                    self._delays[slot] = 1.0
+                delay = self._delays[slot]
+                print(f"Worker {process.pid} exited with code {process.exitcode}, restarting in {delay:g}s")
+                self._recover(process.pid)
+                self._restart_at[slot] = now + delay
+                self._delays[slot] = min(delay * 2, self.max_restart_delay)
+
+            elif now >= self._restart_at[slot]:
+                self.restarts += 1
+                self._start(slot)
+
+    def _recover(self, pid: int):
+        """Requeue the running jobs of a worker process that died without draining."""
+        worker_id = f"{os.uname().nodename}:{pid}"
+        try:
+            if self._job_store is None:
+                from persona.core.job_store import JobStore
+                self._job_store = JobStore()
+
+            for job in self._job_store.get_running_jobs(worker_id=worker_id):
+                # The agent outlives its worker in its own session; stop it
+                # so the job does not run twice
+                if job.pid and self._is_agent(job):
+                    try:
+                        os.killpg(job.pid, signal.SIGKILL)
+                    except (ProcessLookupError, PermissionError):
+                        pass
+                if self._job_store.requeue_job(job.id):
+                    self._job_store.log(job.id, "warn", f"Worker {worker_id} died, requeued")
+                    print(f"Requeued job {job.short_id} from worker {worker_id}")
+        except Exception as e:
+            print(f"Failed to requeue jobs of worker {worker_id}: {e}")
+
+    @staticmethod
+    def _is_agent(job) -> bool:
+        """
+        Check that a job's recorded PID still belongs to its agent.
+
+        The agent may have exited and its PID been reused by the time its
+        worker is found dead. A process started after the job (allowing
+        for the claim-to-spawn gap) or whose environment names another
+        job is not the agent.
+        """
+        from persona.core.job_store import parse_timestamp
+
+        try:
+            process = psutil.Process(job.pid)
+            started = parse_timestamp(job.started_at)
+            if started is not None and process.create_time() > started.timestamp() + _SPAWN_SLACK:
+                return False
+            try:
+                return process.environ().get("PERSONA_JOB_ID") == job.id
+            except psutil.AccessDenied:
+                return True
+        except psutil.Error:
+            return False
+
+    def _signal_handler(self, signum, frame):
+        self._signals += 1
+        if self._signals == 1:
+            print(f"\nReceived signal {signum}, draining workers...")
+            self._stop.set()
+        else:
+            # Workers treat a second SIGTERM as "requeue now"
+            for process in self._workers:
+                if process is not None and process.is_alive():
+                    self._signal(process, signal.SIGTERM)
+
+    @staticmethod
+    def _signal(process: multiprocessing.Process, sig: signal.Signals):
+        try:
+            os.kill(process.pid, sig)
+        except ProcessLookupError:
+            pass
@@ -15,6 +15,7 @@ setup(
         "tabulate>=0.9.0",
         "python-dotenv>=1.0.0",
         "pydantic>=2.0.0",
+        "PyYAML>=6.0",
     ],
     entry_points={
         "console_scripts": [
@@ -1,10 +1,22 @@
 """Pytest configuration and fixtures for Persona tests."""
 
+import os
+
 import pytest
 from unittest.mock import MagicMock, patch
 from datetime import datetime, timezone
 
 
+def pytest_collection_modifyitems(config, items):
+    """Skip slow tests unless `-m` selects them or PERSONA_SLOW_TESTS=1."""
+    if "slow" in (config.getoption("-m") or "") or os.environ.get("PERSONA_SLOW_TESTS") == "1":
+        return
+    skip = pytest.mark.skip(reason="slow; run with -m slow or PERSONA_SLOW_TESTS=1")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture(autouse=True)
 def reset_bridge_store():
     """Reset the bridge singleton store before each test."""
@@ -32,6 +44,8 @@ def mock_supabase_client():
     select_mock.in_.return_value = select_mock
     select_mock.lt.return_value = select_mock
     select_mock.gte.return_value = select_mock
+    select_mock.gt.return_value = select_mock
+    select_mock.or_.return_value = select_mock
     select_mock.order.return_value = select_mock
     select_mock.limit.return_value = select_mock
 
@@ -127,4 +141,5 @@ def mock_env_vars(monkeypatch):
     """Set up mock environment variables."""
     monkeypatch.setenv('SUPABASE_URL', 'http://localhost:54321')
     monkeypatch.setenv('SUPABASE_KEY', 'test-key')
+    monkeypatch.delenv('PERSONA_BACKEND', raising=False)
     monkeypatch.setenv('PERSONA_ROOT', '/test/persona')
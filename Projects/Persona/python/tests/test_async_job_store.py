@@ -0,0 +1,192 @@
+"""Tests for AsyncJobStore and the async backends."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from persona.core.async_job_store import AsyncJobStore
+from persona.core.backends import AsyncSupabaseBackend, SqliteBackend, ThreadedBackend
+from persona.core.job_store import JobStatus, UpdateConflictError
+from persona.core.job_types import JobTypeRegistry
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    """AsyncJobStore on a SQLite database, via the thread pool adapter."""
+    return AsyncJobStore(ThreadedBackend(SqliteBackend(str(tmp_path / "persona.db"))), job_types=JobTypeRegistry())
+
+
+@pytest.fixture
+def async_client(sample_job_row):
+    """Mock async Supabase client whose queries resolve to sample_job_row."""
+    client = MagicMock()
+    query = MagicMock()
+    for name in ("select", "insert", "update", "eq", "in_", "order", "limit", "gt", "or_"):
+        getattr(query, name).return_value = query
+    query.execute = AsyncMock(return_value=MagicMock(data=[sample_job_row], count=1))
+    client.table.return_value = query
+    client.rpc.return_value = query
+    client.postgrest.aclose = AsyncMock()
+    return client
+
+
+class TestAsyncJobStoreSqlite:
+    """End-to-end tests on the SQLite backend."""
+
+    def test_lifecycle(self, sqlite_store):
+        """Should create, start and complete a job without blocking the loop."""
+        async def scenario():
+            async with sqlite_store as store:
+                job = await store.create_job("research", {"question": "q"}, assigned_to="researcher")
+                await store.start_job(job.short_id, pid=123)
+                done = await store.complete_job(job.id, result={"ok": True})
+                logs_before = await store.get_logs(job.id)
+                await store.log(job.id, "info", "hello")
+                return done, logs_before, await store.get_logs(job.id)
+
+        done, logs_before, logs = run(scenario())
+
+        assert done.status == JobStatus.COMPLETED
+        assert done.pid == 123
+        assert done.result == {"ok": True}
+        assert logs_before == []
+        assert [entry["message"] for entry in logs] == ["hello"]
+
+    def test_gather_fan_out(self, sqlite_store):
+        """Should run hundreds of concurrent operations on one event loop."""
+        async def scenario():
+            async with sqlite_store as store:
+                jobs = await asyncio.gather(*(store.create_job("research", {"n": i}) for i in range(200)))
+                await asyncio.gather(*(store.heartbeat(job.short_id) for job in jobs))
+                claims = await asyncio.gather(*(store.claim_jobs(f"w{i}", limit=25) for i in range(10)))
+                return jobs, claims, await store.count_jobs("running")
+
+        jobs, claims, running = run(scenario())
+
+        claimed = [job.id for batch in claims for job in batch]
+        assert len(jobs) == 200
+        assert len(claimed) == len(set(claimed)) == 200
+        assert running == 200
+
+    def test_create_jobs_and_iterate(self, sqlite_store):
+        """Should keep spec order for bulk creates and page with async iterators."""
+        async def scenario():
+            async with sqlite_store as store:
+                created = await store.create_jobs(
+                    [{"job_type": "research", "payload": {"n": i}} for i in range(7)], chunk_size=3
+                )
+                listed = [job async for job in store.iter_jobs(page_size=2)]
+                return created, listed
+
+        created, listed = run(scenario())
+
+        assert [job.payload["n"] for job in created] == list(range(7))
+        assert sorted(job.id for job in listed) == sorted(job.id for job in created)
+
+    def test_update_conflict(self, sqlite_store):
+        """Should raise UpdateConflictError when the version never matches."""
+        async def scenario():
+            async with sqlite_store as store:
+                job = await store.create_job("research", {})
+                await store.update_job(job.id, status="running")
+                await store.update_job(job.id, expected_version=0, max_retries=1, status="failed")
+
+        with pytest.raises(UpdateConflictError):
+            run(scenario())
+
+    def test_update_missing_job(self, sqlite_store):
+        """Should raise ValueError for an unknown job."""
+        async def scenario():
+            async with sqlite_store as store:
+                await store.update_job("nope1234", status="running")
+
+        with pytest.raises(ValueError):
+            run(scenario())
+
+
+class TestAsyncSupabaseBackend:
+    """Tests for the async Supabase backend."""
+
+    def test_get_job_awaits_execute(self, async_client, sample_job_row):
+        """Should build the same query as the sync backend and await it."""
+        store = AsyncJobStore(AsyncSupabaseBackend(async_client))
+
+        job = run(store.get_job("abc12345"))
+
+        async_client.table.assert_called_with("jobs")
+        async_client.table.return_value.eq.assert_called_with("short_id", "abc12345")
+        assert job.id == sample_job_row["id"]
+
+    def test_transition_uses_rpc(self, async_client):
+        """Should send the patch to transition_job."""
+        store = AsyncJobStore(AsyncSupabaseBackend(async_client))
+
+        run(store.fail_job("550e8400-e29b-41d4-a716-446655440000", "boom", exit_code=2))
+
+        name, params = async_client.rpc.call_args[0]
+        assert name == "transition_job"
+        assert params["p_patch"]["status"] == "failed"
+        assert params["p_patch"]["exit_code"] == 2
+
+    def test_concurrency_is_capped(self, async_client):
+        """Should never have more than max_concurrency requests in flight."""
+        in_flight = 0
+        peak = 0
+
+        async def slow_execute():
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            return MagicMock(data=[], count=0)
+
+        async_client.table.return_value.execute = slow_execute
+
+        async def scenario():
+            store = AsyncJobStore(AsyncSupabaseBackend(async_client, max_concurrency=5))
+            await asyncio.gather(*(store.count_jobs("pending") for _ in range(50)))
+            await store.aclose()
+
+        run(scenario())
+
+        assert peak == 5
+        async_client.postgrest.aclose.assert_awaited_once()
+
+    def test_rejects_non_positive_concurrency(self, async_client):
+        """Should raise ValueError for max_concurrency <= 0."""
+        with pytest.raises(ValueError):
+            AsyncSupabaseBackend(async_client, max_concurrency=0)
+
+
+class TestConnect:
+    """Tests for AsyncJobStore.connect backend selection."""
+
+    def test_connect_sqlite(self, monkeypatch, tmp_path):
+        """Should use the thread pool adapter over SQLite."""
+        monkeypatch.setenv("PERSONA_BACKEND", "sqlite")
+        monkeypatch.setenv("PERSONA_SQLITE_PATH", str(tmp_path / "p.db"))
+
+        async def scenario():
+            store = await AsyncJobStore.connect()
+            await store.aclose()
+            return store
+
+        store = run(scenario())
+        assert isinstance(store.backend, ThreadedBackend)
+        assert store.client is None
+
+    def test_connect_supabase(self, mock_env_vars):
+        """Should create the async Supabase client."""
+        client = MagicMock()
+        with patch('supabase.acreate_client', AsyncMock(return_value=client)) as create:
+            store = run(AsyncJobStore.connect(max_concurrency=7))
+
+        create.assert_awaited_once_with('http://localhost:54321', 'test-key')
+        assert store.client is client
+        assert store.backend.max_concurrency == 7
@@ -0,0 +1,180 @@
+"""Micro-benchmarks for hot JobStore and process start paths.
+
+Marked slow and skipped by default; run with `pytest -m slow -s` (or set
+PERSONA_SLOW_TESTS=1) to see the numbers.
+"""
+
+import json
+import os
+import subprocess
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Optional
+
+import pytest
+
+from persona.core.job_store import Job, JobStatus
+from persona.core.spawner import AgentSpawner
+
+ROWS = 1000
+
+
+@dataclass
+class _EagerJob:
+    """The previous Job layout: every column copied, JSON decoded up front."""
+    id: str
+    short_id: str
+    job_type: str
+    payload: dict
+    status: JobStatus
+    pid: Optional[int] = None
+    hostname: Optional[str] = None
+    worker_id: Optional[str] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    version: int = 0
+    last_heartbeat: Optional[str] = None
+    exit_code: Optional[int] = None
+    error_message: Optional[str] = None
+    result: Optional[dict] = None
+    parent_job_id: Optional[str] = None
+    delegated_by: Optional[str] = None
+    assigned_to: Optional[str] = None
+    source_file: Optional[str] = None
+    source_line: Optional[int] = None
+    tags: list[str] = field(default_factory=list)
+    priority: int = 0
+
+
+def _eager(row: dict) -> _EagerJob:
+    data = dict(row)
+    for column in ("payload", "result", "tags"):
+        if data.get(column) is not None:
+            data[column] = json.loads(data[column])
+    data["status"] = JobStatus(data["status"])
+    return _EagerJob(**data)
+
+
+def _rows(n: int) -> list[dict]:
+    """Job rows as the SQLite backend returns them (JSON columns as text)."""
+    context = "log line\n" * 200
+    return [
+        {
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "short_id": f"{i:08x}",
+            "job_type": "research",
+            "payload": json.dumps({"question": f"q{i}", "context": context}),
+            "status": "completed",
+            "pid": 1000 + i,
+            "hostname": "host",
+            "worker_id": "worker-1",
+            "created_at": "2025-01-01T00:00:00+00:00",
+            "started_at": "2025-01-01T00:00:01+00:00",
+            "completed_at": "2025-01-01T00:01:00+00:00",
+            "updated_at": "2025-01-01T00:01:00+00:00",
+            "version": 3,
+            "last_heartbeat": "2025-01-01T00:00:59+00:00",
+            "exit_code": 0,
+            "error_message": None,
+            "result": json.dumps({"summary": "done", "context": context}),
+            "parent_job_id": None,
+            "delegated_by": None,
+            "assigned_to": "researcher",
+            "source_file": None,
+            "source_line": None,
+            "tags": json.dumps(["research"]),
+        }
+        for i in range(n)
+    ]
+
+
+def _measure(build, rows):
+    """Build one listing and read the fields a list view uses."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    jobs = [build(row) for row in rows]
+    for job in jobs:
+        (job.short_id, job.status, job.assigned_to, job.created_at)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+@pytest.mark.slow
+class TestJobRepresentationBenchmark:
+    """Compare the slotted lazy Job against the eager dataclass."""
+
+    def test_lazy_job_allocates_less(self):
+        """Should allocate far less than eager decoding for a large listing."""
+        eager_peak, eager_time = _measure(_eager, _rows(ROWS))
+        lazy_peak, lazy_time = _measure(Job.from_row, _rows(ROWS))
+
+        print(
+            f"\n{ROWS} jobs: eager {eager_peak / 1024:.0f} KiB {eager_time * 1000:.1f} ms, "
+            f"lazy {lazy_peak / 1024:.0f} KiB {lazy_time * 1000:.1f} ms"
+        )
+        assert lazy_peak < eager_peak / 2
+
+    def test_lazy_job_decodes_on_access(self):
+        """Should decode JSON columns once, on first access."""
+        row = _rows(1)[0]
+        job = Job.from_row(row)
+
+        assert isinstance(row["payload"], str)
+        assert job.payload["question"] == "q0"
+        assert job.payload is job.payload
+        assert job.tags == ["research"]
+        assert job.to_dict() == {**_eager(row).__dict__, "status": "completed"}
+
+
+SPAWNS = 50
+
+
+def _spawn_rate(start, n: int = SPAWNS) -> float:
+    """Average seconds per start of a trivial program."""
+    started = time.perf_counter()
+    for _ in range(n):
+        start().wait()
+    return (time.perf_counter() - started) / n
+
+
+@pytest.mark.slow
+class TestSpawnBenchmark:
+    """Compare Popen with a full env copy against the posix_spawn spawner."""
+
+    def test_spawner_keeps_pace_with_popen_under_large_rss(self):
+        """Should start agents within 1.5x of Popen's time while the worker holds a lot of memory."""
+        ballast = bytearray(512 * 1024 * 1024)
+        ballast[::4096] = b"x" * len(ballast[::4096])
+
+        spawner = AgentSpawner(method="posix_spawn")
+        cmd = ["true"]
+
+        def popen():
+            return subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True,
+                bufsize=0, env={**os.environ, "PERSONA_JOB_ID": "x"},
+            )
+
+        def spawn():
+            return spawner.spawn(cmd, spawner.env(PERSONA_JOB_ID="x"))
+
+        def close(start):
+            def run():
+                process = start()
+                process.stdout.close()
+                process.stderr.close()
+                return process
+            return run
+
+        popen_time = _spawn_rate(close(popen))
+        spawn_time = _spawn_rate(close(spawn))
+        del ballast
+
+        print(f"\n{SPAWNS} spawns: Popen {popen_time * 1e6:.0f} us, posix_spawn {spawn_time * 1e6:.0f} us")
+        # Headroom for timer noise on shared CI runners
+        assert spawn_time < popen_time * 1.5
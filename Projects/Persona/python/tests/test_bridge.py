@@ -50,6 +50,37 @@ class TestCreateJob:
             assert insert_data['source_line'] == 42
 
 
+class TestCreateJobs:
+    """Tests for create_jobs command."""
+
+    def test_create_jobs_bulk(self, mock_supabase_client, mock_env_vars):
+        """Should create all jobs in one insert and return them in order."""
+        def insert(rows):
+            chain = MagicMock()
+            chain.execute.return_value = MagicMock(
+                data=[{**row, 'short_id': row['id'][:8]} for row in rows]
+            )
+            return chain
+
+        mock_supabase_client.table.return_value.insert.side_effect = insert
+
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            result = bridge.create_jobs([
+                {'type': 'research', 'payload': {'question': 'Q1'}, 'agent': 'researcher'},
+                {'type': 'research', 'payload': {'question': 'Q2'}, 'agent': 'researcher',
+                 'sourceFile': 'daily/2025-01-15.md', 'sourceLine': 7},
+            ])
+
+            assert len(result['jobs']) == 2
+            assert all(job['status'] == 'pending' for job in result['jobs'])
+            assert mock_supabase_client.table.return_value.insert.call_count == 1
+
+            rows = mock_supabase_client.table.return_value.insert.call_args[0][0]
+            assert [row['payload']['question'] for row in rows] == ['Q1', 'Q2']
+            assert rows[1]['source_line'] == 7
+            assert result['jobs'][0]['id'] == rows[0]['id']
+
+
 class TestGetJobStatus:
     """Tests for get_job_status command."""
 
@@ -146,20 +177,18 @@ class TestGetHungJobs:
     """Tests for get_hung_jobs command."""
 
     def test_get_hung_jobs(self, mock_supabase_client, sample_running_job_row, mock_env_vars):
-        """Should return jobs running longer than threshold."""
-        # Make started_at old enough to be hung
-        old_job = {
+        """Should return jobs whose heartbeat is older than the threshold."""
+        stale_job = {
             **sample_running_job_row,
-            'started_at': (datetime.now(timezone.utc) - timedelta(minutes=10)).isoformat()
+            'last_heartbeat': (datetime.now(timezone.utc) - timedelta(minutes=10)).isoformat()
         }
-        mock_supabase_client.table.return_value.select.return_value.eq.return_value.lt.return_value.execute.return_value = MagicMock(
-            data=[old_job]
-        )
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(data=[stale_job])
 
         with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
             result = bridge.get_hung_jobs(threshold_minutes=5)
 
-            assert 'jobs' in result
+            mock_supabase_client.rpc.assert_called_with("detect_hung_jobs", {"timeout_seconds": 300})
+            assert [j['lastHeartbeat'] for j in result['jobs']] == [stale_job['last_heartbeat']]
 
 
 class TestGetFailedJobs:
@@ -442,6 +471,17 @@ class TestMainCLI:
         captured = capsys.readouterr()
         assert 'No job data provided' in captured.out
 
+    def test_main_create_jobs_requires_array(self, capsys):
+        """Should reject create_jobs data that is not a JSON array."""
+        with patch('sys.argv', ['bridge.py', 'create_jobs', '{"type": "research"}']):
+            with pytest.raises(SystemExit) as exc_info:
+                bridge.main()
+
+            assert exc_info.value.code == 1
+
+        captured = capsys.readouterr()
+        assert 'JSON array' in captured.out
+
     def test_main_get_job_status_missing_id(self, capsys):
         """Should output error if job ID missing."""
         with patch('sys.argv', ['bridge.py', 'get_job_status']):
@@ -0,0 +1,93 @@
+"""Tests for the agent control protocol."""
+
+import pytest
+
+from persona.core.control import ControlState, parse_control_line
+from persona.core.markers import MarkerScanner
+
+
+class TestParseControlLine:
+    """Tests for framing and validation."""
+
+    def test_ordinary_output(self):
+        """Should ignore lines without the prefix, even if they mention it."""
+        assert parse_control_line("hello") is None
+        assert parse_control_line('quoted: PERSONA_MSG {"type": "complete"}') is None
+
+    def test_valid_message(self):
+        """Should return the decoded message."""
+        message = parse_control_line('PERSONA_MSG {"type": "progress", "percent": 50}')
+        assert message == {"type": "progress", "percent": 50}
+
+    @pytest.mark.parametrize("line", [
+        "PERSONA_MSG not json",
+        "PERSONA_MSG [1, 2]",
+        'PERSONA_MSG {"type": "explode"}',
+        'PERSONA_MSG {"type": "delegate", "agent": "researcher"}',
+        'PERSONA_MSG {"type": "delegate", "agent": "researcher", "task": "  "}',
+        'PERSONA_MSG {"type": "delegate", "agent": "researcher", "task": 7}',
+        'PERSONA_MSG {"type": "delegate", "agent": "researcher", "task": "dig", "context": {"a": 1}}',
+        'PERSONA_MSG {"type": "artifact"}',
+    ])
+    def test_invalid_message(self, line):
+        """Should reject malformed framed lines."""
+        with pytest.raises(ValueError):
+            parse_control_line(line)
+
+
+class TestControlState:
+    """Tests for accumulating control messages."""
+
+    def test_accumulates_state(self):
+        """Should merge results, sum usage and dedupe artifacts."""
+        state = ControlState()
+        for line in [
+            'PERSONA_MSG {"type": "progress", "message": "half", "percent": 50}',
+            'PERSONA_MSG {"type": "usage", "input_tokens": 100, "model": "opus"}',
+            'PERSONA_MSG {"type": "usage", "input_tokens": 50, "output_tokens": 10}',
+            'PERSONA_MSG {"type": "artifact", "path": "a.md"}',
+            'PERSONA_MSG {"type": "artifact", "path": "a.md"}',
+            'PERSONA_MSG {"type": "result", "data": {"summary": "done"}}',
+            'PERSONA_MSG {"type": "complete"}',
+        ]:
+            assert state.feed(line)
+
+        assert state.outcome == "complete"
+        assert state.snapshot() == {
+            "output": {"summary": "done"},
+            "progress": {"message": "half", "percent": 50},
+            "artifacts": ["a.md"],
+            "usage": {"input_tokens": 150, "output_tokens": 10, "model": "opus"},
+        }
+
+    def test_error_is_not_undone(self):
+        """Should keep the first error even if the agent later reports completion."""
+        state = ControlState()
+        state.feed('PERSONA_MSG {"type": "error", "message": "no access"}')
+        state.feed('PERSONA_MSG {"type": "error", "message": "later"}')
+        state.feed('PERSONA_MSG {"type": "complete"}')
+
+        assert state.outcome == "error"
+        assert state.error == "no access"
+
+    def test_counts_invalid_lines(self):
+        """Should count malformed control lines without applying them."""
+        state = ControlState()
+        assert state.feed("PERSONA_MSG {oops")
+        assert not state.feed("plain output")
+
+        assert state.invalid == 1
+        assert not state.used
+
+
+class TestScannerWithControl:
+    """Tests for control messages alongside legacy markers."""
+
+    def test_control_lines_are_not_legacy_markers(self):
+        """Should route framed lines to control state only."""
+        scanner = MarkerScanner()
+        scanner.feed('PERSONA_MSG {"type": "error", "message": "PERSONA_COMPLETE missing"}')
+
+        assert scanner.control.outcome == "error"
+        assert not scanner.complete
+        assert not scanner.error_seen
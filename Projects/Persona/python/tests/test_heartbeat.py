@@ -0,0 +1,169 @@
+"""Tests for HeartbeatService."""
+
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+import psutil
+
+from persona.core.heartbeat import DeadlineIndex, HeartbeatService
+
+
+def make_process(alive=True):
+    """Create a mock Popen whose poll() reports the given state."""
+    process = MagicMock()
+    process.poll.return_value = None if alive else 0
+    return process
+
+
+@pytest.fixture
+def job_store():
+    return MagicMock()
+
+
+@pytest.fixture
+def service(job_store):
+    return HeartbeatService(job_store, interval=30)
+
+
+class TestTick:
+    """Tests for a single heartbeat round."""
+
+    def test_new_jobs_skip_first_tick(self, service, job_store):
+        """Should not heartbeat a job that was just registered."""
+        service.register('job-1', make_process())
+
+        assert service.tick() == []
+        job_store.heartbeat_many.assert_not_called()
+
+    def test_one_bulk_update_for_all_jobs(self, service, job_store):
+        """Should send a single heartbeat_many call covering every live job."""
+        for i in range(3):
+            service.register(f'job-{i}', make_process())
+        service.tick()
+
+        due = service.tick()
+
+        assert sorted(due) == ['job-0', 'job-1', 'job-2']
+        job_store.heartbeat_many.assert_called_once()
+        assert sorted(job_store.heartbeat_many.call_args[0][0]) == due
+        job_store.heartbeat.assert_not_called()
+
+    def test_activity_skips_heartbeat(self, service, job_store):
+        """Should skip jobs that flushed logs since the previous tick."""
+        service.register('quiet', make_process())
+        service.register('chatty', make_process())
+        service.tick()
+
+        service.record_activity('chatty')
+        due = service.tick()
+
+        assert due == ['quiet']
+
+    def test_exited_process_dropped_and_reported(self, service, job_store):
+        """Should stop tracking dead processes and run their exit handler."""
+        process = make_process()
+        on_exit = MagicMock()
+        service.register('job-1', process, on_exit=on_exit)
+
+        process.poll.return_value = 1
+        service.tick()
+
+        assert service.tracked_ids() == []
+        on_exit.assert_called_once()
+        job_store.heartbeat_many.assert_not_called()
+
+    def test_unregister(self, service):
+        """Should forget unregistered jobs."""
+        service.register('job-1', make_process())
+        service.unregister('job-1')
+        service.unregister('job-1')
+
+        assert service.tracked_ids() == []
+
+    def test_store_error_does_not_raise(self, service, job_store):
+        """Should survive a failed bulk heartbeat."""
+        job_store.heartbeat_many.side_effect = Exception('network down')
+        service.register('job-1', make_process())
+        service.tick()
+
+        assert service.tick() == ['job-1']
+        assert service.tracked_ids() == ['job-1']
+
+
+class TestPidLiveness:
+    """Tests for jobs tracked by PID only."""
+
+    def test_live_pid(self, service):
+        """Should keep a PID whose process is running."""
+        proc = MagicMock()
+        proc.status.return_value = psutil.STATUS_RUNNING
+        with patch('persona.core.heartbeat.psutil.Process', return_value=proc):
+            service.register('job-1', pid=1234)
+            service.tick()
+            assert service.tracked_ids() == ['job-1']
+
+    def test_zombie_or_missing_pid(self, service):
+        """Should drop zombies and vanished processes."""
+        zombie = MagicMock()
+        zombie.status.return_value = psutil.STATUS_ZOMBIE
+
+        def process_for(pid):
+            if pid == 1:
+                return zombie
+            raise psutil.NoSuchProcess(pid)
+
+        with patch('persona.core.heartbeat.psutil.Process', side_effect=process_for):
+            service.register('zombie', pid=1)
+            service.register('gone', pid=2)
+            service.tick()
+            assert service.tracked_ids() == []
+
+
+class TestStallDeadlines:
+    """Tests for the local stall deadline index."""
+
+    def test_index_rearms_touched_jobs(self):
+        """Should expire jobs by their latest touch, keeping one heap entry per job."""
+        index = DeadlineIndex(timeout=10)
+        index.touch('a', now=0)
+        index.touch('b', now=5)
+        index.touch('a', now=20)
+        index.touch('c', now=1)
+        index.discard('c')
+
+        assert index.next_deadline() == 10
+        assert index.pop_expired(now=16) == ['b']
+        assert index.next_deadline() == 30
+        assert index.pop_expired(now=29) == []
+        assert index.pop_expired(now=30) == ['a']
+        assert len(index) == 0
+        assert index.next_deadline() is None
+
+    def test_output_moves_deadline_and_db_writes_do_not(self, job_store):
+        """Should key stalls on output only, so failing heartbeat writes change nothing."""
+        service = HeartbeatService(job_store, interval=30, stall_timeout=0.05)
+        service.register('job-1', make_process(), watch_progress=True)
+        job_store.heartbeat_many.side_effect = Exception("offline")
+        service.tick()
+        service.tick()
+        time.sleep(0.03)
+
+        service.record_progress('job-1')
+        time.sleep(0.03)
+        assert service.expired() == []
+
+        time.sleep(0.03)
+        assert service.expired() == ['job-1']
+        assert service.expired() == []
+
+    def test_only_watched_jobs_get_deadlines(self, service):
+        service.register('files-only', make_process())
+        service.record_progress('files-only')
+        assert service.next_deadline() is None
+
+    def test_unregister_drops_deadline(self, service):
+        service.register('job-1', make_process(), watch_progress=True)
+        service.unregister('job-1')
+        assert service.next_deadline() is None
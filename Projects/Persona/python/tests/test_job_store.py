@@ -4,7 +4,8 @@ import pytest
 from unittest.mock import MagicMock, patch
 from datetime import datetime, timezone
 
-from persona.core.job_store import JobStore, Job, JobStatus
+from persona.core.job_store import JobStore, Job, JobStatus, parse_timestamp
+from persona.core.scheduling import SchedulingPolicy
 
 
 class TestJobStore:
@@ -113,6 +114,78 @@ class TestCreateJob:
             assert insert_data['delegated_by'] == 'assistant'
 
 
+class TestCreateJobs:
+    """Tests for bulk job creation."""
+
+    @staticmethod
+    def _echo_insert(client, reverse=False):
+        """Make insert return the inserted rows with server-generated short IDs."""
+        def insert(rows):
+            created = [{**row, 'short_id': row['id'][:8], 'created_at': '2025-01-15T10:00:00Z'} for row in rows]
+            if reverse:
+                created.reverse()
+            chain = MagicMock()
+            chain.execute.return_value = MagicMock(data=created)
+            return chain
+
+        client.table.return_value.insert.side_effect = insert
+
+    def test_create_jobs_single_request(self, mock_supabase_client, mock_env_vars):
+        """Should insert all specs in one request."""
+        self._echo_insert(mock_supabase_client)
+
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore()
+            jobs = store.create_jobs([
+                {'job_type': 'research', 'payload': {'question': f'Q{i}'}, 'assigned_to': 'researcher'}
+                for i in range(30)
+            ])
+
+            assert len(jobs) == 30
+            assert mock_supabase_client.table.return_value.insert.call_count == 1
+            rows = mock_supabase_client.table.return_value.insert.call_args[0][0]
+            assert len(rows) == 30
+            assert all(row['status'] == 'pending' for row in rows)
+
+    def test_create_jobs_preserves_input_order(self, mock_supabase_client, mock_env_vars):
+        """Should return jobs in input order even if rows come back reordered."""
+        self._echo_insert(mock_supabase_client, reverse=True)
+
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore()
+            jobs = store.create_jobs([
+                {'job_type': 'research', 'payload': {'question': 'first'}},
+                {'job_type': 'meeting_extract', 'payload': {'meeting': {'title': 'Standup'}}},
+                {'job_type': 'research', 'payload': {'question': 'last'}},
+            ])
+
+            assert [job.job_type for job in jobs] == ['research', 'meeting_extract', 'research']
+            assert jobs[0].payload == {'question': 'first'}
+            assert jobs[2].payload == {'question': 'last'}
+
+    def test_create_jobs_chunks_large_batches(self, mock_supabase_client, mock_env_vars):
+        """Should split inserts into chunks of chunk_size rows."""
+        self._echo_insert(mock_supabase_client)
+
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore()
+            jobs = store.create_jobs(
+                [{'job_type': 'research', 'payload': {'question': f'Q{i}'}} for i in range(5)],
+                chunk_size=2
+            )
+
+            assert len(jobs) == 5
+            sizes = [len(c[0][0]) for c in mock_supabase_client.table.return_value.insert.call_args_list]
+            assert sizes == [2, 2, 1]
+
+    def test_create_jobs_empty(self, mock_supabase_client, mock_env_vars):
+        """Should not make any request for an empty batch."""
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore()
+            assert store.create_jobs([]) == []
+            mock_supabase_client.table.return_value.insert.assert_not_called()
+
+
 class TestGetJob:
     """Tests for job retrieval."""
 
@@ -163,12 +236,13 @@ class TestStartJob:
 
     def test_start_job_sets_status_and_pid(self, mock_supabase_client, sample_job_row, sample_running_job_row, mock_env_vars):
         """Should set status to running and record PID."""
-        # First call for get_job
+        # Short ID resolution
         mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(
             data=[sample_job_row]
         )
-        # Second call for update
-        mock_supabase_client.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock(
+        # Transition RPC
+        mock_supabase_client.rpc.return_value = MagicMock()
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
             data=[sample_running_job_row]
         )
 
@@ -185,7 +259,8 @@ class TestStartJob:
         mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(
             data=[sample_job_row]
         )
-        mock_supabase_client.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock(
+        mock_supabase_client.rpc.return_value = MagicMock()
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
             data=[sample_running_job_row]
         )
 
@@ -193,9 +268,8 @@ class TestStartJob:
             store = JobStore()
             job = store.start_job('abc12345', pid=12345)
 
-            # Verify update was called with started_at and last_heartbeat
-            update_call = mock_supabase_client.table.return_value.update.call_args
-            update_data = update_call[0][0]
+            # Verify the transition patch carries started_at and last_heartbeat
+            update_data = mock_supabase_client.rpc.call_args[0][1]['p_patch']
 
             assert 'started_at' in update_data
             assert 'last_heartbeat' in update_data
@@ -209,7 +283,8 @@ class TestCompleteJob:
         mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(
             data=[sample_job_row]
         )
-        mock_supabase_client.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock(
+        mock_supabase_client.rpc.return_value = MagicMock()
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
             data=[sample_completed_job_row]
         )
 
@@ -225,7 +300,8 @@ class TestCompleteJob:
         mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(
             data=[sample_job_row]
         )
-        mock_supabase_client.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock(
+        mock_supabase_client.rpc.return_value = MagicMock()
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
             data=[sample_completed_job_row]
         )
 
@@ -234,7 +310,7 @@ class TestCompleteJob:
             result_data = {'answer': 'AI is artificial intelligence.'}
             job = store.complete_job('abc12345', result=result_data)
 
-            update_data = mock_supabase_client.table.return_value.update.call_args[0][0]
+            update_data = mock_supabase_client.rpc.call_args[0][1]['p_patch']
             assert update_data['result'] == result_data
 
 
@@ -246,7 +322,8 @@ class TestFailJob:
         mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(
             data=[sample_job_row]
         )
-        mock_supabase_client.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock(
+        mock_supabase_client.rpc.return_value = MagicMock()
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
             data=[sample_failed_job_row]
         )
 
@@ -262,7 +339,8 @@ class TestFailJob:
         mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(
             data=[sample_job_row]
         )
-        mock_supabase_client.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock(
+        mock_supabase_client.rpc.return_value = MagicMock()
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
             data=[{**sample_failed_job_row, 'exit_code': 2}]
         )
 
@@ -270,7 +348,7 @@ class TestFailJob:
             store = JobStore()
             job = store.fail_job('abc12345', error='Error', exit_code=2)
 
-            update_data = mock_supabase_client.table.return_value.update.call_args[0][0]
+            update_data = mock_supabase_client.rpc.call_args[0][1]['p_patch']
             assert update_data['exit_code'] == 2
 
 
@@ -283,7 +361,8 @@ class TestCancelJob:
         mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(
             data=[sample_job_row]
         )
-        mock_supabase_client.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock(
+        mock_supabase_client.rpc.return_value = MagicMock()
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
             data=[cancelled_row]
         )
 
@@ -326,6 +405,26 @@ class TestGetPendingJobs:
             assert any(call[0] == ('assigned_to', 'researcher') for call in calls)
 
 
+    def test_get_pending_jobs_uses_summary_projection(self, mock_supabase_client, sample_job_row, mock_env_vars):
+        """Should select only summary columns and return JobSummary rows."""
+        from persona.core.job_store import JOB_SUMMARY_COLUMNS, JobSummary
+        summary_row = {k: v for k, v in sample_job_row.items() if k in JOB_SUMMARY_COLUMNS}
+        mock_supabase_client.table.return_value.select.return_value.execute.return_value = MagicMock(
+            data=[summary_row]
+        )
+
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore()
+            jobs = store.get_pending_jobs()
+
+            columns = mock_supabase_client.table.return_value.select.call_args[0][0]
+            assert 'payload' not in columns
+            assert 'result' not in columns
+            assert columns.split(', ') == list(JOB_SUMMARY_COLUMNS)
+            assert isinstance(jobs[0], JobSummary)
+            assert not hasattr(jobs[0], 'payload')
+
+
 class TestGetRunningJobs:
     """Tests for getting running jobs."""
 
@@ -344,6 +443,39 @@ class TestGetRunningJobs:
             assert jobs[0].pid == 12345
 
 
+class TestClaimJobs:
+    """Tests for atomic job claiming."""
+
+    def test_claim_jobs_calls_rpc(self, mock_supabase_client, sample_running_job_row, mock_env_vars):
+        """Should claim through the claim_jobs RPC and return running jobs."""
+        claimed_row = {**sample_running_job_row, 'worker_id': 'host-a:123'}
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(data=[claimed_row])
+
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore(scheduling=SchedulingPolicy(agent_weights={'researcher': 2.0}))
+            jobs = store.claim_jobs('host-a:123', assigned_to='researcher', limit=2)
+
+            mock_supabase_client.rpc.assert_called_once_with('claim_jobs', {
+                'p_worker_id': 'host-a:123',
+                'p_hostname': store.hostname,
+                'p_agent': 'researcher',
+                'p_limit': 2,
+                'p_agent_weights': {'researcher': 2.0},
+                'p_type_weights': None,
+                'p_aging_seconds': 120,
+            })
+            assert len(jobs) == 1
+            assert jobs[0].status == JobStatus.RUNNING
+            assert jobs[0].worker_id == 'host-a:123'
+
+    def test_claim_jobs_without_capacity(self, mock_supabase_client, mock_env_vars):
+        """Should not call the database when no slots are requested."""
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore()
+            assert store.claim_jobs('host-a:123', limit=0) == []
+            mock_supabase_client.rpc.assert_not_called()
+
+
 class TestHeartbeat:
     """Tests for heartbeat updates."""
 
@@ -361,6 +493,94 @@ class TestHeartbeat:
             update_data = update_call[0][0]
             assert 'last_heartbeat' in update_data
 
+    def test_heartbeat_many_single_update(self, mock_supabase_client, mock_env_vars):
+        """Should refresh several jobs with one update filtered by id."""
+        ids = ['550e8400-e29b-41d4-a716-446655440000', '550e8400-e29b-41d4-a716-446655440001']
+
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore()
+            store.heartbeat_many(ids)
+
+            update = mock_supabase_client.table.return_value.update
+            assert update.call_count == 1
+            assert 'last_heartbeat' in update.call_args[0][0]
+            update.return_value.in_.assert_called_once_with('id', ids)
+
+    def test_heartbeat_many_empty_is_noop(self, mock_supabase_client, mock_env_vars):
+        """Should not send a request when there are no jobs."""
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore()
+            store.heartbeat_many([])
+
+            mock_supabase_client.table.return_value.update.assert_not_called()
+
+
+class TestIdResolutionCache:
+    """Tests for the short_id -> UUID resolution cache."""
+
+    def test_uuid_skips_lookup(self, mock_supabase_client, mock_env_vars):
+        """Should use a full UUID directly without querying jobs."""
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore()
+            store.heartbeat('550e8400-e29b-41d4-a716-446655440000')
+
+            mock_supabase_client.table.return_value.select.assert_not_called()
+            eq_call = mock_supabase_client.table.return_value.update.return_value.eq.call_args
+            assert eq_call[0] == ('id', '550e8400-e29b-41d4-a716-446655440000')
+            assert store.id_cache_stats()['misses'] == 0
+
+    def test_short_id_resolved_once(self, mock_supabase_client, sample_running_job_row, mock_env_vars):
+        """Should resolve a short_id with one query and serve repeats from cache."""
+        mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(
+            data=[sample_running_job_row]
+        )
+
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore()
+            store.heartbeat('abc12345')
+            store.log('abc12345', 'info', 'Still working')
+            store.log_batch('abc12345', ['line 1', 'line 2'])
+
+            assert mock_supabase_client.table.return_value.select.call_count == 1
+            stats = store.id_cache_stats()
+            assert stats['misses'] == 1
+            assert stats['hits'] == 2
+
+    def test_rows_populate_cache(self, mock_supabase_client, sample_job_row, mock_env_vars):
+        """Should fill the cache from any fetched or created job row."""
+        mock_supabase_client.table.return_value.insert.return_value.execute.return_value = MagicMock(
+            data=[sample_job_row]
+        )
+
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore()
+            store.create_job(job_type='research', payload={'question': 'What is AI?'})
+
+            assert store.resolve_id('abc12345') == sample_job_row['id']
+            mock_supabase_client.table.return_value.select.assert_not_called()
+            assert store.id_cache_stats()['hits'] == 1
+
+    def test_unknown_short_id(self, mock_supabase_client, mock_env_vars):
+        """Should return None for short IDs that match no job."""
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore()
+            assert store.resolve_id('deadbeef') is None
+            assert store.id_cache_stats()['size'] == 0
+
+    def test_cache_is_bounded(self, mock_supabase_client, sample_job_row, mock_env_vars):
+        """Should evict least recently used entries beyond the size limit."""
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore(id_cache_size=2)
+            for i in range(3):
+                store._row_to_job({**sample_job_row, 'id': f'uuid-{i}', 'short_id': f'short{i:03d}'})
+
+            stats = store.id_cache_stats()
+            assert stats['size'] == 2
+            assert stats['maxsize'] == 2
+            # Oldest entry was evicted and now needs a lookup
+            assert store.resolve_id('short000') is None
+            assert store.resolve_id('short002') == 'uuid-2'
+
 
 class TestLog:
     """Tests for job logging."""
@@ -419,8 +639,46 @@ class TestGetLogs:
             assert len(logs) == 2
 
 
+class TestIterJobs:
+    """Tests for keyset-paginated job iteration."""
+
+    def test_iter_jobs_resumes_after_last_key(self, mock_supabase_client, sample_job_row, mock_env_vars):
+        """Should request the next page strictly after the previous page's last (created_at, id)."""
+        first = {**sample_job_row, 'id': '00000000-0000-0000-0000-000000000001', 'short_id': '00000001'}
+        second = {**sample_job_row, 'id': '00000000-0000-0000-0000-000000000002', 'short_id': '00000002'}
+        third = {**sample_job_row, 'id': '00000000-0000-0000-0000-000000000003', 'short_id': '00000003'}
+        mock_supabase_client.table.return_value.select.return_value.execute.side_effect = [
+            MagicMock(data=[first, second]),
+            MagicMock(data=[third]),
+        ]
+
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore()
+            jobs = list(store.iter_jobs([('status', 'eq', 'pending')], page_size=2))
+
+            assert [j.short_id for j in jobs] == ['00000001', '00000002', '00000003']
+            select = mock_supabase_client.table.return_value.select.return_value
+            select.or_.assert_called_once_with(
+                'created_at.gt."2025-01-15T10:00:00Z",'
+                'and(created_at.eq."2025-01-15T10:00:00Z",id.gt."00000000-0000-0000-0000-000000000002")'
+            )
+            order_calls = [c[0][0] for c in select.order.call_args_list]
+            assert order_calls[:2] == ['created_at', 'id']
+
+    def test_iter_jobs_stops_on_short_page(self, mock_supabase_client, sample_job_row, mock_env_vars):
+        """Should not issue another request after a partial page."""
+        mock_supabase_client.table.return_value.select.return_value.execute.return_value = MagicMock(
+            data=[sample_job_row]
+        )
+
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            store = JobStore()
+            assert len(list(store.iter_jobs(page_size=10))) == 1
+            assert mock_supabase_client.table.return_value.select.return_value.execute.call_count == 1
+
+
 class TestJobDataclass:
-    """Tests for Job dataclass."""
+    """Tests for the Job representation."""
 
     def test_job_from_row(self, sample_job_row, mock_supabase_client, mock_env_vars):
         """Should correctly convert database row to Job object."""
@@ -442,6 +700,62 @@ class TestJobDataclass:
             assert job.source_line == 42
             assert job.tags == ['research', 'daily-note']
 
+    def test_job_is_slotted(self, sample_job_row):
+        """Should wrap the row without a per-instance __dict__."""
+        job = Job.from_row(sample_job_row)
+
+        assert not hasattr(job, '__dict__')
+        with pytest.raises(AttributeError):
+            job.unknown_field = 1
+
+    def test_job_keyword_construction_and_defaults(self):
+        """Should accept the same keywords as before and apply defaults."""
+        job = Job(id='x', short_id='abc12345', job_type='research', payload={}, status=JobStatus.RUNNING, pid=42)
+
+        assert job.status == JobStatus.RUNNING
+        assert job.pid == 42
+        assert job.version == 0
+        assert job.tags == []
+        assert job.result is None
+        with pytest.raises(TypeError):
+            Job(id='x', short_id='y', job_type='z', payload={}, status=JobStatus.PENDING, bogus=1)
+
+    def test_job_decodes_json_text_lazily(self, sample_job_row):
+        """Should decode JSON text columns on first access."""
+        row = dict(sample_job_row, payload='{"question": "lazy"}', tags='["a"]')
+        job = Job.from_row(row)
+
+        assert job.payload == {'question': 'lazy'}
+        assert job.tags == ['a']
+
+    def test_job_assignment_and_equality(self, sample_job_row):
+        """Should support attribute assignment and compare by value."""
+        first = Job.from_row(dict(sample_job_row))
+        second = Job.from_row(dict(sample_job_row))
+        assert first == second
+
+        second.exit_code = 1
+        second.status = JobStatus.FAILED
+        assert first != second
+        assert second.to_dict()['status'] == 'failed'
+        assert second.to_dict()['exit_code'] == 1
+
+
+class TestParseTimestamp:
+    """Tests for parsing timestamp columns."""
+
+    @pytest.mark.parametrize("value, expected", [
+        ("2026-10-17T10:00:03.12345+00:00", datetime(2026, 10, 17, 10, 0, 3, 123450, timezone.utc)),
+        ("2026-10-17T10:00:03.1+00:00", datetime(2026, 10, 17, 10, 0, 3, 100000, timezone.utc)),
+        ("2026-10-17T10:00:03Z", datetime(2026, 10, 17, 10, 0, 3, tzinfo=timezone.utc)),
+        ("2026-10-17 10:00:03.123456", datetime(2026, 10, 17, 10, 0, 3, 123456, timezone.utc)),
+        ("not a timestamp", None),
+        (None, None),
+    ])
+    def test_parses_backend_timestamps(self, value, expected):
+        """Should accept trimmed fractions and naive UTC values."""
+        assert parse_timestamp(value) == expected
+
 
 class TestJobStatus:
     """Tests for JobStatus enum."""
@@ -457,116 +771,101 @@ class TestJobStatus:
 
 
 class TestUpdateJobOptimisticLocking:
-    """Tests for TOCTOU race condition prevention via optimistic locking."""
-
-    def test_update_job_uses_optimistic_locking(self, mock_supabase_client, sample_job_row, mock_env_vars):
-        """Should include updated_at in WHERE clause for optimistic lock."""
-        job_with_updated_at = {
-            **sample_job_row,
-            'updated_at': '2025-01-15T09:00:00+00:00'
-        }
-        mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(
-            data=[job_with_updated_at]
-        )
-        mock_supabase_client.table.return_value.update.return_value.eq.return_value.eq.return_value.execute.return_value = MagicMock(
-            data=[{**job_with_updated_at, 'status': 'running'}]
+    """Tests for TOCTOU race condition prevention via versioned transitions."""
+
+    def _setup(self, client, row, transition_results):
+        client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(
+            data=[row]
         )
+        client.rpc.return_value = MagicMock()
+        client.rpc.return_value.execute.side_effect = transition_results
+
+    def test_update_job_is_single_transition_call(self, mock_supabase_client, sample_job_row, mock_env_vars):
+        """Should apply the patch through one transition_job RPC."""
+        self._setup(mock_supabase_client, sample_job_row, [
+            MagicMock(data=[{**sample_job_row, 'status': 'running', 'version': 1}])
+        ])
 
         with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
             from persona.core.job_store import JobStore
             store = JobStore()
-            store.update_job('abc12345', status='running')
-
-            # Verify eq was called twice - once for id, once for updated_at (optimistic lock)
-            eq_calls = mock_supabase_client.table.return_value.update.return_value.eq.call_args_list
-            # First eq is for id, chain returns another mock that has eq for updated_at
-            assert len(eq_calls) >= 1
+            job = store.update_job('abc12345', status=JobStatus.RUNNING)
+
+            assert job.version == 1
+            assert mock_supabase_client.rpc.call_count == 1
+            name, params = mock_supabase_client.rpc.call_args[0]
+            assert name == 'transition_job'
+            assert params['p_id'] == sample_job_row['id']
+            assert params['p_expected_version'] is None
+            assert params['p_patch'] == {'status': 'running'}
+            mock_supabase_client.table.return_value.update.assert_not_called()
+
+    def test_update_job_passes_expected_version(self, mock_supabase_client, sample_job_row, mock_env_vars):
+        """Should forward expected_version for compare-and-set."""
+        self._setup(mock_supabase_client, sample_job_row, [
+            MagicMock(data=[{**sample_job_row, 'status': 'running', 'version': 4}])
+        ])
 
-    def test_update_job_retries_on_conflict(self, mock_supabase_client, sample_job_row, mock_env_vars):
-        """Should retry with fresh data when optimistic lock fails."""
-        job_with_updated_at = {
-            **sample_job_row,
-            'updated_at': '2025-01-15T09:00:00+00:00'
-        }
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+            from persona.core.job_store import JobStore
+            store = JobStore()
+            store.update_job('abc12345', expected_version=3, status='running')
 
-        # First read
-        mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(
-            data=[job_with_updated_at]
-        )
+            params = mock_supabase_client.rpc.call_args[0][1]
+            assert params['p_expected_version'] == 3
 
-        # First update fails (empty data = conflict), second succeeds
-        update_results = [
+    def test_update_job_retries_on_conflict(self, mock_supabase_client, sample_job_row, mock_env_vars):
+        """Should retry against the current version when the version check fails."""
+        current = {**sample_job_row, 'version': 5}
+        self._setup(mock_supabase_client, current, [
             MagicMock(data=[]),  # First attempt - conflict
-            MagicMock(data=[{**job_with_updated_at, 'status': 'running'}])  # Second attempt - success
-        ]
-        mock_supabase_client.table.return_value.update.return_value.eq.return_value.eq.return_value.execute.side_effect = update_results
+            MagicMock(data=[{**current, 'status': 'running', 'version': 6}])
+        ])
 
-        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client), \
+             patch('persona.core.job_store.time.sleep'):
             from persona.core.job_store import JobStore
             store = JobStore()
 
-            # Should succeed after retry
-            job = store.update_job('abc12345', status='running')
+            job = store.update_job('abc12345', expected_version=4, status='running')
             assert job.status.value == 'running'
+            assert mock_supabase_client.rpc.call_args[0][1]['p_expected_version'] == 5
 
     def test_update_job_raises_after_max_retries(self, mock_supabase_client, sample_job_row, mock_env_vars):
         """Should raise UpdateConflictError after max retries exhausted."""
-        job_with_updated_at = {
-            **sample_job_row,
-            'updated_at': '2025-01-15T09:00:00+00:00'
-        }
-
-        mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(
-            data=[job_with_updated_at]
-        )
-
-        # All updates fail (simulating constant conflicts)
-        mock_supabase_client.table.return_value.update.return_value.eq.return_value.eq.return_value.execute.return_value = MagicMock(
-            data=[]  # Empty = conflict
-        )
+        self._setup(mock_supabase_client, sample_job_row, [MagicMock(data=[])] * 3)
 
-        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
+        with patch('persona.core.job_store.create_client', return_value=mock_supabase_client), \
+             patch('persona.core.job_store.time.sleep'):
             from persona.core.job_store import JobStore, UpdateConflictError
             store = JobStore()
 
             with pytest.raises(UpdateConflictError, match='conflict'):
-                store.update_job('abc12345', status='running', max_retries=3)
-
-    def test_update_job_without_prior_updated_at(self, mock_supabase_client, sample_job_row, mock_env_vars):
-        """Should still work for jobs without prior updated_at (new jobs)."""
-        # Job without updated_at field
-        job_without_updated = {**sample_job_row, 'updated_at': None}
+                store.update_job('abc12345', expected_version=0, status='running', max_retries=3)
+            assert mock_supabase_client.rpc.call_count == 3
 
-        mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(
-            data=[job_without_updated]
-        )
-        mock_supabase_client.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock(
-            data=[{**sample_job_row, 'status': 'running', 'updated_at': '2025-01-15T10:00:00+00:00'}]
-        )
+    def test_update_job_missing_job_raises(self, mock_supabase_client, sample_job_row, mock_env_vars):
+        """Should raise ValueError when an unconditional transition matches nothing."""
+        self._setup(mock_supabase_client, sample_job_row, [MagicMock(data=[])])
 
         with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
             from persona.core.job_store import JobStore
             store = JobStore()
 
-            # Should succeed without optimistic lock for new jobs
-            job = store.update_job('abc12345', status='running')
-            assert job is not None
+            with pytest.raises(ValueError, match='not found'):
+                store.update_job(sample_job_row['id'], status='running')
 
-    def test_update_job_sets_new_updated_at(self, mock_supabase_client, sample_job_row, mock_env_vars):
-        """Should always set a new updated_at timestamp."""
-        mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(
-            data=[sample_job_row]
-        )
-        mock_supabase_client.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock(
-            data=[{**sample_job_row, 'status': 'running'}]
-        )
+    def test_update_job_does_not_send_updated_at(self, mock_supabase_client, sample_job_row, mock_env_vars):
+        """Should leave updated_at and version to the database trigger."""
+        self._setup(mock_supabase_client, sample_job_row, [
+            MagicMock(data=[{**sample_job_row, 'status': 'running'}])
+        ])
 
         with patch('persona.core.job_store.create_client', return_value=mock_supabase_client):
             from persona.core.job_store import JobStore
             store = JobStore()
             store.update_job('abc12345', status='running')
 
-            # Verify update was called with updated_at
-            update_call = mock_supabase_client.table.return_value.update.call_args
-            update_data = update_call[0][0]
-            assert 'updated_at' in update_data
+            patch_data = mock_supabase_client.rpc.call_args[0][1]['p_patch']
+            assert 'updated_at' not in patch_data
+            assert 'version' not in patch_data
@@ -0,0 +1,165 @@
+"""Tests for the job type registry."""
+
+from pathlib import Path
+
+import pytest
+
+from persona.core.backends import SqliteBackend
+from persona.core.job_store import Job, JobStatus, JobStore
+from persona.core.job_types import (
+    InvalidJobError,
+    JobTypeRegistry,
+    PromptTemplate,
+    load_job_type,
+    parse_class_limits,
+)
+
+CONTEXT = {"vault_path": Path("/vault"), "persona_root": Path("/vault/Projects/Persona"), "business": "Acme"}
+
+
+def make_job(job_type, payload, **fields):
+    return Job(
+        id="550e8400-e29b-41d4-a716-446655440000",
+        short_id="abc12345",
+        job_type=job_type,
+        payload=payload,
+        status=JobStatus.PENDING,
+        **fields
+    )
+
+
+class TestPromptTemplate:
+    """Tests for template parsing and rendering."""
+
+    def test_renders_dotted_fields(self):
+        template = PromptTemplate("Q: {payload.question} ({job.short_id}) {payload.meeting.title} {payload.n:03d}")
+        job = make_job("x", {})
+        text = template.render({"job": job, "payload": {"question": "why", "meeting": {"title": "Sync"}, "n": 7}})
+        assert text == "Q: why (abc12345) Sync 007"
+        assert template.fields == ["payload.question", "job.short_id", "payload.meeting.title", "payload.n"]
+
+    def test_missing_values_render_empty(self):
+        assert PromptTemplate("[{payload.a.b}]").render({"payload": {}}) == "[]"
+
+    @pytest.mark.parametrize("source", ["{secret}", "{0}", "{payload[x]}", "{payload.}", "{unclosed"])
+    def test_rejects_unknown_fields(self, source):
+        with pytest.raises(ValueError):
+            PromptTemplate(source)
+
+
+class TestBuiltinTypes:
+    """Tests for the built-in job types."""
+
+    def test_research_command(self):
+        registry = JobTypeRegistry.load(plugins=False)
+        cmd = registry.get("research").build_command(make_job("research", {"question": "Why?"}), CONTEXT)
+
+        assert cmd[:2] == ["claude", "-p"]
+        assert "Question: Why?" in cmd[2]
+        assert "/vault/Resources/General/Embeds/abc12345-research.md" in cmd[2]
+        assert cmd[-2:] == ["--model", "opus"]
+
+    def test_payload_model_overrides_default(self):
+        registry = JobTypeRegistry.load(plugins=False)
+        job = make_job("delegate", {"task": "Summarize", "model": "sonnet"}, assigned_to="cro", delegated_by="ceo")
+        cmd = registry.get("delegate").build_command(job, CONTEXT)
+
+        assert "You are the cro agent." in cmd[2]
+        assert "Task delegated by ceo:\nSummarize" in cmd[2]
+        assert cmd[-1] == "sonnet"
+
+    def test_agent_action_command(self):
+        registry = JobTypeRegistry.load(plugins=False)
+        cmd = registry.get("agent_action").build_command(make_job("agent_action", {"agent": "ceo", "action": "brief"}), CONTEXT)
+        assert cmd == ["bash", "/vault/Projects/Persona/scripts/run-agent.sh", "Acme", "ceo", "brief", "300"]
+
+    def test_invalid_payload(self):
+        registry = JobTypeRegistry.load(plugins=False)
+        with pytest.raises(InvalidJobError, match="meeting.title"):
+            registry.validate("meeting_extract", {"meeting": {"time_str": "9am"}})
+        with pytest.raises(InvalidJobError, match="question"):
+            registry.validate("research", {"question": ""})
+
+    def test_unknown_type_uses_generic_prompt(self):
+        registry = JobTypeRegistry.load(plugins=False)
+        registry.validate("apply_note_updates", {"anything": 1})
+        cmd = registry.get("custom").build_command(make_job("custom", {"prompt": "hello"}), CONTEXT)
+        assert cmd[2] == "hello"
+
+
+class TestYamlTypes:
+    """Tests for job types loaded from YAML files."""
+
+    def test_loads_and_overrides(self, tmp_path):
+        (tmp_path / "summarize.yaml").write_text("\n".join([
+            "name: summarize",
+            "payload:",
+            "  path: str",
+            "  words: {type: int, default: 100}",
+            "prompt: 'Summarize {payload.path} in {payload.words} words'",
+            "model: haiku",
+            "timeout: 120",
+            "concurrency: light",
+        ]))
+        (tmp_path / "research.yaml").write_text("\n".join([
+            "name: research",
+            "command: [echo, '{payload.question}']",
+        ]))
+        registry = JobTypeRegistry.load(tmp_path, plugins=False)
+
+        summarize = registry.get("summarize")
+        cmd = summarize.build_command(make_job("summarize", {"path": "a.md"}), CONTEXT)
+        assert cmd[2] == "Summarize a.md in 100 words"
+        assert cmd[-1] == "haiku"
+        assert summarize.timeout == 120
+        assert registry.in_classes({"light"}) == ["summarize"]
+        with pytest.raises(InvalidJobError):
+            summarize.validate({"words": "many"})
+
+        assert registry.get("research").build_command(make_job("research", {"question": "q"}), CONTEXT) == ["echo", "q"]
+
+    @pytest.mark.parametrize("text", [
+        "prompt: no name",
+        "name: x\nprompt: a\ncommand: [b]",
+        "name: x\nprompt: '{nope}'",
+        "name: x\nprompt: a\npayload: {f: tuple}",
+        "name: x\nprompt: a\nretries: 3",
+    ])
+    def test_rejects_malformed_files(self, tmp_path, text):
+        path = tmp_path / "bad.yaml"
+        path.write_text(text)
+        with pytest.raises(ValueError):
+            load_job_type(path)
+
+
+class TestCreateValidation:
+    """Tests for validation when jobs are created."""
+
+    def test_invalid_job_is_not_inserted(self, tmp_path):
+        backend = SqliteBackend(str(tmp_path / "persona.db"))
+        store = JobStore(backend=backend, job_types=JobTypeRegistry.load(plugins=False))
+
+        with pytest.raises(InvalidJobError):
+            store.create_jobs([
+                {"job_type": "research", "payload": {"question": "ok"}},
+                {"job_type": "research", "payload": {}},
+            ])
+        assert store.get_pending_jobs() == []
+        backend.close()
+
+    def test_claim_skips_excluded_types(self, tmp_path):
+        backend = SqliteBackend(str(tmp_path / "persona.db"))
+        store = JobStore(backend=backend, job_types=JobTypeRegistry.load(plugins=False))
+        store.create_job("research", {"question": "q"})
+        meeting = store.create_job("meeting_extract", {"meeting": {"title": "Sync"}})
+
+        claimed = store.claim_jobs("w1", limit=5, exclude_types=["research"])
+        assert [job.id for job in claimed] == [meeting.id]
+        backend.close()
+
+
+def test_parse_class_limits():
+    assert parse_class_limits(" heavy=1, interactive=2 ") == {"heavy": 1, "interactive": 2}
+    assert parse_class_limits("") == {}
+    with pytest.raises(ValueError):
+        parse_class_limits("heavy=0")
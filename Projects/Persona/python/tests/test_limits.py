@@ -0,0 +1,181 @@
+"""Tests for per-job resource limits."""
+
+import resource
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from persona.core.job_store import Job, JobStatus
+from persona.core.limits import (
+    CgroupManager,
+    LimitsConfig,
+    ResourceLimits,
+    apply_rlimits,
+    classify_limit_exit,
+)
+from persona.core.process_manager import ProcessManager
+
+
+def make_job(job_type="agent_action", payload=None, assigned_to=None):
+    return Job(
+        id="550e8400-e29b-41d4-a716-446655440000",
+        short_id="abc12345",
+        job_type=job_type,
+        payload=payload or {},
+        status=JobStatus.PENDING,
+        assigned_to=assigned_to
+    )
+
+
+def write_config(tmp_path, text):
+    path = tmp_path / "limits.yaml"
+    path.write_text(text)
+    return path
+
+
+class TestLimitsConfig:
+    """Tests for loading and merging limits."""
+
+    def test_missing_file_means_no_limits(self, tmp_path):
+        """Should return empty limits when the file does not exist."""
+        config = LimitsConfig.load(tmp_path / "missing.yaml")
+        assert config.for_job(make_job()) == ResourceLimits()
+        assert not config.uses_cgroup
+
+    def test_job_type_overrides_agent_overrides_defaults(self, tmp_path):
+        """Should layer defaults, agent and job type limits."""
+        config = LimitsConfig.load(write_config(tmp_path, "\n".join([
+            "defaults: {open_files: 1024, memory_mb: 2048}",
+            "agents:",
+            "  researcher: {memory_mb: 4096, cpu_weight: 50}",
+            "job_types:",
+            "  research: {cpu_weight: 20}",
+        ])))
+
+        limits = config.for_job(make_job("research", assigned_to="researcher"))
+        assert limits == ResourceLimits(memory_mb=4096, open_files=1024, cpu_weight=20)
+        assert config.for_job(make_job("agent_action", {"agent": "researcher"})).cpu_weight == 50
+        assert config.for_job(make_job()).memory_mb == 2048
+        assert config.uses_cgroup
+
+    @pytest.mark.parametrize("text", [
+        "defaults: {memory: 10}",
+        "defaults: {memory_mb: -1}",
+        "agents: {ceo: {cpu_weight: 20000}}",
+        "limits: {}",
+        "- 1",
+    ])
+    def test_rejects_invalid_config(self, tmp_path, text):
+        """Should raise ValueError for unknown keys, bad values and bad shapes."""
+        with pytest.raises(ValueError):
+            LimitsConfig.load(write_config(tmp_path, text))
+
+
+class TestClassifyLimitExit:
+    """Tests for attributing exits to limits."""
+
+    def test_clean_exit(self):
+        assert classify_limit_exit(ResourceLimits(cpu_seconds=5), 0) is None
+
+    def test_cpu_time(self):
+        limits = ResourceLimits(cpu_seconds=5)
+        assert classify_limit_exit(limits, -signal.SIGXCPU)[0] == "cpu_time"
+        assert classify_limit_exit(limits, 128 + signal.SIGXCPU)[0] == "cpu_time"
+        assert classify_limit_exit(ResourceLimits(), -signal.SIGXCPU) is None
+
+    def test_memory(self):
+        """Should use the cgroup OOM count or rlimit allocation errors."""
+        assert classify_limit_exit(ResourceLimits(memory_max_mb=64), -9, oom_killed=True)[0] == "memory"
+        assert classify_limit_exit(ResourceLimits(memory_mb=64), 1, "MemoryError")[0] == "memory"
+        assert classify_limit_exit(ResourceLimits(), 1, "MemoryError") is None
+
+    def test_open_files(self):
+        limits = ResourceLimits(open_files=64)
+        assert classify_limit_exit(limits, 1, "OSError: [Errno 24] Too many open files")[0] == "open_files"
+        assert classify_limit_exit(limits, 1, "some other failure") is None
+
+
+@pytest.mark.skipif(not hasattr(resource, "prlimit"), reason="prlimit() is Linux-only")
+class TestApplyRlimits:
+    """Tests for setting rlimits on a running child."""
+
+    def test_sets_limits_on_child(self):
+        process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(10)"])
+        try:
+            apply_rlimits(process.pid, ResourceLimits(open_files=128, cpu_seconds=30))
+            assert resource.prlimit(process.pid, resource.RLIMIT_NOFILE) == (128, 128)
+            assert resource.prlimit(process.pid, resource.RLIMIT_CPU) == (30, 35)
+        finally:
+            process.kill()
+            process.wait()
+
+    def test_cpu_limit_fails_job(self, tmp_path, monkeypatch):
+        """Should fail a job killed by RLIMIT_CPU with limit_exceeded set."""
+        monkeypatch.setenv("PERSONA_LIMITS_FILE", str(write_config(tmp_path, "defaults: {cpu_seconds: 1}")))
+        store = MagicMock()
+        failed = threading.Event()
+        store.fail_job.side_effect = lambda *args, **kwargs: failed.set()
+        job = make_job("research")
+        store.get_job.return_value = job
+
+        manager = ProcessManager(store, tmp_path)
+        monkeypatch.setattr(manager, "_build_command", lambda job: [sys.executable, "-c", "while True: pass"])
+        manager.start_agent(job)
+
+        assert failed.wait(15)
+        manager.supervisor.stop(timeout=5)
+        manager.heartbeats.stop()
+        manager.log_shipper.stop(timeout=5)
+
+        args, kwargs = store.fail_job.call_args
+        assert args[0] == job.id
+        assert args[1] == "CPU time limit exceeded (1s)"
+        assert args[2] == -signal.SIGXCPU
+        assert kwargs["result"]["limit_exceeded"] == "cpu_time"
+
+
+class TestCgroupCleanup:
+    """Tests for removing job cgroups, on a fake cgroup directory."""
+
+    def test_remove_waits_for_killed_processes(self, tmp_path, monkeypatch):
+        """Should only rmdir once cgroup.events reports the cgroup empty."""
+        path = tmp_path / "job-abc12345"
+        path.mkdir()
+        (path / "cgroup.kill").write_text("0")
+        (path / "cgroup.events").write_text("populated 1\nfrozen 0\n")
+
+        def exit_later():
+            time.sleep(0.1)
+            (path / "cgroup.events").write_text("populated 0\nfrozen 0\n")
+
+        seen = []
+        monkeypatch.setattr(Path, "rmdir", lambda self: seen.append((self / "cgroup.events").read_text()))
+        threading.Thread(target=exit_later).start()
+
+        CgroupManager.remove(path, timeout=5)
+
+        assert (path / "cgroup.kill").read_text() == "1"
+        assert seen == ["populated 0\nfrozen 0\n"]
+
+    def test_attach_removes_cgroup_it_could_not_join(self, tmp_path, monkeypatch):
+        """Should not leave the job's directory behind when moving the process in fails."""
+        write_text = Path.write_text
+
+        def fail_procs(self, data, *args, **kwargs):
+            if self.name == "cgroup.procs":
+                raise PermissionError("Permission denied")
+            return write_text(self, data, *args, **kwargs)
+
+        monkeypatch.setattr(Path, "write_text", fail_procs)
+        manager = CgroupManager(tmp_path, set())
+
+        with pytest.raises(PermissionError):
+            manager.attach("abc12345", 12345, ResourceLimits(memory_max_mb=256))
+
+        assert not (tmp_path / "job-abc12345").exists()
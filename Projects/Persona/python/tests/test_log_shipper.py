@@ -0,0 +1,228 @@
+"""Tests for LogShipper."""
+
+import sqlite3
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from persona.core.log_shipper import LogShipper
+
+
+class FlakyStore:
+    """Records log_batch calls and fails while `down` is set."""
+
+    def __init__(self):
+        self.down = False
+        self.batches = []
+
+    def log_batch(self, job_id, messages, level="info"):
+        if self.down:
+            raise ConnectionError("backend unreachable")
+        self.batches.append((job_id, level, list(messages)))
+
+    def lines(self):
+        return [line for _, _, batch in self.batches for line in batch]
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def store():
+    return FlakyStore()
+
+
+@pytest.fixture
+def make_shipper(tmp_path, store):
+    shippers = []
+
+    def make(**kwargs):
+        options = dict(batch_size=3, flush_interval=0.05, retries=0, replay_backoff=0.05)
+        options.update(kwargs)
+        shipper = LogShipper(store, tmp_path / "spool", **options)
+        shippers.append(shipper)
+        return shipper
+
+    yield make
+    for shipper in shippers:
+        shipper.stop(timeout=5)
+
+
+class TestLogShipper:
+    """Tests for batching, back-pressure and disk spill."""
+
+    def test_batches_by_size_and_flushes_in_order(self, make_shipper, store):
+        """Should send full batches immediately and the remainder on flush."""
+        shipper = make_shipper(flush_interval=60)
+        shipper.start()
+
+        for i in range(7):
+            shipper.push("job1", "info", f"line {i}")
+
+        assert shipper.flush(timeout=5)
+        assert [len(batch) for _, _, batch in store.batches] == [3, 3, 1]
+        assert store.lines() == [f"line {i}" for i in range(7)]
+        assert shipper.stats()["shipped"] == 7
+
+    def test_flushes_on_interval(self, make_shipper, store):
+        """Should ship a partial batch once it has waited flush_interval."""
+        shipper = make_shipper()
+        shipper.start()
+
+        shipper.push("job1", "error", "oops")
+
+        assert wait_for(lambda: store.batches)
+        assert store.batches == [("job1", "error", ["oops"])]
+
+    def test_push_drops_when_queue_full(self, make_shipper):
+        """Should never block the producer; full queue drops and counts."""
+        shipper = make_shipper(max_queue=2)
+
+        assert shipper.push("job1", "info", "a")
+        assert shipper.push("job1", "info", "b")
+        assert not shipper.push("job1", "info", "c")
+
+        stats = shipper.stats()
+        assert stats["dropped"] == 1
+        assert stats["queue_depth"] == 2
+
+    def test_spills_and_replays_in_order(self, make_shipper, store):
+        """Should spool while the backend is down and replay in order afterwards."""
+        shipper = make_shipper(flush_interval=60)
+        shipper.start()
+        store.down = True
+
+        for i in range(5):
+            shipper.push("job1", "info", f"line {i}")
+        assert shipper.flush(timeout=5)
+
+        stats = shipper.stats()
+        assert stats["spooling"]
+        assert stats["spilled"] == 5
+        assert store.batches == []
+
+        store.down = False
+        for i in range(5, 8):
+            shipper.push("job1", "info", f"line {i}")
+
+        assert wait_for(lambda: not shipper.stats()["spooling"])
+        assert shipper.flush(timeout=5)
+        assert store.lines() == [f"line {i}" for i in range(8)]
+        assert shipper.stats()["replayed"] >= 5
+
+    def test_spool_survives_restart(self, make_shipper, store):
+        """Should replay segments left behind by a previous shipper."""
+        store.down = True
+        first = make_shipper()
+        first.start()
+        first.push("job1", "info", "before crash")
+        assert first.flush(timeout=5)
+        first.stop(timeout=5)
+
+        store.down = False
+        second = make_shipper()
+        assert second.stats()["spooling"]
+        second.start()
+
+        assert wait_for(lambda: store.lines() == ["before crash"])
+        assert wait_for(lambda: not second.stats()["spooling"])
+
+    def test_on_shipped_callback(self, tmp_path):
+        """Should report each job whose lines were inserted."""
+        store = MagicMock()
+        shipped = []
+        shipper = LogShipper(store, tmp_path, batch_size=1, on_shipped=shipped.append)
+        shipper.start()
+
+        shipper.push("job1", "info", "hello")
+        assert shipper.flush(timeout=5)
+        shipper.stop(timeout=5)
+
+        store.log_batch.assert_called_once_with("job1", ["hello"], "info")
+        assert shipped == ["job1"]
+
+    def test_rejected_batch_is_dead_lettered(self, tmp_path):
+        """Should set aside a batch the backend rejects instead of spooling it."""
+        store = MagicMock()
+        store.log_batch.side_effect = [sqlite3.IntegrityError("FOREIGN KEY constraint failed"), None]
+        shipper = LogShipper(store, tmp_path / "spool", batch_size=1, retries=2, retry_backoff=0)
+        shipper.start()
+
+        shipper.push("deleted-job", "info", "orphan")
+        shipper.push("job1", "info", "hello")
+        assert shipper.flush(timeout=5)
+        shipper.stop(timeout=5)
+
+        stats = shipper.stats()
+        assert (stats["dead_lettered"], stats["shipped"], stats["spooling"]) == (1, 1, False)
+        assert store.log_batch.call_count == 2
+        assert "orphan" in (tmp_path / "spool" / "dead-letter.jsonl").read_text()
+
+    def test_replay_skips_batch_that_keeps_failing(self, make_shipper, store):
+        """Should dead-letter a spooled batch after max_replay_attempts and ship the rest."""
+        shipper = make_shipper(flush_interval=60, batch_size=1, max_replay_attempts=2)
+        shipper.start()
+        store.down = True
+        shipper.push("poison", "info", "never accepted")
+        shipper.push("job1", "info", "fine")
+        assert shipper.flush(timeout=5)
+
+        original = store.log_batch
+
+        def log_batch(job_id, messages, level="info"):
+            if job_id == "poison":
+                raise ConnectionError("timeout")
+            original(job_id, messages, level)
+
+        store.log_batch = log_batch
+        store.down = False
+
+        assert wait_for(lambda: not shipper.stats()["spooling"])
+        assert store.lines() == ["fine"]
+        assert shipper.stats()["dead_lettered"] == 1
+
+    def test_spool_size_cap(self, make_shipper, store):
+        """Should drop lines that do not fit in the spool."""
+        shipper = make_shipper(flush_interval=60, batch_size=1, max_spool_bytes=200)
+        shipper.start()
+        store.down = True
+
+        for i in range(10):
+            shipper.push("job1", "info", f"line {i}")
+        assert shipper.flush(timeout=5)
+
+        stats = shipper.stats()
+        assert stats["spilled"] + stats["dropped"] == 10
+        assert 0 < stats["spilled"] < 10
+
+    def test_dead_letters_rotate_outside_spool_budget(self, tmp_path):
+        """Should rotate dead letters at their own cap and keep spilling."""
+        store = MagicMock()
+        store.log_batch.side_effect = sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+        spool = tmp_path / "spool"
+        shipper = LogShipper(
+            store, spool, batch_size=1, retries=0, max_spool_bytes=300, max_dead_letter_bytes=200
+        )
+        shipper.start()
+        for i in range(10):
+            shipper.push("deleted-job", "info", f"orphan {i}")
+        assert shipper.flush(timeout=5)
+
+        store.log_batch.side_effect = ConnectionError("timeout")
+        shipper.push("job1", "info", "spilled")
+        assert shipper.flush(timeout=5)
+        shipper.stop(timeout=5)
+
+        stats = shipper.stats()
+        assert (stats["dead_lettered"], stats["spilled"], stats["dropped"]) == (10, 1, 0)
+        assert (spool / "dead-letter.jsonl").stat().st_size <= 200
+        assert "orphan 9" in (spool / "dead-letter.jsonl").read_text()
+        assert (spool / "dead-letter.1.jsonl").exists()
+
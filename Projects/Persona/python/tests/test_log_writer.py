@@ -0,0 +1,99 @@
+"""Tests for LocalLogWriter."""
+
+import gzip
+import os
+import time
+
+import pytest
+
+from persona.core.log_writer import LocalLogWriter
+
+
+@pytest.fixture
+def make_writer(tmp_path):
+    writers = []
+
+    def make(**kwargs):
+        writer = LocalLogWriter(tmp_path, **kwargs)
+        writers.append(writer)
+        return writer
+
+    yield make
+    for writer in writers:
+        writer.shutdown()
+
+
+def read_gz(path):
+    with gzip.open(path, "rt") as f:
+        return f.read()
+
+
+class TestLocalLogWriter:
+    """Tests for buffering, rotation, compression and retention."""
+
+    def test_buffers_until_flush(self, make_writer, tmp_path):
+        """Should not hit the file per line; flush_due writes buffered output."""
+        writer = make_writer()
+        writer.open("job1", "abc12345")
+
+        assert writer.write("job1", "stdout", "hello")
+        assert (tmp_path / "abc12345.log").read_text() == ""
+
+        writer.flush_due()
+        content = (tmp_path / "abc12345.log").read_text()
+        assert content.startswith("[") and content.endswith("] hello\n")
+
+    def test_write_to_unknown_job(self, make_writer):
+        """Should report that no log is open."""
+        assert not make_writer().write("missing", "stdout", "hello")
+
+    def test_close_compresses(self, make_writer, tmp_path):
+        """Should gzip finished logs and drop empty ones."""
+        writer = make_writer()
+        writer.open("job1", "abc12345")
+        writer.write("job1", "stdout", "done")
+
+        assert writer.close("job1")
+        writer.shutdown()
+
+        assert "done" in read_gz(tmp_path / "abc12345.log.gz")
+        assert not (tmp_path / "abc12345.log").exists()
+        # Nothing was written to stderr
+        assert not (tmp_path / "abc12345.error.log").exists()
+        assert not (tmp_path / "abc12345.error.log.gz").exists()
+
+    def test_rotates_large_logs(self, make_writer, tmp_path):
+        """Should move a live log aside once it passes rotate_bytes."""
+        writer = make_writer(rotate_bytes=100)
+        writer.open("job1", "abc12345")
+        for i in range(10):
+            writer.write("job1", "stdout", f"line {i}")
+        writer.close("job1")
+        writer.shutdown()
+
+        segments = sorted(tmp_path.glob("abc12345.log*.gz"))
+        text = "".join(read_gz(p) for p in segments)
+        assert len(segments) > 1
+        assert all(f"line {i}" in text for i in range(10))
+
+    def test_retention_by_age_and_size(self, make_writer, tmp_path):
+        """Should delete old logs, then the oldest archives past the size cap."""
+        writer = make_writer(max_age_days=1, max_total_bytes=250)
+        now = time.time()
+
+        def make_file(name, age_days, size=100):
+            path = tmp_path / name
+            path.write_bytes(b"x" * size)
+            os.utime(path, (now - age_days * 86400, now - age_days * 86400))
+            return path
+
+        expired = make_file("old.log", 3)
+        oldest = make_file("a.log.gz", 0.5)
+        newer = make_file("b.log.gz", 0.2)
+        newest = make_file("c.log", 0.1)
+        other = make_file("notes.txt", 5)
+
+        assert writer.enforce_retention() == 2
+        assert not expired.exists()
+        assert not oldest.exists()
+        assert newer.exists() and newest.exists() and other.exists()
@@ -0,0 +1,76 @@
+"""Tests for MarkerScanner."""
+
+from persona.core.markers import MarkerScanner
+
+
+class TestMarkerScanner:
+    """Tests for incremental marker detection."""
+
+    def test_detects_completion(self):
+        """Should flag completion from a single line."""
+        scanner = MarkerScanner()
+        scanner.feed("working...")
+        assert not scanner.complete
+
+        scanner.feed("PERSONA_COMPLETE")
+        assert scanner.complete
+        assert not scanner.error_seen
+
+    def test_keeps_first_error_message(self):
+        """Should record the text of the first PERSONA_ERROR line."""
+        scanner = MarkerScanner()
+        scanner.feed("PERSONA_ERROR: rate limited")
+        scanner.feed("PERSONA_ERROR: second failure")
+
+        assert scanner.error_seen
+        assert scanner.error == "rate limited"
+
+    def test_bare_error_marker(self):
+        """Should flag an error marker that carries no message."""
+        scanner = MarkerScanner()
+        scanner.feed("PERSONA_ERROR")
+
+        assert scanner.error_seen
+        assert scanner.error is None
+
+    def test_parses_delegation(self):
+        """Should parse agent and task from the first delegation line."""
+        scanner = MarkerScanner()
+        scanner.feed("PERSONA_DELEGATE: researcher: Look into Q3 churn")
+        scanner.feed("PERSONA_DELEGATE: assistant: ignored")
+
+        assert scanner.delegation == {"agent": "researcher", "task": "Look into Q3 churn"}
+
+    def test_ignores_incomplete_delegation(self):
+        """Should not record a delegation line without an agent or task."""
+        scanner = MarkerScanner()
+        scanner.feed("PERSONA_DELEGATE: researcher:")
+        scanner.feed("PERSONA_DELEGATE: : dig")
+        assert scanner.delegation is None
+
+        scanner.feed("PERSONA_DELEGATE: researcher: dig")
+        assert scanner.delegation == {"agent": "researcher", "task": "dig"}
+
+    def test_tail_is_bounded(self):
+        """Should keep only roughly max_tail_bytes of recent output."""
+        scanner = MarkerScanner(max_tail_bytes=100)
+        for i in range(1000):
+            scanner.feed(f"line {i:04d}")
+
+        tail = scanner.tail()
+        assert tail.endswith("line 0999")
+        assert "line 0000" not in tail
+        assert len(tail) <= 100
+
+    def test_feed_file(self, tmp_path):
+        """Should scan an existing file and ignore a missing one."""
+        log = tmp_path / "job.log"
+        log.write_text("[2026-10-17 10:00:00] hello\n[2026-10-17 10:00:01] PERSONA_ERROR: boom\n")
+
+        scanner = MarkerScanner().feed_file(log)
+        assert scanner.error == "boom"
+        assert scanner.tail().endswith("PERSONA_ERROR: boom")
+
+        missing = MarkerScanner().feed_file(tmp_path / "missing.log")
+        assert not missing.error_seen
+        assert missing.tail() == ""
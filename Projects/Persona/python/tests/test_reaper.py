@@ -0,0 +1,122 @@
+"""Tests for the worker's hung job reaper."""
+
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from persona.core.backends import SqliteBackend
+from persona.core.heartbeat import HeartbeatService
+from persona.core.job_store import JobStatus, JobStore
+from persona.core.job_types import JobTypeRegistry
+from persona.core.reaper import HungJobReaper
+
+
+@pytest.fixture
+def store(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "persona.db"))
+    yield JobStore(backend=backend, job_types=JobTypeRegistry())
+    backend.close()
+
+
+def make_reaper(store, stall_timeout=1800.0):
+    process_manager = MagicMock()
+    process_manager.heartbeats = HeartbeatService(store, interval=30, stall_timeout=stall_timeout)
+    return HungJobReaper(store, process_manager, "host-a:1", sweep_interval=60, hung_timeout=300)
+
+
+def live_process():
+    process = MagicMock()
+    process.poll.return_value = None
+    return process
+
+
+def running_job(store, worker_id, heartbeat_age):
+    job = store.create_job("research", {})
+    heartbeat = (datetime.now(timezone.utc) - timedelta(seconds=heartbeat_age)).isoformat()
+    store.backend.update_jobs(
+        [("id", "eq", job.id)],
+        {"status": "running", "worker_id": worker_id, "last_heartbeat": heartbeat}
+    )
+    return job
+
+
+class TestLocalReaping:
+    """Tests for jobs this worker runs."""
+
+    def test_kills_job_past_deadline(self, store):
+        """Should kill a local job as hung once it has been silent for the stall timeout."""
+        reaper = make_reaper(store, stall_timeout=0.01)
+        reaper.process_manager.kill_job.return_value = True
+        reaper.heartbeats.register("job-1", MagicMock(), watch_progress=True)
+        reaper.heartbeats.register("gone", MagicMock(), watch_progress=True)
+        reaper.process_manager.is_running.side_effect = lambda job_id: job_id == "job-1"
+
+        assert reaper.seconds_until_deadline() <= 0.01
+        time.sleep(0.02)
+
+        assert reaper.reap() == ["job-1"]
+        reaper.process_manager.kill_job.assert_called_once_with(
+            "job-1", force=True, hung_reason="No output for 0.01s"
+        )
+        assert reaper.reap() == []
+        assert reaper.seconds_until_deadline() is None
+
+    def test_database_outage_does_not_reap(self, store):
+        """Should leave an agent that keeps printing alone while heartbeat writes fail."""
+        reaper = make_reaper(store, stall_timeout=0.05)
+        reaper.process_manager.is_running.return_value = True
+        reaper.heartbeats.register("job-1", live_process(), watch_progress=True)
+        store.heartbeat_many = MagicMock(side_effect=ConnectionError("database unreachable"))
+
+        for _ in range(5):
+            reaper.heartbeats.tick()
+            reaper.heartbeats.record_progress("job-1")
+            time.sleep(0.02)
+            assert reaper.reap() == []
+
+        reaper.process_manager.kill_job.assert_not_called()
+
+    def test_failed_kill_is_retried(self, store):
+        """Should watch a job again when kill_job cannot reach the database."""
+        reaper = make_reaper(store, stall_timeout=0.01)
+        reaper.process_manager.is_running.return_value = True
+        reaper.process_manager.kill_job.side_effect = ConnectionError("database unreachable")
+        reaper.heartbeats.register("job-1", MagicMock(), watch_progress=True)
+        time.sleep(0.02)
+
+        assert reaper.reap() == []
+        assert reaper.seconds_until_deadline() is not None
+
+
+class TestSweep:
+    """Tests for jobs of other workers."""
+
+    def test_marks_only_vanished_workers(self, store):
+        """Should mark stale jobs hung only when their worker has no fresh jobs."""
+        vanished = running_job(store, "host-b:2", heartbeat_age=600)
+        busy_stale = running_job(store, "host-c:3", heartbeat_age=600)
+        running_job(store, "host-c:3", heartbeat_age=5)
+        own = running_job(store, "host-a:1", heartbeat_age=600)
+        orphan = running_job(store, None, heartbeat_age=600)
+
+        marked = make_reaper(store).sweep()
+
+        assert sorted(j.id for j in marked) == sorted([vanished.id, orphan.id])
+        assert store.get_job(vanished.id).status == JobStatus.HUNG
+        assert "host-b:2 is gone" in store.get_job(vanished.id).error_message
+        assert store.get_job(busy_stale.id).status == JobStatus.RUNNING
+        assert store.get_job(own.id).status == JobStatus.RUNNING
+
+    def test_sweep_runs_on_interval(self, store):
+        """Should query the database only when the sweep interval has passed."""
+        reaper = make_reaper(store)
+        store.get_hung_jobs = MagicMock(return_value=[])
+
+        reaper.check()
+        store.get_hung_jobs.assert_not_called()
+
+        reaper._next_sweep = 0
+        reaper.check()
+        store.get_hung_jobs.assert_called_once_with(300)
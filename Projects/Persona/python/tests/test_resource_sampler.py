@@ -0,0 +1,95 @@
+"""Tests for ResourceSampler."""
+
+import os
+import signal
+import subprocess
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+from persona.core.resource_sampler import ResourceSampler
+
+
+@pytest.fixture
+def busy_tree():
+    """A process that holds some memory and has one child."""
+    code = (
+        "import subprocess, sys, time\n"
+        "data = bytearray(20 * 1024 * 1024)\n"
+        "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])\n"
+        "print('ready', flush=True)\n"
+        "time.sleep(30)\n"
+    )
+    process = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, start_new_session=True)
+    assert process.stdout.readline().strip() == b"ready"
+    yield process
+    os.killpg(process.pid, signal.SIGKILL)
+    process.wait()
+    process.stdout.close()
+
+
+class TestResourceSampler:
+    """Tests for sampling, downsampling and peaks."""
+
+    def test_samples_process_tree(self, busy_tree):
+        """Should measure the whole tree without blocking and keep a ring buffer."""
+        store = MagicMock()
+        sampler = ResourceSampler(store, interval=60, window=3600, buffer_size=2)
+        sampler.register("job1", busy_tree.pid)
+
+        for _ in range(3):
+            assert sampler.sample() == 1
+
+        latest = sampler.latest("job1")
+        assert latest.children == 1
+        assert latest.rss_bytes > 20 * 1024 * 1024
+        assert len(sampler.samples("job1")) == 2
+        assert sampler.peaks("job1")["samples"] == 3
+        store.record_metrics.assert_not_called()
+
+    def test_writes_one_row_per_window(self, busy_tree):
+        """Should downsample a window of samples into a single row per job."""
+        store = MagicMock()
+        sampler = ResourceSampler(store, interval=60, window=0.0001)
+        sampler.register("job1", busy_tree.pid)
+
+        for _ in range(3):
+            sampler.sample()
+
+        # The first two samples span a full window; the third opens the next
+        rows = [row for call in store.record_metrics.call_args_list for row in call.args[0]]
+        assert len(rows) == 1
+        assert rows[0]["job_id"] == "job1"
+        assert rows[0]["samples"] == 2
+        assert rows[0]["children"] == 1
+        assert rows[0]["cpu_percent_max"] >= rows[0]["cpu_percent"]
+
+    def test_finish_flushes_partial_window_and_returns_peaks(self, busy_tree):
+        """Should store the last partial window and report peaks on finish."""
+        store = MagicMock()
+        sampler = ResourceSampler(store, interval=60, window=3600)
+        sampler.register("job1", busy_tree.pid)
+        sampler.sample()
+        sampler.sample()
+
+        peaks = sampler.finish("job1")
+
+        assert peaks["samples"] == 2
+        assert peaks["rss_bytes_max"] > 20 * 1024 * 1024
+        assert peaks["children_max"] == 1
+        (rows,), _ = store.record_metrics.call_args
+        assert rows[0]["samples"] == 2
+        assert sampler.latest("job1") is None
+        assert sampler.finish("job1") == {}
+
+    def test_skips_exited_processes(self):
+        """Should ignore jobs whose process is gone."""
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+
+        sampler = ResourceSampler(MagicMock(), interval=60)
+        sampler.register("job1", process.pid)
+
+        assert sampler.sample() == 0
+        assert sampler.latest("job1") is None
@@ -0,0 +1,138 @@
+"""Tests for the scheduling policy and weighted fair claiming."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from persona.core.backends import SqliteBackend
+from persona.core.job_store import JobStore
+from persona.core.job_types import JobTypeRegistry, MEETING_EXTRACT
+from persona.core.scheduling import SchedulingPolicy
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "persona.db"))
+    yield backend
+    backend.close()
+
+
+def make_store(backend, **policy) -> JobStore:
+    return JobStore(backend=backend, job_types=JobTypeRegistry(), scheduling=SchedulingPolicy(**policy))
+
+
+def age(store, job, seconds):
+    created = (datetime.now(timezone.utc) - timedelta(seconds=seconds)).isoformat(timespec="microseconds")
+    store.backend.update_jobs([("id", "eq", job.id)], {"created_at": created})
+
+
+class TestSchedulingPolicy:
+    """Tests for loading scheduling.yaml."""
+
+    def test_load(self, tmp_path):
+        path = tmp_path / "scheduling.yaml"
+        path.write_text("aging_seconds: 30\nagents:\n  assistant: 3\njob_types:\n  research: 0.5\n")
+
+        policy = SchedulingPolicy.load(path)
+
+        assert policy.agent_weights == {"assistant": 3.0}
+        assert policy.type_weights == {"research": 0.5}
+        assert policy.aging_seconds == 30
+
+    def test_missing_file_uses_defaults(self, tmp_path):
+        assert SchedulingPolicy.load(tmp_path / "missing.yaml") == SchedulingPolicy()
+
+    def test_zero_aging_disables_aging(self, tmp_path):
+        path = tmp_path / "scheduling.yaml"
+        path.write_text("aging_seconds: 0\n")
+        assert SchedulingPolicy.load(path).aging_seconds is None
+
+    @pytest.mark.parametrize("text", [
+        "agents:\n  assistant: 0\n",
+        "job_types:\n  research: fast\n",
+        "aging_seconds: -1\n",
+        "weights: {}\n",
+    ])
+    def test_rejects_malformed(self, tmp_path, text):
+        path = tmp_path / "scheduling.yaml"
+        path.write_text(text)
+        with pytest.raises(ValueError):
+            SchedulingPolicy.load(path)
+
+
+class TestFairClaiming:
+    """Tests for claim order on the SQLite backend."""
+
+    def test_burst_does_not_block_other_agents(self, backend):
+        """Should alternate between agents instead of draining the oldest burst."""
+        store = make_store(backend)
+        burst = [store.create_job("research", {}, assigned_to="researcher") for _ in range(5)]
+        other = store.create_job("meeting_extract", {}, assigned_to="assistant")
+
+        claimed = store.claim_jobs("w1", limit=2)
+
+        assert [j.id for j in claimed] == [burst[0].id, other.id]
+
+    def test_agent_weights(self, backend):
+        """Should split claims in proportion to agent weights."""
+        store = make_store(backend, agent_weights={"assistant": 2})
+        for _ in range(6):
+            store.create_job("research", {}, assigned_to="assistant")
+            store.create_job("research", {}, assigned_to="researcher")
+
+        claimed = store.claim_jobs("w1", limit=6)
+
+        agents = [j.assigned_to for j in claimed]
+        assert agents.count("assistant") == 4
+        assert agents.count("researcher") == 2
+
+    def test_running_jobs_count_against_agent(self, backend):
+        """Should favour the agent with less work already running."""
+        store = make_store(backend)
+        for _ in range(2):
+            store.create_job("research", {}, assigned_to="researcher")
+        store.claim_jobs("w1", limit=2)
+        store.create_job("research", {}, assigned_to="researcher")
+        idle = store.create_job("research", {}, assigned_to="assistant")
+
+        assert store.claim_jobs("w2")[0].id == idle.id
+
+    def test_type_weights(self, backend):
+        """Should charge an agent less for job types with a higher weight."""
+        store = make_store(backend, type_weights={"meeting_extract": 4})
+        for _ in range(2):
+            store.create_job("research", {}, assigned_to="researcher")
+        store.claim_jobs("w1", limit=2)
+        for _ in range(3):
+            store.create_job("meeting_extract", {}, assigned_to="assistant")
+        store.create_job("research", {}, assigned_to="researcher")
+
+        claimed = store.claim_jobs("w2", limit=3)
+
+        assert [j.assigned_to for j in claimed] == ["assistant"] * 3
+
+    def test_priority_then_age_within_agent(self, backend):
+        """Should claim an agent's higher priority jobs first, oldest first among equals."""
+        store = make_store(backend, aging_seconds=None)
+        low = store.create_job("research", {}, assigned_to="researcher")
+        high = store.create_job("research", {}, assigned_to="researcher", priority=5)
+        later_high = store.create_job("research", {}, assigned_to="researcher", priority=5)
+
+        claimed = store.claim_jobs("w1", limit=3)
+
+        assert [j.id for j in claimed] == [high.id, later_high.id, low.id]
+
+    def test_aging_prevents_starvation(self, backend):
+        """Should let a long-waiting low priority job overtake newer urgent ones."""
+        store = make_store(backend, aging_seconds=60)
+        old = store.create_job("research", {}, assigned_to="researcher")
+        age(store, old, 3600)
+        urgent = store.create_job("research", {}, assigned_to="researcher", priority=10)
+
+        assert [j.id for j in store.claim_jobs("w1", limit=2)] == [old.id, urgent.id]
+
+    def test_default_priority_from_job_type(self, backend):
+        store = JobStore(backend=backend, job_types=JobTypeRegistry([MEETING_EXTRACT]))
+        job = store.create_job("meeting_extract", {"meeting": {"title": "Standup"}})
+        assert job.priority == MEETING_EXTRACT.priority
+        assert store.create_job("other", {}).priority == 0
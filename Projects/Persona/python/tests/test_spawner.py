@@ -0,0 +1,70 @@
+"""Tests for the agent spawner."""
+
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+from persona.core.spawner import AgentSpawner, SpawnedProcess
+
+posix_spawn_only = pytest.mark.skipif(not hasattr(os, "posix_spawn"), reason="posix_spawn unavailable")
+
+
+@posix_spawn_only
+class TestPosixSpawn:
+    """Tests for the posix_spawn path."""
+
+    def test_pipes_env_and_exit_code(self):
+        """Should pipe output, pass the merged env and report the exit code."""
+        spawner = AgentSpawner(base_env={**os.environ, "BASE": "1"}, method="posix_spawn")
+        code = "import os, sys; print(os.environ['BASE'], os.environ['JOB']); print('err', file=sys.stderr); sys.exit(3)"
+        process = spawner.spawn([sys.executable, "-c", code], spawner.env(JOB="abc"))
+
+        assert isinstance(process, SpawnedProcess)
+        assert process.stdout.read() == b"1 abc\n"
+        assert process.stderr.read() == b"err\n"
+        assert process.wait(timeout=10) == 3
+        assert process.poll() == 3
+
+    def test_new_session_and_signals(self):
+        """Should start a session leader and report signals as negative codes."""
+        spawner = AgentSpawner(method="posix_spawn")
+        process = spawner.spawn([sys.executable, "-c", "import time; time.sleep(30)"], spawner.env())
+
+        assert os.getsid(process.pid) == process.pid
+        with pytest.raises(subprocess.TimeoutExpired):
+            process.wait(timeout=0.05)
+        os.killpg(process.pid, signal.SIGTERM)
+        assert process.wait() == -signal.SIGTERM
+
+    def test_writes_to_files(self, tmp_path):
+        """Should send output straight to open files."""
+        spawner = AgentSpawner(method="posix_spawn")
+        with open(tmp_path / "out", "w") as out, open(tmp_path / "err", "w") as err:
+            process = spawner.spawn(["echo", "hello"], spawner.env(), out, err)
+        assert process.stdout is None
+        assert process.wait(timeout=10) == 0
+        assert (tmp_path / "out").read_text() == "hello\n"
+
+    def test_missing_executable(self):
+        """Should raise FileNotFoundError like Popen."""
+        spawner = AgentSpawner(method="posix_spawn")
+        with pytest.raises(FileNotFoundError):
+            spawner.spawn(["persona-no-such-program"], spawner.env())
+
+
+class TestFallback:
+    """Tests for the Popen path."""
+
+    def test_preexec_fn_uses_popen(self):
+        """Should use Popen when a preexec_fn is needed."""
+        spawner = AgentSpawner(method="posix_spawn")
+        process = spawner.spawn([sys.executable, "-c", "pass"], spawner.env(), preexec_fn=lambda: None)
+        assert isinstance(process, subprocess.Popen)
+        assert process.wait(timeout=10) == 0
+
+    def test_rejects_unknown_method(self):
+        with pytest.raises(ValueError):
+            AgentSpawner(method="fork")
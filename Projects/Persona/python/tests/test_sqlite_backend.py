@@ -0,0 +1,423 @@
+"""Tests for JobStore and NoteStateStore on the SQLite backend."""
+
+import io
+import json
+import threading
+
+import pytest
+
+from persona.core.backends import SqliteBackend
+from persona.core.export import iter_export_records, write_jsonl
+from persona.core.job_store import JobStore, JobStatus, UpdateConflictError
+from persona.core.job_types import JobTypeRegistry
+from persona.core.note_state import NoteStateStore
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "persona.db"))
+    yield backend
+    backend.close()
+
+
+@pytest.fixture
+def store(backend):
+    # Storage tests use placeholder payloads; skip the built-in payload schemas
+    return JobStore(backend=backend, job_types=JobTypeRegistry())
+
+
+class TestBackendSelection:
+    """Tests for choosing the backend from the environment."""
+
+    def test_env_selects_sqlite(self, monkeypatch, tmp_path):
+        """Should use SQLite without Supabase credentials when PERSONA_BACKEND=sqlite."""
+        monkeypatch.setenv("PERSONA_BACKEND", "sqlite")
+        monkeypatch.setenv("PERSONA_SQLITE_PATH", str(tmp_path / "env.db"))
+        monkeypatch.delenv("SUPABASE_URL", raising=False)
+        monkeypatch.delenv("SUPABASE_KEY", raising=False)
+
+        store = JobStore()
+
+        assert isinstance(store.backend, SqliteBackend)
+        assert store.client is None
+        assert (tmp_path / "env.db").exists()
+        store.backend.close()
+
+    def test_unknown_backend_raises(self, monkeypatch):
+        """Should reject unknown backend names."""
+        monkeypatch.setenv("PERSONA_BACKEND", "mongo")
+
+        with pytest.raises(ValueError, match="PERSONA_BACKEND"):
+            JobStore()
+
+    def test_wal_mode(self, backend):
+        """Should open file databases in WAL mode."""
+        mode = backend._conn().execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+
+class TestJobLifecycle:
+    """Tests for creating and transitioning jobs."""
+
+    def test_create_and_get(self, store):
+        """Should create a job and fetch it by UUID and short ID."""
+        job = store.create_job(
+            "research",
+            {"question": "What is AI?"},
+            assigned_to="researcher",
+            tags=["research"]
+        )
+
+        assert job.status == JobStatus.PENDING
+        assert job.short_id == job.id[:8]
+        assert job.version == 0
+        assert store.get_job(job.id).payload == {"question": "What is AI?"}
+        assert store.get_job(job.short_id).tags == ["research"]
+
+    def test_create_jobs_preserves_order(self, store):
+        """Should bulk-insert jobs and return them in spec order."""
+        specs = [{"job_type": "research", "payload": {"n": i}} for i in range(5)]
+
+        jobs = store.create_jobs(specs, chunk_size=2)
+
+        assert [j.payload["n"] for j in jobs] == list(range(5))
+        assert store.count_jobs("pending") == 5
+
+    def test_start_complete(self, store):
+        """Should move a job through running to completed."""
+        job = store.create_job("research", {})
+
+        running = store.start_job(job.short_id, pid=42)
+        assert running.status == JobStatus.RUNNING
+        assert running.pid == 42
+        assert running.version == 1
+
+        done = store.complete_job(job.id, result={"ok": True})
+        assert done.status == JobStatus.COMPLETED
+        assert done.result == {"ok": True}
+        assert done.version == 2
+
+    def test_transition_version_conflict(self, store):
+        """Should reject compare-and-set against a stale version."""
+        job = store.create_job("research", {})
+        store.start_job(job.id, pid=1)
+
+        with pytest.raises(UpdateConflictError):
+            store.update_job(job.id, expected_version=0, max_retries=1, status="cancelled")
+
+        updated = store.update_job(job.id, expected_version=1, status="cancelled")
+        assert updated.status == JobStatus.CANCELLED
+
+    def test_outcome_keeps_concurrent_cancel(self, store):
+        """Should not overwrite a cancel that landed after the version was read."""
+        job = store.start_job(store.create_job("research", {}).id, pid=1)
+        store.cancel_job(job.id)
+
+        assert store.complete_job(job.id, expected_version=job.version) is None
+        assert store.fail_job(job.id, "boom", expected_version=job.version) is None
+        assert store.get_job(job.id).status == JobStatus.CANCELLED
+
+    def test_outcome_retries_over_other_changes(self, store):
+        """Should still record the outcome when a running job only changed otherwise."""
+        job = store.start_job(store.create_job("research", {}).id, pid=1)
+        store.update_job(job.id, result={"progress": {"percent": 50}})
+
+        done = store.complete_job(job.id, result={"ok": True}, expected_version=job.version)
+
+        assert done.status == JobStatus.COMPLETED
+        assert done.result == {"ok": True}
+
+    def test_update_missing_job(self, store):
+        """Should raise ValueError for unknown jobs."""
+        with pytest.raises(ValueError, match="not found"):
+            store.update_job("550e8400-e29b-41d4-a716-446655440000", status="running")
+
+    def test_heartbeat_does_not_bump_version(self, store):
+        """Should treat heartbeats as liveness only."""
+        job = store.start_job(store.create_job("research", {}).id, pid=1)
+
+        store.heartbeat(job.id)
+        store.heartbeat_many([job.id])
+
+        assert store.get_job(job.id).version == job.version
+
+    def test_cancel_all_pending(self, store):
+        """Should cancel every pending job and report the count."""
+        store.create_jobs([{"job_type": "research", "payload": {}} for _ in range(3)])
+
+        assert store.cancel_all_pending("test") == 3
+        assert store.count_jobs("cancelled") == 3
+
+
+class TestClaimJobs:
+    """Tests for atomic claiming."""
+
+    def test_claim_oldest_for_agent(self, store):
+        """Should claim the oldest pending jobs for the requested agent."""
+        first = store.create_job("research", {}, assigned_to="researcher")
+        store.create_job("research", {}, assigned_to="cro")
+        second = store.create_job("research", {}, assigned_to="researcher")
+
+        claimed = store.claim_jobs("worker-1", assigned_to="researcher", limit=5)
+
+        assert [j.id for j in claimed] == [first.id, second.id]
+        assert all(j.status == JobStatus.RUNNING for j in claimed)
+        assert all(j.worker_id == "worker-1" for j in claimed)
+        assert store.claim_jobs("worker-2", assigned_to="researcher") == []
+
+    def test_requeue_running_job(self, store):
+        """Should put a running job back to pending and leave finished jobs alone."""
+        job = store.create_job("research", {})
+        store.claim_jobs("worker-1")
+        store.start_job(job.id, 4321)
+
+        requeued = store.requeue_job(job.id)
+
+        assert requeued.status == JobStatus.PENDING
+        assert requeued.pid is None and requeued.worker_id is None and requeued.started_at is None
+        assert store.claim_jobs("worker-2")[0].id == job.id
+
+        store.complete_job(job.id)
+        assert store.requeue_job(job.id) is None
+        assert store.get_job(job.id).status == JobStatus.COMPLETED
+
+    def test_concurrent_claims_never_overlap(self, tmp_path):
+        """Should hand each job to exactly one of several racing workers."""
+        path = str(tmp_path / "race.db")
+        seed = JobStore(backend=SqliteBackend(path), job_types=JobTypeRegistry())
+        seed.create_jobs([{"job_type": "research", "payload": {"n": i}} for i in range(40)])
+
+        claimed = []
+        lock = threading.Lock()
+
+        def worker(name):
+            store = JobStore(backend=SqliteBackend(path))
+            while True:
+                jobs = store.claim_jobs(name, limit=3)
+                if not jobs:
+                    break
+                with lock:
+                    claimed.extend(j.id for j in jobs)
+            store.backend.close()
+
+        threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(claimed) == 40
+        assert len(set(claimed)) == 40
+        seed.backend.close()
+
+
+class TestQueries:
+    """Tests for hung detection, job trees and listings."""
+
+    def test_detect_hung_jobs(self, store):
+        """Should report running jobs whose heartbeat is stale or missing."""
+        stale = store.create_job("research", {})
+        store.update_job(stale.id, status="running", last_heartbeat="2000-01-01T00:00:00+00:00")
+        fresh = store.start_job(store.create_job("research", {}).id, pid=1)
+
+        hung = store.get_hung_jobs(timeout_seconds=60)
+
+        assert [j.id for j in hung] == [stale.id]
+        assert fresh.id not in [j.id for j in hung]
+
+    def test_job_tree(self, store):
+        """Should return a job and all of its descendants."""
+        root = store.create_job("research", {})
+        child = store.create_job("delegate", {}, parent_id=root.id)
+        grandchild = store.create_job("delegate", {}, parent_id=child.id)
+        store.create_job("research", {})
+
+        tree = store.get_job_tree(root.short_id)
+
+        assert {j.id for j in tree} == {root.id, child.id, grandchild.id}
+
+    def test_finished_jobs_and_timings(self, store):
+        """Should list finished jobs newest first and expose their timings."""
+        a = store.create_job("research", {}, assigned_to="researcher")
+        b = store.create_job("research", {}, assigned_to="researcher")
+        store.start_job(a.id, pid=1)
+        store.complete_job(a.id)
+        store.start_job(b.id, pid=2)
+        store.fail_job(b.id, "boom")
+
+        finished = store.get_finished_jobs(["completed", "failed"])
+        assert [j.id for j in finished] == [b.id, a.id]
+        assert [j.id for j in store.get_finished_jobs(["failed"])] == [b.id]
+
+        timings = list(store.iter_finished_job_timings("2000-01-01T00:00:00+00:00", assigned_to="researcher"))
+        assert {t["status"] for t in timings} == {"completed", "failed"}
+
+
+class TestKeysetIterators:
+    """Tests for keyset-paginated iterators."""
+
+    def test_iter_jobs_pages_through_everything(self, store):
+        """Should yield every job exactly once, oldest first, across pages."""
+        created = store.create_jobs([{"job_type": "research", "payload": {"n": i}} for i in range(7)])
+        # Same created_at for all rows in the batch exercises the id tiebreaker
+        expected = sorted(created, key=lambda j: (j.created_at, j.id))
+
+        jobs = list(store.iter_jobs(page_size=3))
+
+        assert [j.id for j in jobs] == [j.id for j in expected]
+
+    def test_iter_jobs_filters_and_summary(self, store):
+        """Should apply filters and optionally yield summaries."""
+        store.create_job("research", {"big": "x" * 1000})
+        store.create_job("meeting_extract", {})
+
+        summaries = list(store.iter_jobs([("job_type", "eq", "research")], page_size=1, summary=True))
+
+        assert len(summaries) == 1
+        assert not hasattr(summaries[0], "payload")
+
+    def test_iter_jobs_is_lazy(self, store, backend):
+        """Should fetch one page at a time as the consumer advances."""
+        store.create_jobs([{"job_type": "research", "payload": {}} for _ in range(10)])
+        calls = []
+        original = backend.select_page
+
+        def counting(*args, **kwargs):
+            calls.append(kwargs.get("after"))
+            return original(*args, **kwargs)
+
+        backend.select_page = counting
+        iterator = store.iter_jobs(page_size=4)
+        next(iterator)
+        assert len(calls) == 1
+
+        rest = list(iterator)
+        assert len(rest) == 9
+        assert len(calls) == 3
+
+    def test_iter_logs_and_events(self, store):
+        """Should stream logs for a job and events by type."""
+        job = store.create_job("research", {})
+        store.log_batch(job.id, [f"line {i}" for i in range(5)])
+        for i in range(5):
+            store.publish_event("job.progress", job.short_id, data={"i": i})
+
+        logs = list(store.iter_logs(job.short_id, page_size=2))
+        events = list(store.iter_events(event_type="job.progress", page_size=2))
+
+        assert [entry["message"] for entry in logs] == [f"line {i}" for i in range(5)]
+        assert sorted(e["data"]["i"] for e in events) == list(range(5))
+        assert list(store.iter_logs("nope1234")) == []
+
+    def test_iter_tracked_notes(self, backend):
+        """Should page through note states in path order."""
+        notes = NoteStateStore(backend=backend)
+        for day in range(5):
+            notes.save_state(f"daily/2025-01-0{day + 1}.md", str(day), {})
+
+        paths = [n["note_path"] for n in notes.iter_tracked_notes(page_size=2)]
+
+        assert paths == [f"daily/2025-01-0{day + 1}.md" for day in range(5)]
+
+    def test_export_jobs_as_jsonl(self, store):
+        """Should stream filtered jobs as JSON Lines."""
+        store.create_jobs([{"job_type": "research", "payload": {"n": i}} for i in range(3)])
+        store.create_job("meeting_extract", {})
+
+        out = io.StringIO()
+        count = write_jsonl(iter_export_records(store, "jobs", job_type="research", page_size=2), out)
+
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert count == 3
+        assert {r["payload"]["n"] for r in records} == {0, 1, 2}
+        assert all(r["status"] == "pending" for r in records)
+
+    def test_export_rejects_unknown_kind(self, store):
+        """Should raise ValueError for an unknown export kind."""
+        with pytest.raises(ValueError):
+            list(iter_export_records(store, "notes"))
+
+
+class TestLogsAndEvents:
+    """Tests for job logs and the event queue."""
+
+    def test_logs_newest_first_and_refresh_heartbeat(self, store):
+        """Should store logs and count them as heartbeats for running jobs."""
+        job = store.create_job("research", {})
+        store.update_job(job.id, status="running", last_heartbeat="2000-01-01T00:00:00+00:00")
+
+        store.log(job.short_id, "info", "first")
+        store.log_batch(job.id, ["second", "third"])
+
+        logs = store.get_logs(job.id)
+        assert [entry["message"] for entry in logs][0] in ("second", "third")
+        assert len(logs) == 3
+        assert logs[-1]["message"] == "first"
+        assert store.get_job(job.id).last_heartbeat > "2000-01-01T00:00:00+00:00"
+
+    def test_metrics_newest_first(self, store):
+        """Should store metric rows and return the newest first."""
+        job = store.create_job("research", {})
+        store.record_metrics([
+            {"job_id": job.id, "sampled_at": "2026-10-17T10:00:00+00:00", "samples": 12,
+             "cpu_percent": 20.5, "cpu_percent_max": 80.0, "rss_bytes": 1000,
+             "io_read_bytes": 10, "io_write_bytes": 20, "children": 1},
+            {"job_id": job.id, "sampled_at": "2026-10-17T10:01:00+00:00", "samples": 12,
+             "cpu_percent": 5.0, "cpu_percent_max": 9.0, "rss_bytes": 2000,
+             "io_read_bytes": 30, "io_write_bytes": 40, "children": 2},
+        ])
+
+        rows = store.get_metrics(job.short_id)
+        assert [r["rss_bytes"] for r in rows] == [2000, 1000]
+        assert store.get_metrics(job.id, limit=1)[0]["children"] == 2
+
+    def test_fail_job_keeps_result_unless_given(self, store):
+        """Should leave a stored result alone when failing without one."""
+        job = store.create_job("research", {})
+        store.update_job(job.id, result={"progress": {"percent": 50}})
+
+        failed = store.fail_job(job.id, "boom")
+        assert failed.result == {"progress": {"percent": 50}}
+
+        failed = store.fail_job(job.id, "boom", result={"resources": {"samples": 3}})
+        assert failed.result == {"resources": {"samples": 3}}
+
+    def test_event_queue_visibility(self, store):
+        """Should hide read events until deleted or the timeout passes."""
+        store.publish_event("job.started", "abc12345", data={"pid": 1})
+        store.publish_event("job.completed", "abc12345")
+
+        events = store.read_events(qty=10, visibility_timeout=30)
+        assert [e["message"]["type"] for e in events] == ["job.started", "job.completed"]
+        assert store.read_events(qty=10) == []
+
+        assert store.delete_event(events[0]["msg_id"]) is True
+        assert store.delete_event(events[0]["msg_id"]) is False
+
+        audit = store.get_events(job_id="abc12345", event_type="job.started")
+        assert len(audit) == 1
+        assert audit[0]["data"] == {"pid": 1}
+
+
+class TestNoteState:
+    """Tests for NoteStateStore on SQLite."""
+
+    def test_save_and_detect_changes(self, backend):
+        """Should store hashes and detect content changes."""
+        notes = NoteStateStore(backend=backend)
+
+        assert notes.has_changed("daily/2025-01-15.md", "hello") is True
+        notes.save_state("daily/2025-01-15.md", "hello", {"questions": ["q"]})
+
+        assert notes.has_changed("daily/2025-01-15.md", "hello") is False
+        assert notes.has_changed("daily/2025-01-15.md", "hello!") is True
+        assert notes.get_state("daily/2025-01-15.md")["parsed_data"] == {"questions": ["q"]}
+        assert len(notes.get_all_tracked_notes()) == 1
+
+        notes.delete_state("daily/2025-01-15.md")
+        assert notes.get_state("daily/2025-01-15.md") is None
+
+    def test_requires_client_or_backend(self):
+        """Should refuse to construct without storage."""
+        with pytest.raises(ValueError):
+            NoteStateStore()
@@ -0,0 +1,515 @@
+"""Tests for ProcessSupervisor and its use by ProcessManager."""
+
+import gzip
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from persona.core import supervisor as supervisor_module
+from persona.core.job_store import Job, JobStatus
+from persona.core.process_manager import ProcessManager
+from persona.core.supervisor import ProcessSupervisor
+
+
+def spawn(code: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-c", code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=0
+    )
+
+
+class Recorder:
+    """Collects supervisor callbacks and signals when children exit."""
+
+    def __init__(self, expected_exits: int = 1):
+        self.lines = []
+        self.exits = {}
+        self.done = threading.Event()
+        self.expected_exits = expected_exits
+
+    def on_output(self, key, stream, line):
+        self.lines.append((key, stream, line))
+
+    def on_exit(self, key, returncode):
+        self.exits[key] = (returncode, time.monotonic())
+        if len(self.exits) >= self.expected_exits:
+            self.done.set()
+
+
+@pytest.fixture
+def supervisor():
+    sup = ProcessSupervisor(workers=2)
+    sup.start()
+    yield sup
+    sup.stop(timeout=5)
+
+
+class TestProcessSupervisor:
+    """Tests for output multiplexing and exit detection."""
+
+    def test_reads_lines_and_reports_exit(self, supervisor):
+        """Should deliver every line, including an unterminated last one, then the exit code."""
+        rec = Recorder()
+        code = "import sys; print('one'); print('two', file=sys.stderr); sys.stdout.write('tail'); sys.exit(3)"
+        supervisor.watch("job1", spawn(code), rec.on_output, rec.on_exit)
+
+        assert rec.done.wait(5)
+        assert ("job1", "stdout", "one") in rec.lines
+        assert ("job1", "stderr", "two") in rec.lines
+        assert ("job1", "stdout", "tail") in rec.lines
+        assert rec.exits["job1"][0] == 3
+        assert supervisor.watched() == []
+
+    def test_exit_reported_promptly(self, supervisor):
+        """Should report an exit immediately rather than on a polling interval."""
+        rec = Recorder()
+        started = time.monotonic()
+        supervisor.watch("job1", spawn("import time; time.sleep(0.3)"), on_exit=rec.on_exit)
+
+        assert rec.done.wait(5)
+        assert rec.exits["job1"][1] - started < 1.0
+
+    def test_fixed_thread_count(self, supervisor):
+        """Should not start threads per child."""
+        rec = Recorder(expected_exits=20)
+        before = threading.active_count()
+
+        for i in range(20):
+            supervisor.watch(f"job{i}", spawn("import time; print('hi'); time.sleep(0.3)"), rec.on_output, rec.on_exit)
+        during = threading.active_count()
+
+        assert rec.done.wait(10)
+        assert during - before <= 0
+        assert len(rec.lines) == 20
+
+    def test_polling_fallback_without_pidfd(self, monkeypatch, supervisor):
+        """Should still detect exits where pidfd_open is unavailable."""
+        monkeypatch.setattr(supervisor_module, "_PIDFD_SUPPORTED", False)
+        rec = Recorder()
+        supervisor.watch("job1", spawn("import sys; sys.exit(5)"), on_exit=rec.on_exit)
+
+        assert rec.done.wait(5)
+        assert rec.exits["job1"][0] == 5
+
+    def test_submit_runs_in_order_per_key(self, supervisor):
+        """Should run tasks for the same key sequentially and in order."""
+        seen = []
+        finished = threading.Event()
+
+        def task(n):
+            time.sleep(0.001 * (5 - n % 5))
+            seen.append(n)
+            if n == 19:
+                finished.set()
+
+        for n in range(20):
+            supervisor.submit("job1", task, n)
+
+        assert finished.wait(5)
+        assert seen == list(range(20))
+
+    def test_timers_run_on_loop(self, supervisor):
+        """Should run registered timers periodically."""
+        ticks = []
+        fired = threading.Event()
+
+        def tick():
+            ticks.append(threading.current_thread().name)
+            if len(ticks) >= 2:
+                fired.set()
+
+        supervisor.every(0.05, tick)
+
+        assert fired.wait(5)
+        assert set(ticks) == {"persona-supervisor"}
+
+    def test_call_later_runs_in_order_and_cancels(self, supervisor):
+        """Should run one-shot callbacks by due time and skip cancelled ones."""
+        seen = []
+        done = threading.Event()
+
+        supervisor.call_later(0.1, seen.append, "late")
+        handle = supervisor.call_later(0.05, seen.append, "cancelled")
+        supervisor.call_later(0.02, seen.append, "early")
+        supervisor.call_later(0.15, done.set)
+        supervisor.cancel(handle)
+
+        assert done.wait(5)
+        assert seen == ["early", "late"]
+
+
+class TestProcessManagerStreaming:
+    """Tests for ProcessManager output streaming through the supervisor."""
+
+    def test_streams_logs_and_completes(self, tmp_path, monkeypatch):
+        """Should write local logs, batch them to the store and complete the job."""
+        monkeypatch.setenv("LOG_BATCH_SIZE", "2")
+        store = MagicMock()
+        completed = threading.Event()
+        store.complete_job.side_effect = lambda *args, **kwargs: completed.set()
+
+        job = Job(
+            id="550e8400-e29b-41d4-a716-446655440000",
+            short_id="abc12345",
+            job_type="research",
+            payload={},
+            status=JobStatus.RUNNING
+        )
+        store.get_job.return_value = job
+
+        manager = ProcessManager(store, tmp_path)
+        monkeypatch.setattr(
+            manager, "_build_command",
+            lambda job: [sys.executable, "-c", "for i in range(3): print(f'line {i}')\nprint('PERSONA_COMPLETE')"]
+        )
+
+        manager.start_agent(job)
+
+        assert completed.wait(5)
+        manager.supervisor.stop(timeout=5)
+        manager.heartbeats.stop()
+        manager.log_shipper.stop(timeout=5)
+        manager.log_writer.shutdown()
+
+        batches = [c.args[1] for c in store.log_batch.call_args_list]
+        assert [line for batch in batches for line in batch] == ["line 0", "line 1", "line 2", "PERSONA_COMPLETE"]
+        with gzip.open(tmp_path / "abc12345.log.gz", "rt") as f:
+            assert "line 2" in f.read()
+        assert not (tmp_path / "abc12345.log").exists()
+        assert job.id not in manager._processes
+
+    def test_error_marker_detected_while_streaming(self, tmp_path, monkeypatch):
+        """Should fail the job with the error message seen in streamed stdout."""
+        store = MagicMock()
+        failed = threading.Event()
+        store.fail_job.side_effect = lambda *args, **kwargs: failed.set()
+
+        job = Job(
+            id="550e8400-e29b-41d4-a716-446655440001",
+            short_id="def67890",
+            job_type="research",
+            payload={},
+            status=JobStatus.RUNNING
+        )
+        store.get_job.return_value = job
+
+        manager = ProcessManager(store, tmp_path)
+        monkeypatch.setattr(
+            manager, "_build_command",
+            lambda job: [sys.executable, "-c", "import sys; print('noise', file=sys.stderr); print('PERSONA_ERROR: quota exceeded')"]
+        )
+
+        manager.start_agent(job)
+
+        assert failed.wait(5)
+        manager.supervisor.stop(timeout=5)
+        manager.heartbeats.stop()
+        manager.log_shipper.stop(timeout=5)
+
+        store.fail_job.assert_called_once_with(job.id, "quota exceeded", 0, result=None, expected_version=0)
+        assert manager.get_markers(job.id) is None
+
+    def test_control_messages_decide_outcome(self, tmp_path, monkeypatch):
+        """Should complete from control messages despite a quoted legacy marker."""
+        store = MagicMock()
+
+        job = Job(
+            id="550e8400-e29b-41d4-a716-446655440002",
+            short_id="aaa11111",
+            job_type="research",
+            payload={},
+            status=JobStatus.RUNNING,
+            assigned_to="assistant"
+        )
+        store.get_job.return_value = job
+
+        script = "\n".join([
+            "print('The report mentions PERSONA_ERROR in passing')",
+            "print('PERSONA_MSG {\"type\": \"artifact\", \"path\": \"notes.md\"}')",
+            "print('PERSONA_MSG {\"type\": \"delegate\", \"agent\": \"researcher\", \"task\": \"dig\"}')",
+            "print('PERSONA_MSG {\"type\": \"delegate\", \"agent\": \"director\", \"task\": \"review\"}')",
+            "print('PERSONA_MSG {\"type\": \"complete\"}')",
+        ])
+        manager = ProcessManager(store, tmp_path)
+        monkeypatch.setattr(manager, "_build_command", lambda job: [sys.executable, "-c", script])
+        exited = threading.Event()
+        manager.on_job_exit = lambda job_id: exited.set()
+
+        manager.start_agent(job)
+
+        assert exited.wait(5)
+        manager.supervisor.stop(timeout=5)
+        manager.heartbeats.stop()
+        manager.log_shipper.stop(timeout=5)
+
+        store.fail_job.assert_not_called()
+        store.complete_job.assert_called_once_with(job.id, result={"artifacts": ["notes.md"]}, expected_version=0)
+        specs = store.create_jobs.call_args.args[0]
+        assert [(s["assigned_to"], s["payload"]["task"]) for s in specs] == [("researcher", "dig"), ("director", "review")]
+        assert all(s["parent_id"] == job.id and s["delegated_by"] == "assistant" for s in specs)
+
+    def test_control_progress_is_flushed_periodically(self, tmp_path, monkeypatch):
+        """Should write progress to the result column while the job runs."""
+        monkeypatch.setenv("CONTROL_FLUSH_INTERVAL", "0.05")
+        store = MagicMock()
+        updated = threading.Event()
+        store.update_job.side_effect = lambda *args, **kwargs: "result" in kwargs and updated.set()
+
+        job = Job(
+            id="550e8400-e29b-41d4-a716-446655440003",
+            short_id="bbb22222",
+            job_type="research",
+            payload={},
+            status=JobStatus.RUNNING
+        )
+        store.get_job.return_value = job
+
+        script = "import time\nprint('PERSONA_MSG {\"type\": \"progress\", \"percent\": 10}', flush=True)\ntime.sleep(0.5)"
+        manager = ProcessManager(store, tmp_path)
+        monkeypatch.setattr(manager, "_build_command", lambda job: [sys.executable, "-c", script])
+
+        manager.start_agent(job)
+
+        assert updated.wait(5)
+        store.update_job.assert_called_with(job.id, result={"progress": {"percent": 10}})
+        manager.supervisor.stop(timeout=5)
+        manager.heartbeats.stop()
+        manager.log_shipper.stop(timeout=5)
+
+    def test_deadline_escalates_to_sigkill(self, tmp_path, monkeypatch):
+        """Should SIGTERM at the deadline, SIGKILL after the grace period and fail with 124."""
+        monkeypatch.setenv("JOB_KILL_GRACE", "0.2")
+        store = MagicMock()
+        failed = threading.Event()
+        store.fail_job.side_effect = lambda *args, **kwargs: failed.set()
+
+        job = Job(
+            id="550e8400-e29b-41d4-a716-446655440004",
+            short_id="ccc33333",
+            job_type="research",
+            payload={"timeout": 0.3},
+            status=JobStatus.RUNNING
+        )
+        store.get_job.return_value = job
+
+        script = "\n".join([
+            "import signal, time",
+            "signal.signal(signal.SIGTERM, signal.SIG_IGN)",
+            "print('ready', flush=True)",
+            "time.sleep(30)",
+        ])
+        manager = ProcessManager(store, tmp_path)
+        monkeypatch.setattr(manager, "_build_command", lambda job: [sys.executable, "-c", script])
+
+        started = time.monotonic()
+        manager.start_agent(job)
+
+        assert failed.wait(10)
+        elapsed = time.monotonic() - started
+        manager.supervisor.stop(timeout=5)
+        manager.heartbeats.stop()
+        manager.log_shipper.stop(timeout=5)
+
+        store.fail_job.assert_called_once_with(job.id, "Timed out after 0.3s", 124, result=None, expected_version=0)
+        messages = [c.args[2] for c in store.log.call_args_list]
+        assert "Timed out after 0.3s, sent SIGTERM" in messages
+        assert any("sent SIGKILL" in m for m in messages)
+        assert 0.5 <= elapsed < 5
+
+    def test_hand_off_requeues_running_job(self, tmp_path, monkeypatch):
+        """Should SIGTERM a handed-off job and requeue it instead of failing it."""
+        store = MagicMock()
+        requeued = threading.Event()
+        store.requeue_job.side_effect = lambda *args: requeued.set() or True
+
+        job = Job(
+            id="550e8400-e29b-41d4-a716-446655440005",
+            short_id="ddd44444",
+            job_type="research",
+            payload={},
+            status=JobStatus.RUNNING
+        )
+        store.get_job.return_value = job
+
+        script = "import time\nprint('ready', flush=True)\ntime.sleep(30)"
+        manager = ProcessManager(store, tmp_path)
+        monkeypatch.setattr(manager, "_build_command", lambda job: [sys.executable, "-c", script])
+        manager.start_agent(job)
+
+        assert manager.hand_off() == [job.id]
+
+        assert requeued.wait(10)
+        manager.supervisor.stop(timeout=5)
+        manager.heartbeats.stop()
+        manager.log_shipper.stop(timeout=5)
+
+        store.requeue_job.assert_called_once_with(job.id)
+        store.fail_job.assert_not_called()
+        store.complete_job.assert_not_called()
+        assert manager.in_flight() == 0
+
+    def test_kill_as_hung_keeps_status(self, tmp_path, monkeypatch):
+        """Should mark a job killed as hung and not fail it when the process exits."""
+        store = MagicMock()
+        job = Job(
+            id="550e8400-e29b-41d4-a716-446655440006",
+            short_id="eee55555",
+            job_type="research",
+            payload={},
+            status=JobStatus.RUNNING
+        )
+        store.get_job.return_value = job
+        store.mark_hung.side_effect = lambda *args: setattr(job, "status", JobStatus.HUNG) or job
+
+        script = "import time\nprint('ready', flush=True)\ntime.sleep(30)"
+        manager = ProcessManager(store, tmp_path)
+        monkeypatch.setattr(manager, "_build_command", lambda job: [sys.executable, "-c", script])
+        exited = threading.Event()
+        manager.on_job_exit = lambda job_id: exited.set()
+        job.pid = manager.start_agent(job)
+
+        assert manager.kill_job(job.id, force=True, hung_reason="No heartbeat for 300s")
+
+        assert exited.wait(10)
+        manager.supervisor.stop(timeout=5)
+        manager.heartbeats.stop()
+        manager.log_shipper.stop(timeout=5)
+
+        store.mark_hung.assert_called_once_with(job.id, "No heartbeat for 300s")
+        store.cancel_job.assert_not_called()
+        store.fail_job.assert_not_called()
+        store.complete_job.assert_not_called()
+
+    def test_invalid_delegations_are_skipped(self, tmp_path, monkeypatch):
+        """Should complete the job, create only valid delegations and free its slot."""
+        store = MagicMock()
+        job = Job(
+            id="550e8400-e29b-41d4-a716-446655440007",
+            short_id="fff66666",
+            job_type="research",
+            payload={},
+            status=JobStatus.RUNNING,
+            assigned_to="assistant"
+        )
+        store.get_job.return_value = job
+
+        manager = ProcessManager(store, tmp_path)
+        manager._delegate(job, [
+            {"agent": "researcher", "task": "dig", "context": {"not": "a string"}},
+            {"agent": "director", "task": "review"},
+        ], "tail")
+
+        specs = store.create_jobs.call_args.args[0]
+        assert [(s["assigned_to"], s["payload"]) for s in specs] == [("director", {"task": "review", "context": "tail"})]
+        assert "Ignored delegation to researcher" in store.log.call_args.args[2]
+
+        script = "\n".join([
+            "print('PERSONA_DELEGATE: researcher:')",
+            "print('PERSONA_MSG {\"type\": \"delegate\", \"agent\": \"researcher\", \"task\": 7}')",
+        ])
+        store.create_jobs.reset_mock()
+        monkeypatch.setattr(manager, "_build_command", lambda job: [sys.executable, "-c", script])
+        exited = threading.Event()
+        manager.on_job_exit = lambda job_id: exited.set()
+        manager.start_agent(job)
+
+        assert exited.wait(5)
+        manager.supervisor.stop(timeout=5)
+        manager.heartbeats.stop()
+        manager.log_shipper.stop(timeout=5)
+
+        store.create_jobs.assert_not_called()
+        store.complete_job.assert_called_once_with(job.id, result=None, expected_version=0)
+        assert manager.in_flight() == 0
+        assert not manager.running_classes()
+
+    def test_failed_outcome_write_frees_slot(self, tmp_path, monkeypatch):
+        """Should release the job's slot when recording its outcome raises."""
+        store = MagicMock()
+        store.complete_job.side_effect = ConnectionError("database unreachable")
+        job = Job(
+            id="550e8400-e29b-41d4-a716-446655440008",
+            short_id="ggg77777",
+            job_type="research",
+            payload={},
+            status=JobStatus.RUNNING
+        )
+        store.get_job.return_value = job
+
+        manager = ProcessManager(store, tmp_path)
+        monkeypatch.setattr(manager, "_build_command", lambda job: [sys.executable, "-c", "print('PERSONA_COMPLETE')"])
+        exited = threading.Event()
+        manager.on_job_exit = lambda job_id: exited.set()
+        manager.start_agent(job)
+
+        assert exited.wait(5)
+        manager.supervisor.stop(timeout=5)
+        manager.heartbeats.stop()
+        manager.log_shipper.stop(timeout=5)
+
+        assert manager.in_flight() == 0
+        assert not manager.running_classes()
+
+    def test_failed_start_write_kills_agent(self, tmp_path, monkeypatch):
+        """Should kill the agent and release its slot when storing the PID fails."""
+        store = MagicMock()
+        store.update_job.side_effect = ConnectionError("database unreachable")
+        job = Job(
+            id="550e8400-e29b-41d4-a716-446655440009",
+            short_id="hhh88888",
+            job_type="research",
+            payload={},
+            status=JobStatus.RUNNING
+        )
+
+        manager = ProcessManager(store, tmp_path)
+        spawned = []
+        spawn = manager._spawn
+        monkeypatch.setattr(manager, "_spawn", lambda *args: spawned.append(spawn(*args)) or spawned[-1])
+        monkeypatch.setattr(manager, "_build_command", lambda job: [sys.executable, "-c", "import time; time.sleep(30)"])
+
+        with pytest.raises(ConnectionError):
+            manager.start_agent(job)
+
+        assert spawned[0].returncode is not None
+        assert manager.in_flight() == 0
+        assert not manager.running_classes()
+
+    def test_outcome_recorded_meanwhile_is_kept(self, tmp_path, monkeypatch):
+        """Should not log completion or delegate when the job was cancelled before its exit was recorded."""
+        store = MagicMock()
+        store.complete_job.return_value = None
+        job = Job(
+            id="550e8400-e29b-41d4-a716-446655440010",
+            short_id="iii99999",
+            job_type="research",
+            payload={},
+            status=JobStatus.RUNNING,
+            version=3
+        )
+        store.get_job.return_value = job
+
+        script = "\n".join([
+            "print('PERSONA_MSG {\"type\": \"delegate\", \"agent\": \"researcher\", \"task\": \"dig\"}')",
+            "print('PERSONA_MSG {\"type\": \"complete\"}')",
+        ])
+        manager = ProcessManager(store, tmp_path)
+        monkeypatch.setattr(manager, "_build_command", lambda job: [sys.executable, "-c", script])
+        exited = threading.Event()
+        manager.on_job_exit = lambda job_id: exited.set()
+        manager.start_agent(job)
+
+        assert exited.wait(5)
+        manager.supervisor.stop(timeout=5)
+        manager.heartbeats.stop()
+        manager.log_shipper.stop(timeout=5)
+
+        store.complete_job.assert_called_once_with(job.id, result=None, expected_version=3)
+        store.create_jobs.assert_not_called()
+        assert "Job completed successfully" not in [c.args[2] for c in store.log.call_args_list]
@@ -0,0 +1,45 @@
+"""Tests for job timeout resolution."""
+
+import pytest
+
+from persona.core.job_store import Job, JobStatus
+from persona.core.timeouts import resolve_timeout
+
+
+def make_job(job_type="agent_action", payload=None, assigned_to=None):
+    return Job(
+        id="550e8400-e29b-41d4-a716-446655440000",
+        short_id="abc12345",
+        job_type=job_type,
+        payload=payload or {},
+        status=JobStatus.PENDING,
+        assigned_to=assigned_to
+    )
+
+
+class TestResolveTimeout:
+    """Tests for payload, job type, agent and global defaults."""
+
+    def test_payload_wins(self):
+        """Should prefer an explicit payload timeout."""
+        assert resolve_timeout(make_job("research", {"timeout": 45}, "researcher")) == 45
+
+    def test_job_type_default(self):
+        """Should use the job type table before the agent table."""
+        assert resolve_timeout(make_job("meeting_extract", assigned_to="researcher")) == 600
+
+    def test_agent_default(self):
+        """Should use the assigned agent, or the payload agent for agent_action."""
+        assert resolve_timeout(make_job("delegate", assigned_to="ceo")) == 900
+        assert resolve_timeout(make_job("agent_action", {"agent": "director"})) == 300
+
+    def test_global_default(self, monkeypatch):
+        """Should fall back to JOB_DEFAULT_TIMEOUT."""
+        monkeypatch.setenv("JOB_DEFAULT_TIMEOUT", "42")
+        assert resolve_timeout(make_job("custom", assigned_to="intern")) == 42
+
+    @pytest.mark.parametrize("value", [0, -5, "soon"])
+    def test_invalid_payload_timeout(self, value):
+        """Should reject timeouts that are not positive numbers."""
+        with pytest.raises(ValueError):
+            resolve_timeout(make_job(payload={"timeout": value}))
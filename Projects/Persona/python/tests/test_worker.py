@@ -0,0 +1,356 @@
+"""Tests for the worker loop, job notifications and worker metrics."""
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from realtime import RealtimeSubscribeStates
+
+from persona.core import limits
+from persona.core.job_store import Job, JobStatus
+from persona.core.job_listener import JobListener
+from persona.core.stats import LatencyStats
+from persona.worker import Worker
+from persona.worker_pool import WorkerPool
+
+
+@pytest.fixture
+def worker(tmp_path, monkeypatch):
+    """Worker on a SQLite database with agent starts stubbed out."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("PERSONA_BACKEND", "sqlite")
+    monkeypatch.setenv("PERSONA_SQLITE_PATH", str(tmp_path / "persona.db"))
+    handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    worker = Worker(concurrency=2, poll_interval=30, worker_id="w1")
+    worker.process_manager.start_agent = MagicMock()
+    yield worker
+    worker.running = False
+    worker._wake.set()
+    for sig, handler in handlers.items():
+        signal.signal(sig, handler)
+
+
+def run_in_thread(worker):
+    thread = threading.Thread(target=worker.run, daemon=True)
+    thread.start()
+    return thread
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestLatencyStats:
+    """Tests for rolling percentiles."""
+
+    def test_percentiles(self):
+        stats = LatencyStats(window=100)
+        for value in range(1, 101):
+            stats.record(value)
+        summary = stats.summary()
+        assert (summary["p50"], summary["p90"], summary["p99"], summary["max"]) == (50, 90, 99, 100)
+        assert summary["count"] == 100
+
+    def test_window_and_clamping(self):
+        stats = LatencyStats(window=2)
+        for value in (100, -1, 3):
+            stats.record(value)
+        assert stats.percentile(100) == 3
+        assert stats.percentile(0) == 0
+        assert stats.count == 3
+        assert LatencyStats().summary()["p50"] is None
+
+
+    def test_records_pickup_with_trimmed_fraction(self, worker):
+        """Should record pickups whose created_at has fewer than six fractional digits."""
+        created = (datetime.now(timezone.utc) - timedelta(seconds=5)).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-1] + "+00:00"
+        job = Job(id="a", short_id="a", job_type="research", payload={}, status=JobStatus.RUNNING, created_at=created)
+
+        worker._record_pickups([job])
+
+        assert worker.pickup_latency.count == 1
+        assert 4 < worker.pickup_latency.percentile(50) < 60
+
+
+class TestEventDrivenPickup:
+    """Tests for claiming on wake-ups instead of waiting for the poll."""
+
+    def test_notification_claims_immediately(self, worker):
+        """Should claim a new job as soon as it is notified, not after poll_interval."""
+        thread = run_in_thread(worker)
+        time.sleep(0.1)
+
+        job = worker.job_store.create_job("research", {"question": "q"})
+        worker._wake.set()
+
+        assert wait_for(lambda: worker.process_manager.start_agent.called)
+        assert worker.process_manager.start_agent.call_args.args[0].id == job.id
+        assert worker.stats()["pickup_latency"]["count"] == 1
+
+        worker.running = False
+        worker._wake.set()
+        thread.join(5)
+        assert not thread.is_alive()
+
+    def test_finished_job_wakes_worker(self, worker):
+        """Should re-check the queue when a running job finishes."""
+        thread = run_in_thread(worker)
+        time.sleep(0.1)
+        worker.job_store.create_job("research", {"question": "q"})
+
+        worker.process_manager.on_job_exit("some-job")
+
+        assert wait_for(lambda: worker.process_manager.start_agent.called)
+        worker.running = False
+        worker._wake.set()
+        thread.join(5)
+
+
+class TestJobListener:
+    """Tests for Realtime notification handling (no network)."""
+
+    def test_reports_pending_inserts(self):
+        seen = []
+        listener = JobListener("http://localhost", "key", on_job=seen.append)
+
+        listener._on_change({"data": {"record": {"id": "a", "status": "pending"}}})
+        listener._on_change({"data": {"record": {"id": "b", "status": "running"}}})
+
+        assert [row["id"] for row in seen] == ["a"]
+        assert listener.stats()["notifications"] == 1
+
+    def test_connection_state(self):
+        connected = []
+        listener = JobListener("http://localhost", "key", on_job=lambda row: None, on_connected=lambda: connected.append(1))
+
+        listener._on_state(RealtimeSubscribeStates.SUBSCRIBED)
+        assert listener.connected and connected == [1]
+
+        listener._on_state(RealtimeSubscribeStates.CHANNEL_ERROR, RuntimeError("boom"))
+        assert not listener.connected
+
+    def test_healthy_session_resets_backoff(self):
+        """Should reset the reconnect delay once a subscription succeeds."""
+        listener = JobListener("http://localhost", "key", on_job=lambda row: None)
+        listener._backoff = 32.0
+
+        listener._on_state(RealtimeSubscribeStates.SUBSCRIBED)
+        listener._on_state(RealtimeSubscribeStates.CLOSED)
+
+        assert listener._backoff == 1.0
+
+    def test_worker_imports_without_async_client(self):
+        """Should import the worker and fall back to polling on a supabase without acreate_client."""
+        script = "\n".join([
+            "import supabase",
+            "del supabase.acreate_client",
+            "from unittest.mock import MagicMock",
+            "from persona.worker import Worker",
+            "worker = Worker.__new__(Worker)",
+            "worker.job_store = MagicMock()",
+            "assert worker._create_listener() is None",
+        ])
+        env = {**os.environ, "SUPABASE_URL": "http://localhost", "SUPABASE_KEY": "key"}
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=env)
+
+        assert result.returncode == 0, result.stderr
+        assert "polling instead" in result.stdout
+
+
+class TestLocalCapacity:
+    """Tests for slot accounting and idle backoff."""
+
+    def test_jobs_on_other_workers_do_not_use_slots(self, worker):
+        """Should fill every slot even when other workers have jobs running."""
+        other = worker.job_store.create_job("research", {"question": "elsewhere"})
+        worker.job_store.claim_jobs("w2", limit=1)
+        for i in range(2):
+            worker.job_store.create_job("research", {"question": f"q{i}"})
+
+        worker._tick()
+
+        started = [c.args[0].id for c in worker.process_manager.start_agent.call_args_list]
+        assert len(started) == 2
+        assert other.id not in started
+
+    def test_in_flight_jobs_use_slots(self, worker):
+        """Should only claim for slots not taken by this worker's own agents."""
+        worker.process_manager._processes["running"] = MagicMock()
+        for i in range(2):
+            worker.job_store.create_job("research", {"question": f"q{i}"})
+
+        worker._tick()
+
+        assert worker.process_manager.start_agent.call_count == 1
+
+    def test_idle_backoff(self, worker):
+        """Should double the poll interval on an empty queue and reset after a claim."""
+        worker.max_poll_interval = 100
+        intervals = []
+        for _ in range(4):
+            worker._tick()
+            intervals.append(worker._poll_timeout())
+        assert intervals == [60, 100, 100, 100]
+
+        worker.job_store.create_job("research", {"question": "q"})
+        worker._tick()
+        assert worker._poll_timeout() == 30
+
+    def test_queue_wait_by_class(self, worker):
+        """Should report queue wait percentiles per concurrency class."""
+        worker.job_store.create_job("research", {"question": "q"})
+        worker.job_store.create_job("meeting_extract", {"meeting": {"title": "Standup"}})
+
+        worker._tick()
+
+        queue_wait = worker.stats()["queue_wait"]
+        assert set(queue_wait) == {"heavy", "interactive"}
+        assert queue_wait["heavy"]["count"] == 1
+
+
+class TestDrain:
+    """Tests for draining in-flight jobs on shutdown."""
+
+    def test_waits_for_jobs_to_finish(self, worker):
+        """Should not requeue jobs that finish within the drain timeout."""
+        worker.drain_timeout = 5
+        remaining = [1]
+        worker.process_manager.in_flight = lambda: remaining[0]
+        worker.process_manager.hand_off = MagicMock()
+
+        def finish():
+            time.sleep(0.1)
+            remaining[0] = 0
+            worker.process_manager.on_job_exit("job")
+
+        threading.Thread(target=finish).start()
+        started = time.monotonic()
+        worker.drain()
+
+        assert time.monotonic() - started < 2
+        worker.process_manager.hand_off.assert_not_called()
+
+    def test_hands_off_after_timeout(self, worker):
+        """Should hand unfinished jobs back to the queue once the drain times out."""
+        worker.drain_timeout = 0.1
+        remaining = [1]
+        worker.process_manager.in_flight = lambda: remaining[0]
+
+        def hand_off():
+            remaining[0] = 0
+            return ["job"]
+
+        worker.process_manager.hand_off = MagicMock(side_effect=hand_off)
+        worker.drain()
+
+        worker.process_manager.hand_off.assert_called_once()
+
+    def test_second_signal_skips_the_wait(self, worker):
+        """Should requeue at once when a second shutdown signal arrives."""
+        worker.drain_timeout = 60
+        remaining = [1]
+        worker.process_manager.in_flight = lambda: remaining[0]
+        worker.process_manager.hand_off = MagicMock(side_effect=lambda: remaining.__setitem__(0, 0) or ["job"])
+
+        worker._signal_handler(signal.SIGTERM, None)
+        threading.Timer(0.1, worker._signal_handler, args=(signal.SIGTERM, None)).start()
+        started = time.monotonic()
+        worker.drain()
+
+        assert time.monotonic() - started < 5
+        worker.process_manager.hand_off.assert_called_once()
+
+
+class TestWorkerPool:
+    """Tests for restarting crashed worker processes."""
+
+    def test_restarts_crashed_worker_with_backoff(self, monkeypatch):
+        pool = WorkerPool(2, drain_timeout=0)
+        started = []
+        monkeypatch.setattr(pool, "_start", started.append)
+        crashed = MagicMock(pid=123, exitcode=1)
+        crashed.is_alive.return_value = False
+        healthy = MagicMock()
+        healthy.is_alive.return_value = True
+        pool._workers = [crashed, healthy]
+        pool._started_at = [time.monotonic(), time.monotonic()]
+
+        pool._check()
+        assert started == []
+        assert pool._delays[0] == 2
+
+        pool._restart_at[0] = time.monotonic() - 1
+        pool._check()
+        assert started == [0]
+        assert pool.restarts == 1
+
+    def test_rejects_empty_pool(self):
+        with pytest.raises(ValueError):
+            WorkerPool(0)
+
+    def test_moves_out_of_delegated_cgroup(self, tmp_path, monkeypatch):
+        """Should leave the delegated cgroup so workers can enable controllers below it."""
+        service = tmp_path / "persona-worker.service"
+        service.mkdir()
+        (tmp_path / "cgroup.controllers").write_text("cpu io memory pids\n")
+        (service / "cgroup.controllers").write_text("cpu memory pids\n")
+        monkeypatch.setattr(limits, "_CGROUP_FS", tmp_path)
+        monkeypatch.setattr(limits, "_own_cgroup", lambda: "/persona-worker.service")
+        monkeypatch.delenv("PERSONA_CGROUP_ROOT", raising=False)
+
+        WorkerPool(2)._prepare_cgroups()
+
+        assert (service / "pool" / "cgroup.procs").read_text() == str(os.getpid())
+        assert (service / "cgroup.subtree_control").read_text() == "+cpu +memory"
+        assert os.environ["PERSONA_CGROUP_ROOT"] == str(service / "workers")
+        assert (service / "workers").is_dir()
+        monkeypatch.delenv("PERSONA_CGROUP_ROOT")
+
+    def test_keeps_configured_cgroup_root(self, monkeypatch):
+        monkeypatch.setenv("PERSONA_CGROUP_ROOT", "/sys/fs/cgroup/persona")
+        prepare = MagicMock()
+        monkeypatch.setattr(limits.CgroupManager, "prepare_pool", prepare)
+
+        WorkerPool(2)._prepare_cgroups()
+
+        prepare.assert_not_called()
+
+    def test_recover_kills_only_the_jobs_agents(self):
+        """Should kill an agent left by a dead worker but not a process that reused a job's PID."""
+        started = datetime.now(timezone.utc).isoformat()
+
+        def agent(job_id):
+            env = {**os.environ, "PERSONA_JOB_ID": job_id}
+            return subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"], env=env, start_new_session=True)
+
+        jobs = [
+            Job(id=f"job-{i}", short_id=f"job{i}", job_type="research", payload={},
+                status=JobStatus.RUNNING, started_at=started)
+            for i in range(2)
+        ]
+        own, reused = agent("job-0"), agent("another-job")
+        jobs[0].pid, jobs[1].pid = own.pid, reused.pid
+        pool = WorkerPool(1)
+        pool._job_store = MagicMock()
+        pool._job_store.get_running_jobs.return_value = jobs
+        try:
+            pool._recover(4321)
+
+            assert own.wait(5) == -signal.SIGKILL
+            assert reused.poll() is None
+            assert [c.args[0] for c in pool._job_store.requeue_job.call_args_list] == ["job-0", "job-1"]
+        finally:
+            reused.kill()
+            reused.wait()
+
@@ -0,0 +1,58 @@
+-- Migration: Atomic job claiming
+-- Description: Add worker ownership to jobs and a claim_jobs() function that
+--              hands out pending jobs with FOR UPDATE SKIP LOCKED
+-- Date: 2026-10-17
+
+-- ============================================================================
+-- STEP 1: Track which worker owns a running job
+-- ============================================================================
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS worker_id TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_jobs_worker_id ON jobs(worker_id);
+
+-- Pending jobs are always scanned oldest-first, optionally per agent
+CREATE INDEX IF NOT EXISTS idx_jobs_pending_created
+  ON jobs(assigned_to, created_at)
+  WHERE status = 'pending';
+
+-- ============================================================================
+-- STEP 2: Claim function
+-- ============================================================================
+-- Locks up to p_limit pending jobs, skipping rows another worker has already
+-- locked, flips them to running and returns them. Two workers calling this
+-- concurrently never receive the same job.
+CREATE OR REPLACE FUNCTION claim_jobs(
+  p_worker_id TEXT,
+  p_hostname TEXT,
+  p_agent TEXT DEFAULT NULL,
+  p_limit INTEGER DEFAULT 1
+) RETURNS SETOF jobs AS $$
+  WITH next_jobs AS (
+    SELECT id
+    FROM jobs
+    WHERE status = 'pending'
+      AND (p_agent IS NULL OR assigned_to = p_agent)
+    ORDER BY created_at
+    LIMIT GREATEST(p_limit, 0)
+    FOR UPDATE SKIP LOCKED
+  )
+  UPDATE jobs j
+  SET status = 'running',
+      worker_id = p_worker_id,
+      hostname = p_hostname,
+      started_at = NOW(),
+      last_heartbeat = NOW(),
+      updated_at = NOW()
+  FROM next_jobs
+  WHERE j.id = next_jobs.id
+  RETURNING j.*;
+$$ LANGUAGE sql;
+
+-- ============================================================================
+-- STEP 3: Grant permissions
+-- ============================================================================
+GRANT EXECUTE ON FUNCTION claim_jobs TO authenticated;
+GRANT EXECUTE ON FUNCTION claim_jobs TO service_role;
+
+COMMENT ON COLUMN jobs.worker_id IS 'Worker that claimed this job (hostname:pid)';
+COMMENT ON FUNCTION claim_jobs IS 'Atomically claim pending jobs for a worker using FOR UPDATE SKIP LOCKED';
@@ -0,0 +1,108 @@
+-- Migration: Versioned job transitions
+-- Description: Add an integer version to jobs and a transition_job() function
+--              that applies a compare-and-set patch in a single round trip
+-- Date: 2026-10-17
+
+-- ============================================================================
+-- STEP 1: Version column
+-- ============================================================================
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0;
+
+-- ============================================================================
+-- STEP 2: Bump the version on every state change
+-- ============================================================================
+-- Any update that changes more than the heartbeat increments the version, so
+-- direct table updates (claim_jobs, cancel_all_pending, ...) invalidate stale
+-- compare-and-set attempts too. Heartbeat-only updates never cause conflicts.
+CREATE OR REPLACE FUNCTION bump_job_version()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF (to_jsonb(NEW) - 'last_heartbeat' - 'updated_at' - 'version')
+     IS DISTINCT FROM
+     (to_jsonb(OLD) - 'last_heartbeat' - 'updated_at' - 'version') THEN
+    NEW.version := OLD.version + 1;
+    NEW.updated_at := NOW();
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bump_job_version ON jobs;
+CREATE TRIGGER bump_job_version
+  BEFORE UPDATE ON jobs
+  FOR EACH ROW
+  EXECUTE FUNCTION bump_job_version();
+
+-- ============================================================================
+-- STEP 3: Compare-and-set transition function
+-- ============================================================================
+-- Applies p_patch (a JSON object of column -> value) to the job and returns the
+-- new row. When p_expected_version is given the patch only applies if the row
+-- is still at that version; otherwise no row is returned and the caller can
+-- tell a conflict from a missing job with a follow-up read.
+--
+-- Only the columns named in the patch are written, and their new values are
+-- computed from the target row itself. If the row is updated concurrently,
+-- READ COMMITTED re-evaluates the SET list against the re-fetched row, so a
+-- patch never writes back stale values of columns it does not mention. Any
+-- column may be patched except id, short_id, created_at and version, the
+-- same rule as SqliteBackend.transition_job; other keys raise.
+CREATE OR REPLACE FUNCTION transition_job(
+  p_id UUID,
+  p_expected_version INTEGER DEFAULT NULL,
+  p_patch JSONB DEFAULT '{}'::jsonb
+) RETURNS SETOF jobs AS $$
+DECLARE
+  v_key TEXT;
+  v_columns TEXT;
+  v_values TEXT;
+BEGIN
+  SELECT k INTO v_key
+  FROM jsonb_object_keys(p_patch) k
+  WHERE k IN ('id', 'short_id', 'created_at', 'version')
+     OR NOT EXISTS (
+       SELECT 1 FROM pg_attribute a
+       WHERE a.attrelid = 'jobs'::regclass
+         AND a.attname = k
+         AND a.attnum > 0
+         AND NOT a.attisdropped
+     )
+  LIMIT 1;
+
+  IF v_key IS NOT NULL THEN
+    RAISE EXCEPTION 'Column % cannot be changed by a transition', v_key
+      USING ERRCODE = 'invalid_column_reference';
+  END IF;
+
+  SELECT string_agg(quote_ident(k), ', '), string_agg('r.' || quote_ident(k), ', ')
+  INTO v_columns, v_values
+  FROM jsonb_object_keys(p_patch) k;
+
+  IF v_columns IS NULL THEN
+    -- Empty patch: nothing to write, but still honour the version check
+    RETURN QUERY
+      SELECT * FROM jobs
+      WHERE id = p_id
+        AND (p_expected_version IS NULL OR version = p_expected_version);
+    RETURN;
+  END IF;
+
+  RETURN QUERY EXECUTE format(
+    'UPDATE jobs j
+     SET (%s) = (SELECT %s FROM jsonb_populate_record(j, $3) r)
+     WHERE j.id = $1
+       AND ($2::integer IS NULL OR j.version = $2)
+     RETURNING j.*',
+    v_columns, v_values
+  ) USING p_id, p_expected_version, p_patch;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- STEP 4: Grant permissions
+-- ============================================================================
+GRANT EXECUTE ON FUNCTION transition_job TO authenticated;
+GRANT EXECUTE ON FUNCTION transition_job TO service_role;
+
+COMMENT ON COLUMN jobs.version IS 'Incremented on every state change; used for compare-and-set updates';
+COMMENT ON FUNCTION transition_job IS 'Apply a JSON patch to a job, optionally only if it is still at the expected version';
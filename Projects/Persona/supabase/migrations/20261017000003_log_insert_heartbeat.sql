@@ -0,0 +1,30 @@
+-- Migration: Log inserts count as heartbeats
+-- Description: Touch jobs.last_heartbeat whenever log lines are inserted, so
+--              jobs that are already shipping logs need no separate heartbeat
+-- Date: 2026-10-17
+
+-- ============================================================================
+-- STEP 1: Statement-level trigger on job_logs
+-- ============================================================================
+-- log_batch inserts many rows in one statement; the transition table lets us
+-- touch each affected job once per statement rather than once per line.
+-- Heartbeat-only updates do not bump jobs.version (see bump_job_version).
+CREATE OR REPLACE FUNCTION touch_job_heartbeat_from_logs()
+RETURNS TRIGGER AS $$
+BEGIN
+  UPDATE jobs
+  SET last_heartbeat = NOW()
+  WHERE id IN (SELECT DISTINCT job_id FROM new_logs)
+    AND status = 'running';
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS touch_job_heartbeat_from_logs ON job_logs;
+CREATE TRIGGER touch_job_heartbeat_from_logs
+  AFTER INSERT ON job_logs
+  REFERENCING NEW TABLE AS new_logs
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION touch_job_heartbeat_from_logs();
+
+COMMENT ON FUNCTION touch_job_heartbeat_from_logs IS 'Refresh last_heartbeat for running jobs that just wrote log lines';
@@ -0,0 +1,27 @@
+-- Migration: Per-job resource metrics
+-- Description: Store downsampled CPU, memory and IO samples taken by each
+--              worker's resource sampler
+-- Date: 2026-10-17
+
+-- ============================================================================
+-- STEP 1: Metrics table
+-- ============================================================================
+-- One row per job per sampling window. cpu_percent is the window average
+-- and cpu_percent_max its peak; rss_bytes and children are window peaks;
+-- IO counters are the process tree's totals at the end of the window.
+CREATE TABLE IF NOT EXISTS job_metrics (
+  id BIGSERIAL PRIMARY KEY,
+  job_id UUID REFERENCES jobs(id) ON DELETE CASCADE,
+  sampled_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  samples INTEGER NOT NULL DEFAULT 1,
+  cpu_percent REAL,
+  cpu_percent_max REAL,
+  rss_bytes BIGINT,
+  io_read_bytes BIGINT,
+  io_write_bytes BIGINT,
+  children INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_metrics_job ON job_metrics(job_id, sampled_at DESC);
+
+COMMENT ON TABLE job_metrics IS 'Downsampled resource usage per job, written by worker resource samplers';
@@ -0,0 +1,48 @@
+-- Migration: Skip job types when claiming
+-- Description: Let workers leave jobs of some types pending, e.g. when the
+--              job type's concurrency class is already at its limit
+-- Date: 2026-10-17
+
+-- ============================================================================
+-- STEP 1: Replace claim_jobs with a version that takes p_exclude_types
+-- ============================================================================
+-- The old four-argument function is dropped so named-argument RPC calls
+-- without p_exclude_types are not ambiguous.
+DROP FUNCTION IF EXISTS claim_jobs(TEXT, TEXT, TEXT, INTEGER);
+
+CREATE OR REPLACE FUNCTION claim_jobs(
+  p_worker_id TEXT,
+  p_hostname TEXT,
+  p_agent TEXT DEFAULT NULL,
+  p_limit INTEGER DEFAULT 1,
+  p_exclude_types TEXT[] DEFAULT NULL
+) RETURNS SETOF jobs AS $$
+  WITH next_jobs AS (
+    SELECT id
+    FROM jobs
+    WHERE status = 'pending'
+      AND (p_agent IS NULL OR assigned_to = p_agent)
+      AND (p_exclude_types IS NULL OR job_type <> ALL(p_exclude_types))
+    ORDER BY created_at
+    LIMIT GREATEST(p_limit, 0)
+    FOR UPDATE SKIP LOCKED
+  )
+  UPDATE jobs j
+  SET status = 'running',
+      worker_id = p_worker_id,
+      hostname = p_hostname,
+      started_at = NOW(),
+      last_heartbeat = NOW(),
+      updated_at = NOW()
+  FROM next_jobs
+  WHERE j.id = next_jobs.id
+  RETURNING j.*;
+$$ LANGUAGE sql;
+
+-- ============================================================================
+-- STEP 2: Grant permissions
+-- ============================================================================
+GRANT EXECUTE ON FUNCTION claim_jobs TO authenticated;
+GRANT EXECUTE ON FUNCTION claim_jobs TO service_role;
+
+COMMENT ON FUNCTION claim_jobs IS 'Atomically claim pending jobs for a worker using FOR UPDATE SKIP LOCKED, skipping p_exclude_types';
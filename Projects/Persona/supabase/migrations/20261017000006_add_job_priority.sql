@@ -0,0 +1,94 @@
+-- Migration: Job priority and weighted fair claiming
+-- Description: Add jobs.priority and make claim_jobs share workers across
+--              agents by weight instead of strictly oldest-first
+-- Date: 2026-10-17
+
+-- ============================================================================
+-- STEP 1: Priority column (higher runs first within an agent)
+-- ============================================================================
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS priority INTEGER NOT NULL DEFAULT 0;
+
+COMMENT ON COLUMN jobs.priority IS 'Queue priority within the assigned agent; higher is claimed first';
+
+-- ============================================================================
+-- STEP 2: Replace claim_jobs with a weighted fair version
+-- ============================================================================
+-- Each agent is a flow. A pending job's finish tag is the work its agent
+-- already has running plus the work queued ahead of it, divided by the
+-- agent's weight; the smallest tag is claimed first. A job counts as
+-- 1 / (job type weight) units of work. Within an agent, jobs are ordered by
+-- priority plus one per p_aging_seconds waited, then age. Weights default
+-- to 1 and a NULL p_aging_seconds disables aging.
+DROP FUNCTION IF EXISTS claim_jobs(TEXT, TEXT, TEXT, INTEGER, TEXT[]);
+
+CREATE OR REPLACE FUNCTION claim_jobs(
+  p_worker_id TEXT,
+  p_hostname TEXT,
+  p_agent TEXT DEFAULT NULL,
+  p_limit INTEGER DEFAULT 1,
+  p_exclude_types TEXT[] DEFAULT NULL,
+  p_agent_weights JSONB DEFAULT NULL,
+  p_type_weights JSONB DEFAULT NULL,
+  p_aging_seconds INTEGER DEFAULT NULL
+) RETURNS SETOF jobs AS $$
+  WITH running AS (
+    SELECT COALESCE(assigned_to, '') AS flow,
+           SUM(1.0 / COALESCE((p_type_weights ->> job_type)::NUMERIC, 1)) AS service
+    FROM jobs
+    WHERE status = 'running'
+    GROUP BY 1
+  ),
+  pending AS (
+    SELECT id,
+           COALESCE(assigned_to, '') AS flow,
+           created_at,
+           1.0 / COALESCE((p_type_weights ->> job_type)::NUMERIC, 1) AS cost,
+           priority + CASE WHEN p_aging_seconds > 0
+             THEN FLOOR(GREATEST(EXTRACT(EPOCH FROM NOW() - created_at), 0) / p_aging_seconds)::INTEGER
+             ELSE 0
+           END AS effective_priority
+    FROM jobs
+    WHERE status = 'pending'
+      AND (p_agent IS NULL OR assigned_to = p_agent)
+      AND (p_exclude_types IS NULL OR job_type <> ALL(p_exclude_types))
+  ),
+  ranked AS (
+    SELECT p.id,
+           p.created_at,
+           p.effective_priority,
+           (COALESCE(r.service, 0) + SUM(p.cost) OVER (
+              PARTITION BY p.flow
+              ORDER BY p.effective_priority DESC, p.created_at, p.id
+              ROWS UNBOUNDED PRECEDING
+           )) / COALESCE((p_agent_weights ->> p.flow)::NUMERIC, 1) AS finish
+    FROM pending p
+    LEFT JOIN running r ON r.flow = p.flow
+  ),
+  next_jobs AS (
+    SELECT j.id
+    FROM jobs j
+    JOIN ranked n ON n.id = j.id
+    WHERE j.status = 'pending'
+    ORDER BY n.finish, n.effective_priority DESC, n.created_at, n.id
+    LIMIT GREATEST(p_limit, 0)
+    FOR UPDATE OF j SKIP LOCKED
+  )
+  UPDATE jobs j
+  SET status = 'running',
+      worker_id = p_worker_id,
+      hostname = p_hostname,
+      started_at = NOW(),
+      last_heartbeat = NOW(),
+      updated_at = NOW()
+  FROM next_jobs
+  WHERE j.id = next_jobs.id
+  RETURNING j.*;
+$$ LANGUAGE sql;
+
+-- ============================================================================
+-- STEP 3: Grant permissions
+-- ============================================================================
+GRANT EXECUTE ON FUNCTION claim_jobs TO authenticated;
+GRANT EXECUTE ON FUNCTION claim_jobs TO service_role;
+
+COMMENT ON FUNCTION claim_jobs IS 'Atomically claim pending jobs for a worker using FOR UPDATE SKIP LOCKED, by weighted fair queueing across agents, then aged priority and age';
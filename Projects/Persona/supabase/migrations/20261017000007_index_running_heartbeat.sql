@@ -0,0 +1,13 @@
+-- Migration: Index running jobs by heartbeat
+-- Description: Every worker runs detect_hung_jobs() periodically to find the
+--              jobs of workers that have vanished; keep that a small index scan
+-- Date: 2026-10-17
+
+-- ============================================================================
+-- STEP 1: Partial index on running jobs
+-- ============================================================================
+-- detect_hung_jobs() filters on status = 'running' and last_heartbeat, so only
+-- running rows need to be indexed; the NULL heartbeat case is in the index too.
+CREATE INDEX IF NOT EXISTS idx_jobs_running_heartbeat
+  ON jobs(last_heartbeat)
+  WHERE status = 'running';